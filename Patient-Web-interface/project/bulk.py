@@ -0,0 +1,325 @@
+"""
+Bulk patient import and export.
+
+Import streams a CSV or JSONL file, validates every row with the same rules
+as the signup form (signup.Signup) and inserts valid rows in batched
+transactions through SQLAlchemy's executemany path. NIDs that already exist
+(or repeat in the file) are reported as duplicates and skipped; they don't
+abort the batch. Export pages through the table by NID, so memory stays
+flat whatever the table size.
+
+Columns: NID, username, email, password, Fname, Lname, BD (YYYY-MM-DD).
+Re_password defaults to password.
+
+Usage:
+    python3 bulk.py import patients.csv [--batch-size 1000] [--workers 4]
+    python3 bulk.py export --format jsonl > patients.jsonl
+
+    curl -H "Authorization: Bearer $PATIENT_API_TOKEN" -H "Content-Type: text/csv" \\
+         --data-binary @patients.csv http://localhost:8000/api/patients/import
+    curl -H "Authorization: Bearer $PATIENT_API_TOKEN" \\
+         "http://localhost:8000/api/patients/export?format=csv"
+"""
+import argparse
+import csv
+import hmac
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import MultiDict
+
+from signup import Signup
+
+EXPORT_FIELDS = ('NID', 'username', 'email', 'Fname', 'Lname', 'BD')
+REPORT_LIMIT = 100      # duplicates / errors listed in the report
+CHUNK_ROWS = 500        # rows per validation task
+EXPORT_PAGE = 1000
+MAX_IN_PARAMS = 500     # NIDs per IN (...) lookup; SQLite < 3.32 allows 999 variables
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict or None) from a text stream"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_no, row if isinstance(row, dict) else None
+
+
+def detect_format(name='', content_type=''):
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    return 'jsonl'
+
+
+_validator = None
+
+
+def validate_chunk(chunk):
+    """[(line, row)] -> [(line, record or None, errors or None)]
+
+    Runs in pool workers, so it builds its own form and app context rather
+    than importing the web app.
+    """
+    global _validator
+    if _validator is None:
+        _validator = Flask('bulk-validate')
+    results = []
+    with _validator.app_context():
+        form = Signup(formdata=None, meta={'csrf': False})
+        for line, row in chunk:
+            if row is None:
+                results.append((line, None, {'row': ['not a JSON object']}))
+                continue
+            data = {k: '' if v is None else str(v) for k, v in row.items() if k}
+            if 'email' not in data and 'mail' in data:
+                data['email'] = data['mail']
+            data.setdefault('Re_password', data.get('password', ''))
+            form.process(MultiDict(data))
+            if not form.validate():
+                results.append((line, None, form.errors))
+                continue
+            try:
+                nid = int(form.NID.data)
+            except ValueError:
+                results.append((line, None, {'NID': ['National ID must be a number']}))
+                continue
+            results.append((line, {
+                'NID': nid,
+                'username': form.username.data,
+                'password': form.password.data,
+                'mail': form.email.data,
+                'Fname': form.Fname.data,
+                'Lname': form.Lname.data,
+                'BD': form.BD.data.isoformat(),
+            }, None))
+    return results
+
+
+def _chunks(rows, size):
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validated(rows, workers=1):
+    """validate_chunk over a row stream, in order, with bounded look-ahead"""
+    if workers <= 1:
+        for chunk in _chunks(rows, CHUNK_ROWS):
+            yield from validate_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in _chunks(rows, CHUNK_ROWS):
+            pending.append(pool.submit(validate_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class PatientImporter:
+    def __init__(self, db, model, cache=None, batch_size=1000, workers=1):
+        self.db = db
+        self.model = model
+        self.cache = cache
+        self.batch_size = batch_size
+        self.workers = workers
+
+    def run(self, rows):
+        started = time.monotonic()
+        report = {
+            'rows': 0, 'inserted': 0, 'duplicates': 0, 'invalid': 0,
+            'duplicate_nids': [], 'errors': [],
+        }
+        batch = []
+        for line, record, errors in validated(rows, self.workers):
+            report['rows'] += 1
+            if errors:
+                report['invalid'] += 1
+                if len(report['errors']) < REPORT_LIMIT:
+                    report['errors'].append({'line': line, 'errors': errors})
+                continue
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                self._flush(batch, report)
+                batch = []
+        if batch:
+            self._flush(batch, report)
+        report['seconds'] = round(time.monotonic() - started, 3)
+        return report
+
+    def _flush(self, batch, report):
+        inserted, duplicates = self.insert_batch(batch)
+        report['inserted'] += len(inserted)
+        report['duplicates'] += len(duplicates)
+        room = REPORT_LIMIT - len(report['duplicate_nids'])
+        report['duplicate_nids'].extend(duplicates[:max(room, 0)])
+
+    def insert_batch(self, records):
+        """Insert one transaction's worth; returns (inserted NIDs, duplicate NIDs)"""
+        session = self.db.session
+        NID = self.model.NID
+        unique = {}
+        duplicates = []
+        for record in records:
+            if record['NID'] in unique:
+                duplicates.append(record['NID'])
+            else:
+                unique[record['NID']] = record
+
+        nids = list(unique)
+        for attempt in range(3):
+            existing = set()
+            for start in range(0, len(nids), MAX_IN_PARAMS):
+                chunk = nids[start:start + MAX_IN_PARAMS]
+                existing.update(session.scalars(select(NID).where(NID.in_(chunk))))
+            fresh = [r for nid, r in unique.items() if nid not in existing]
+            try:
+                if fresh:
+                    session.execute(insert(self.model), fresh)
+                session.commit()
+                break
+            except IntegrityError:
+                # A /signup landed between the check and the insert
+                session.rollback()
+                if attempt == 2:
+                    raise
+
+        inserted = [r['NID'] for r in fresh]
+        if self.cache is not None and inserted:
+            self.cache.invalidate_many(inserted)
+        return inserted, duplicates + sorted(existing)
+
+
+def export_rows(db, model, fmt='csv', include_passwords=False, page=EXPORT_PAGE):
+    """Yield the table as CSV or JSONL text, one page of rows per chunk"""
+    fields = EXPORT_FIELDS + (('password',) if include_passwords else ())
+    columns = [model.mail if f == 'email' else getattr(model, f) for f in fields]
+    if fmt == 'csv':
+        yield ','.join(fields) + '\r\n'
+
+    last = None
+    while True:
+        query = select(*columns).order_by(model.NID).limit(page)
+        if last is not None:
+            query = query.where(model.NID > last)
+        rows = db.session.execute(query).all()
+        if not rows:
+            return
+        out = io.StringIO()
+        if fmt == 'csv':
+            csv.writer(out).writerows(rows)
+        else:
+            for row in rows:
+                out.write(json.dumps(dict(zip(fields, row))) + '\n')
+        yield out.getvalue()
+        last = rows[-1][0]
+
+
+def _authorized():
+    token = os.environ.get('PATIENT_API_TOKEN', '')
+    supplied = request.headers.get('Authorization', '')
+    if supplied.startswith('Bearer '):
+        supplied = supplied[7:]
+    else:
+        supplied = request.headers.get('X-API-Token', '')
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def _auth_error():
+    if not os.environ.get('PATIENT_API_TOKEN'):
+        return jsonify({'status': 'error', 'message': 'Bulk API disabled: PATIENT_API_TOKEN not set'}), 403
+    return jsonify({'status': 'error', 'message': 'Invalid or missing API token'}), 401
+
+
+def init_bulk(app, db, model, cache=None):
+    @app.route('/api/patients/import', methods=['POST'])
+    def import_patients():
+        if not _authorized():
+            return _auth_error()
+        fmt = request.args.get('format') or detect_format(content_type=request.content_type or '')
+        if fmt not in ('csv', 'jsonl'):
+            return jsonify({'status': 'error', 'message': f'Unknown format: {fmt}'}), 400
+        batch_size = request.args.get('batch_size', 1000, type=int)
+        stream = io.TextIOWrapper(io.BufferedReader(request.stream), encoding='utf-8', newline='')
+        importer = PatientImporter(db, model, cache, batch_size=max(batch_size, 1))
+        report = importer.run(read_rows(stream, fmt))
+        return jsonify({'status': 'success', **report})
+
+    @app.route('/api/patients/export', methods=['GET'])
+    def export_patients():
+        if not _authorized():
+            return _auth_error()
+        fmt = request.args.get('format', 'csv')
+        if fmt not in ('csv', 'jsonl'):
+            return jsonify({'status': 'error', 'message': f'Unknown format: {fmt}'}), 400
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        return Response(
+            stream_with_context(export_rows(db, model, fmt)),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=patients.{fmt}'},
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk patient import/export')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    imp = sub.add_parser('import', help='Import a CSV or JSONL file')
+    imp.add_argument('file', help='Input file, - for stdin')
+    imp.add_argument('--format', choices=['csv', 'jsonl'])
+    imp.add_argument('--batch-size', type=int, default=1000)
+    imp.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                     help='validation processes')
+
+    exp = sub.add_parser('export', help='Write every patient to stdout')
+    exp.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    exp.add_argument('--include-passwords', action='store_true')
+
+    args = parser.parse_args(argv)
+
+    from main import app, create_schema, db, Patient, patient_cache
+
+    with app.app_context():
+        create_schema()
+        if args.command == 'export':
+            for chunk in export_rows(db, Patient, args.format, args.include_passwords):
+                sys.stdout.write(chunk)
+            return 0
+
+        fmt = args.format or detect_format(name=args.file)
+        if args.file == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+        else:
+            stream = open(args.file, encoding='utf-8', newline='')
+        with stream:
+            importer = PatientImporter(db, Patient, patient_cache, args.batch_size, args.workers)
+            report = importer.run(read_rows(stream, fmt))
+    print(json.dumps(report, indent=2))
+    return 0 if report['invalid'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+Read-through cache for patient lookups.
+
+Two tiers: a bounded LRU/TTL dict in each worker, and optionally a SQLite
+file shared by every worker on the host. Found patients go in both tiers.
+Records are never updated in place, so they can't go stale. Not-found
+results ("negative" entries) soak up repeated misses. When the shared tier
+is on they go there only, so one invalidation on /signup reaches every
+worker. Without it they stay local with a short TTL, so other workers see
+a new patient within PATIENT_CACHE_NEGATIVE_TTL seconds at worst.
+
+Settings (environment):
+    PATIENT_CACHE_SIZE          max entries per tier, 0 disables (10000)
+    PATIENT_CACHE_TTL           seconds for found patients (300)
+    PATIENT_CACHE_NEGATIVE_TTL  seconds for not-found NIDs (30)
+    PATIENT_CACHE_PATH          SQLite file for the shared tier (unset = off)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import CACHE_ENTRIES, CACHE_EVICTIONS, CACHE_LOOKUPS, CACHE_SHARED_ENTRIES
+
+MISSING = object()
+
+
+def cache_key(nid):
+    # "007" and "7" are the same Integer primary key
+    text = str(nid).strip()
+    try:
+        return str(int(text))
+    except ValueError:
+        return text
+
+
+class LRUCache:
+    """Thread-safe LRU with per-entry expiry. A cached None is a valid value."""
+
+    def __init__(self, maxsize, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            expires, value = entry
+            if expires <= self.clock():
+                del self._data[key]
+                CACHE_ENTRIES.dec()
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            if key not in self._data:
+                CACHE_ENTRIES.inc()
+            self._data[key] = (self.clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                CACHE_ENTRIES.dec()
+                CACHE_EVICTIONS.inc()
+
+    def delete(self, key):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                CACHE_ENTRIES.dec()
+
+    def clear(self):
+        with self._lock:
+            CACHE_ENTRIES.dec(len(self._data))
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SharedCache:
+    """SQLite-backed tier shared by all workers on the host"""
+
+    PURGE_EVERY = 256
+
+    def __init__(self, path, maxsize, clock=time.time):
+        self.path = path
+        self.maxsize = maxsize
+        self.clock = clock
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().execute(
+            'CREATE TABLE IF NOT EXISTS patient_cache '
+            '(key TEXT PRIMARY KEY, value TEXT, expires REAL NOT NULL)'
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit: every statement is its own short transaction
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')  # it's a cache
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT value, expires FROM patient_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] <= self.clock():
+            return MISSING
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        self._conn().execute(
+            'INSERT OR REPLACE INTO patient_cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, json.dumps(value), self.clock() + ttl),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge()
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM patient_cache WHERE key = ?', (key,))
+
+    def delete_many(self, keys):
+        conn = self._conn()
+        conn.execute('BEGIN')
+        conn.executemany('DELETE FROM patient_cache WHERE key = ?', [(k,) for k in keys])
+        conn.execute('COMMIT')
+
+    def clear(self):
+        self._conn().execute('DELETE FROM patient_cache')
+        CACHE_SHARED_ENTRIES.set(0)
+
+    def purge(self):
+        """Drop expired rows, then the soonest-to-expire ones over maxsize"""
+        conn = self._conn()
+        conn.execute('DELETE FROM patient_cache WHERE expires <= ?', (self.clock(),))
+        count = conn.execute('SELECT COUNT(*) FROM patient_cache').fetchone()[0]
+        if count > self.maxsize:
+            conn.execute(
+                'DELETE FROM patient_cache WHERE key IN '
+                '(SELECT key FROM patient_cache ORDER BY expires LIMIT ?)',
+                (count - self.maxsize,),
+            )
+            CACHE_EVICTIONS.inc(count - self.maxsize)
+            count = self.maxsize
+        CACHE_SHARED_ENTRIES.set(count)
+
+
+class PatientCache:
+    def __init__(self, maxsize=10000, ttl=300.0, negative_ttl=30.0, shared_path=None):
+        self.enabled = maxsize > 0
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.local = LRUCache(maxsize)
+        self.shared = SharedCache(shared_path, maxsize) if shared_path and self.enabled else None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            maxsize=int(os.environ.get('PATIENT_CACHE_SIZE', '10000')),
+            ttl=float(os.environ.get('PATIENT_CACHE_TTL', '300')),
+            negative_ttl=float(os.environ.get('PATIENT_CACHE_NEGATIVE_TTL', '30')),
+            shared_path=os.environ.get('PATIENT_CACHE_PATH') or None,
+        )
+
+    def lookup(self, nid, loader):
+        """Cached value for nid, or loader() (which returns None for not found)"""
+        if not self.enabled:
+            return loader()
+        key = cache_key(nid)
+
+        value = self.local.get(key)
+        if value is not MISSING:
+            CACHE_LOOKUPS.labels('local', 'hit' if value is not None else 'negative_hit').inc()
+            return value
+        CACHE_LOOKUPS.labels('local', 'miss').inc()
+
+        if self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except sqlite3.Error:
+                value = MISSING
+            if value is not MISSING:
+                CACHE_LOOKUPS.labels('shared', 'hit' if value is not None else 'negative_hit').inc()
+                if value is not None:
+                    self.local.set(key, value, self.ttl)
+                return value
+            CACHE_LOOKUPS.labels('shared', 'miss').inc()
+
+        value = loader()
+        self._store(key, value)
+        return value
+
+    def _store(self, key, value):
+        if value is None and self.shared is not None:
+            targets = (self.shared,)
+        elif self.shared is not None:
+            targets = (self.local, self.shared)
+        else:
+            targets = (self.local,)
+        ttl = self.ttl if value is not None else self.negative_ttl
+        for tier in targets:
+            try:
+                tier.set(key, value, ttl)
+            except sqlite3.Error:
+                pass  # a busy shared cache only costs a DB read
+
+    def invalidate(self, nid):
+        key = cache_key(nid)
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def invalidate_many(self, nids):
+        keys = [cache_key(nid) for nid in nids]
+        for key in keys:
+            self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete_many(keys)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
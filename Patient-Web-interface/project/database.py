@@ -0,0 +1,75 @@
+"""
+Database settings for the Patient web app.
+
+DATABASE_URL picks the database (default: SQLite file in the instance
+folder). SQLite connections are switched to WAL with a busy timeout so
+several gunicorn workers can read while one writes instead of failing with
+"database is locked"; other databases get a sized, pre-pinged pool.
+"""
+import os
+
+from sqlalchemy import event
+
+DEFAULT_DATABASE_URI = 'sqlite:///patient.db'
+
+# Applied to every new SQLite connection. journal_mode is persistent in the
+# file, the rest are per-connection.
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),    # durable at checkpoint, safe with WAL
+    ('busy_timeout', os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    ('cache_size', '-16000'),     # 16 MB page cache
+    ('temp_store', 'MEMORY'),
+    ('mmap_size', '134217728'),   # 128 MB
+    ('foreign_keys', 'ON'),
+)
+
+
+def database_uri():
+    return os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URI)
+
+
+def _is_memory(uri):
+    return uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri
+
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for the given URI"""
+    pool_size = int(os.environ.get('DB_POOL_SIZE', '5'))
+    max_overflow = int(os.environ.get('DB_MAX_OVERFLOW', '10'))
+    pool_timeout = int(os.environ.get('DB_POOL_TIMEOUT', '10'))
+
+    if uri.startswith('sqlite'):
+        if _is_memory(uri):
+            # One shared connection per thread; a pool would see empty DBs
+            return {}
+        return {
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'pool_timeout': pool_timeout,
+            'connect_args': {'timeout': 5, 'check_same_thread': False},
+        }
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': True,
+    }
+
+
+def configure_engine(engine):
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def init_database(app, db):
+    with app.app_context():
+        configure_engine(db.engine)
@@ -0,0 +1,54 @@
+"""
+gunicorn settings for the Patient web app.
+
+Usage:
+    gunicorn -c gunicorn.conf.py main:app
+
+Tunable through the environment: PORT, WEB_CONCURRENCY (worker processes),
+GUNICORN_THREADS (threads per worker), GUNICORN_TIMEOUT, DATABASE_URL.
+"""
+import multiprocessing
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 20
+keepalive = 5
+backlog = 2048
+# Recycle workers now and then so a slow leak can't grow forever
+max_requests = 5000
+max_requests_jitter = 500
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# Workers write their metrics here and /metrics sums them; must be set
+# before prometheus_client is imported anywhere
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/patient-metrics')
+_metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+shutil.rmtree(_metrics_dir, ignore_errors=True)
+os.makedirs(_metrics_dir, exist_ok=True)
+
+
+def on_starting(server):
+    # Create the schema once in the master so workers don't race on it
+    from main import app, create_schema, db
+    with app.app_context():
+        create_schema()
+        db.engine.dispose()
+
+
+def post_fork(server, worker):
+    # Never share pooled connections across processes
+    from main import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from metrics import child_exit as metrics_child_exit
+    metrics_child_exit(server, worker)
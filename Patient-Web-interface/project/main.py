@@ -1,11 +1,22 @@
+import os
+
 from flask import Flask, request, render_template
 from signup import Signup, Search
 from flask_sqlalchemy import SQLAlchemy
+from database import database_uri, engine_options, init_database
+from metrics import init_metrics
+from cache import PatientCache
+from bulk import init_bulk
+from patient_search import ensure_search_schema, init_search
 
 app = Flask(__name__)
-app.config['SECRET_KEY'] = '123456'  # add secret key CSR
-app.config["SQLALCHEMY_DATABASE_URI"] = 'sqlite:///patient.db'
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', '123456')  # add secret key CSR
+app.config["SQLALCHEMY_DATABASE_URI"] = database_uri()
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
 db = SQLAlchemy(app)
+init_database(app, db)
+init_metrics(app, db)
+patient_cache = PatientCache.from_env()
 
 
 class Patient(db.Model):
@@ -18,6 +29,32 @@ class Patient(db.Model):
     Lname = db.Column(db.String)
     BD = db.Column(db.TEXT)
 
+    # Case-insensitive prefix search (patient_search.py) range-scans these
+    __table_args__ = (
+        db.Index('ix_patient_username_lower', db.func.lower(username)),
+        db.Index('ix_patient_mail_lower', db.func.lower(mail)),
+        db.Index('ix_patient_fname_lower', db.func.lower(Fname)),
+        db.Index('ix_patient_lname_lower', db.func.lower(Lname)),
+    )
+
+
+init_bulk(app, db, Patient, patient_cache)
+init_search(app, db, Patient)
+
+
+def create_schema():
+    """Tables, search indexes and (optionally) the FTS index; needs an app context"""
+    db.create_all()
+    ensure_search_schema(db, Patient)
+
+
+def find_patient(nid):
+    """The fields /search shows, as a cacheable dict, or None"""
+    patient = Patient.query.filter_by(NID=nid).first()
+    if patient is None:
+        return None
+    return {'NID': patient.NID, 'username': patient.username, 'mail': patient.mail}
+
 
 @app.route('/', methods=["GET"])
 def mainpage():
@@ -50,6 +87,7 @@ def signup():
             )
             db.session.add(patient)
             db.session.commit()
+            patient_cache.invalidate(NID)
             value = (f'user is {username} <br> UID is {NID} <br> '
                      f'mail is {email} <br> Fname is {Fname} <br> '
                      f'Lname is {Lname} <br> Birthday is {BD}')
@@ -72,15 +110,16 @@ def search():
     if request.method == 'GET':
         return render_template('search.html', form=form)
     elif request.method == 'POST':
-        patient = Patient.query.filter_by(NID=form.NID.data).first()
+        patient = patient_cache.lookup(form.NID.data, lambda: find_patient(form.NID.data))
         if patient is None:
             return render_template('out.html', output="Cant Find a User")
-        value = (f'User is {patient.username} <br> UID is {patient.NID} <br> '
-                 f'Mail is {patient.mail}')
+        value = (f'User is {patient["username"]} <br> UID is {patient["NID"]} <br> '
+                 f'Mail is {patient["mail"]}')
         return render_template('out.html', output=value)
 
 
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
-    app.run(host='0.0.0.0', port=8000, debug=True)
\ No newline at end of file
+        create_schema()
+    # Development server only; production runs gunicorn -c gunicorn.conf.py main:app
+    app.run(host='0.0.0.0', port=8000, debug=os.environ.get('FLASK_DEBUG', '1') == '1')
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""
+Prometheus instrumentation for the Patient web app.
+
+Per-route latency histograms, in-flight gauges, SQL query timing,
+connection-pool usage and patient-cache counters, served on /metrics. When
+PROMETHEUS_MULTIPROC_DIR is set (multi-worker servers such as gunicorn)
+every worker writes to that directory and /metrics aggregates them.
+"""
+import os
+import time
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+REQUEST_LATENCY = Histogram(
+    'patient_http_request_duration_seconds',
+    'HTTP request latency by route',
+    ['method', 'endpoint', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'patient_http_requests_in_progress',
+    'HTTP requests currently being served',
+    ['method', 'endpoint'],
+    multiprocess_mode='livesum',
+)
+QUERY_LATENCY = Histogram(
+    'patient_db_query_duration_seconds',
+    'SQL statement execution time',
+    ['operation'],
+    buckets=QUERY_BUCKETS,
+)
+QUERY_ERRORS = Counter(
+    'patient_db_query_errors_total',
+    'SQL statements that raised',
+    ['operation'],
+)
+POOL_CONNECTIONS = Gauge(
+    'patient_db_pool_connections',
+    'Database connections by state (open, checked_out)',
+    ['state'],
+    multiprocess_mode='livesum',
+)
+CACHE_LOOKUPS = Counter(
+    'patient_cache_lookups_total',
+    'Patient cache lookups by outcome (hit, negative_hit, miss)',
+    ['tier', 'result'],
+)
+CACHE_ENTRIES = Gauge(
+    'patient_cache_entries',
+    'Entries held in the in-process patient cache',
+    multiprocess_mode='livesum',
+)
+CACHE_SHARED_ENTRIES = Gauge(
+    'patient_cache_shared_entries',
+    'Entries held in the shared patient cache',
+    multiprocess_mode='livemax',
+)
+CACHE_EVICTIONS = Counter(
+    'patient_cache_evictions_total',
+    'Patient cache entries dropped for space',
+)
+
+OPERATIONS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+
+def _operation(statement):
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+    return verb if verb in OPERATIONS else 'OTHER'
+
+
+def _endpoint():
+    # The route pattern, not the raw path, keeps label cardinality bounded
+    return request.url_rule.rule if request.url_rule else '<unmatched>'
+
+
+def _before_request():
+    if request.path == '/metrics':
+        return
+    g._metrics_start = time.perf_counter()
+    g._metrics_labels = (request.method, _endpoint())
+    REQUESTS_IN_PROGRESS.labels(*g._metrics_labels).inc()
+
+
+def _after_request(response):
+    g._metrics_status = response.status_code
+    return response
+
+
+def _teardown_request(exc):
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return
+    labels = g.pop('_metrics_labels')
+    status = 500 if exc is not None else g.pop('_metrics_status', 500)
+    REQUEST_LATENCY.labels(*labels, str(status)).observe(time.perf_counter() - start)
+    REQUESTS_IN_PROGRESS.labels(*labels).dec()
+
+
+def _instrument_engine(engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info['_metrics_query_start'].pop()
+        QUERY_LATENCY.labels(_operation(statement)).observe(time.perf_counter() - start)
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        starts = context.connection.info.get('_metrics_query_start') if context.connection else None
+        if starts:
+            starts.pop()
+        QUERY_ERRORS.labels(_operation(context.statement or '')).inc()
+
+    # Counted from pool events so it works for every pool class
+    open_conns = POOL_CONNECTIONS.labels('open')
+    checked_out = POOL_CONNECTIONS.labels('checked_out')
+    event.listen(engine.pool, 'connect', lambda *args: open_conns.inc())
+    event.listen(engine.pool, 'close', lambda *args: open_conns.dec())
+    event.listen(engine.pool, 'checkout', lambda *args: checked_out.inc())
+    event.listen(engine.pool, 'checkin', lambda *args: checked_out.dec())
+
+
+def metrics_view():
+    registry = REGISTRY
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def child_exit(server, worker):
+    """gunicorn hook: drop a dead worker's live gauges"""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def init_metrics(app, db):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    with app.app_context():
+        _instrument_engine(db.engine)
@@ -0,0 +1,204 @@
+"""
+Patient search by name, email and username.
+
+Prefix matches run as range scans on lower() expression indexes
+(lower(col) >= 'jo' AND lower(col) < 'jp'). They work the same on SQLite and
+server databases. On SQLite, setting PATIENT_SEARCH_FTS=1 also maintains an
+FTS5 index (patient_fts), kept in sync by triggers, so multi-word queries
+match whole names. Results are ordered by NID and paginated by keyset
+(after=<last NID>), so page 1000 costs the same as page 1.
+
+Routes:
+    GET /patients?q=jo&field=name            HTML results
+    GET /api/patients/search?q=jo&after=123  JSON {results, next}
+
+The JSON API needs PATIENT_API_TOKEN, like the bulk export. Without the
+token the HTML page shows only the first page, without email addresses.
+"""
+import os
+import re
+
+from flask import jsonify, render_template, request, url_for
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.schema import CreateIndex
+
+from bulk import _auth_error, _authorized
+
+FIELDS = {
+    'any': ('username', 'mail', 'Fname', 'Lname'),
+    'name': ('Fname', 'Lname'),
+    'email': ('mail',),
+    'username': ('username',),
+}
+RESULT_COLUMNS = ('NID', 'username', 'mail', 'Fname', 'Lname')
+ANONYMOUS_FIELDS = ('name', 'username')  # without the API token, emails aren't searched
+MIN_QUERY = 2
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+FTS_TABLE = 'patient_fts'
+FTS_COLUMNS = FIELDS['any']
+
+
+def ensure_search_schema(db, model, fts=None):
+    """Create indexes missing from an existing table and, if asked, the FTS index.
+
+    create_all() only builds indexes together with a new table, so databases
+    created before the indexes existed get them here.
+    """
+    if fts is None:
+        fts = os.environ.get('PATIENT_SEARCH_FTS', '0') == '1'
+    engine = db.engine
+    # checkfirst can't see expression indexes (no reflection), so let the DB check
+    with engine.begin() as conn:
+        for index in model.__table__.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+    if fts and engine.dialect.name == 'sqlite':
+        _create_fts(engine, model.__tablename__)
+
+
+def _create_fts(engine, table):
+    columns = ', '.join(FTS_COLUMNS)
+    new = ', '.join(f'new.{c}' for c in FTS_COLUMNS)
+    old = ', '.join(f'old.{c}' for c in FTS_COLUMNS)
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': FTS_TABLE},
+        ).first()
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{columns}, content='{table}', content_rowid='NID', prefix='2 3')"
+        ))
+        # External-content table: triggers keep it in step with the base table
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON \"{table}\" BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.NID, {new}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON \"{table}\" BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.NID, {old}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON \"{table}\" BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.NID, {old}); "
+            f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.NID, {new}); END"
+        ))
+        if not exists:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def fts_available(db):
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    row = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': FTS_TABLE},
+    ).first()
+    return row is not None
+
+
+def _prefix_range(prefix):
+    # Every string starting with prefix sorts in [prefix, prefix with last char + 1)
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _fts_query(q, field):
+    words = re.findall(r'\w+', q)
+    if not words:
+        return None
+    terms = ' '.join(f'"{w}"*' for w in words)
+    columns = ' '.join(FIELDS[field])
+    return f'{{{columns}}}: {terms}'
+
+
+def search_patients(db, model, q, field='any', after=None, limit=DEFAULT_LIMIT, use_fts=None):
+    """One page of matches: (rows as dicts, cursor for the next page or None)"""
+    q = (q or '').strip()
+    if field not in FIELDS:
+        raise ValueError(f'Unknown field: {field}')
+    if len(q) < MIN_QUERY:
+        raise ValueError(f'Query must be at least {MIN_QUERY} characters')
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    if use_fts is None:
+        use_fts = fts_available(db)
+
+    columns = [getattr(model, c) for c in RESULT_COLUMNS]
+    query = select(*columns)
+    match = _fts_query(q, field) if use_fts else None
+    if match is not None:
+        # FTS5 yields rowids in order, so the page is cut inside the index
+        sql = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match'
+        params = {'match': match, 'limit': limit + 1}
+        if after is not None:
+            sql += ' AND rowid > :after'
+            params['after'] = after
+        rowids = text(sql + ' ORDER BY rowid LIMIT :limit').bindparams(**params).columns(model.NID)
+        query = query.where(model.NID.in_(rowids)).order_by(model.NID)
+    else:
+        lo, hi = _prefix_range(q.lower())
+        conditions = [
+            and_(func.lower(getattr(model, c)) >= lo, func.lower(getattr(model, c)) < hi)
+            for c in FIELDS[field]
+        ]
+        if q.isdigit():
+            conditions.append(model.NID == int(q))
+        query = query.where(or_(*conditions))
+        if after is not None:
+            query = query.where(model.NID > after)
+        # "+ 0" stops SQLite walking the primary key in order and filtering,
+        # which is a full scan when matches are rare; the matches come from
+        # the indexes and only they get sorted
+        query = query.order_by(model.NID + 0)
+    query = query.limit(limit + 1)
+
+    rows = [dict(zip(RESULT_COLUMNS, row)) for row in db.session.execute(query)]
+    cursor = rows[limit - 1]['NID'] if len(rows) > limit else None
+    return rows[:limit], cursor
+
+
+def init_search(app, db, model):
+    def _params():
+        after = request.args.get('after', type=int)
+        limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+        return request.args.get('q', ''), request.args.get('field', 'any'), after, limit
+
+    @app.route('/api/patients/search', methods=['GET'])
+    def api_search_patients():
+        if not _authorized():
+            return _auth_error()
+        q, field, after, limit = _params()
+        try:
+            rows, cursor = search_patients(db, model, q, field, after, limit)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        for row in rows:
+            row['email'] = row.pop('mail')
+        return jsonify({'status': 'success', 'results': rows, 'next': cursor})
+
+    @app.route('/patients', methods=['GET'])
+    def patients():
+        q, field, after, limit = _params()
+        full = _authorized()
+        if not full:
+            # Anonymous lookups: one page, no emails, so the table can't be listed
+            after, limit = None, min(limit, DEFAULT_LIMIT)
+            if field not in ANONYMOUS_FIELDS:
+                field = 'name'
+        rows, cursor, error = [], None, None
+        if q:
+            try:
+                rows, cursor = search_patients(db, model, q, field, after, limit)
+            except ValueError as e:
+                error = str(e)
+        if not full:
+            cursor = None
+            for row in rows:
+                row.pop('mail')
+        next_url = url_for('patients', q=q, field=field, after=cursor) if cursor else None
+        return render_template(
+            'patients.html', q=q, field=field, fields=FIELDS, rows=rows,
+            next_url=next_url, error=error, show_email=full,
+        )
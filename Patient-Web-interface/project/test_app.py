@@ -1,18 +1,25 @@
+import json
+import os
 import pytest
-from main import app, db, Patient
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from main import app, db, Patient, patient_cache
 from signup import Signup, Search
 from flask import url_for, template_rendered
 
 @pytest.fixture
 def client():
     app.config["TESTING"] = True
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
     app.config["WTF_CSRF_ENABLED"] = False  # Disable CSRF for testing
     
     with app.test_client() as client:
         with app.app_context():
             db.create_all()
         yield client
+        with app.app_context():
+            db.drop_all()
+        patient_cache.clear()
 
 def test_main_page(client):
     response = client.get("/")
@@ -79,3 +86,162 @@ def test_search_not_found(client):
     })
     assert response.status_code == 200
     assert b"Cant Find a User" in response.data
+
+def test_metrics_endpoint(client):
+    client.get("/signup")
+    client.post("/search", data={"NID": "000000000"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.data.decode()
+    assert 'patient_http_request_duration_seconds_count{endpoint="/signup",method="GET",status="200"}' in body
+    assert 'patient_http_requests_in_progress{endpoint="/search",method="POST"} 0.0' in body
+    assert 'patient_db_query_duration_seconds_count{operation="SELECT"}' in body
+    assert 'endpoint="/metrics"' not in body
+
+def test_sqlite_file_uses_wal(tmp_path):
+    from sqlalchemy import create_engine, text
+    from database import configure_engine, engine_options
+
+    uri = f"sqlite:///{tmp_path / 'wal.db'}"
+    engine = create_engine(uri, **engine_options(uri))
+    configure_engine(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    assert engine.pool.size() == 5
+    engine.dispose()
+
+def test_search_negative_cache_invalidated_on_signup(client):
+    client.post("/search", data={"NID": "123456789"})
+    response = client.post("/search", data={"NID": "123456789"})
+    assert b"Cant Find a User" in response.data
+
+    test_signup_post_success(client)
+    response = client.post("/search", data={"NID": "0123456789"})
+    assert b"testuser" in response.data
+
+    with app.app_context():
+        db.session.query(Patient).delete()
+        db.session.commit()
+    # Served from cache now that the row is gone
+    response = client.post("/search", data={"NID": "123456789"})
+    assert b"testuser" in response.data
+
+def test_lru_cache_evicts_and_expires():
+    from cache import MISSING, LRUCache
+
+    now = [0.0]
+    lru = LRUCache(2, clock=lambda: now[0])
+    lru.set("a", 1, ttl=10)
+    lru.set("b", None, ttl=1)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    lru.set("c", 3, ttl=10)
+    assert lru.get("b") is MISSING  # least recently used went first
+    now[0] = 11
+    assert lru.get("a") is MISSING
+    assert lru.get("c") is MISSING
+    assert len(lru) == 0
+
+def test_shared_cache_seen_by_other_instances(tmp_path):
+    from cache import PatientCache
+
+    path = str(tmp_path / "cache.db")
+    first = PatientCache(shared_path=path)
+    second = PatientCache(shared_path=path)
+    calls = []
+
+    assert first.lookup("42", lambda: calls.append(1)) is None
+    assert second.lookup("42", lambda: calls.append(1)) is None
+    assert len(calls) == 1
+
+    first.invalidate("42")
+    patient = {"NID": 42, "username": "u", "mail": "u@example.com"}
+    assert second.lookup("42", lambda: patient) == patient
+    assert first.lookup("042", lambda: None) == patient
+
+def test_bulk_import_and_export(client, monkeypatch):
+    monkeypatch.setenv("PATIENT_API_TOKEN", "s3cret")
+    monkeypatch.setattr("bulk.MAX_IN_PARAMS", 1)  # existing NIDs are looked up in chunks
+    body = (
+        "NID,username,email,password,Fname,Lname,BD\n"
+        "1001,alice,alice@example.com,pass1,Alice,A,1990-01-01\n"
+        "1002,bob,bob@example.com,pass2,Bob,B,1991-02-02\n"
+        "1001,again,again@example.com,pass3,Al,A,1990-01-01\n"
+        "1003,carol,not-an-email,pass4,Carol,C,1992-03-03\n"
+    )
+    assert client.post("/api/patients/import", data=body).status_code == 401
+
+    client.post("/search", data={"NID": "1002"})  # negative-cached
+    response = client.post(
+        "/api/patients/import?batch_size=2", data=body,
+        headers={"Authorization": "Bearer s3cret", "Content-Type": "text/csv"},
+    )
+    report = response.get_json()
+    assert report["inserted"] == 2
+    assert report["duplicate_nids"] == [1001]
+    assert report["invalid"] == 1 and report["errors"][0]["line"] == 5
+    assert b"bob" in client.post("/search", data={"NID": "1002"}).data
+
+    response = client.get("/api/patients/export?format=jsonl", headers={"X-API-Token": "s3cret"})
+    rows = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [r["NID"] for r in rows] == [1001, 1002]
+    assert rows[0]["email"] == "alice@example.com" and "password" not in rows[0]
+
+def _add_patients(*people):
+    with app.app_context():
+        for nid, username, mail, fname, lname in people:
+            db.session.add(Patient(NID=nid, username=username, password="pw", mail=mail,
+                                   Fname=fname, Lname=lname, BD="1990-01-01"))
+        db.session.commit()
+
+def test_search_api_prefix_and_keyset_pages(client, monkeypatch):
+    monkeypatch.setenv("PATIENT_API_TOKEN", "s3cret")
+    auth = {"Authorization": "Bearer s3cret"}
+    _add_patients(
+        (3, "jsmith", "john.smith@example.com", "John", "Smith"),
+        (1, "joanna", "jo@example.com", "Joanna", "Lee"),
+        (2, "mary", "mary@clinic.org", "Mary", "Jones"),
+        (4, "peter", "peter@example.com", "Peter", "Parker"),
+    )
+    assert client.get("/api/patients/search?q=jo").status_code == 401
+    page = client.get("/api/patients/search?q=JO&limit=2", headers=auth).get_json()
+    assert [r["NID"] for r in page["results"]] == [1, 2]
+    assert page["results"][0]["email"] == "jo@example.com"
+    page = client.get(f"/api/patients/search?q=jo&limit=2&after={page['next']}", headers=auth).get_json()
+    assert [r["NID"] for r in page["results"]] == [3] and page["next"] is None
+
+    page = client.get("/api/patients/search?q=pete&field=email", headers=auth).get_json()
+    assert [r["NID"] for r in page["results"]] == [4]
+    assert client.get("/api/patients/search?q=j", headers=auth).status_code == 400
+
+    response = client.get("/patients?q=par&field=name")
+    assert b"Parker" in response.data and b"Smith" not in response.data
+
+    # Without the token: first page only, no emails, emails not searchable
+    response = client.get("/patients?q=jo&limit=1")
+    assert b"Joanna" in response.data and b"Next page" not in response.data
+    assert b"jo@example.com" not in response.data
+    assert b"Parker" not in client.get("/patients?q=peter@&field=email").data
+    response = client.get("/patients?q=jo&limit=1", headers=auth)
+    assert b"jo@example.com" in response.data and b"Next page" in response.data
+
+def test_search_fts_kept_in_sync(client):
+    from patient_search import FTS_TABLE, ensure_search_schema, search_patients
+
+    _add_patients((7, "ahmed", "ahmed@example.com", "Ahmed", "Hassan"))
+    with app.app_context():
+        ensure_search_schema(db, Patient, fts=True)
+    try:
+        _add_patients((8, "ahmedk", "k@example.com", "Ahmed", "Kamal"))
+        with app.app_context():
+            rows, _ = search_patients(db, Patient, "ahm kam", use_fts=True)
+            assert [r["NID"] for r in rows] == [8]
+            rows, _ = search_patients(db, Patient, "ahmed", field="name", use_fts=True)
+            assert [r["NID"] for r in rows] == [7, 8]
+    finally:
+        with app.app_context():
+            db.session.execute(db.text(f"DROP TABLE {FTS_TABLE}"))
+            db.session.commit()
@@ -457,6 +457,7 @@ resource "null_resource" "update_monitoring_configs" {
       
       # Update Prometheus targets
       sed -i.bak "s|targets: \\['[0-9.]*:9100'\\]|targets: ['${aws_instance.web_server.public_ip}:9100']|g" prometheus.yml
+      sed -i.bak "s|targets: \\['[0-9.]*:80'\\]|targets: ['${aws_instance.web_server.public_ip}:80']|g" prometheus.yml
       
       echo "✅ Monitoring configs updated!"
     EOT
@@ -26,6 +26,7 @@ cd "$BASE_DIR/monitoring"
 if [ -f "prometheus.yml" ]; then
     sed -i.bak "s/<EC2_PUBLIC_IP>/$EC2_IP/g" prometheus.yml
     sed -i.bak "s/- targets: \['[0-9.]*:9100'\]/- targets: ['$EC2_IP:9100']/g" prometheus.yml
+    sed -i.bak "s/- targets: \['[0-9.]*:80'\]/- targets: ['$EC2_IP:80']/g" prometheus.yml
     echo "   ✅ prometheus.yml updated"
 else
     echo "   ❌ prometheus.yml not found"
@@ -47,6 +48,7 @@ echo ""
 echo "📋 Summary:"
 echo "   EC2 IP: $EC2_IP"
 echo "   Node Exporter: http://$EC2_IP:9100/metrics"
+echo "   App Metrics: http://$EC2_IP/metrics"
 echo "   Webhook Receiver: http://$EC2_IP:5000/webhook"
 echo ""
 echo "🚀 Next steps:"
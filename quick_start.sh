@@ -228,9 +228,9 @@ echo "━━━━━━━━━━━━━━━━━━━━━━━━
 echo -e "  ${YELLOW}# View recommendations${NC}"
 echo -e "  ${YELLOW}curl http://$EC2_IP:5000/recommendations | jq .${NC}"
 echo ""
-echo -e "  ${YELLOW}# Approve action${NC}"
+echo -e "  ${YELLOW}# Approve action (remote callers need SELF_HEAL_APPROVAL_TOKEN set on the receiver)${NC}"
 echo -e "  ${YELLOW}curl -X POST http://$EC2_IP:5000/approve-action \\${NC}"
-echo -e "  ${YELLOW}  -H 'Content-Type: application/json' \\${NC}"
+echo -e "  ${YELLOW}  -H 'Content-Type: application/json' -H \"X-Self-Heal-Token: \$TOKEN\" \\${NC}"
 echo -e "  ${YELLOW}  -d '{\"action\":\"upgrade_instance\",\"resource\":\"CPU\"}'${NC}"
 echo ""
 echo -e "  ${YELLOW}# Dismiss recommendation${NC}"
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Alertmanager Webhook Models
+Typed view of the Alertmanager v4 webhook body. The raw request bytes are
+decoded with orjson when it is installed (json otherwise) and the envelope is
+validated with pydantic. Each alert is then validated on its own, so one
+malformed alert is reported back instead of failing the whole batch
+(alertmanager.yml sends every alert, max_alerts: 0). Valid alerts become
+compact AlertRecord objects with the labels the receiver dispatches on
+pulled out once.
+"""
+
+import json
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+class PayloadError(ValueError):
+    """The body is not JSON or not an Alertmanager webhook envelope"""
+
+
+class Alert(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    status: Literal["firing", "resolved"] = "firing"
+    labels: Dict[str, str] = {}
+    annotations: Dict[str, str] = {}
+    startsAt: Optional[str] = None
+    endsAt: Optional[str] = None
+    generatorURL: Optional[str] = None
+    fingerprint: Optional[str] = None
+
+
+class WebhookPayload(BaseModel):
+    """Envelope only; alerts are validated one by one (see parse_payload)"""
+
+    model_config = ConfigDict(extra="ignore")
+
+    version: str = "4"
+    groupKey: str = ""
+    truncatedAlerts: int = 0
+    status: str = "firing"
+    receiver: str = ""
+    groupLabels: Dict[str, str] = {}
+    commonLabels: Dict[str, str] = {}
+    commonAnnotations: Dict[str, str] = {}
+    externalURL: str = ""
+    alerts: List[Any] = []
+
+
+class AlertRecord:
+    """One validated alert, with the fields receive_alert dispatches on"""
+
+    __slots__ = ("status", "alertname", "severity", "action", "instance", "description", "value",
+                 "labels", "annotations", "starts_at", "fingerprint")
+
+    def __init__(self, alert: Alert):
+        labels = alert.labels
+        annotations = alert.annotations
+        self.status = alert.status
+        self.alertname = labels.get("alertname", "Unknown")
+        self.severity = labels.get("severity", "unknown")
+        self.action = labels.get("action", "monitor")
+        self.instance = labels.get("instance", "unknown")
+        self.description = annotations.get("description", "")
+        self.value = annotations.get("value")
+        self.labels = labels
+        self.annotations = annotations
+        self.starts_at = alert.startsAt
+        self.fingerprint = alert.fingerprint
+
+
+class ParsedPayload:
+    __slots__ = ("envelope", "alerts", "errors")
+
+    def __init__(self, envelope: WebhookPayload, alerts: List[AlertRecord], errors: List[Dict]):
+        self.envelope = envelope
+        self.alerts = alerts
+        self.errors = errors
+
+    @property
+    def total(self) -> int:
+        return len(self.alerts) + len(self.errors)
+
+    def summary(self) -> str:
+        """One log line instead of the whole payload"""
+        env = self.envelope
+        return (f"{self.total} alert(s), status={env.status}, receiver={env.receiver or '-'}, "
+                f"group={env.groupKey or '-'}, invalid={len(self.errors)}")
+
+
+def loads(body: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _describe(error: ValidationError) -> List[Dict[str, str]]:
+    return [{"loc": ".".join(str(part) for part in item["loc"]), "msg": item["msg"]}
+            for item in error.errors(include_url=False)]
+
+
+def parse_payload(body: bytes) -> ParsedPayload:
+    """
+    Decode and validate a webhook body.
+    Raises PayloadError for bad JSON or a bad envelope; bad alerts are
+    returned in .errors as {"index", "alertname", "errors": [{"loc", "msg"}]}
+    """
+    try:
+        data = loads(body)
+    except ValueError as e:
+        raise PayloadError(f"Invalid JSON: {e}") from e
+    try:
+        envelope = WebhookPayload.model_validate(data)
+    except ValidationError as e:
+        details = "; ".join(f"{d['loc'] or 'body'}: {d['msg']}" for d in _describe(e))
+        raise PayloadError(f"Invalid webhook payload: {details}") from e
+
+    alerts: List[AlertRecord] = []
+    errors: List[Dict] = []
+    validate = Alert.model_validate
+    for index, item in enumerate(envelope.alerts):
+        try:
+            alerts.append(AlertRecord(validate(item)))
+        except ValidationError as e:
+            labels = item.get("labels") if isinstance(item, dict) else None
+            name = labels.get("alertname") if isinstance(labels, dict) else None
+            errors.append({"index": index, "alertname": name if isinstance(name, str) else None,
+                           "errors": _describe(e)})
+    # The raw list is no longer needed and can be large
+    envelope.alerts = []
+    return ParsedPayload(envelope, alerts, errors)
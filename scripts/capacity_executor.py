@@ -0,0 +1,606 @@
+#!/usr/bin/env python3
+"""
+Self-Healing Capacity Executor
+Turns approved capacity actions (/approve-action, the dashboard's "scale"
+choice) into jobs that a backend carries out:
+
+  local      add_swap: create and enable a swap file
+             expand_disk: grow a loopback filesystem image and resize it online
+  terraform  upgrade_instance: move aws_instance.web_server one size up
+             expand_disk: grow its root volume
+             (rewrites Terraform/main.tf, then plan + apply on that resource only)
+  fake       records what it would do (tests, dry runs)
+
+Jobs run one at a time on a background thread. Their state and step log are
+kept in LOG_DIR/capacity_jobs.json. Which backend handles which action is
+set with SELF_HEAL_CAPACITY_BACKENDS="add_swap=local,upgrade_instance=terraform".
+
+Usage:
+    sudo python3 capacity_executor.py run add_swap --param size_mb=2048
+    python3 capacity_executor.py run upgrade_instance --backend terraform --param instance_type=t3.small
+    python3 capacity_executor.py render expand_disk --param grow_gb=8
+    python3 capacity_executor.py jobs
+
+Parameters are limited to PARAM_LIMITS (sizes within bounds, instance types
+from INSTANCE_LADDER); file paths come only from the environment.
+"""
+
+import argparse
+import difflib
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Paths
+LOG_DIR = Path(os.environ.get("SELF_HEAL_LOG_DIR", "/opt/self-heal/logs"))
+JOBS_FILE = LOG_DIR / "capacity_jobs.json"
+SWAP_FILE = os.environ.get("SELF_HEAL_SWAP_FILE", "/swapfile-selfheal")
+LOOP_IMAGE = os.environ.get("SELF_HEAL_LOOP_IMAGE", "/opt/self-heal/data.img")
+_REPO_TERRAFORM = Path(__file__).resolve().parent.parent / "Terraform"
+TERRAFORM_DIR = Path(os.environ.get(
+    "SELF_HEAL_TERRAFORM_DIR",
+    _REPO_TERRAFORM if _REPO_TERRAFORM.exists() else "/opt/self-heal/terraform",
+))
+
+# Limits and defaults
+DEFAULT_SWAP_MB = 2048
+MAX_SWAP_MB = 16384
+DEFAULT_GROW_MB = 1024      # local loopback image
+MAX_GROW_MB = 65536
+DEFAULT_GROW_GB = 8         # EBS root volume
+MAX_GROW_GB = 256
+DEFAULT_ROOT_GB = 8         # AMI default when main.tf has no root_block_device
+MAX_JOBS_KEPT = 200
+INSTANCE_LADDER = ("t3.nano", "t3.micro", "t3.small", "t3.medium", "t3.large", "t3.xlarge", "t3.2xlarge")
+
+# The only parameters a caller may pass, with their bounds. Paths (swap
+# file, loop image, Terraform dir) are configuration, never parameters.
+PARAM_LIMITS = {
+    "add_swap": {"size_mb": (1, MAX_SWAP_MB)},
+    "expand_disk": {"grow_mb": (1, MAX_GROW_MB), "grow_gb": (1, MAX_GROW_GB)},
+    "upgrade_instance": {"instance_type": INSTANCE_LADDER},
+}
+
+DEFAULT_ROUTES = {
+    "add_swap": "local",
+    "expand_disk": "local",
+    "upgrade_instance": "terraform",
+}
+
+Runner = Callable[[List[str]], str]
+
+
+class CapacityError(Exception):
+    """A capacity action could not be carried out"""
+
+
+def run_command(command: List[str], timeout: int = 900) -> str:
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise CapacityError(f"{command[0]}: {e}") from e
+    if result.returncode != 0:
+        output = (result.stderr or result.stdout).strip()[-500:]
+        raise CapacityError(f"{' '.join(command)} failed ({result.returncode}): {output}")
+    return result.stdout
+
+
+def validate_params(action: str, params: Dict) -> Dict:
+    """Known parameters of an action, converted and within their limits"""
+    allowed = PARAM_LIMITS.get(action)
+    if allowed is None:
+        raise CapacityError(f"Unknown capacity action: {action}")
+    clean = {}
+    for key, value in params.items():
+        if key not in allowed:
+            raise CapacityError(f"Unsupported parameter for {action}: {key}")
+        if key == "instance_type":
+            if value not in INSTANCE_LADDER:
+                raise CapacityError(f"instance_type must be one of {', '.join(INSTANCE_LADDER)}")
+            clean[key] = value
+            continue
+        low, high = allowed[key]
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            raise CapacityError(f"{key} must be an integer, got {value!r}")
+        if not low <= number <= high:
+            raise CapacityError(f"{key} must be {low}-{high}, got {number}")
+        clean[key] = number
+    return clean
+
+
+def _privileged(command: List[str]) -> List[str]:
+    return command if os.geteuid() == 0 else ["sudo", "-n"] + command
+
+
+# ============================================================
+# Backends
+# ============================================================
+
+class Backend:
+    name = "base"
+    actions: Tuple[str, ...] = ()
+
+    def __init__(self, runner: Runner = run_command):
+        self.run = runner
+
+    def provisioned(self, action: str) -> bool:
+        """Whether this host has what the action needs (default routes skip it otherwise)"""
+        return action in self.actions
+
+    def execute(self, action: str, params: Dict, log: Callable[[str], None]) -> Dict:
+        handler = getattr(self, action, None)
+        if action not in self.actions or handler is None:
+            raise CapacityError(f"Backend '{self.name}' cannot {action}")
+        return handler(validate_params(action, params), log)
+
+
+class LocalBackend(Backend):
+    """Changes on this host: swap files and loopback filesystems"""
+
+    name = "local"
+    actions = ("add_swap", "expand_disk")
+
+    def __init__(self, runner: Runner = run_command, swap_file: str = SWAP_FILE,
+                 loop_image: str = LOOP_IMAGE, proc_swaps: str = "/proc/swaps"):
+        super().__init__(runner)
+        self.swap_file = swap_file
+        self.loop_image = loop_image
+        self.proc_swaps = proc_swaps
+
+    def provisioned(self, action: str) -> bool:
+        # Nothing creates the loopback image; only grow one that is there
+        if action == "expand_disk":
+            return os.path.exists(self.loop_image)
+        return super().provisioned(action)
+
+    def active_swaps(self) -> List[str]:
+        try:
+            with open(self.proc_swaps) as f:
+                return [line.split()[0] for line in f.readlines()[1:] if line.strip()]
+        except OSError:
+            return []
+
+    def add_swap(self, params: Dict, log: Callable[[str], None]) -> Dict:
+        size_mb = params.get("size_mb", DEFAULT_SWAP_MB)
+        path = self.swap_file
+        if path in self.active_swaps():
+            log(f"{path} is already in use as swap")
+            return {"status": "unchanged", "swap_file": path}
+        free_mb = shutil.disk_usage(os.path.dirname(path) or "/").free // (1 << 20)
+        if free_mb < size_mb * 1.1:
+            raise CapacityError(f"Only {free_mb} MB free for a {size_mb} MB swap file")
+
+        log(f"Allocating {size_mb} MB at {path}")
+        try:
+            self.run(_privileged(["fallocate", "-l", f"{size_mb}M", path]))
+        except CapacityError:
+            # Some filesystems (and older kernels) can't fallocate swap files
+            self.run(_privileged(["dd", "if=/dev/zero", f"of={path}", "bs=1M", f"count={size_mb}"]))
+        self.run(_privileged(["chmod", "600", path]))
+        log("Formatting and enabling swap")
+        self.run(_privileged(["mkswap", path]))
+        self.run(_privileged(["swapon", path]))
+        return {"status": "enabled", "swap_file": path, "size_mb": size_mb}
+
+    def expand_disk(self, params: Dict, log: Callable[[str], None]) -> Dict:
+        grow_mb = params.get("grow_mb", DEFAULT_GROW_MB)
+        image = self.loop_image
+        if not os.path.exists(image):
+            raise CapacityError(f"No loopback image at {image}")
+        # "/dev/loop0: [2049]:131 (/opt/self-heal/data.img)"
+        attached = self.run(_privileged(["losetup", "-j", image])).strip()
+        if not attached:
+            raise CapacityError(f"{image} is not attached to a loop device")
+        device = attached.splitlines()[0].split(":", 1)[0]
+
+        log(f"Growing {image} by {grow_mb} MB")
+        self.run(_privileged(["truncate", "-s", f"+{grow_mb}M", image]))
+        log(f"Resizing {device} and its filesystem")
+        self.run(_privileged(["losetup", "-c", device]))
+        self.run(_privileged(["resize2fs", device]))
+        return {"status": "expanded", "image": image, "device": device, "grown_mb": grow_mb}
+
+
+def _block_span(text: str, header: str) -> Tuple[int, int]:
+    """(start, end) offsets of a block's body, skipping braces in strings and heredocs"""
+    start = text.find(header)
+    if start < 0:
+        raise CapacityError(f"'{header}' not found")
+    i = text.index("{", start) + 1
+    body_start = i
+    depth = 1
+    while i < len(text):
+        ch = text[i]
+        if ch == '"':
+            i += 1
+            while i < len(text) and text[i] != '"':
+                i += 2 if text[i] == "\\" else 1
+        elif text.startswith("<<", i):
+            match = re.match(r"<<-?(\w+)", text[i:])
+            if match:
+                end = re.compile(rf"^\s*{match.group(1)}\s*$", re.M).search(text, i + match.end())
+                i = end.end() if end else len(text)
+                continue
+        elif ch == "#":
+            i = text.find("\n", i)
+            if i < 0:
+                break
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return body_start, i
+        i += 1
+    raise CapacityError(f"Unterminated block '{header}'")
+
+
+class TerraformBackend(Backend):
+    """Edits the instance definition in main.tf and applies it with Terraform"""
+
+    name = "terraform"
+    actions = ("upgrade_instance", "expand_disk")
+
+    def __init__(self, runner: Runner = run_command, tf_dir: Path = TERRAFORM_DIR,
+                 resource: str = "aws_instance.web_server", binary: str = "terraform"):
+        super().__init__(runner)
+        self.tf_dir = Path(tf_dir)
+        self.resource = resource
+        self.binary = binary
+
+    def provisioned(self, action: str) -> bool:
+        return (super().provisioned(action) and (self.tf_dir / "main.tf").exists()
+                and shutil.which(self.binary) is not None)
+
+    @property
+    def header(self) -> str:
+        kind, name = self.resource.split(".", 1)
+        return f'resource "{kind}" "{name}"'
+
+    def render(self, text: str, action: str, params: Dict) -> Tuple[str, Dict]:
+        """main.tf with the change applied, and what changed"""
+        start, end = _block_span(text, self.header)
+        body = text[start:end]
+        if action == "upgrade_instance":
+            match = re.search(r'^(\s*instance_type\s*=\s*)"([^"]+)"([ \t]*#.*)?', body, re.M)
+            if not match:
+                raise CapacityError(f"No instance_type in {self.resource}")
+            current = match.group(2)
+            target = params.get("instance_type")
+            if not target:
+                if current not in INSTANCE_LADDER or current == INSTANCE_LADDER[-1]:
+                    raise CapacityError(f"No larger size known for {current}; pass instance_type")
+                target = INSTANCE_LADDER[INSTANCE_LADDER.index(current) + 1]
+            elif current in INSTANCE_LADDER and INSTANCE_LADDER.index(target) <= INSTANCE_LADDER.index(current):
+                raise CapacityError(f"upgrade_instance only moves up: {current} -> {target}")
+            # Drop a trailing comment like "# Free Tier eligible", it no longer holds
+            body = body[:match.start(2)] + target + '"' + body[match.end():]
+            change = {"instance_type": {"from": current, "to": target}}
+        elif action == "expand_disk":
+            block = re.search(r"^(\s*)root_block_device\s*\{(.*?)^\s*\}", body, re.M | re.S)
+            size = re.search(r"volume_size\s*=\s*(\d+)", block.group(2)) if block else None
+            current = int(size.group(1)) if size else DEFAULT_ROOT_GB
+            target = current + int(params.get("grow_gb", DEFAULT_GROW_GB))
+            if target <= current:
+                raise CapacityError(f"EBS volumes only grow: {current} GB -> {target} GB")
+            if size:
+                offset = block.start(2) + size.start(1)
+                body = body[:offset] + str(target) + body[offset + len(size.group(1)):]
+            elif block:
+                indent = block.group(1).strip("\n") + "  "
+                insert = block.start(2)
+                body = body[:insert] + f"\n{indent}volume_size = {target}" + body[insert:]
+            else:
+                anchor = re.search(r"^(\s*)instance_type\s*=.*$", body, re.M)
+                if not anchor:
+                    raise CapacityError(f"No instance_type in {self.resource}")
+                indent = anchor.group(1).strip("\n")
+                addition = (f"\n\n{indent}root_block_device {{\n{indent}  volume_size = {target}\n"
+                            f"{indent}}}\n")
+                body = body[:anchor.end()] + addition + body[anchor.end():]
+            change = {"volume_size_gb": {"from": current, "to": target}}
+        else:
+            raise CapacityError(f"Backend '{self.name}' cannot {action}")
+        return text[:start] + body + text[end:], change
+
+    def _terraform(self, *args: str) -> str:
+        return self.run([self.binary, f"-chdir={self.tf_dir}", *args])
+
+    def _apply(self, action: str, params: Dict, log: Callable[[str], None]) -> Dict:
+        main_tf = self.tf_dir / "main.tf"
+        original = main_tf.read_text()
+        updated, change = self.render(original, action, params)
+        log(f"{self.resource}: " + ", ".join(f"{k} {v['from']} -> {v['to']}" for k, v in change.items()))
+        main_tf.write_text(updated)
+        try:
+            if not (self.tf_dir / ".terraform").exists():
+                log("terraform init")
+                self._terraform("init", "-input=false")
+            log("terraform plan")
+            self._terraform("plan", "-input=false", f"-target={self.resource}", "-out=selfheal.tfplan")
+            log("terraform apply")
+            self._terraform("apply", "-input=false", "selfheal.tfplan")
+        except CapacityError:
+            # Leave main.tf describing what is actually deployed
+            main_tf.write_text(original)
+            raise
+        finally:
+            (self.tf_dir / "selfheal.tfplan").unlink(missing_ok=True)
+        return {"status": "applied", "resource": self.resource, "changes": change}
+
+    def upgrade_instance(self, params: Dict, log: Callable[[str], None]) -> Dict:
+        return self._apply("upgrade_instance", params, log)
+
+    def expand_disk(self, params: Dict, log: Callable[[str], None]) -> Dict:
+        return self._apply("expand_disk", params, log)
+
+
+class FakeBackend(Backend):
+    """Records requests instead of changing anything; params {"fail": "..."} raise"""
+
+    name = "fake"
+    actions = ("add_swap", "expand_disk", "upgrade_instance")
+
+    def __init__(self, runner: Runner = run_command):
+        super().__init__(runner)
+        self.calls: List[Tuple[str, Dict]] = []
+
+    def execute(self, action: str, params: Dict, log: Callable[[str], None]) -> Dict:
+        if action not in self.actions:
+            raise CapacityError(f"Backend '{self.name}' cannot {action}")
+        self.calls.append((action, dict(params)))
+        if params.get("fail"):
+            raise CapacityError(str(params["fail"]))
+        log(f"Simulated {action}")
+        return {"status": "simulated", "action": action, "params": params}
+
+
+# ============================================================
+# Jobs
+# ============================================================
+
+class Job:
+    __slots__ = ("id", "action", "backend", "params", "requested_by", "status",
+                 "created", "started", "finished", "steps", "result", "error")
+
+    def __init__(self, action: str, backend: str, params: Dict, requested_by: str = ""):
+        self.id = uuid.uuid4().hex[:12]
+        self.action = action
+        self.backend = backend
+        self.params = params
+        self.requested_by = requested_by
+        self.status = "queued"  # queued | running | succeeded | failed | interrupted
+        self.created = datetime.now().isoformat()
+        self.started: Optional[str] = None
+        self.finished: Optional[str] = None
+        self.steps: List[Dict] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Job":
+        job = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(job, name, data.get(name))
+        job.steps = job.steps or []
+        return job
+
+
+class CapacityExecutor:
+    """Queue of capacity jobs, executed one at a time by their backend"""
+
+    def __init__(self, backends: Dict[str, Backend], routes: Optional[Dict[str, str]] = None,
+                 state_file: Path = JOBS_FILE):
+        self.backends = backends
+        self.routes = dict(DEFAULT_ROUTES if routes is None else routes)
+        self.state_file = Path(state_file)
+        self.queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Condition(self._lock)
+        self._load()
+
+    @classmethod
+    def from_env(cls) -> "CapacityExecutor":
+        backends = {b.name: b for b in (LocalBackend(), TerraformBackend(), FakeBackend())}
+        # Default routes only to backends this host has set up; explicit ones always apply
+        routes = {action: name for action, name in DEFAULT_ROUTES.items()
+                  if backends[name].provisioned(action)}
+        for entry in filter(None, os.environ.get("SELF_HEAL_CAPACITY_BACKENDS", "").split(",")):
+            action, _, backend = entry.partition("=")
+            routes[action.strip()] = backend.strip()
+        return cls(backends, routes)
+
+    def supports(self, action: str) -> bool:
+        backend = self.backends.get(self.routes.get(action, ""))
+        return backend is not None and action in backend.actions
+
+    # ---------------- state ----------------
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.state_file.read_text())
+        except (OSError, ValueError):
+            return
+        for item in data:
+            job = Job.from_dict(item)
+            if job.active:
+                # The process stopped while it was pending; don't re-run blindly
+                job.status = "interrupted"
+            self._jobs[job.id] = job
+
+    def _save(self) -> None:
+        """Write the newest MAX_JOBS_KEPT jobs; callers hold the lock"""
+        jobs = sorted(self._jobs.values(), key=lambda j: j.created)[-MAX_JOBS_KEPT:]
+        self._jobs = {job.id: job for job in jobs}
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_file.with_suffix(".tmp")
+            tmp.write_text(json.dumps([job.to_dict() for job in jobs], indent=2))
+            tmp.replace(self.state_file)
+        except OSError as e:
+            logger.error(f"Could not save capacity jobs: {e}")
+
+    # ---------------- API ----------------
+
+    def submit(self, action: str, params: Optional[Dict] = None, requested_by: str = "") -> Job:
+        """Queue a job; a second click while one for the same action is pending returns that one"""
+        if not self.supports(action):
+            raise CapacityError(f"No backend configured for {action}")
+        with self._lock:
+            for job in self._jobs.values():
+                if job.action == action and job.active:
+                    return job
+            job = Job(action, self.routes[action], dict(params or {}), requested_by)
+            self._jobs[job.id] = job
+            self._save()
+        self.queue.put(job)
+        logger.info(f"Capacity job {job.id} queued: {action} via {job.backend}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, limit: int = 50) -> List[Dict]:
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.created, reverse=True)[:limit]
+            return [job.to_dict() for job in jobs]
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Block until the job has finished (tests, CLI)"""
+        with self._done:
+            self._done.wait_for(lambda: not self._jobs[job_id].active, timeout)
+            return self._jobs[job_id]
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="capacity-executor", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop after the running job (a half-applied Terraform run is worse than waiting)"""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ---------------- worker ----------------
+
+    def _step(self, job: Job, message: str) -> None:
+        logger.info(f"Capacity job {job.id}: {message}")
+        with self._lock:
+            job.steps.append({"time": datetime.now().isoformat(), "message": message})
+            self._save()
+
+    def execute(self, job: Job) -> Job:
+        with self._lock:
+            job.status = "running"
+            job.started = datetime.now().isoformat()
+            self._save()
+        try:
+            result = self.backends[job.backend].execute(job.action, job.params, lambda m: self._step(job, m))
+            status, error = "succeeded", None
+        except (CapacityError, ValueError, OSError) as e:
+            result, status, error = None, "failed", str(e)
+            logger.error(f"Capacity job {job.id} failed: {e}")
+        with self._done:
+            job.result = result
+            job.error = error
+            job.status = status
+            job.finished = datetime.now().isoformat()
+            self._save()
+            self._done.notify_all()
+        return job
+
+    def _run(self) -> None:
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            self.execute(job)
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def _params(items: List[str]) -> Dict[str, str]:
+    params = {}
+    for item in items:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"expected key=value, got {item}")
+        params[key.strip()] = value.strip()
+    return params
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Capacity actions for self-healing")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run an action now and wait for it")
+    run.add_argument("action", choices=sorted(DEFAULT_ROUTES))
+    run.add_argument("--backend", choices=["local", "terraform", "fake"])
+    run.add_argument("--param", action="append", default=[], help="key=value, e.g. size_mb=2048")
+
+    render = sub.add_parser("render", help="Show the main.tf change without applying it")
+    render.add_argument("action", choices=list(TerraformBackend.actions))
+    render.add_argument("--param", action="append", default=[])
+
+    jobs = sub.add_parser("jobs", help="List recent jobs")
+    jobs.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args(argv)
+    executor = CapacityExecutor.from_env()
+
+    try:
+        if args.command == "run":
+            if args.backend:
+                executor.routes[args.action] = args.backend
+            job = executor.submit(args.action, _params(args.param), requested_by="cli")
+            if job.status == "queued":
+                executor.execute(job)
+            result = job.to_dict()
+        elif args.command == "render":
+            backend = executor.backends["terraform"]
+            original = (backend.tf_dir / "main.tf").read_text()
+            updated, change = backend.render(original, args.action, validate_params(args.action, _params(args.param)))
+            diff = difflib.unified_diff(original.splitlines(True), updated.splitlines(True), "main.tf", "main.tf")
+            sys.stdout.write("".join(diff))
+            result = {"changes": change}
+        else:
+            result = {"jobs": executor.jobs(args.limit)}
+    except (CapacityError, argparse.ArgumentTypeError, OSError) as e:
+        print(json.dumps({"status": "error", "error": str(e)}))
+        return 1
+
+    print(json.dumps(result, indent=2))
+    return 0 if result.get("status", "succeeded") != "failed" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
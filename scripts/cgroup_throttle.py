@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Self-Healing cgroup v2 Throttling
+Non-destructive remediation for CPU and memory hogs: offending PIDs are moved
+into a managed slice with cpu.max / memory.high limits, and released back to
+their original cgroup once they stop pushing against the limits.
+
+Usage (needs root to move processes between cgroups):
+    sudo python3 cgroup_throttle.py throttle 1234 5678 [--cpu-max "20000 100000"] [--memory-high 256M]
+    sudo python3 cgroup_throttle.py throttle-top cpu [--count 3]
+    sudo python3 cgroup_throttle.py release-idle
+    sudo python3 cgroup_throttle.py release --all
+    python3 cgroup_throttle.py status
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Paths
+LOG_DIR = Path(os.environ.get("SELF_HEAL_LOG_DIR", "/opt/self-heal/logs"))
+STATE_FILE = LOG_DIR / "throttled.json"
+CGROUP_ROOT = Path(os.environ.get("SELF_HEAL_CGROUP_ROOT", "/sys/fs/cgroup"))
+SLICE_NAME = "selfheal.slice"
+
+# Limits
+DEFAULT_CPU_MAX = "20000 100000"   # 20% of one CPU per throttled group
+DEFAULT_MEMORY_HIGH = "256M"       # Reclaim pressure above this, never OOM-kill
+RELEASE_QUIET_SECONDS = 60         # Release after this long without hitting a limit
+MAX_THROTTLE_SECONDS = 1800        # Hard cap on how long anything stays throttled
+
+# Processes we never touch (same list as handle_high_cpu.sh)
+CRITICAL_PROCS = {
+    "systemd", "sshd", "dockerd", "containerd", "python3", "node",
+    "postgres", "mysql", "nginx", "apache2",
+}
+
+
+class CgroupError(Exception):
+    """cgroup v2 is unavailable or an operation on it failed"""
+
+
+class CgroupThrottler:
+    """Manage throttled groups under <cgroup root>/selfheal.slice"""
+
+    def __init__(self, root: Path = CGROUP_ROOT, state_file: Path = STATE_FILE,
+                 proc_root: str = "/proc", slice_name: str = SLICE_NAME):
+        self.root = Path(root)
+        self.slice = self.root / slice_name
+        self.state_file = Path(state_file)
+        self.proc_root = Path(proc_root)
+
+    # ---------------- cgroupfs helpers ----------------
+
+    def available(self) -> bool:
+        """True if a cgroup v2 hierarchy with the cpu controller is mounted"""
+        try:
+            controllers = (self.root / "cgroup.controllers").read_text().split()
+        except OSError:
+            return False
+        return "cpu" in controllers
+
+    @staticmethod
+    def _write(path: Path, value: str) -> None:
+        try:
+            with open(path, "w") as f:
+                f.write(value)
+        except OSError as e:
+            raise CgroupError(f"Failed to write '{value}' to {path}: {e}") from e
+
+    @staticmethod
+    def _read_kv(path: Path) -> Dict[str, int]:
+        values: Dict[str, int] = {}
+        try:
+            for line in path.read_text().splitlines():
+                key, _, value = line.partition(" ")
+                if value.strip().isdigit():
+                    values[key] = int(value)
+        except OSError:
+            pass
+        return values
+
+    def _ensure_slice(self) -> None:
+        if not self.available():
+            raise CgroupError(f"cgroup v2 with cpu controller not available at {self.root}")
+        controllers = set((self.root / "cgroup.controllers").read_text().split())
+        wanted = " ".join(f"+{c}" for c in ("cpu", "memory") if c in controllers)
+        self.slice.mkdir(exist_ok=True)
+        for parent in (self.root, self.slice):
+            enabled = set()
+            try:
+                enabled = set((parent / "cgroup.subtree_control").read_text().split())
+            except OSError:
+                pass
+            if not {c.lstrip("+") for c in wanted.split()} <= enabled:
+                self._write(parent / "cgroup.subtree_control", wanted)
+
+    def pid_cgroup(self, pid: int) -> str:
+        """cgroup v2 path of a process, relative to the hierarchy root"""
+        try:
+            for line in (self.proc_root / str(pid) / "cgroup").read_text().splitlines():
+                if line.startswith("0::"):
+                    return line[3:].strip() or "/"
+        except OSError as e:
+            raise CgroupError(f"Cannot read cgroup of PID {pid}: {e}") from e
+        raise CgroupError(f"PID {pid} is not in a cgroup v2 hierarchy")
+
+    def _group_pids(self, path: Path) -> List[int]:
+        try:
+            return [int(p) for p in (path / "cgroup.procs").read_text().split()]
+        except OSError:
+            return []
+
+    def _counters(self, path: Path) -> Dict[str, int]:
+        return {
+            "nr_throttled": self._read_kv(path / "cpu.stat").get("nr_throttled", 0),
+            "memory_high": self._read_kv(path / "memory.events").get("high", 0),
+        }
+
+    # ---------------- state ----------------
+
+    def groups(self) -> Dict[str, Dict]:
+        try:
+            return json.loads(self.state_file.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, groups: Dict[str, Dict]) -> None:
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        self.state_file.write_text(json.dumps(groups, indent=2))
+
+    # ---------------- actions ----------------
+
+    def throttle(self, pids: List[int], cpu_max: Optional[str] = DEFAULT_CPU_MAX,
+                 memory_high: Optional[str] = DEFAULT_MEMORY_HIGH, reason: str = "") -> Dict:
+        """Move PIDs into a new limited group; limits apply immediately"""
+        if not pids:
+            raise CgroupError("No PIDs to throttle")
+        self._ensure_slice()
+
+        name = f"throttle-{pids[0]}-{int(time.time())}"
+        path = self.slice / name
+        path.mkdir(exist_ok=True)
+        if cpu_max:
+            self._write(path / "cpu.max", cpu_max)
+        if memory_high:
+            self._write(path / "memory.high", memory_high)
+
+        origins: Dict[str, str] = {}
+        for pid in pids:
+            try:
+                origins[str(pid)] = self.pid_cgroup(pid)
+                self._write(path / "cgroup.procs", str(pid))
+            except CgroupError as e:
+                logger.warning(f"Skipping PID {pid}: {e}")
+                origins.pop(str(pid), None)
+
+        if not origins:
+            self._remove_group(path)
+            raise CgroupError(f"None of the PIDs could be throttled: {pids}")
+
+        now = time.time()
+        record = {
+            "name": name,
+            "pids": [int(p) for p in origins],
+            "origins": origins,
+            "cpu_max": cpu_max,
+            "memory_high": memory_high,
+            "reason": reason,
+            "created": now,
+            "created_at": datetime.fromtimestamp(now).isoformat(),
+            "last_activity": now,
+            "counters": self._counters(path),
+        }
+        groups = self.groups()
+        groups[name] = record
+        self._save(groups)
+        logger.info(f"Throttled PIDs {record['pids']} in {name} (cpu.max={cpu_max}, memory.high={memory_high})")
+        return record
+
+    def _remove_group(self, path: Path) -> None:
+        try:
+            os.rmdir(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            raise CgroupError(f"Failed to remove {path}: {e}") from e
+
+    def _ppid(self, pid: int) -> Optional[int]:
+        try:
+            stat = (self.proc_root / str(pid) / "stat").read_text()
+            return int(stat.rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def _origin(self, pid: int, origins: Dict[str, str]) -> str:
+        """Where a PID goes back to: its own origin, else its parent's (forked while throttled)"""
+        if str(pid) in origins:
+            return origins[str(pid)]
+        return origins.get(str(self._ppid(pid)), "/")
+
+    def release(self, name: str) -> Dict:
+        """
+        Move every process in a group back where it came from and remove it.
+        The group stays on record if it can't be removed, to be retried.
+        """
+        groups = self.groups()
+        record = groups.get(name)
+        if record is None:
+            raise CgroupError(f"Unknown throttle group: {name}")
+        path = self.slice / name
+
+        restored = []
+        # Children forked inside the group are in cgroup.procs but not in origins
+        live = self._group_pids(path) or [int(pid) for pid in record["origins"]]
+        for pid in live:
+            target = self.root / self._origin(pid, record["origins"]).lstrip("/")
+            try:
+                self._write(target / "cgroup.procs", str(pid))
+            except CgroupError:
+                # Original cgroup is gone - fall back to the hierarchy root
+                try:
+                    self._write(self.root / "cgroup.procs", str(pid))
+                except CgroupError as e:
+                    logger.warning(f"Could not restore PID {pid}: {e}")
+                    continue
+            restored.append(pid)
+
+        self._remove_group(path)
+        del groups[name]
+        self._save(groups)
+        logger.info(f"Released {name}: restored PIDs {restored}")
+        return {"name": name, "restored": restored}
+
+    def release_idle(self, quiet_seconds: float = RELEASE_QUIET_SECONDS,
+                     max_seconds: float = MAX_THROTTLE_SECONDS, now: Optional[float] = None) -> List[Dict]:
+        """
+        Release groups whose pressure has subsided: no new cpu.max throttling
+        or memory.high events for quiet_seconds (or they outlived max_seconds,
+        or every process in them has exited).
+        """
+        now = time.time() if now is None else now
+        groups = self.groups()
+        released = []
+        changed = False
+
+        for name, record in list(groups.items()):
+            path = self.slice / name
+            counters = self._counters(path)
+            if counters != record.get("counters"):
+                record["counters"] = counters
+                record["last_activity"] = now
+                changed = True
+
+            idle = now - record["last_activity"] >= quiet_seconds
+            expired = now - record["created"] >= max_seconds
+            empty = path.exists() and not self._group_pids(path)
+            if idle or expired or empty or not path.exists():
+                if changed:
+                    self._save(groups)
+                    changed = False
+                try:
+                    released.append(self.release(name))
+                except CgroupError as e:
+                    logger.error(f"Could not release {name}: {e}")
+                groups = self.groups()
+
+        if changed:
+            self._save(groups)
+        return released
+
+    # ---------------- process selection ----------------
+
+    def _comm(self, pid: int) -> str:
+        try:
+            return (self.proc_root / str(pid) / "comm").read_text().strip()
+        except OSError:
+            return ""
+
+    def top_processes(self, resource: str, count: int = 3, min_percent: float = 40.0,
+                      interval: float = 0.5) -> List[Dict]:
+        """Heaviest non-critical processes by CPU% (sampled) or memory% (RSS)"""
+        def pids():
+            return [int(p) for p in os.listdir(self.proc_root) if p.isdigit() and int(p) != os.getpid()]
+
+        def cpu_ticks(pid: int) -> Optional[int]:
+            try:
+                stat = (self.proc_root / str(pid) / "stat").read_text()
+                fields = stat.rsplit(")", 1)[1].split()
+                return int(fields[11]) + int(fields[12])
+            except (OSError, IndexError, ValueError):
+                return None
+
+        usage: Dict[int, float] = {}
+        if resource.lower() == "cpu":
+            hz = os.sysconf("SC_CLK_TCK")
+            before = {pid: cpu_ticks(pid) for pid in pids()}
+            time.sleep(interval)
+            for pid, start in before.items():
+                end = cpu_ticks(pid)
+                if start is not None and end is not None:
+                    usage[pid] = 100.0 * (end - start) / hz / interval
+        else:
+            page = os.sysconf("SC_PAGE_SIZE")
+            total = os.sysconf("SC_PHYS_PAGES") * page
+            for pid in pids():
+                try:
+                    rss_pages = int((self.proc_root / str(pid) / "statm").read_text().split()[1])
+                except (OSError, IndexError, ValueError):
+                    continue
+                usage[pid] = 100.0 * rss_pages * page / total
+
+        result = []
+        for pid, percent in sorted(usage.items(), key=lambda item: item[1], reverse=True):
+            if percent < min_percent or len(result) >= count:
+                break
+            comm = self._comm(pid)
+            if comm in CRITICAL_PROCS:
+                continue
+            result.append({"pid": pid, "comm": comm, "percent": round(percent, 1)})
+        return result
+
+
+# ============================================================
+# CLI (used by the receiver, dashboard and shell handlers via sudo)
+# ============================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="cgroup v2 throttling for self-healing")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    throttle = sub.add_parser("throttle", help="Throttle specific PIDs")
+    throttle.add_argument("pids", nargs="+", type=int)
+    throttle.add_argument("--cpu-max", default=DEFAULT_CPU_MAX)
+    throttle.add_argument("--memory-high", default=DEFAULT_MEMORY_HIGH)
+    throttle.add_argument("--reason", default="manual")
+
+    top = sub.add_parser("throttle-top", help="Throttle the heaviest non-critical processes")
+    top.add_argument("resource", choices=["cpu", "memory"])
+    top.add_argument("--count", type=int, default=3)
+    top.add_argument("--min-percent", type=float, default=40.0)
+    top.add_argument("--cpu-max", default=DEFAULT_CPU_MAX)
+    top.add_argument("--memory-high", default=DEFAULT_MEMORY_HIGH)
+
+    release = sub.add_parser("release", help="Release throttled groups")
+    release.add_argument("name", nargs="?")
+    release.add_argument("--all", action="store_true")
+
+    idle = sub.add_parser("release-idle", help="Release groups whose pressure has subsided")
+    idle.add_argument("--quiet", type=float, default=RELEASE_QUIET_SECONDS)
+
+    sub.add_parser("status", help="Show throttled groups")
+
+    args = parser.parse_args(argv)
+    throttler = CgroupThrottler()
+
+    try:
+        if args.command == "throttle":
+            result = throttler.throttle(args.pids, args.cpu_max, args.memory_high, args.reason)
+        elif args.command == "throttle-top":
+            procs = throttler.top_processes(args.resource, args.count, args.min_percent)
+            if not procs:
+                result = {"status": "nothing_to_throttle", "resource": args.resource}
+            else:
+                cpu_max = args.cpu_max if args.resource == "cpu" else None
+                memory_high = args.memory_high if args.resource == "memory" else None
+                result = throttler.throttle([p["pid"] for p in procs], cpu_max, memory_high,
+                                            reason=f"high {args.resource}")
+                result["processes"] = procs
+        elif args.command == "release":
+            names = list(throttler.groups()) if args.all else [args.name] if args.name else []
+            if not names:
+                parser.error("give a group name or --all")
+            result = {"released": [throttler.release(n) for n in names]}
+        elif args.command == "release-idle":
+            result = {"released": throttler.release_idle(args.quiet)}
+        else:
+            result = {"available": throttler.available(), "groups": throttler.groups()}
+    except CgroupError as e:
+        print(json.dumps({"status": "error", "error": str(e)}))
+        return 1
+
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
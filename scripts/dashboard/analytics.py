@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Incident analytics for the dashboard.
+Reads the self-healing logs incrementally (byte offsets for the append-only
+files, a timestamp watermark for the rewritten actions_history.json) into
+array-backed columns, and answers range aggregates from them:
+
+  mttr       time from first firing to resolved, per alert (p50/p90/p99)
+  alerts     firing notifications per host per time bucket, plus the hosts
+             and alerts that flap (open a new incident) most often
+  actions    attempts and success rate per remediation (auto scripts,
+             dashboard choices, manual cleanups, approvals, dismissals)
+
+Sources (all in LOG_DIR): webhook.log, recommendations.json,
+actions_history.json, approvals.log, dismissals.log.
+
+Usage:
+    python3 analytics.py summary --window 7d
+    python3 analytics.py bench --days 365 --per-hour 60
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import datetime
+from itertools import compress
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+LOG_DIR = Path(os.environ.get("SELF_HEAL_LOG_DIR", "/opt/self-heal/logs"))
+
+READ_CHUNK = 4 * 1024 * 1024
+HOUR = 3600
+WINDOWS = {"h": HOUR, "d": 24 * HOUR, "w": 7 * 24 * HOUR}
+
+# Outcome codes in the actions table
+FAILED, SUCCEEDED, UNKNOWN = 0, 1, -1
+
+# "2026-10-19 10:00:00,123 - webhook_receiver - INFO - Processing alert: HighCPUUsage on web-1 (severity: ..."
+# (older receivers logged no instance)
+PROCESSING_RE = re.compile(
+    r"^(\d{4}-\d\d-\d\d \d\d:\d\d):(\d\d),(\d{3}) - \S+ - \w+ - Processing alert: "
+    r"(\S+)(?: on (\S+))? \(severity: (\w+), status: (\w+)"
+)
+HISTORY_ACTION_RE = re.compile(r"^(\w+?)_ACTION$")
+MANUAL_CLEANUP_RE = re.compile(r"^MANUAL_(\w+)_CLEANUP$")
+
+
+def parse_time(value) -> Optional[float]:
+    """Epoch seconds from a number, an epoch string or an ISO timestamp (naive = local time)"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_window(value: str) -> int:
+    """'36h', '7d', '2w' or plain seconds"""
+    value = value.strip().lower()
+    if value[-1:] in WINDOWS:
+        return int(float(value[:-1]) * WINDOWS[value[-1]])
+    return int(value)
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class Symbols:
+    """Interns strings so columns can hold small integer codes"""
+
+    __slots__ = ("codes", "names")
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def code(self, name: str) -> int:
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+class EventTable:
+    """
+    Append-only columns sharing one row index, ordered by the "ts" column.
+    Rows may arrive slightly out of order (several sources, incidents that
+    close late); the table is re-sorted once before the next query.
+    """
+
+    __slots__ = ("columns", "_sorted")
+
+    def __init__(self, **typecodes: str):
+        self.columns: Dict[str, array] = {"ts": array("d")}
+        self.columns.update((name, array(code)) for name, code in typecodes.items())
+        self._sorted = True
+
+    def __len__(self) -> int:
+        return len(self.columns["ts"])
+
+    def append(self, ts: float, **values) -> None:
+        column = self.columns["ts"]
+        if column and ts < column[-1]:
+            self._sorted = False
+        column.append(ts)
+        for name, value in values.items():
+            self.columns[name].append(value)
+
+    def nbytes(self) -> int:
+        return sum(len(c) * c.itemsize for c in self.columns.values())
+
+    def _sort(self) -> None:
+        if self._sorted:
+            return
+        ts = self.columns["ts"]
+        order = sorted(range(len(ts)), key=ts.__getitem__)
+        for name, column in self.columns.items():
+            self.columns[name] = array(column.typecode, map(column.__getitem__, order))
+        self._sorted = True
+
+    def select(self, start: float, end: float, *names: str) -> List[array]:
+        """Slices of the named columns for rows with start <= ts < end"""
+        self._sort()
+        ts = self.columns["ts"]
+        lo, hi = bisect_left(ts, start), bisect_left(ts, end)
+        return [self.columns[name][lo:hi] for name in names]
+
+
+class SourceState:
+    """Where reading a log file stopped"""
+
+    __slots__ = ("inode", "offset", "mtime", "watermark")
+
+    def __init__(self):
+        self.inode = None
+        self.offset = 0
+        self.mtime = 0.0
+        self.watermark = 0.0
+
+
+class IncidentAnalytics:
+    """Columnar store of alerts, incidents and actions built from the logs"""
+
+    def __init__(self, log_dir: Path = LOG_DIR):
+        self.log_dir = Path(log_dir)
+        self.symbols = Symbols()
+        # One row per firing/resolved notification the receiver processed
+        self.alerts = EventTable(hour="l", alert="H", host="H", severity="B", firing="B")
+        # One row per closed incident, at the time it opened
+        self.incidents = EventTable(duration="f", alert="H", host="H")
+        # The same durations split per alert, so percentiles need no grouping pass
+        self.durations: Dict[int, EventTable] = {}
+        # One row per remediation attempt or decision
+        self.actions = EventTable(source="B", action="H", resource="H", outcome="b")
+        self._open: Dict[Tuple[int, int], float] = {}
+        self._sources: Dict[str, SourceState] = defaultdict(SourceState)
+        self._minutes: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    # ------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------
+
+    def refresh(self) -> Dict[str, int]:
+        """Read whatever was appended to the sources since the last call"""
+        with self.lock:
+            return {
+                "webhook.log": self._ingest_webhook_log(),
+                "recommendations.json": self._ingest_recommendations(),
+                "actions_history.json": self._ingest_history(),
+                "approvals.log": self._ingest_jsonl("approvals.log", self._approval),
+                "dismissals.log": self._ingest_jsonl("dismissals.log", self._dismissal),
+            }
+
+    def _read_new(self, name: str) -> Iterator[bytes]:
+        """Yield complete new chunks of a file; a rotated or truncated file is read from the start"""
+        path = self.log_dir / name
+        state = self._sources[name]
+        try:
+            st = path.stat()
+        except OSError:
+            return
+        if st.st_ino != state.inode or st.st_size < state.offset:
+            state.inode, state.offset = st.st_ino, 0
+        if st.st_size == state.offset:
+            return
+        with open(path, "rb") as f:
+            f.seek(state.offset)
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                yield chunk
+                state.offset += len(chunk)
+
+    def _read_lines(self, name: str) -> Iterator[str]:
+        """Yield new complete lines; a half-written last line is left for the next refresh"""
+        state = self._sources[name]
+        tail = b""
+        for chunk in self._read_new(name):
+            lines = (tail + chunk).split(b"\n")
+            tail = lines.pop()
+            for line in lines:
+                yield line.decode("utf-8", "replace")
+        state.offset -= len(tail)
+
+    def _log_time(self, minute: str, second: str, millis: str) -> float:
+        # strptime per line dominates a cold scan; one parse per minute is enough
+        base = self._minutes.get(minute)
+        if base is None:
+            base = self._minutes[minute] = datetime.strptime(minute, "%Y-%m-%d %H:%M").timestamp()
+        return base + int(second) + int(millis) / 1000
+
+    def _ingest_webhook_log(self) -> int:
+        code = self.symbols.code
+        count = 0
+        for line in self._read_lines("webhook.log"):
+            if "Processing alert: " not in line:
+                continue
+            match = PROCESSING_RE.match(line)
+            if not match:
+                continue
+            minute, second, millis, alertname, host, severity, status = match.groups()
+            ts = self._log_time(minute, second, millis)
+            alert, host = code(alertname), code(host or "unknown")
+            firing = status != "resolved"
+            self.alerts.append(ts, hour=int(ts // HOUR), alert=alert, host=host,
+                               severity=code(severity.lower()), firing=firing)
+            key = (alert, host)
+            if firing:
+                self._open.setdefault(key, ts)
+            elif key in self._open:
+                opened = self._open.pop(key)
+                self._incident(opened, ts - opened, alert, host)
+            count += 1
+        return count
+
+    def _ingest_recommendations(self) -> int:
+        # Appended by handle_*.sh as "[\n{...}\n,\n{...}" - never closed
+        name = "recommendations.json"
+        state = self._sources[name]
+        # surrogateescape keeps a split multi-byte character the same length when re-encoded
+        data = b"".join(self._read_new(name)).decode("utf-8", "surrogateescape")
+        decoder = json.JSONDecoder()
+        pos = count = 0
+        while True:
+            start = data.find("{", pos)
+            if start < 0:
+                pos = len(data)  # only separators left
+                break
+            try:
+                record, end = decoder.raw_decode(data, start)
+            except ValueError:
+                break  # still being written
+            pos = end
+            ts = parse_time(record.get("timestamp"))
+            if ts is None:
+                continue
+            # Scripts report CRITICAL when usage is still over target afterwards
+            healed = str(record.get("severity", "")).upper() != "CRITICAL"
+            self._action(ts, "auto", "auto_heal", record.get("resource"), SUCCEEDED if healed else FAILED)
+            count += 1
+        state.offset -= len(data[pos:].encode("utf-8", "surrogateescape"))
+        return count
+
+    def _ingest_history(self) -> int:
+        # Rewritten newest-first and capped by the dashboard; only entries past the watermark are new
+        name = "actions_history.json"
+        path = self.log_dir / name
+        state = self._sources[name]
+        try:
+            mtime = path.stat().st_mtime
+            if mtime == state.mtime:
+                return 0
+            entries = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return 0
+        state.mtime = mtime
+        count = 0
+        newest = state.watermark
+        for entry in entries:
+            ts = parse_time(entry.get("timestamp"))
+            if ts is None or ts <= state.watermark:
+                continue
+            newest = max(newest, ts)
+            kind = entry.get("type", "")
+            details = entry.get("details") or {}
+            if HISTORY_ACTION_RE.match(kind):
+                outcome = SUCCEEDED if details.get("status") == "success" else FAILED
+                self._action(ts, "dashboard", details.get("action"), kind[:-len("_ACTION")], outcome)
+            elif kind == "MANUAL_ACTION":
+                self._action(ts, "manual", details.get("action_type"), None, SUCCEEDED)
+            elif MANUAL_CLEANUP_RE.match(kind):
+                outcome = FAILED if details.get("errors") else SUCCEEDED
+                self._action(ts, "manual", "cleanup", MANUAL_CLEANUP_RE.match(kind).group(1), outcome)
+            elif kind == "ALERT_DISMISSED":
+                alert = details.get("alert") or {}
+                self._action(ts, "dashboard", "dismiss", alert.get("alert_type"), UNKNOWN)
+            else:
+                continue
+            count += 1
+        state.watermark = newest
+        return count
+
+    def _ingest_jsonl(self, name: str, handle) -> int:
+        count = 0
+        for line in self._read_lines(name):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            ts = parse_time(record.get("timestamp"))
+            if ts is not None:
+                handle(ts, record)
+                count += 1
+        return count
+
+    def _approval(self, ts: float, record: Dict) -> None:
+        self._action(ts, "recommendation", record.get("action"), record.get("resource"), UNKNOWN)
+
+    def _dismissal(self, ts: float, record: Dict) -> None:
+        self._action(ts, "recommendation", "dismiss", None, UNKNOWN)
+
+    def _incident(self, opened: float, duration: float, alert: int, host: int) -> None:
+        self.incidents.append(opened, duration=duration, alert=alert, host=host)
+        table = self.durations.get(alert)
+        if table is None:
+            table = self.durations[alert] = EventTable(duration="f")
+        table.append(opened, duration=duration)
+
+    def _action(self, ts: float, source: str, action: Optional[str], resource: Optional[str], outcome: int) -> None:
+        code = self.symbols.code
+        self.actions.append(ts, source=code(source), action=code(action or "unknown"),
+                            resource=code(str(resource or "unknown").upper()), outcome=outcome)
+
+    # ------------------------------------------------------------
+    # Queries (all ranges are [start, end) in epoch seconds)
+    # ------------------------------------------------------------
+
+    def mttr(self, start: float, end: float) -> Dict:
+        """Incident durations per alert, for incidents opened in the range"""
+        names = self.symbols.names
+        with self.lock:
+            overall, = self.incidents.select(start, end, "duration")
+            grouped = {alert: table.select(start, end, "duration")[0] for alert, table in self.durations.items()}
+            still_open = Counter(names[a] for (a, _), opened in self._open.items() if start <= opened < end)
+
+        def stats(durations: array) -> Dict:
+            values = sorted(durations)
+            return {
+                "count": len(values),
+                "mean": round(sum(values) / len(values), 1),
+                "p50": round(percentile(values, 50), 1),
+                "p90": round(percentile(values, 90), 1),
+                "p99": round(percentile(values, 99), 1),
+                "max": round(values[-1], 1),
+            }
+
+        by_alert = {names[alert]: stats(values) for alert, values in grouped.items() if values}
+        return {
+            "overall": stats(overall) if overall else None,
+            "by_alert": dict(sorted(by_alert.items(), key=lambda item: -item[1]["p50"])),
+            "open": dict(still_open),
+            "unit": "seconds",
+        }
+
+    def alert_frequency(self, start: float, end: float, bucket_hours: int = 1, top: int = 10) -> Dict:
+        """Firing notifications per host per bucket, and the most frequent incidents"""
+        names = self.symbols.names
+        bucket_hours = max(1, int(bucket_hours))
+        first = int(start // HOUR) // bucket_hours
+        last = (-int(-end // HOUR) - 1) // bucket_hours
+        buckets = max(0, last - first + 1)
+        with self.lock:
+            hours, hosts, firing = self.alerts.select(start, end, "hour", "host", "firing")
+            flap_alerts, flap_hosts = self.incidents.select(start, end, "alert", "host")
+        # Counting (host, bucket) pairs with Counter keeps the per-row loop in C
+        hosts, slots = list(compress(hosts, firing)), compress(hours, firing)
+        if bucket_hours > 1:
+            slots = (hour // bucket_hours for hour in slots)
+        per_host: Dict[str, Dict] = {}
+        for (host, slot), n in Counter(zip(hosts, slots)).items():
+            entry = per_host.get(names[host])
+            if entry is None:
+                entry = per_host[names[host]] = {"total": 0, "counts": [0] * buckets}
+            entry["total"] += n
+            entry["counts"][slot - first] += n
+        flaps = Counter(zip(flap_hosts, flap_alerts))
+        return {
+            "start": first * bucket_hours * HOUR,
+            "bucket_seconds": bucket_hours * HOUR,
+            "total": len(hosts),
+            "hosts": dict(sorted(per_host.items(), key=lambda item: -item[1]["total"])),
+            "flapping": [
+                {"host": names[host], "alert": names[alert], "incidents": n}
+                for (host, alert), n in flaps.most_common(top)
+            ],
+        }
+
+    def effectiveness(self, start: float, end: float) -> Dict:
+        """Attempts and success rate per (source, action, resource)"""
+        names = self.symbols.names
+        with self.lock:
+            columns = self.actions.select(start, end, "source", "action", "resource", "outcome")
+        counts = Counter(zip(*columns))
+        grouped: Dict[Tuple[int, int, int], Dict] = {}
+        for (source, action, resource, outcome), n in counts.items():
+            entry = grouped.setdefault((source, action, resource), {
+                "source": names[source], "action": names[action], "resource": names[resource],
+                "attempts": 0, "succeeded": 0, "failed": 0,
+            })
+            entry["attempts"] += n
+            if outcome == SUCCEEDED:
+                entry["succeeded"] += n
+            elif outcome == FAILED:
+                entry["failed"] += n
+        rows = sorted(grouped.values(), key=lambda e: (-e["attempts"], e["source"], e["action"]))
+        for entry in rows:
+            decided = entry["succeeded"] + entry["failed"]
+            entry["success_rate"] = round(entry["succeeded"] / decided, 3) if decided else None
+        return {"actions": rows}
+
+    def report(self, start: float, end: float, bucket_hours: int = 1) -> Dict:
+        return {
+            "range": {"start": start, "end": end},
+            "mttr": self.mttr(start, end),
+            "alerts": self.alert_frequency(start, end, bucket_hours),
+            "actions": self.effectiveness(start, end),
+        }
+
+    def stats(self) -> Dict:
+        tables = {"alerts": self.alerts, "incidents": self.incidents, "actions": self.actions}
+        return {
+            "rows": {name: len(table) for name, table in tables.items()},
+            "memory_bytes": sum(t.nbytes() for t in list(tables.values()) + list(self.durations.values())),
+            "symbols": len(self.symbols.names),
+        }
+
+
+def synthesize(analytics: IncidentAnalytics, days: int, per_hour: int, hosts: int = 20, seed: int = 1) -> float:
+    """Fill the tables with `days` of made-up history ending now; returns the start time"""
+    rng = random.Random(seed)
+    code = analytics.symbols.code
+    host_codes = [code(f"web-{i}") for i in range(hosts)]
+    alert_codes = [code(n) for n in ("HighCPUUsage", "HighMemoryUsage", "HighDiskUsage", "NetworkErrors")]
+    critical, warning = code("critical"), code("warning")
+    sources = [code(s) for s in ("auto", "dashboard", "manual", "recommendation")]
+    action_codes = [code(a) for a in ("auto_heal", "auto", "scale", "cleanup", "add_swap")]
+    resources = [code(r) for r in ("CPU", "MEMORY", "DISK", "NETWORK")]
+    end = time.time()
+    start = end - days * 24 * HOUR
+    step = HOUR / per_hour
+    ts = start
+    while ts < end:
+        host, alert = rng.choice(host_codes), rng.choice(alert_codes)
+        analytics.alerts.append(ts, hour=int(ts // HOUR), alert=alert, host=host,
+                                severity=critical if rng.random() < 0.3 else warning, firing=True)
+        if rng.random() < 0.5:
+            analytics._incident(ts, rng.expovariate(1 / 300), alert, host)
+            analytics.actions.append(ts, source=rng.choice(sources), action=rng.choice(action_codes),
+                                     resource=rng.choice(resources), outcome=rng.choice((0, 1, 1, -1)))
+        ts += step
+    return start
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Incident analytics from the self-healing logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    summary = sub.add_parser("summary", help="MTTR, alert frequency and action effectiveness")
+    summary.add_argument("--log-dir", default=str(LOG_DIR))
+    summary.add_argument("--window", default="7d", help="how far back, e.g. 24h, 7d, 52w")
+    summary.add_argument("--bucket-hours", type=int, default=24)
+
+    bench = sub.add_parser("bench", help="Time ingest-free queries over synthetic history")
+    bench.add_argument("--days", type=int, default=365)
+    bench.add_argument("--per-hour", type=int, default=60, help="alert notifications per hour")
+
+    args = parser.parse_args(argv)
+    if args.command == "summary":
+        analytics = IncidentAnalytics(Path(args.log_dir))
+        ingested = analytics.refresh()
+        end = time.time()
+        result = analytics.report(end - parse_window(args.window), end, args.bucket_hours)
+        result["ingested"] = ingested
+        result["stats"] = analytics.stats()
+    else:
+        analytics = IncidentAnalytics()
+        start = synthesize(analytics, args.days, args.per_hour)
+        end = time.time()
+        timings = {}
+        for name, query in (("mttr", lambda: analytics.mttr(start, end)),
+                            ("alerts_1h", lambda: analytics.alert_frequency(start, end, 1)),
+                            ("alerts_1d", lambda: analytics.alert_frequency(start, end, 24)),
+                            ("actions", lambda: analytics.effectiveness(start, end))):
+            query()  # first call pays for the sort
+            began = time.perf_counter()
+            query()
+            timings[name] = round((time.perf_counter() - began) * 1000, 1)
+        result = {"stats": analytics.stats(), "query_ms": timings}
+
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
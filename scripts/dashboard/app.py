@@ -4,19 +4,82 @@ Self-Healing Web Dashboard
 Professional control center for infrastructure self-healing
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
 import subprocess
 import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
 from datetime import datetime
 from pathlib import Path
 
+# Shared self-healing modules live next to webhook_receiver.py
+# (../ in the repo, ../scripts when deployed to /opt/self-heal/dashboard)
+_BASE = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = _BASE / "scripts" if (_BASE / "scripts" / "thresholds.py").exists() else _BASE
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import psi  # noqa: E402
+from thresholds import BaselineEngine, LOCAL_INSTANCE  # noqa: E402
+from analytics import IncidentAnalytics, parse_time, parse_window  # noqa: E402
+from fleet import FleetView, PrometheusError, QueryCache, baseline_limits  # noqa: E402
+from http_cache import (conditional, content_version, entries_since, file_version,  # noqa: E402
+                        init_compression, not_modified)
+from log_search import LogSearch  # noqa: E402
+from timeseries import MetricHistory, start_sampler  # noqa: E402
+
 app = Flask(__name__)
+init_compression(app)  # gzip/brotli for larger JSON responses
 
 # Configuration
 LOG_DIR = Path("/opt/self-heal/logs")
 PENDING_FILE = LOG_DIR / "pending_actions.json"
 HISTORY_FILE = LOG_DIR / "actions_history.json"
 
+# Per-host baselines learned from the metrics this dashboard samples
+baselines = BaselineEngine().load()
+BASELINE_SAVE_INTERVAL = 60  # seconds
+BASELINE_SAMPLE_INTERVAL = 10  # seconds between baseline observations
+_baseline_saved_at = 0.0
+_baseline_observed_at = 0.0
+
+# Fixed-memory metric history for sparklines (filled by the sampler thread)
+history = MetricHistory()
+SAMPLE_MAX_AGE = 5  # seconds before /api/status falls back to top/free/df
+
+# MTTR / alert frequency / action effectiveness, read incrementally from LOG_DIR
+analytics = IncidentAnalytics(LOG_DIR)
+
+# webhook.log / self_heal.log / notifications.log search (mmap + sparse time index)
+log_search = LogSearch(LOG_DIR)
+
+# Fleet mode: every instance from Prometheus (set SELF_HEAL_PROMETHEUS_URL to enable)
+fleet = FleetView.from_env()
+
+# Manual-option scans (ps/find) are shared by viewers until they expire or the pending alert changes
+SCAN_TTL = {"CPU": 5.0, "MEMORY": 5.0, "DISK": 60.0}
+scans = QueryCache(wait_timeout=30.0)
+_scan_versions = {}  # alert type -> (content version, when it last changed)
+_scan_lock = threading.Lock()
+_history_cache = {"version": None, "entries": []}
+
+# cgroup v2 groups whose pressure is shown next to the system-wide PSI
+PRESSURE_CGROUPS = ("system.slice", "user.slice", "selfheal.slice")
+
+# "Scale" approves a capacity job on the webhook receiver
+RECEIVER_URL = os.environ.get("SELF_HEAL_RECEIVER_URL", "http://localhost:5000")
+APPROVAL_TOKEN = os.environ.get("SELF_HEAL_APPROVAL_TOKEN", "")
+SCALE_ACTIONS = {
+    "cpu": "upgrade_instance",
+    "memory": "add_swap",
+    "disk": "expand_disk",
+    "network": "upgrade_instance",
+}
+
 def ensure_dirs():
     """Ensure required directories exist"""
     LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -75,6 +138,63 @@ def get_system_metrics():
         print(f"Error getting metrics: {e}")
         return {"cpu": 0, "memory": 0, "disk": 0}
 
+def learn_baselines(metrics):
+    """Feed a metrics sample into the local host's baselines"""
+    global _baseline_saved_at
+    for resource in ("cpu", "memory", "disk"):
+        baselines.observe(LOCAL_INSTANCE, resource, metrics[resource])
+    if time.time() - _baseline_saved_at >= BASELINE_SAVE_INTERVAL:
+        try:
+            baselines.save()
+            _baseline_saved_at = time.time()
+        except OSError as e:
+            print(f"Error saving baselines: {e}")
+
+def on_metrics_sample(ts, values):
+    """Sampler callback: learn baselines at a coarser cadence than we sample"""
+    global _baseline_observed_at
+    if ts - _baseline_observed_at < BASELINE_SAMPLE_INTERVAL:
+        return
+    if all(k in values for k in ("cpu", "memory", "disk")):
+        _baseline_observed_at = ts
+        learn_baselines(values)
+
+def get_current_metrics():
+    """Latest sampled metrics, or a one-off collection if the sampler is idle"""
+    with history.lock:
+        latest = dict(history.latest)
+        age = time.time() - history.latest_ts
+    if age <= SAMPLE_MAX_AGE and all(k in latest for k in ("cpu", "memory", "disk")):
+        return {"cpu": latest["cpu"], "memory": latest["memory"], "disk": latest["disk"]}
+    metrics = get_system_metrics()
+    if metrics["cpu"] or metrics["memory"] or metrics["disk"]:
+        learn_baselines(metrics)
+    return metrics
+
+def get_thresholds():
+    """Current critical thresholds for the local host"""
+    return {
+        resource.lower(): info["threshold"]
+        for resource, info in baselines.snapshot(LOCAL_INSTANCE)[LOCAL_INSTANCE].items()
+    }
+
+def get_pressure():
+    """PSI stall averages for the host and the main cgroups ({} without PSI)"""
+    system = psi.read_all()
+    if system is None:
+        return {}
+    cgroups = {}
+    for name in PRESSURE_CGROUPS:
+        pressure = psi.read_cgroup_pressure(name)
+        if pressure:
+            cgroups[name] = psi.summarize(pressure)
+    return {
+        "system": psi.summarize(system),
+        "priority": psi.priority(system),
+        "score": psi.pressure_score(system),
+        "cgroups": cgroups,
+    }
+
 def get_large_files():
     """Get list of largest files"""
     try:
@@ -193,6 +313,16 @@ def get_large_files_detailed():
                         "safe": "log" in parts[1].lower() or "tmp" in parts[1].lower()
                     })
         
+        # Add ranked reclaim option (compress/delete/truncate until under threshold)
+        files.insert(0, {
+            "type": "action",
+            "name": "Smart Reclaim",
+            "size": "until below threshold",
+            "action": "reclaim_disk",
+            "safe": True,
+            "description": "Compress rotated logs, remove stale temp/cache files"
+        })
+        
         # Add cache cleanup option
         files.insert(0, {
             "type": "action",
@@ -207,6 +337,105 @@ def get_large_files_detailed():
     except:
         return []
 
+def delete_file(path):
+    """Delete a file as root (truncated instead if a process still has it open)"""
+    result = subprocess.run(
+        ["sudo", "-n", sys.executable, str(SCRIPTS_DIR / "disk_reclaim.py"), "remove", path],
+        capture_output=True, text=True, timeout=30
+    )
+    removed = json.loads(result.stdout or "{}")
+    if "action" not in removed:
+        raise RuntimeError(removed.get("error") or result.stderr.strip() or "remove failed")
+    return removed
+
+def reclaim_disk():
+    """Run the ranked reclaim as root until usage is below the disk threshold"""
+    result = subprocess.run(
+        ["sudo", "-n", sys.executable, str(SCRIPTS_DIR / "disk_reclaim.py"), "reclaim",
+         "--target-percent", str(get_thresholds().get("disk", 85))],
+        capture_output=True, text=True, timeout=300
+    )
+    report = json.loads(result.stdout or "{}")
+    if "reclaimed_bytes" not in report:
+        raise RuntimeError(report.get("error") or result.stderr.strip() or "reclaim failed")
+    return report
+
+def throttle_pids(pids, resource):
+    """Move PIDs into a cgroup v2 throttle group (cpu.max / memory.high)"""
+    command = [sys.executable, str(SCRIPTS_DIR / "cgroup_throttle.py"), "throttle", *pids,
+               "--reason", f"manual {resource}"]
+    if resource == 'cpu':
+        command += ["--memory-high", ""]
+    else:
+        command += ["--cpu-max", ""]
+    result = subprocess.run(["sudo", "-n"] + command, capture_output=True, text=True, timeout=15)
+    output = json.loads(result.stdout or "{}")
+    if result.returncode != 0:
+        raise RuntimeError(output.get("error") or result.stderr.strip())
+    return output
+
+def approve_capacity(alert_type):
+    """Ask the webhook receiver to run the capacity action for this alert type"""
+    capacity_action = SCALE_ACTIONS.get(alert_type)
+    if capacity_action is None:
+        raise ValueError(f"No scaling action for {alert_type} alerts")
+    body = json.dumps({
+        "action": capacity_action,
+        "resource": alert_type.upper(),
+        "details": {"source": "dashboard"},
+    }).encode()
+    headers = {"Content-Type": "application/json"}
+    if APPROVAL_TOKEN:
+        headers["X-Self-Heal-Token"] = APPROVAL_TOKEN
+    req = urllib.request.Request(f"{RECEIVER_URL}/approve-action", data=body, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            approval = json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        detail = json.loads(e.read() or b"{}").get("detail", e.reason)
+        raise RuntimeError(f"Receiver refused {capacity_action}: {detail}") from e
+    except urllib.error.URLError as e:
+        raise RuntimeError(f"Webhook receiver unreachable at {RECEIVER_URL}: {e.reason}") from e
+    if not approval.get("job"):
+        # Logged, but nothing will run it
+        raise RuntimeError(f"No capacity backend is provisioned for {capacity_action} on this host")
+    return approval
+
+def get_capacity_job(job_id):
+    """State of a capacity job on the receiver, or None if it can't be reached"""
+    try:
+        with urllib.request.urlopen(f"{RECEIVER_URL}/jobs/{job_id}", timeout=5) as resp:
+            return json.loads(resp.read())
+    except (urllib.error.URLError, ValueError):
+        return None
+
+def sync_capacity_job(pending):
+    """
+    A scaled alert stays pending until its job finishes: resolved when the
+    job succeeds, handed back to the user with the error when it fails
+    """
+    job_id = (pending or {}).get("capacity_job")
+    if not job_id:
+        return pending
+    job = get_capacity_job(job_id)
+    if job is None or job.get("status") not in ("succeeded", "failed"):
+        pending["capacity_status"] = (job or {}).get("status", pending.get("capacity_status"))
+        return pending
+    alert_type = pending.get("alert_type", "unknown").lower()
+    if job["status"] == "succeeded":
+        pending["resolved_at"] = job.get("finished") or datetime.now().isoformat()
+        add_history(f"{alert_type.upper()}_RESOLVED", {"action": "scale", "alert": pending})
+        add_history(f"{alert_type.upper()}_ACTION", {"status": "success", "action": "scale", "job": job})
+        PENDING_FILE.unlink(missing_ok=True)
+        return None
+    add_history(f"{alert_type.upper()}_ACTION", {"status": "error", "action": "scale", "job": job,
+                                                 "message": job.get("error")})
+    pending.pop("capacity_job")
+    pending.pop("capacity_status", None)
+    pending["capacity_error"] = job.get("error") or "capacity job failed"
+    PENDING_FILE.write_text(json.dumps(pending))
+    return pending
+
 def get_pending_alert():
     """Check if there's a pending alert"""
     if PENDING_FILE.exists():
@@ -216,12 +445,21 @@ def get_pending_alert():
             return None
     return None
 
+def get_pending_by_instance():
+    """Pending alerts keyed by the instance they fired on"""
+    pending = get_pending_alert()
+    return {pending.get("instance", "Unknown"): pending} if pending else {}
+
 def get_history():
-    """Get action history"""
-    try:
-        return json.loads(HISTORY_FILE.read_text())
-    except:
-        return []
+    """Get action history (parsed once per version of the file)"""
+    version, _ = file_version(HISTORY_FILE)
+    if version != _history_cache["version"]:
+        try:
+            entries = json.loads(HISTORY_FILE.read_text())
+        except:
+            entries = []
+        _history_cache.update(version=version, entries=entries)
+    return list(_history_cache["entries"])
 
 def add_history(action_type, details):
     """Add entry to history"""
@@ -233,7 +471,7 @@ def add_history(action_type, details):
     })
     # Keep last 100 entries
     history = history[:100]
-    HISTORY_FILE.write_text(json.dumps(history, indent=2))
+    HISTORY_FILE.write_text(json.dumps(history))
 
 # ============================================================
 # Routes
@@ -246,26 +484,174 @@ def index():
 
 @app.route('/api/status')
 def api_status():
-    """Get current system status and pending alerts"""
-    metrics = get_system_metrics()
-    pending = get_pending_alert()
+    """
+    Get current system status and pending alerts
+    Answers 304 while the pending alert and the sampled values are unchanged
+    (the du scan for large files is skipped then)
+    """
+    metrics = get_current_metrics()
+    pending = sync_capacity_job(get_pending_alert())
+    thresholds = get_thresholds()
+    pressure = get_pressure()
+    pending_version, _ = file_version(PENDING_FILE)
+    etag = f"{pending_version}-{content_version([metrics, thresholds, pressure])}"
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
     files = get_large_files() if pending else []
     
-    return jsonify({
+    return conditional(jsonify({
         "status": metrics,
+        "thresholds": thresholds,
+        "pressure": pressure,
         "pending_alert": pending,
         "large_files": files,
         "timestamp": datetime.now().isoformat()
-    })
+    }), etag)
 
-@app.route('/api/history')
-def api_history():
-    """Get action history"""
+@app.route('/api/metrics/history')
+def api_metrics_history():
+    """
+    Get recent metric history as compact columnar JSON
+    Query: resolution=1s|10s, series=cpu,memory,disk:/ (default all), points=N
+    """
+    names = [n for n in request.args.get('series', '').split(',') if n] or None
+    points = request.args.get('points', type=int)
+    try:
+        data = history.query(names, request.args.get('resolution', '1s'), points)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    data["memory_bytes"] = history.memory_bytes()
+    return jsonify(data)
+
+@app.route('/api/thresholds')
+def api_thresholds():
+    """Get learned/default thresholds for every known host"""
     return jsonify({
-        "history": get_history(),
+        "thresholds": baselines.snapshot(),
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/api/history')
+def api_history():
+    """
+    Get action history (newest first)
+    Query: since=<timestamp of the newest entry the client has> for only the newer ones
+    Answers 304 while the history file is unchanged (If-None-Match / If-Modified-Since)
+    """
+    etag, modified = file_version(HISTORY_FILE)
+    unchanged = not_modified(etag, modified)
+    if unchanged:
+        return unchanged
+
+    entries = get_history()
+    result = {"history": entries, "delta": False}
+    since = request.args.get('since')
+    if since:
+        newer = entries_since(entries, since)
+        if newer is not None:
+            result = {"history": newer, "delta": True}
+    result["latest"] = entries[0]["timestamp"] if entries else None
+    result["timestamp"] = datetime.now().isoformat()
+    return conditional(jsonify(result), etag, modified)
+
+@app.route('/api/fleet')
+def api_fleet():
+    """Per-host status for every instance in Prometheus, with pending alerts by instance"""
+    if fleet is None:
+        return jsonify({"enabled": False})
+    try:
+        data = fleet.snapshot(baseline_limits(baselines), get_pending_by_instance())
+    except PrometheusError as e:
+        return jsonify({"enabled": True, "status": "error", "message": str(e)}), 502
+    data["enabled"] = True
+    data["timestamp"] = datetime.now().isoformat()
+    return jsonify(data)
+
+@app.route('/api/fleet/history')
+def api_fleet_history():
+    """
+    One resource across the fleet over time
+    Query: resource=cpu|memory|disk|network, minutes=60, step=60
+    """
+    if fleet is None:
+        return jsonify({"status": "error", "message": "Fleet mode is off (SELF_HEAL_PROMETHEUS_URL)"}), 404
+    try:
+        return jsonify(fleet.history(request.args.get('resource', 'cpu'),
+                                     request.args.get('minutes', 60, type=int),
+                                     request.args.get('step', 60, type=int)))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except PrometheusError as e:
+        return jsonify({"status": "error", "message": str(e)}), 502
+
+@app.route('/api/analytics')
+def api_analytics():
+    """
+    Incident aggregates over a time range
+    Query: start, end (epoch or ISO; end defaults to now), window=7d (used when
+    start is omitted), bucket_hours=1, report=mttr|alerts|actions (default all)
+    """
+    try:
+        end = parse_time(request.args.get('end')) or time.time()
+        start = parse_time(request.args.get('start'))
+        if start is None:
+            start = end - parse_window(request.args.get('window', '7d'))
+        bucket_hours = request.args.get('bucket_hours', 1, type=int)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if start >= end:
+        return jsonify({"status": "error", "message": "start must be before end"}), 400
+    
+    analytics.refresh()
+    report = request.args.get('report')
+    if report == 'mttr':
+        data = {"mttr": analytics.mttr(start, end)}
+    elif report == 'alerts':
+        data = {"alerts": analytics.alert_frequency(start, end, bucket_hours)}
+    elif report == 'actions':
+        data = {"actions": analytics.effectiveness(start, end)}
+    elif report:
+        return jsonify({"status": "error", "message": f"Unknown report: {report}"}), 400
+    else:
+        data = analytics.report(start, end, bucket_hours)
+    data["range"] = {"start": start, "end": end}
+    data["timestamp"] = datetime.now().isoformat()
+    return jsonify(data)
+
+@app.route('/api/logs')
+def api_logs():
+    """
+    Search the self-healing logs by time range, one page at a time
+    Query: start, end, window=1h, level=ERROR,WARNING, alert, instance, q,
+    files=webhook.log,..., order=desc|asc, limit=100, cursor (next_cursor of
+    the previous page), format=ndjson to stream every match instead
+    """
+    args = request.args
+    try:
+        end = parse_time(args.get('end')) or time.time()
+        start = parse_time(args.get('start'))
+        if start is None:
+            start = end - parse_window(args.get('window', '1h'))
+        filters = {
+            "files": [f for f in args.get('files', '').split(',') if f] or None,
+            "levels": [l for l in args.get('level', '').split(',') if l] or None,
+            "alert": args.get('alert', ''),
+            "instance": args.get('instance', ''),
+            "text": args.get('q', ''),
+            "descending": args.get('order', 'desc') != 'asc',
+            "cursor": args.get('cursor'),
+        }
+        if args.get('format') == 'ndjson':
+            entries = log_search.iter_entries(start, end, **filters)
+            lines = (json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+            return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+        result = log_search.search(start, end, args.get('limit', 100, type=int), **filters)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    result["range"] = {"start": start, "end": end}
+    return jsonify(result)
+
 @app.route('/api/action', methods=['POST'])
 def api_action():
     """Execute chosen action"""
@@ -298,10 +684,21 @@ def api_action():
             result["message"] = "Manual mode - SSH to server and investigate"
             
         elif action == "scale":
-            result["message"] = "Scaling recommended - check AWS console or Terraform"
+            approval = approve_capacity(alert_type)
+            result["status"] = "queued"
+            result["job"] = approval["job"]
+            result["message"] = approval.get("message", "Scaling approved")
+            # Keep the alert until the job is done (see sync_capacity_job)
+            if PENDING_FILE.exists():
+                pending_data = json.loads(PENDING_FILE.read_text())
+                pending_data['user_choice'] = action
+                pending_data['capacity_job'] = approval["job"]["id"]
+                pending_data['capacity_status'] = approval["job"].get("status", "queued")
+                pending_data.pop('capacity_error', None)
+                PENDING_FILE.write_text(json.dumps(pending_data))
         
         # Clear pending alert
-        if PENDING_FILE.exists():
+        if action != "scale" and PENDING_FILE.exists():
             pending_data = json.loads(PENDING_FILE.read_text())
             pending_data['user_choice'] = action
             pending_data['resolved_at'] = datetime.now().isoformat()
@@ -312,8 +709,9 @@ def api_action():
             })
             PENDING_FILE.unlink()
         
-        # Add to history
-        add_history(f"{alert_type.upper()}_ACTION", result)
+        # Add to history (a scale action once its job has finished)
+        if action != "scale":
+            add_history(f"{alert_type.upper()}_ACTION", result)
         
         return jsonify(result)
     
@@ -337,47 +735,55 @@ def api_dismiss():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+MANUAL_OPTIONS = {
+    "CPU": ("High CPU Processes", "Select processes to terminate (SIGTERM)", get_top_cpu_processes),
+    "MEMORY": ("Memory Management Options", "Select action to free memory", get_top_memory_processes),
+    "DISK": ("Large Files & Cleanup Options", "Select files/actions to free disk space", get_large_files_detailed),
+}
+
+def scan_manual_options(alert_type):
+    """Run the ps/find scan for one alert type; versioned by its content"""
+    title, description, scan = MANUAL_OPTIONS[alert_type]
+    payload = {
+        "status": "success",
+        "alert_type": alert_type,
+        "title": title,
+        "description": description,
+        "options": scan()
+    }
+    version = content_version(payload)
+    with _scan_lock:
+        previous = _scan_versions.get(alert_type)
+        changed = previous[1] if previous and previous[0] == version else datetime.now().astimezone()
+        _scan_versions[alert_type] = (version, changed)
+    return payload, version, changed
+
+def drop_scans(*alert_types):
+    """Forget cached scans a manual action has just made stale (killed PIDs, deleted files)"""
+    with scans.lock:
+        for key in [k for k in scans.entries if k[0] in alert_types]:
+            del scans.entries[key]
+
 @app.route('/api/manual-options/<resource>', methods=['GET'])
 def api_manual_options(resource):
-    """Get manual remediation options based on alert type"""
+    """
+    Get manual remediation options based on alert type
+    Scans are cached for SCAN_TTL and rerun when the pending alert changes;
+    answers 304 while the client's copy is current
+    """
     try:
         alert_type = resource.upper()
-        
-        if alert_type == 'CPU':
-            options = get_top_cpu_processes()
-            return jsonify({
-                "status": "success",
-                "alert_type": "CPU",
-                "title": "High CPU Processes",
-                "description": "Select processes to terminate (SIGTERM)",
-                "options": options
-            })
-        
-        elif alert_type == 'MEMORY':
-            options = get_top_memory_processes()
-            return jsonify({
-                "status": "success",
-                "alert_type": "MEMORY",
-                "title": "Memory Management Options",
-                "description": "Select action to free memory",
-                "options": options
-            })
-        
-        elif alert_type == 'DISK':
-            options = get_large_files_detailed()
-            return jsonify({
-                "status": "success",
-                "alert_type": "DISK",
-                "title": "Large Files & Cleanup Options",
-                "description": "Select files/actions to free disk space",
-                "options": options
-            })
-        
-        else:
+        if alert_type not in MANUAL_OPTIONS:
             return jsonify({
                 "status": "error",
                 "message": f"Unknown alert type: {alert_type}"
             }), 400
+        
+        pending_version, _ = file_version(PENDING_FILE)
+        payload, version, changed = scans.get((alert_type, pending_version), SCAN_TTL[alert_type],
+                                              lambda: scan_manual_options(alert_type))
+        etag = f"{pending_version}-{version}"
+        return not_modified(etag, changed) or conditional(jsonify(payload), etag, changed)
     
     except Exception as e:
         return jsonify({
@@ -385,6 +791,14 @@ def api_manual_options(resource):
             "message": str(e)
         }), 500
 
+# Scans a manual action changes: killing a process shows in both CPU and memory
+SCAN_AFFECTED = {
+    "kill_process": ("CPU", "MEMORY"),
+    "clear_cache": ("MEMORY",),
+    "clear_package_cache": ("DISK",),
+    "delete_file": ("DISK",),
+}
+
 @app.route('/api/execute-manual', methods=['POST'])
 def api_execute_manual():
     """Execute manual action selected by user"""
@@ -416,9 +830,10 @@ def api_execute_manual():
             result["message"] = "Package cache cleared successfully"
             
         elif action_type == "delete_file":
-            # Delete specific file
-            subprocess.run(["sudo", "rm", "-f", target], timeout=10, check=True)
-            result["message"] = f"File deleted: {target}"
+            # Delete specific file (truncated instead if a process holds it open)
+            removed = delete_file(target)
+            verb = "truncated" if removed["action"] == "truncate" else "deleted"
+            result["message"] = f"File {verb}: {target} ({removed['bytes'] // 1024 // 1024}MB freed)"
         
         else:
             return jsonify({
@@ -426,6 +841,8 @@ def api_execute_manual():
                 "message": f"Unknown action type: {action_type}"
             }), 400
         
+        drop_scans(*SCAN_AFFECTED[action_type])
+        
         # Add to history
         add_history("MANUAL_ACTION", {
             "action_type": action_type,
@@ -458,6 +875,7 @@ def api_manual_execute():
         data = request.json
         resource = data.get('resource')  # cpu, memory, disk
         selections = data.get('selections', [])  # Array of selected items
+        mode = data.get('mode', 'kill')  # kill | throttle (cpu/memory processes)
         
         if not selections:
             return jsonify({
@@ -468,6 +886,17 @@ def api_manual_execute():
         results = []
         errors = []
         
+        if resource in ('cpu', 'memory') and mode == 'throttle':
+            # Throttle selected processes instead of killing them
+            pids = [item for item in selections if item.isdigit()]
+            selections = [item for item in selections if not item.isdigit()]
+            if pids:
+                try:
+                    group = throttle_pids(pids, resource)
+                    results.append(f"Throttled PIDs {', '.join(pids)} ({group.get('name')})")
+                except Exception as e:
+                    errors.append(f"Failed to throttle PIDs {', '.join(pids)}: {e}")
+        
         if resource == 'cpu':
             # Kill selected processes
             for pid in selections:
@@ -511,13 +940,22 @@ def api_manual_execute():
                         results.append("Package cache cleared")
                     except Exception as e:
                         errors.append(f"Failed to clear package cache: {e}")
+                elif item == 'reclaim_disk':
+                    # Ranked reclaim until usage is below the threshold
+                    try:
+                        report = reclaim_disk()
+                        results.append(
+                            f"Reclaimed {report['reclaimed_bytes'] // 1024 // 1024}MB in "
+                            f"{len(report['steps'])} steps ({report['wall_seconds']}s)"
+                        )
+                    except Exception as e:
+                        errors.append(f"Failed to reclaim disk space: {e}")
                 elif item.startswith('/'):
                     # It's a file path
                     try:
-                        subprocess.run(["sudo", "rm", "-f", item], 
-                                     timeout=10, check=True,
-                                     capture_output=True, text=True)
-                        results.append(f"Deleted: {item}")
+                        removed = delete_file(item)
+                        verb = "Truncated" if removed["action"] == "truncate" else "Deleted"
+                        results.append(f"{verb}: {item}")
                     except Exception as e:
                         errors.append(f"Failed to delete {item}: {e}")
                 else:
@@ -529,6 +967,8 @@ def api_manual_execute():
                 "message": f"Unknown resource: {resource}"
             }), 400
         
+        drop_scans(*(("DISK",) if resource == 'disk' else ("CPU", "MEMORY")))
+        
         # Add to history
         add_history(f"MANUAL_{resource.upper()}_CLEANUP", {
             "selections": selections,
@@ -563,6 +1003,7 @@ def api_manual_execute():
 
 if __name__ == '__main__':
     ensure_dirs()
+    start_sampler(history, on_sample=on_metrics_sample)
     print("\n" + "="*60)
     print("🌐 Self-Healing Dashboard Starting...")
     print("="*60)
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Fleet view for the dashboard, read from the Prometheus HTTP API.
+One query per resource covers every instance (the same expressions as
+alerts.yml, grouped by instance). Results are cached for a few seconds, and
+concurrent requests for the same query share a single upstream call: the
+first caller fetches, the others wait for its result or get the previous
+one while it is refreshed.
+
+Enabled by setting SELF_HEAL_PROMETHEUS_URL, e.g. http://<monitoring-ip>:9090.
+
+Usage:
+    SELF_HEAL_PROMETHEUS_URL=http://localhost:9090 python3 fleet.py
+    python3 fleet.py --url http://localhost:9090 --history cpu --minutes 60
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+# Shared self-healing modules live next to webhook_receiver.py
+_BASE = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = _BASE / "scripts" if (_BASE / "scripts" / "thresholds.py").exists() else _BASE
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from thresholds import DEFAULT_THRESHOLDS, BaselineEngine, normalize_resource  # noqa: E402
+
+PROMETHEUS_URL = os.environ.get("SELF_HEAL_PROMETHEUS_URL", "")
+INSTANT_TTL = 5.0       # seconds; node_exporter is scraped every 5s
+RANGE_TTL = 30.0
+QUERY_TIMEOUT = 5.0
+MAX_POINTS = 720
+
+_FSTYPES = 'fstype!~"tmpfs|fuse.lxcfs|squashfs|vfat"'
+
+# resource -> PromQL returning one series per instance
+FLEET_QUERIES = {
+    "cpu": '100 - (avg by(instance) (irate(node_cpu_seconds_total{mode="idle"}[5m])) * 100)',
+    "memory": "(1 - (node_memory_MemAvailable_bytes / node_memory_MemTotal_bytes)) * 100",
+    "disk": f"max by(instance) ((1 - (node_filesystem_avail_bytes{{{_FSTYPES}}} "
+            f"/ node_filesystem_size_bytes{{{_FSTYPES}}})) * 100)",
+    "network": "sum by(instance) (rate(node_network_receive_errs_total[5m]) "
+               "+ rate(node_network_transmit_errs_total[5m]))",
+}
+UP_QUERY = 'up{job="ec2-node-exporter"}'
+
+
+class PrometheusError(Exception):
+    """Prometheus could not be reached or rejected the query"""
+
+
+class _Entry:
+    __slots__ = ("value", "error", "expires", "ready")
+
+    def __init__(self):
+        self.value = None
+        self.error: Optional[Exception] = None
+        self.expires = 0.0
+        self.ready: Optional[threading.Event] = None  # set while a fetch is in flight
+
+
+class QueryCache:
+    """
+    TTL cache with request coalescing. Only one loader runs per key at a
+    time; callers that arrive meanwhile wait for it (or get the stale value
+    if there is one). Errors are handed to the waiters but not cached.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, wait_timeout: float = QUERY_TIMEOUT + 1):
+        self.clock = clock
+        self.wait_timeout = wait_timeout
+        self.entries: Dict[tuple, _Entry] = {}
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "stale": 0, "errors": 0}
+
+    def get(self, key: tuple, ttl: float, loader: Callable[[], object]):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = _Entry()
+            if entry.ready is None and entry.expires > self.clock():
+                self.stats["hits"] += 1
+                return entry.value
+            if entry.ready is not None:
+                if entry.expires:  # a refresh is running; the old value will do
+                    self.stats["stale"] += 1
+                    return entry.value
+                self.stats["coalesced"] += 1
+                ready, leader = entry.ready, False
+            else:
+                self.stats["misses"] += 1
+                ready = entry.ready = threading.Event()
+                leader = True
+
+        if not leader:
+            if not ready.wait(self.wait_timeout):
+                raise PrometheusError("Timed out waiting for a shared query")
+            if entry.error is not None:
+                raise entry.error
+            return entry.value
+
+        try:
+            value = loader()
+        except Exception as e:
+            with self.lock:
+                self.stats["errors"] += 1
+                entry.error = e
+                if not entry.expires:  # nothing stale worth keeping
+                    self.entries.pop(key, None)
+                entry.ready = None
+            ready.set()
+            raise
+        with self.lock:
+            entry.value, entry.error = value, None
+            entry.expires = self.clock() + ttl
+            entry.ready = None
+            self._evict()
+        ready.set()
+        return value
+
+    def _evict(self) -> None:
+        # Range keys move with time; drop the ones nobody has refreshed
+        now = self.clock()
+        if len(self.entries) > 256:
+            for key in [k for k, e in self.entries.items() if e.ready is None and e.expires < now]:
+                del self.entries[key]
+
+
+class PrometheusClient:
+    """Minimal /api/v1/query and /api/v1/query_range client"""
+
+    def __init__(self, base_url: str, timeout: float = QUERY_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.requests = 0
+
+    def _get(self, path: str, params: Dict) -> Dict:
+        url = f"{self.base_url}{path}?{urllib.parse.urlencode(params)}"
+        self.requests += 1
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as resp:
+                body = json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            try:
+                body = json.loads(e.read())
+            except ValueError:
+                raise PrometheusError(f"Prometheus returned HTTP {e.code}")
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise PrometheusError(f"Prometheus unreachable: {e}")
+        if body.get("status") != "success":
+            raise PrometheusError(f"{body.get('errorType', 'error')}: {body.get('error', 'query failed')}")
+        return body["data"]
+
+    def instant(self, query: str) -> Dict[str, float]:
+        """instance -> latest value"""
+        data = self._get("/api/v1/query", {"query": query})
+        return {
+            series["metric"].get("instance", "unknown"): float(series["value"][1])
+            for series in data.get("result", [])
+        }
+
+    def range(self, query: str, start: float, end: float, step: float) -> Dict[str, list]:
+        """instance -> [[ts, value], ...]"""
+        data = self._get("/api/v1/query_range", {"query": query, "start": start, "end": end, "step": step})
+        return {
+            series["metric"].get("instance", "unknown"): [[float(ts), float(v)] for ts, v in series["values"]]
+            for series in data.get("result", [])
+        }
+
+
+class FleetView:
+    """Per-host status for every instance Prometheus knows about"""
+
+    def __init__(self, client: PrometheusClient, cache: Optional[QueryCache] = None,
+                 queries: Optional[Dict[str, str]] = None):
+        self.client = client
+        self.cache = cache or QueryCache()
+        self.queries = dict(queries or FLEET_QUERIES)
+        self.pool = ThreadPoolExecutor(max_workers=len(self.queries) + 1, thread_name_prefix="fleet-query")
+
+    @classmethod
+    def from_env(cls) -> Optional["FleetView"]:
+        return cls(PrometheusClient(PROMETHEUS_URL)) if PROMETHEUS_URL else None
+
+    def _instant(self, query: str) -> Dict[str, float]:
+        return self.cache.get(("instant", query), INSTANT_TTL, lambda: self.client.instant(query))
+
+    def snapshot(self, thresholds: Optional[Callable[[str, str], Dict[str, float]]] = None,
+                 pending: Optional[Dict[str, Dict]] = None) -> Dict:
+        """
+        Latest value of each resource per instance, with a status from the
+        thresholds(instance, resource) callback ({"warning": x, "critical": y})
+        and any pending alert for that instance.
+        """
+        names = list(self.queries) + ["up"]
+        futures = [self.pool.submit(self._instant, self.queries[name]) for name in self.queries]
+        futures.append(self.pool.submit(self._instant, UP_QUERY))
+        values, errors = {}, {}
+        for name, future in zip(names, futures):
+            try:
+                values[name] = future.result()
+            except PrometheusError as e:
+                errors[name] = str(e)
+        if len(errors) == len(names):
+            raise PrometheusError(next(iter(errors.values())))
+
+        pending = pending or {}
+        instances = sorted(set().union(*(v.keys() for v in values.values())) | set(pending))
+        hosts = {}
+        for instance in instances:
+            host = {name: (round(values[name][instance], 2) if instance in values.get(name, {}) else None)
+                    for name in self.queries}
+            up = values.get("up", {}).get(instance)
+            host["up"] = None if up is None else up >= 1
+            host["status"] = self._status(instance, host, thresholds)
+            host["pending_alert"] = pending.get(instance)
+            hosts[instance] = host
+        return {"hosts": hosts, "errors": errors, "cache": dict(self.cache.stats)}
+
+    def _status(self, instance: str, host: Dict, thresholds) -> str:
+        if host["up"] is False:
+            return "down"
+        status = "unknown" if all(host[name] is None for name in self.queries) else "ok"
+        for name in self.queries:
+            if host[name] is None or thresholds is None:
+                continue
+            limits = thresholds(instance, name)
+            if host[name] >= limits["critical"]:
+                return "critical"
+            if host[name] >= limits["warning"]:
+                status = "warning"
+        return status
+
+    def history(self, resource: str, minutes: int = 60, step: int = 60, now: Optional[float] = None) -> Dict:
+        """Range query for one resource across the fleet, aligned to `step` so viewers share cache entries"""
+        if resource not in self.queries:
+            raise ValueError(f"Unknown resource: {resource}")
+        step = max(5, int(step))
+        minutes = max(1, int(minutes))
+        if minutes * 60 / step > MAX_POINTS:
+            raise ValueError(f"Too many points; use a step of at least {minutes * 60 // MAX_POINTS}s")
+        end = int((now if now is not None else time.time()) // step * step)
+        start = end - minutes * 60
+        query = self.queries[resource]
+        series = self.cache.get(("range", query, start, end, step), RANGE_TTL,
+                                lambda: self.client.range(query, start, end, step))
+        return {"resource": resource, "start": start, "end": end, "step": step, "series": series}
+
+
+def baseline_limits(engine: BaselineEngine) -> Callable[[str, str], Dict[str, float]]:
+    """Per-host limits for snapshot(): learned critical threshold, default warning below it"""
+    def limits(instance: str, resource: str) -> Dict[str, float]:
+        critical = engine.threshold(resource, instance)
+        warning = DEFAULT_THRESHOLDS[normalize_resource(resource)]["warning"]
+        return {"critical": critical, "warning": min(warning, critical)}
+    return limits
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fleet status from Prometheus")
+    parser.add_argument("--url", default=PROMETHEUS_URL or "http://localhost:9090")
+    parser.add_argument("--history", choices=sorted(FLEET_QUERIES), help="print a range query instead")
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--step", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    fleet = FleetView(PrometheusClient(args.url))
+    try:
+        if args.history:
+            result = fleet.history(args.history, args.minutes, args.step)
+        else:
+            result = fleet.snapshot(baseline_limits(BaselineEngine().load()))
+    except (PrometheusError, ValueError) as e:
+        print(json.dumps({"status": "error", "error": str(e)}))
+        return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
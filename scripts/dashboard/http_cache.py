@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Conditional requests and compression for the dashboard JSON APIs.
+
+Each cacheable endpoint has a change version: the stat of the file it reads
+(history, pending alert) or a hash of a cached scan. The version is sent as
+a weak ETag, with Last-Modified from the time it last changed. A client
+that sends either back (If-None-Match / If-Modified-Since) gets
+304 Not Modified, and the endpoint skips building the body.
+
+JSON responses above MIN_COMPRESS_BYTES are compressed: brotli when the
+client accepts it and the brotli module is installed, gzip otherwise.
+
+Usage:
+    init_compression(app)
+
+    etag, modified = file_version(HISTORY_FILE)
+    return not_modified(etag, modified) or conditional(jsonify(...), etag, modified)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from flask import Response, request
+from werkzeug.http import is_resource_modified
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional, gzip is used instead
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5   # well under gzip -6 in size, still fast enough per request
+COMPRESSIBLE = ("application/json",)
+
+
+# ============================================================
+# Change versions
+# ============================================================
+
+def file_version(path) -> Tuple[str, Optional[datetime]]:
+    """(etag, last modified) of a file; changes whenever it is rewritten"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing", None
+    etag = f"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"
+    return etag, datetime.fromtimestamp(st.st_mtime, timezone.utc)
+
+
+def content_version(payload) -> str:
+    """Stable hash of a JSON-serializable payload"""
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+
+def entries_since(entries: List[Dict], since: str, key: str = "timestamp") -> Optional[List[Dict]]:
+    """
+    Entries newer than the one stamped `since` (entries are newest first).
+    None if that entry is no longer there, e.g. the list was reset: the
+    client then needs the full list.
+    """
+    for i, entry in enumerate(entries):
+        if entry.get(key) == since:
+            return entries[:i]
+    return None
+
+
+# ============================================================
+# Conditional responses
+# ============================================================
+
+def _validators(response: Response, etag: str, last_modified: Optional[datetime]) -> Response:
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Cache, but check back every time
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """A 304 response if the client's copy is current, else None"""
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    return _validators(Response(status=304), etag, last_modified)
+
+
+def conditional(response: Response, etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Attach the validators a client needs for its next conditional request"""
+    return _validators(response, etag, last_modified)
+
+
+# ============================================================
+# Compression
+# ============================================================
+
+def choose_encoding() -> Optional[str]:
+    accept = request.accept_encodings
+    if brotli is not None and accept.quality("br") > 0:
+        return "br"
+    if accept.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress_response(response: Response) -> Response:
+    if response.mimetype not in COMPRESSIBLE:
+        return response
+    response.vary.add("Accept-Encoding")
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers):
+        return response
+    data = response.get_data()
+    encoding = choose_encoding() if len(data) >= MIN_COMPRESS_BYTES else None
+    if encoding is None:
+        return response
+    if encoding == "br":
+        response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+    else:
+        response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_compression(app) -> None:
+    app.after_request(compress_response)
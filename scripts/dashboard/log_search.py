@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Time-range search over the self-healing log files.
+Files are mmapped and scanned lazily, so only the pages a query touches are
+read and nothing is loaded per line up front. A sparse index (one timestamp
+-> offset entry per INDEX_STEP bytes, extended as the file grows) lets a
+query seek straight to its time range. Substring filters jump between hits
+with mmap.find instead of decoding every line.
+
+Two line formats are understood:
+  webhook.log          2026-10-19 10:00:00,123 - webhook_receiver - INFO - message
+  self_heal.log,       [Mon Oct 19 10:00:00 UTC 2026] [CPU] message
+  notifications.log    (shell handlers; level inferred from the message)
+Lines without a timestamp (tracebacks, multi-line messages) belong to the
+entry above them. Files are assumed to be appended in time order.
+
+Usage:
+    python3 log_search.py --window 2h --level ERROR,WARNING
+    python3 log_search.py --alert HighCPUUsage --instance web-1 --order asc
+"""
+
+import argparse
+import heapq
+import json
+import mmap
+import os
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+LOG_DIR = Path(os.environ.get("SELF_HEAL_LOG_DIR", "/opt/self-heal/logs"))
+LOG_FILES = ("webhook.log", "self_heal.log", "notifications.log")
+
+INDEX_STEP = 1024 * 1024  # bytes between sparse index entries
+MAX_ENTRY_LINES = 500     # continuation lines looked at when finding an entry's head
+MAX_PAGE = 1000
+
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+PYTHON_RE = re.compile(rb"^(\d{4}-\d\d-\d\d \d\d:\d\d):(\d\d),(\d{3}) - (\S+) - ([A-Z]+) - ")
+# `date` output: weekday, month, space-padded day, time, optional zone, year
+SHELL_RE = re.compile(rb"^\[\w{3} (\w{3}) +(\d{1,2}) (\d\d:\d\d):(\d\d) (?:\S+ )?(\d{4})\] (?:\[([^\]]+)\] )?")
+
+# Shell handlers have no levels; these markers stand in for them
+SHELL_ERROR_MARKERS = ("✗", "Failed", "failed", "ERROR", "Error")
+SHELL_WARNING_MARKERS = ("ALERT", "WARNING", "CRITICAL", "Killing", "Throttl")
+
+
+class LineParser:
+    """Timestamps and headers of both formats, with one strptime per minute"""
+
+    def __init__(self):
+        self._minutes: Dict[bytes, float] = {}
+
+    def _minute(self, key: bytes, fmt: str) -> float:
+        base = self._minutes.get(key)
+        if base is None:
+            base = self._minutes[key] = datetime.strptime(key.decode(), fmt).timestamp()
+        return base
+
+    def timestamp(self, line: bytes) -> Optional[float]:
+        match = PYTHON_RE.match(line)
+        if match:
+            return self._minute(match.group(1), "%Y-%m-%d %H:%M") + int(match.group(2)) + int(match.group(3)) / 1000
+        match = SHELL_RE.match(line)
+        if match:
+            month, day, minute, second, year = match.group(1, 2, 3, 4, 5)
+            return self._minute(b"%s %s %s %s" % (year, month, day, minute), "%Y %b %d %H:%M") + int(second)
+        return None
+
+    def entry(self, text: bytes) -> Tuple[Optional[float], Dict]:
+        """(timestamp, fields) of one entry; the timestamp is None for lines outside both formats"""
+        ts = self.timestamp(text)
+        match = PYTHON_RE.match(text)
+        if match:
+            source, level = match.group(4).decode(), match.group(5).decode()
+        else:
+            match = SHELL_RE.match(text)
+            if not match:
+                return None, {}
+            source = (match.group(6) or b"").decode()
+            level = None
+        message = text[match.end():].decode("utf-8", "replace").rstrip("\n")
+        if level is None:
+            level = shell_level(message)
+        return ts, {"source": source, "level": level, "message": message}
+
+
+def shell_level(message: str) -> str:
+    if any(marker in message for marker in SHELL_ERROR_MARKERS):
+        return "ERROR"
+    if any(marker in message for marker in SHELL_WARNING_MARKERS):
+        return "WARNING"
+    return "INFO"
+
+
+class SparseIndex:
+    """
+    Every `step` bytes, the offset and time of the next entry head. Memory is
+    16 bytes per step (16 KB per GB of log). Rebuilt when the file is rotated
+    or truncated, extended when it grows.
+    """
+
+    __slots__ = ("step", "inode", "next_pos", "times", "offsets")
+
+    def __init__(self, step: int = INDEX_STEP):
+        self.step = step
+        self.inode = None
+        self.next_pos = 0
+        self.times = array("d")
+        self.offsets = array("q")
+
+    def update(self, mm: mmap.mmap, inode: int, parser: LineParser) -> None:
+        size = len(mm)
+        if inode != self.inode or (self.offsets and size <= self.offsets[-1]):
+            self.inode, self.next_pos = inode, 0
+            self.times, self.offsets = array("d"), array("q")
+        pos = self.next_pos
+        while pos < size:
+            head = _next_head(mm, pos, size, parser)
+            if head is None:
+                break
+            offset, ts = head
+            # Keep times non-decreasing so bisect stays valid if the clock steps back
+            if self.times and ts < self.times[-1]:
+                ts = self.times[-1]
+            if not self.offsets or offset > self.offsets[-1]:
+                self.times.append(ts)
+                self.offsets.append(offset)
+            pos = offset + self.step
+        self.next_pos = pos
+
+    def lower_bound(self, start: float) -> int:
+        """Offset of an entry head at or before the first entry with time >= start"""
+        i = bisect_left(self.times, start) - 1
+        return self.offsets[i] if i >= 0 else 0
+
+    def upper_bound(self, end: float, size: int) -> int:
+        """Offset after which every indexed entry has time >= end"""
+        i = bisect_left(self.times, end)
+        return self.offsets[i] if i < len(self.offsets) else size
+
+
+def _line_end(mm: mmap.mmap, pos: int, limit: int) -> int:
+    nl = mm.find(b"\n", pos, limit)
+    return limit if nl < 0 else nl + 1
+
+
+def _next_head(mm: mmap.mmap, pos: int, limit: int, parser: LineParser) -> Optional[Tuple[int, float]]:
+    """First entry head (offset, time) at a line start at or after pos"""
+    if pos > 0 and mm[pos - 1:pos] != b"\n":
+        pos = _line_end(mm, pos, limit)
+    while pos < limit:
+        end = _line_end(mm, pos, limit)
+        ts = parser.timestamp(mm[pos:end])
+        if ts is not None:
+            return pos, ts
+        pos = end
+    return None
+
+
+def _entry_bounds(mm: mmap.mmap, pos: int, limit: int, parser: LineParser) -> Tuple[int, int]:
+    """Start and end of the entry containing byte pos (head line plus continuation lines)"""
+    start = mm.rfind(b"\n", 0, pos) + 1
+    for _ in range(MAX_ENTRY_LINES):
+        if start == 0 or parser.timestamp(mm[start:_line_end(mm, start, limit)]) is not None:
+            break
+        start = mm.rfind(b"\n", 0, start - 1) + 1
+    end = _line_end(mm, start, limit)
+    while end < limit and parser.timestamp(mm[end:_line_end(mm, end, limit)]) is None:
+        end = _line_end(mm, end, limit)
+    return start, end
+
+
+class LogFile:
+    """One log file: its sparse index and lazily scanned entries"""
+
+    def __init__(self, path: Path, step: int = INDEX_STEP):
+        self.path = path
+        self.name = path.name
+        self.index = SparseIndex(step)
+        self.parser = LineParser()
+        self.lock = threading.Lock()
+
+    def _map(self) -> Optional[Tuple[mmap.mmap, int]]:
+        try:
+            with open(self.path, "rb") as f:
+                inode = os.fstat(f.fileno()).st_ino
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), inode
+        except (OSError, ValueError):  # missing or empty
+            return None
+
+    def scan(self, start: float, end: float, needles: List[bytes], levels: Optional[set],
+             descending: bool = False, resume: Optional[int] = None) -> Iterator[Tuple[float, int, int, Dict]]:
+        """
+        Yield (time, entry start, entry end, fields) for entries in [start, end)
+        that contain every needle, oldest first (or newest first). `resume` is
+        an offset from a previous page's cursor.
+        """
+        mapped = self._map()
+        if mapped is None:
+            return
+        mm, inode = mapped
+        try:
+            with self.lock:
+                self.index.update(mm, inode, self.parser)
+                low = self.index.lower_bound(start)
+                high = self.index.upper_bound(end, len(mm))
+            if resume is not None:
+                if descending:
+                    high = min(high, resume)
+                else:
+                    low = max(low, resume)
+            needle = max(needles, key=len) if needles else None
+            yield from (self._backward if descending else self._forward)(
+                mm, low, high, start, end, needle, needles, levels)
+        finally:
+            mm.close()
+
+    def _match(self, mm, bounds, start, end, needles, levels):
+        text = mm[bounds[0]:bounds[1]]
+        if needles and not all(n in text for n in needles):
+            return None, None
+        ts, fields = self.parser.entry(text)
+        if ts is None or not start <= ts < end:
+            return ts, None
+        if levels and fields["level"] not in levels:
+            return ts, None
+        return ts, fields
+
+    def _forward(self, mm, low, high, start, end, needle, needles, levels):
+        pos = low
+        while pos < high:
+            if needle is not None:
+                hit = mm.find(needle, pos, high)
+                if hit < 0:
+                    return
+                bounds = _entry_bounds(mm, hit, len(mm), self.parser)
+                bounds = (max(bounds[0], pos), bounds[1])
+            else:
+                bounds = _entry_bounds(mm, pos, len(mm), self.parser)
+            ts, fields = self._match(mm, bounds, start, end, needles, levels)
+            if ts is not None and ts >= end:
+                return
+            if fields is not None:
+                yield ts, bounds[0], bounds[1], fields
+            pos = bounds[1]
+
+    def _backward(self, mm, low, high, start, end, needle, needles, levels):
+        pos = high
+        while pos > low:
+            if needle is not None:
+                hit = mm.rfind(needle, low, pos)
+                if hit < 0:
+                    return
+                bounds = _entry_bounds(mm, hit, len(mm), self.parser)
+            else:
+                bounds = _entry_bounds(mm, pos - 1, len(mm), self.parser)
+            bounds = (bounds[0], min(bounds[1], pos))
+            ts, fields = self._match(mm, bounds, start, end, needles, levels)
+            if ts is not None and ts < start:
+                return
+            if fields is not None:
+                yield ts, bounds[0], bounds[1], fields
+            pos = bounds[0]
+
+
+class LogSearch:
+    """Merged, paginated search over several log files"""
+
+    def __init__(self, log_dir: Path = LOG_DIR, files=LOG_FILES, step: int = INDEX_STEP):
+        self.log_dir = Path(log_dir)
+        self.files = {name: LogFile(self.log_dir / name, step) for name in files}
+
+    def iter_entries(self, start: float, end: float, files: Optional[List[str]] = None,
+                     levels: Optional[List[str]] = None, alert: str = "", instance: str = "", text: str = "",
+                     descending: bool = True, cursor: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Matching entries from all files, merged by time; each carries the
+        cursor that resumes after it. Bad arguments raise ValueError here,
+        before anything is read.
+        """
+        names = files or list(self.files)
+        unknown = [n for n in names if n not in self.files]
+        if unknown:
+            raise ValueError(f"Unknown log file: {', '.join(unknown)}")
+        level_set = {l.upper() for l in levels} if levels else None
+        if level_set and not level_set <= set(LEVELS):
+            raise ValueError(f"Unknown level: {', '.join(sorted(level_set - set(LEVELS)))}")
+        needles = [s.encode() for s in (alert, instance, text) if s]
+        positions = decode_cursor(cursor)
+        return self._merge(names, start, end, needles, level_set, descending, positions)
+
+    def _merge(self, names, start, end, needles, level_set, descending, positions) -> Iterator[Dict]:
+        def tagged(name):
+            for ts, begin, finish, fields in self.files[name].scan(
+                    start, end, needles, level_set, descending, positions.get(name)):
+                yield ts, name, begin, finish, fields
+
+        streams = [tagged(name) for name in names]
+        merged = heapq.merge(*streams, key=lambda item: item[0], reverse=descending)
+        for ts, name, begin, finish, fields in merged:
+            positions[name] = begin if descending else finish
+            yield dict(fields, time=datetime.fromtimestamp(ts).isoformat(timespec="milliseconds"),
+                       ts=ts, file=name, cursor=encode_cursor(positions))
+
+    def search(self, start: float, end: float, limit: int = 100, **filters) -> Dict:
+        """One page of results and the cursor for the next (None when done)"""
+        limit = max(1, min(int(limit), MAX_PAGE))
+        began = time.perf_counter()
+        page = list(islice(self.iter_entries(start, end, **filters), limit + 1))
+        more = len(page) > limit
+        page = page[:limit]
+        next_cursor = page[-1]["cursor"] if more else None
+        for entry in page:
+            del entry["cursor"]
+        return {
+            "entries": page,
+            "count": len(page),
+            "next_cursor": next_cursor,
+            "elapsed_ms": round((time.perf_counter() - began) * 1000, 1),
+        }
+
+    def index_stats(self) -> Dict:
+        return {name: {"entries": len(f.index.offsets), "memory_bytes": 16 * len(f.index.offsets)}
+                for name, f in self.files.items()}
+
+
+def encode_cursor(positions: Dict[str, int]) -> str:
+    return ",".join(f"{name}:{offset}" for name, offset in sorted(positions.items()))
+
+
+def decode_cursor(cursor: Optional[str]) -> Dict[str, int]:
+    positions: Dict[str, int] = {}
+    for part in (cursor or "").split(","):
+        if not part:
+            continue
+        name, _, offset = part.rpartition(":")
+        if not name or not offset.isdigit():
+            raise ValueError(f"Bad cursor: {cursor}")
+        positions[name] = int(offset)
+    return positions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Search the self-healing logs by time range")
+    parser.add_argument("--log-dir", default=str(LOG_DIR))
+    parser.add_argument("--window", type=float, default=3600, help="seconds back from now (default 1h)")
+    parser.add_argument("--file", action="append", choices=LOG_FILES)
+    parser.add_argument("--level", help="comma-separated, e.g. ERROR,WARNING")
+    parser.add_argument("--alert", default="")
+    parser.add_argument("--instance", default="")
+    parser.add_argument("--text", default="")
+    parser.add_argument("--order", choices=["asc", "desc"], default="desc")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--cursor")
+    args = parser.parse_args(argv)
+
+    end = time.time()
+    search = LogSearch(Path(args.log_dir))
+    try:
+        result = search.search(end - args.window, end, args.limit, files=args.file,
+                               levels=args.level.split(",") if args.level else None,
+                               alert=args.alert, instance=args.instance, text=args.text,
+                               descending=args.order == "desc", cursor=args.cursor)
+    except ValueError as e:
+        print(json.dumps({"status": "error", "error": str(e)}))
+        return 1
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,20 +9,27 @@ function updateStatus() {
         .then(res => res.json())
         .then(data => {
             const status = data.status;
+            const thresholds = data.thresholds || {};
             
             // Update CPU
-            updateMetric('cpu', status.cpu);
+            updateMetric('cpu', status.cpu, thresholds.cpu);
             
             // Update Memory
-            updateMetric('memory', status.memory);
+            updateMetric('memory', status.memory, thresholds.memory);
             
             // Update Disk
-            updateMetric('disk', status.disk);
+            updateMetric('disk', status.disk, thresholds.disk);
+            
+            // Pressure stall (empty when the kernel has no PSI)
+            const pressure = (data.pressure || {}).system || {};
+            updatePressure('cpu', pressure.cpu);
+            updatePressure('memory', pressure.memory);
+            updatePressure('disk', pressure.io);
             
             // Update alert section
             if (data.pending_alert) {
                 // Create unique ID for alert
-                const alertId = `${data.pending_alert.alert_type}_${data.pending_alert.timestamp}`;
+                const alertId = `${data.pending_alert.alert_type}_${data.pending_alert.timestamp}_${data.pending_alert.capacity_status || ''}_${data.pending_alert.capacity_error || ''}`;
                 
                 // Only show alert if it's new (different from current)
                 if (alertId !== currentAlertId) {
@@ -42,7 +49,7 @@ function updateStatus() {
         .catch(err => console.error('Error fetching status:', err));
 }
 
-function updateMetric(name, value) {
+function updateMetric(name, value, threshold = 80) {
     const valueEl = document.getElementById(`${name}-value`);
     const fillEl = document.getElementById(`${name}-fill`);
     const cardEl = document.getElementById(`${name}-card`);
@@ -53,12 +60,12 @@ function updateMetric(name, value) {
     // Update progress bar
     fillEl.style.width = `${value}%`;
     
-    // Color based on thresholds
+    // Color based on the host's (learned or default) critical threshold
     let color, className;
-    if (value < 60) {
+    if (value < threshold * 0.75) {
         color = '#10b981'; // green
         className = 'ok';
-    } else if (value < 80) {
+    } else if (value < threshold) {
         color = '#f59e0b'; // yellow
         className = 'warning';
     } else {
@@ -72,6 +79,23 @@ function updateMetric(name, value) {
     cardEl.className = 'status-card ' + className;
 }
 
+function updatePressure(name, pressure) {
+    const psiEl = document.getElementById(`${name}-psi`);
+    if (!psiEl) return;
+    if (!pressure) {
+        psiEl.textContent = '';
+        return;
+    }
+    
+    // "some": at least one task waited, "full": every task waited
+    let text = `Stall: ${pressure.some ?? 0}%`;
+    if (pressure.full !== undefined) {
+        text += ` some / ${pressure.full}% full`;
+    }
+    psiEl.textContent = text;
+    psiEl.className = 'status-psi' + ((pressure.full || 0) >= 5 || (pressure.some || 0) >= 20 ? ' stalled' : '');
+}
+
 function showAlert(alert, files) {
     document.getElementById('alert-section').classList.remove('hidden');
     document.getElementById('no-alert').classList.add('hidden');
@@ -87,6 +111,9 @@ function showAlert(alert, files) {
         <p><strong>Severity:</strong> ${alert.severity}</p>
         <p><strong>Threshold:</strong> ${alert.threshold}</p>
         <p><strong>Current:</strong> ${alert.current_usage}</p>
+        ${alert.priority && alert.priority !== 'unknown' ? `<p><strong>Priority:</strong> ${alert.priority} (pressure stall)</p>` : ''}
+        ${alert.capacity_job ? `<p><strong>Scaling:</strong> job ${alert.capacity_job} ${alert.capacity_status || 'queued'}</p>` : ''}
+        ${alert.capacity_error ? `<p><strong>Scaling failed:</strong> ${alert.capacity_error}</p>` : ''}
     `;
     document.getElementById('alert-details').innerHTML = detailsHtml;
     
@@ -132,8 +159,16 @@ function showAlert(alert, files) {
     // Update button descriptions based on alert type
     updateButtonDescriptions(alertType);
     
-    // Start countdown
-    startCountdown(300); // 5 minutes
+    // Start countdown, unless a scaling job is already working on it
+    if (alert.capacity_job) {
+        if (countdownInterval) {
+            clearInterval(countdownInterval);
+            countdownInterval = null;
+        }
+        document.getElementById('alert-timer').textContent = '📈 Scaling';
+    } else {
+        startCountdown(300); // 5 minutes
+    }
 }
 
 function updateButtonDescriptions(alertType) {
@@ -224,6 +259,16 @@ function chooseAction(action) {
     })
     .then(res => res.json())
     .then(data => {
+        if (data.status === 'error') {
+            alert(`❌ ${data.message}`);
+            return;
+        }
+        if (data.status === 'queued') {
+            // The alert stays until the job finishes
+            alert(`📈 ${data.message}`);
+            updateStatus();
+            return;
+        }
         alert(`✅ Action executed: ${data.message}`);
         hideAlert();
         updateStatus();
@@ -321,6 +366,9 @@ function renderCPUOptions(data) {
         <button class="action-btn auto" onclick="executeManualSelection('cpu')">
             ✅ Kill Selected Processes
         </button>
+        <button class="action-btn manual" onclick="executeManualSelection('cpu', 'throttle')">
+            🐢 Throttle Selected (cgroup)
+        </button>
         <button class="action-btn" onclick="closeManualModal()">Cancel</button>
     `;
 }
@@ -368,6 +416,9 @@ function renderMemoryOptions(data) {
         <button class="action-btn auto" onclick="executeManualSelection('memory')">
             ✅ Execute Selected Actions
         </button>
+        <button class="action-btn manual" onclick="executeManualSelection('memory', 'throttle')">
+            🐢 Throttle Selected (cgroup)
+        </button>
         <button class="action-btn" onclick="closeManualModal()">Cancel</button>
     `;
     
@@ -430,7 +481,7 @@ function renderDiskOptions(data) {
     return html;
 }
 
-function executeManualSelection(resource) {
+function executeManualSelection(resource, mode = 'kill') {
     const checkboxes = document.querySelectorAll('.option-item input[type="checkbox"]:checked');
     const selected = Array.from(checkboxes).map(cb => cb.value);
     
@@ -450,7 +501,8 @@ function executeManualSelection(resource) {
         },
         body: JSON.stringify({ 
             resource: resource,
-            selections: selected 
+            selections: selected,
+            mode: mode
         })
     })
     .then(res => res.json())
@@ -494,18 +546,31 @@ function dismissAlert() {
     });
 }
 
+// History is fetched as a delta: only entries newer than the newest one we have.
+// The server answers 304 while nothing changed; the browser then reuses its copy.
+let historyEntries = [];
+let historyLatest = null;
+
 function updateHistory() {
-    fetch('/api/history')
+    const url = historyLatest ? `/api/history?since=${encodeURIComponent(historyLatest)}` : '/api/history';
+    fetch(url)
         .then(res => res.json())
         .then(data => {
             const historyList = document.getElementById('history-list');
+            const entries = data.history || [];
+            
+            if (data.delta && data.latest === historyLatest) {
+                return;  // nothing new
+            }
+            historyEntries = (data.delta ? entries.concat(historyEntries) : entries).slice(0, 100);
+            historyLatest = data.latest;
             
-            if (!data.history || data.history.length === 0) {
+            if (historyEntries.length === 0) {
                 historyList.innerHTML = '<div class="loading">No actions yet</div>';
                 return;
             }
             
-            const historyHtml = data.history.slice(0, 10).map(item => {
+            const historyHtml = historyEntries.slice(0, 10).map(item => {
                 const time = new Date(item.timestamp).toLocaleString();
                 const type = item.type.toLowerCase();
                 const icon = getActionIcon(type);
@@ -541,13 +606,93 @@ function getActionClass(type) {
     return '';
 }
 
+// Sparklines for the last 10 minutes (1s resolution)
+function updateSparklines() {
+    fetch('/api/metrics/history?resolution=1s&series=cpu,memory,disk')
+        .then(res => res.json())
+        .then(data => {
+            ['cpu', 'memory', 'disk'].forEach(name => {
+                const series = data.series[name];
+                if (series) {
+                    drawSparkline(document.getElementById(`${name}-spark`), series.avg);
+                }
+            });
+        })
+        .catch(err => console.error('Error fetching metric history:', err));
+}
+
+function drawSparkline(canvas, values) {
+    if (!canvas) return;
+    const ctx = canvas.getContext('2d');
+    const width = canvas.width;
+    const height = canvas.height;
+    ctx.clearRect(0, 0, width, height);
+    ctx.strokeStyle = '#60a5fa';
+    ctx.lineWidth = 1;
+    ctx.beginPath();
+    
+    let drawing = false;
+    values.forEach((value, i) => {
+        if (value === null) {
+            drawing = false;  // Gap in samples
+            return;
+        }
+        const x = (i / Math.max(values.length - 1, 1)) * width;
+        const y = height - (Math.min(value, 100) / 100) * height;
+        if (drawing) {
+            ctx.lineTo(x, y);
+        } else {
+            ctx.moveTo(x, y);
+            drawing = true;
+        }
+    });
+    ctx.stroke();
+}
+
+// Fleet table (only when the dashboard is pointed at Prometheus)
+function updateFleet() {
+    fetch('/api/fleet')
+        .then(res => res.json())
+        .then(data => {
+            const section = document.getElementById('fleet-section');
+            if (!data.enabled) {
+                section.classList.add('hidden');
+                return;
+            }
+            section.classList.remove('hidden');
+            const rows = document.getElementById('fleet-rows');
+            if (data.status === 'error') {
+                rows.innerHTML = `<tr><td colspan="7" class="loading">❌ ${data.message}</td></tr>`;
+                return;
+            }
+            const fmt = value => value === null ? '--' : `${value.toFixed(1)}`;
+            rows.innerHTML = Object.entries(data.hosts).map(([instance, host]) => `
+                <tr class="fleet-${host.status}">
+                    <td>${instance}</td>
+                    <td><span class="fleet-status">${host.status}</span></td>
+                    <td>${fmt(host.cpu)}%</td>
+                    <td>${fmt(host.memory)}%</td>
+                    <td>${fmt(host.disk)}%</td>
+                    <td>${fmt(host.network)}</td>
+                    <td>${host.pending_alert ? host.pending_alert.alert_name : ''}</td>
+                </tr>
+            `).join('');
+        })
+        .catch(err => console.error('Error fetching fleet:', err));
+}
+
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     updateStatus();
     updateHistory();
+    updateSparklines();
+    updateFleet();
     
     // Update every 5 seconds
     setInterval(updateStatus, 5000);
+    setInterval(updateSparklines, 5000);
+    
+    setInterval(updateFleet, 15000);
     
     // Update history every 30 seconds
     setInterval(updateHistory, 30000);
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Compact in-process metric history for dashboard sparklines.
+Fixed-size, array-backed ring buffers at several resolutions - memory is
+allocated once up front and never grows with uptime.
+"""
+
+import math
+import os
+import threading
+import time
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+# (name, step seconds, slots) - 1s for 10 minutes, 10s for 24 hours
+TIERS = (
+    ("1s", 1, 600),
+    ("10s", 10, 8640),
+)
+
+# Hard cap on tracked series (cpu, memory, disk + per-mountpoint disk)
+MAX_SERIES = 16
+
+# Filesystems that never fill up the way real disks do (same filter as alerts.yml)
+IGNORED_FSTYPES = {
+    "tmpfs", "devtmpfs", "fuse.lxcfs", "squashfs", "vfat", "proc", "sysfs", "cgroup",
+    "cgroup2", "devpts", "mqueue", "overlay", "nsfs", "tracefs", "debugfs", "securityfs",
+    "pstore", "bpf", "autofs", "configfs", "fusectl", "hugetlbfs", "binfmt_misc", "efivarfs",
+}
+
+
+class RingTier:
+    """
+    One resolution of one series. Each slot holds min/max/sum/count of the
+    samples that fell into its time window; a slot id marks which window a
+    slot currently belongs to, so gaps and wrap-around need no bookkeeping.
+    """
+
+    __slots__ = ("step", "size", "slot_ids", "mins", "maxs", "sums", "counts")
+
+    def __init__(self, step: int, size: int):
+        self.step = step
+        self.size = size
+        self.slot_ids = array("q", [-1]) * size
+        self.mins = array("f", [0.0]) * size
+        self.maxs = array("f", [0.0]) * size
+        self.sums = array("f", [0.0]) * size
+        self.counts = array("H", [0]) * size
+
+    @staticmethod
+    def bytes_per_slot() -> int:
+        return array("q").itemsize + 3 * array("f").itemsize + array("H").itemsize
+
+    def add(self, ts: float, value: float) -> None:
+        slot = int(ts // self.step)
+        pos = slot % self.size
+        if self.slot_ids[pos] != slot:
+            self.slot_ids[pos] = slot
+            self.mins[pos] = self.maxs[pos] = self.sums[pos] = value
+            self.counts[pos] = 1
+            return
+        if value < self.mins[pos]:
+            self.mins[pos] = value
+        if value > self.maxs[pos]:
+            self.maxs[pos] = value
+        self.sums[pos] += value
+        if self.counts[pos] < 0xFFFF:
+            self.counts[pos] += 1
+
+    def window(self, now: float, points: int) -> Tuple[int, List[Optional[float]], List[Optional[float]], List[Optional[float]]]:
+        """Return (first slot, mins, avgs, maxs) for the last `points` windows ending at now"""
+        points = max(1, min(points, self.size))
+        last = int(now // self.step)
+        first = last - points + 1
+        mins: List[Optional[float]] = []
+        avgs: List[Optional[float]] = []
+        maxs: List[Optional[float]] = []
+        for slot in range(first, last + 1):
+            pos = slot % self.size
+            if self.slot_ids[pos] == slot and self.counts[pos]:
+                mins.append(round(self.mins[pos], 1))
+                avgs.append(round(self.sums[pos] / self.counts[pos], 1))
+                maxs.append(round(self.maxs[pos], 1))
+            else:
+                mins.append(None)
+                avgs.append(None)
+                maxs.append(None)
+        return first, mins, avgs, maxs
+
+
+class MetricHistory:
+    """Multi-resolution history for a bounded set of named series"""
+
+    def __init__(self, tiers=TIERS, max_series: int = MAX_SERIES):
+        self.tiers = tuple(tiers)
+        self.max_series = max_series
+        self.series: Dict[str, Dict[str, RingTier]] = {}
+        self.latest: Dict[str, float] = {}
+        self.latest_ts = 0.0
+        self.lock = threading.Lock()
+
+    def memory_bytes(self) -> int:
+        """Upper bound of buffer memory once every series slot is in use"""
+        slots = sum(size for _, _, size in self.tiers)
+        return self.max_series * slots * RingTier.bytes_per_slot()
+
+    def record(self, ts: float, values: Dict[str, float]) -> None:
+        with self.lock:
+            for name, value in values.items():
+                if value is None or math.isnan(value):
+                    continue
+                tiers = self.series.get(name)
+                if tiers is None:
+                    if len(self.series) >= self.max_series:
+                        continue
+                    tiers = self.series[name] = {
+                        label: RingTier(step, size) for label, step, size in self.tiers
+                    }
+                for tier in tiers.values():
+                    tier.add(ts, value)
+                self.latest[name] = value
+            self.latest_ts = ts
+
+    def query(self, names: Optional[List[str]] = None, resolution: str = "1s",
+              points: Optional[int] = None, now: Optional[float] = None) -> Dict:
+        """Columnar history: one start/step header, then value arrays per series"""
+        steps = {label: step for label, step, _ in self.tiers}
+        if resolution not in steps:
+            raise ValueError(f"Unknown resolution: {resolution} (expected one of {', '.join(steps)})")
+        now = time.time() if now is None else now
+        step = steps[resolution]
+
+        with self.lock:
+            names = [n for n in (names or sorted(self.series)) if n in self.series]
+            out: Dict[str, Dict[str, List[Optional[float]]]] = {}
+            first = int(now // step)
+            for name in names:
+                tier = self.series[name][resolution]
+                first, mins, avgs, maxs = tier.window(now, points or tier.size)
+                # At the sampling resolution min == avg == max, so only ship avg
+                out[name] = {"avg": avgs} if step <= 1 else {"min": mins, "avg": avgs, "max": maxs}
+
+        return {
+            "resolution": resolution,
+            "step": step,
+            "start": first * step,
+            "series": out,
+            "available": sorted(self.series),
+        }
+
+
+class ProcSampler:
+    """Cheap CPU/memory/disk sampling straight from procfs and statvfs"""
+
+    def __init__(self, proc_root: str = "/proc", max_mounts: int = MAX_SERIES - 3):
+        self.proc_root = proc_root
+        self.max_mounts = max_mounts
+        self._last_cpu: Optional[Tuple[int, int]] = None
+
+    def _read(self, name: str) -> str:
+        with open(os.path.join(self.proc_root, name)) as f:
+            return f.read()
+
+    def cpu_percent(self) -> Optional[float]:
+        """CPU busy % since the previous call (None on the first call)"""
+        fields = self._read("stat").split("\n", 1)[0].split()[1:]
+        ticks = [int(v) for v in fields]
+        idle = ticks[3] + (ticks[4] if len(ticks) > 4 else 0)
+        total = sum(ticks[:8])
+        last, self._last_cpu = self._last_cpu, (idle, total)
+        if last is None or total <= last[1]:
+            return None
+        return round(100.0 * (1 - (idle - last[0]) / (total - last[1])), 1)
+
+    def memory_percent(self) -> float:
+        info = {}
+        for line in self._read("meminfo").splitlines():
+            key, _, rest = line.partition(":")
+            if key in ("MemTotal", "MemAvailable"):
+                info[key] = int(rest.split()[0])
+        return round((1 - info["MemAvailable"] / info["MemTotal"]) * 100, 1)
+
+    def mountpoints(self) -> List[str]:
+        mounts: List[str] = []
+        for line in self._read("mounts").splitlines():
+            parts = line.split()
+            if len(parts) < 3 or parts[2] in IGNORED_FSTYPES or parts[1] in mounts:
+                continue
+            mounts.append(parts[1].replace("\\040", " "))
+        if "/" in mounts:
+            mounts.remove("/")
+        return (["/"] + mounts)[: self.max_mounts]
+
+    @staticmethod
+    def disk_percent(path: str) -> Optional[float]:
+        try:
+            st = os.statvfs(path)
+        except OSError:
+            return None
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        usable = used + st.f_bavail * st.f_frsize
+        return round(100.0 * used / usable, 1) if usable else None
+
+    def sample(self) -> Dict[str, float]:
+        values: Dict[str, float] = {}
+        cpu = self.cpu_percent()
+        if cpu is not None:
+            values["cpu"] = cpu
+        values["memory"] = self.memory_percent()
+        for mount in self.mountpoints():
+            pct = self.disk_percent(mount)
+            if pct is None:
+                continue
+            values[f"disk:{mount}"] = pct
+            if mount == "/":
+                values["disk"] = pct
+        return values
+
+
+def start_sampler(history: MetricHistory, sampler: Optional[ProcSampler] = None, interval: float = 1.0,
+                  on_sample: Optional[Callable[[float, Dict[str, float]], None]] = None) -> threading.Thread:
+    """Sample every `interval` seconds on a daemon thread"""
+    sampler = sampler or ProcSampler()
+
+    def loop():
+        next_run = time.monotonic()
+        while True:
+            try:
+                ts = time.time()
+                values = sampler.sample()
+                history.record(ts, values)
+                if on_sample:
+                    on_sample(ts, values)
+            except Exception as e:
+                print(f"Error sampling metrics: {e}")
+            next_run += interval
+            time.sleep(max(0.0, next_run - time.monotonic()))
+
+    thread = threading.Thread(target=loop, name="metrics-sampler", daemon=True)
+    thread.start()
+    return thread
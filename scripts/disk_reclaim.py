@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Self-Healing Disk Reclaim
+Plans reclaimable space under log/tmp/cache directories, ranks candidates by
+bytes they would free, and works down the list until a free-space goal is met:
+rotated logs are gzip-compressed in a process pool, stale files are deleted,
+and files still held open by a process are truncated (deleting them would
+free nothing until the process exits).
+
+Usage (root sees every process's open files):
+    sudo python3 disk_reclaim.py plan --target-percent 80
+    sudo python3 disk_reclaim.py reclaim --target-percent 80 [--dry-run]
+    sudo python3 disk_reclaim.py remove /var/log/huge.log
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import stat
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Where reclaimable space is looked for, and what may be done there
+LOG_ROOTS = ("/var/log",)
+TMP_ROOTS = ("/tmp", "/var/tmp")
+CACHE_ROOTS = ("/var/cache/dnf", "/var/cache/yum", "/var/cache/apt/archives")
+
+# Age limits (same as the shell cleanup)
+LOG_MAX_AGE_DAYS = 7
+TMP_MAX_AGE_DAYS = 3
+
+# Never touch anything written this recently
+MIN_IDLE_SECONDS = 300
+# Open files below this size are not worth truncating
+TRUNCATE_MIN_BYTES = 100 * 1024 * 1024
+# Logs typically gzip to about a tenth of their size
+COMPRESS_RATIO = 0.1
+MIN_COMPRESS_BYTES = 64 * 1024
+
+ROTATED_RE = re.compile(r"(\.\d+|[-_.]\d{8}(\d{2})?)$")
+COMPRESSED_RE = re.compile(r"\.(gz|xz|bz2|zst|zip)$")
+
+# Only these names under the log roots are candidates: *.log, *.log.N,
+# *-YYYYMMDD, and compressed copies of those
+LOG_NAME_RE = re.compile(r"(\.log(\.\d+)?|-\d{8}(\d{2})?)(\.(gz|xz|bz2|zst|zip))?$")
+# Never touched, whatever their name: the systemd journal and login records
+EXCLUDED_LOG_DIRS = ("journal",)
+UTMP_RE = re.compile(r"^(utmp|wtmp|btmp|lastlog|faillog)([.-]|$)")
+
+DAY = 86400
+
+
+class Candidate:
+    """One reclaim step: what to do with a path and how much it should free"""
+
+    __slots__ = ("action", "path", "size", "estimate", "reason", "pids")
+
+    def __init__(self, action: str, path: str, size: int, estimate: int, reason: str,
+                 pids: Optional[List[int]] = None):
+        self.action = action  # compress | delete | truncate
+        self.path = path
+        self.size = size
+        self.estimate = estimate
+        self.reason = reason
+        self.pids = pids or []
+
+    def to_dict(self) -> Dict:
+        return {
+            "action": self.action,
+            "path": self.path,
+            "size_bytes": self.size,
+            "estimated_bytes": self.estimate,
+            "reason": self.reason,
+            "pids": self.pids,
+        }
+
+
+def allocated_bytes(st: os.stat_result) -> int:
+    """Bytes actually used on disk (sparse files report less than st_size)"""
+    return st.st_blocks * 512
+
+
+def open_files(proc_root: str = "/proc") -> Dict[str, List[int]]:
+    """
+    Map every file held open by a process to the PIDs holding it. Deleted but
+    still open files are keyed by their /proc/<pid>/fd/<n> path instead.
+    """
+    result: Dict[str, List[int]] = {}
+    try:
+        pids = [p for p in os.listdir(proc_root) if p.isdigit()]
+    except OSError:
+        return result
+    for pid in pids:
+        fd_dir = os.path.join(proc_root, pid, "fd")
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue  # Exited, or another user's process without root
+        for fd in fds:
+            try:
+                target = os.readlink(os.path.join(fd_dir, fd))
+            except OSError:
+                continue
+            if not target.startswith("/"):
+                continue  # socket:[...], pipe:[...], anon_inode:...
+            if target.endswith(" (deleted)"):
+                target = os.path.join(fd_dir, fd)
+            result.setdefault(target, []).append(int(pid))
+    return result
+
+
+def compress_file(path: str) -> Dict:
+    """
+    gzip one file next to itself, keeping mode/owner/mtime (runs in a worker)
+    """
+    started = time.monotonic()
+    tmp_path = path + ".gz.tmp"
+    try:
+        st = os.lstat(path)
+        with open(path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.chmod(tmp_path, stat.S_IMODE(st.st_mode))
+        try:
+            os.chown(tmp_path, st.st_uid, st.st_gid)
+        except PermissionError:
+            pass
+        os.utime(tmp_path, (st.st_atime, st.st_mtime))
+        os.replace(tmp_path, path + ".gz")
+        new_size = allocated_bytes(os.lstat(path + ".gz"))
+        os.unlink(path)
+        return {"action": "compress", "path": path, "bytes": max(0, allocated_bytes(st) - new_size),
+                "seconds": round(time.monotonic() - started, 3)}
+    except OSError as e:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        return {"action": "compress", "path": path, "bytes": 0, "error": str(e),
+                "seconds": round(time.monotonic() - started, 3)}
+
+
+def remove(path: str, holders: Optional[Dict[str, List[int]]] = None, proc_root: str = "/proc") -> Dict:
+    """
+    Free a single file: truncate it if a process still has it open, delete it
+    otherwise. Raises PermissionError when not allowed (callers may escalate).
+    """
+    started = time.monotonic()
+    st = os.lstat(path)
+    if not stat.S_ISREG(st.st_mode):
+        raise IsADirectoryError(f"Not a regular file: {path}")
+    if holders is None:
+        holders = open_files(proc_root)
+    pids = holders.get(path, [])
+    if pids:
+        os.truncate(path, 0)
+        action = "truncate"
+    else:
+        os.unlink(path)
+        action = "delete"
+    return {"action": action, "path": path, "bytes": allocated_bytes(st), "pids": pids,
+            "seconds": round(time.monotonic() - started, 3)}
+
+
+class DiskReclaimer:
+    """Plan and execute space reclaim for one filesystem"""
+
+    def __init__(self, mount: str = "/", log_roots=LOG_ROOTS, tmp_roots=TMP_ROOTS,
+                 cache_roots=CACHE_ROOTS, proc_root: str = "/proc", now: Optional[float] = None):
+        self.mount = mount
+        self.log_roots = tuple(log_roots)
+        self.tmp_roots = tuple(tmp_roots)
+        self.cache_roots = tuple(cache_roots)
+        self.proc_root = proc_root
+        self.now = now
+        self.dev = os.stat(mount).st_dev
+
+    # ------------------------------------------------------------
+    # Usage
+    # ------------------------------------------------------------
+
+    def usage(self) -> Dict:
+        st = os.statvfs(self.mount)
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        usable = used + st.f_bavail * st.f_frsize
+        return {
+            "used_bytes": used,
+            "free_bytes": st.f_bavail * st.f_frsize,
+            "percent": round(100.0 * used / usable, 1) if usable else 0.0,
+            "usable_bytes": usable,
+        }
+
+    def goal_for_percent(self, target_percent: float) -> int:
+        """Bytes that must be freed to get usage down to target_percent"""
+        usage = self.usage()
+        return max(0, int(usage["used_bytes"] - usage["usable_bytes"] * target_percent / 100))
+
+    # ------------------------------------------------------------
+    # Planning
+    # ------------------------------------------------------------
+
+    def _walk(self, roots):
+        for root in roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.lstat(path)
+                    except OSError:
+                        continue
+                    # Regular files on this filesystem only, never via symlinks
+                    if stat.S_ISREG(st.st_mode) and st.st_dev == self.dev:
+                        yield path, st
+
+    def is_log_candidate(self, path: str) -> bool:
+        """Whether a file under a log root may be compressed, deleted or truncated"""
+        name = os.path.basename(path)
+        if UTMP_RE.match(name) or not LOG_NAME_RE.search(name):
+            return False
+        return not any(path.startswith(os.path.join(root, excluded) + os.sep)
+                       for root in self.log_roots for excluded in EXCLUDED_LOG_DIRS)
+
+    def plan(self) -> List[Candidate]:
+        """Every candidate, ranked by the bytes it is expected to free"""
+        now = self.now or time.time()
+        holders = open_files(self.proc_root)
+        candidates: List[Candidate] = []
+
+        for path, st in self._walk(self.log_roots):
+            if not self.is_log_candidate(path):
+                continue
+            size = allocated_bytes(st)
+            age = now - st.st_mtime
+            pids = holders.get(path, [])
+            if pids:
+                if size >= TRUNCATE_MIN_BYTES:
+                    candidates.append(Candidate("truncate", path, size, size, "open log", pids))
+            elif age < MIN_IDLE_SECONDS or not size:
+                continue
+            elif COMPRESSED_RE.search(path):
+                if age > LOG_MAX_AGE_DAYS * DAY:
+                    candidates.append(Candidate("delete", path, size, size, "old compressed log"))
+            elif ROTATED_RE.search(path) or age > LOG_MAX_AGE_DAYS * DAY:
+                if size >= MIN_COMPRESS_BYTES:
+                    estimate = int(size * (1 - COMPRESS_RATIO))
+                    candidates.append(Candidate("compress", path, size, estimate, "rotated log"))
+
+        for path, st in self._walk(self.tmp_roots):
+            if path in holders or now - st.st_atime < TMP_MAX_AGE_DAYS * DAY:
+                continue
+            size = allocated_bytes(st)
+            if size:
+                candidates.append(Candidate("delete", path, size, size, "stale temp file"))
+
+        for path, st in self._walk(self.cache_roots):
+            size = allocated_bytes(st)
+            if size and path not in holders:
+                candidates.append(Candidate("delete", path, size, size, "package cache"))
+
+        # Deleted files a process still holds keep their space until truncated
+        seen = set()
+        for path, pids in holders.items():
+            if not path.startswith(self.proc_root):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if (st.st_dev, st.st_ino) in seen:
+                continue  # Same file behind several descriptors
+            seen.add((st.st_dev, st.st_ino))
+            if stat.S_ISREG(st.st_mode) and st.st_dev == self.dev and allocated_bytes(st):
+                size = allocated_bytes(st)
+                candidates.append(Candidate("truncate", path, size, size, "deleted but still open", pids))
+
+        candidates.sort(key=lambda c: c.estimate, reverse=True)
+        return candidates
+
+    # ------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------
+
+    def _run_step(self, candidate: Candidate) -> Dict:
+        started = time.monotonic()
+        try:
+            # /proc/<pid>/fd/<n> is a link to the deleted file - stat the file
+            st = os.stat(candidate.path) if candidate.action == "truncate" else os.lstat(candidate.path)
+            if candidate.action == "truncate":
+                os.truncate(candidate.path, 0)
+            else:
+                os.unlink(candidate.path)
+            freed = allocated_bytes(st)
+            step = {"action": candidate.action, "path": candidate.path, "bytes": freed}
+        except OSError as e:
+            step = {"action": candidate.action, "path": candidate.path, "bytes": 0, "error": str(e)}
+        step["seconds"] = round(time.monotonic() - started, 3)
+        return step
+
+    def reclaim(self, goal_bytes: int, workers: Optional[int] = None, dry_run: bool = False) -> Dict:
+        """
+        Work down the ranked plan until goal_bytes have been freed. Compression
+        runs in a process pool while deletes/truncates proceed in this process;
+        nothing new is started once the freed + in-flight estimate covers the goal.
+        """
+        started = time.monotonic()
+        before = self.usage()
+        plan = self.plan()
+        steps: List[Dict] = []
+        reclaimed = 0
+
+        if dry_run:
+            for candidate in plan:
+                if reclaimed >= goal_bytes:
+                    break
+                steps.append(dict(candidate.to_dict(), bytes=candidate.estimate, dry_run=True))
+                reclaimed += candidate.estimate
+            return self._report(goal_bytes, before, before, steps, reclaimed, started, len(plan))
+
+        pending: Dict = {}
+        in_flight = 0
+        index = 0
+        workers = workers or min(4, os.cpu_count() or 1)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while reclaimed < goal_bytes and (index < len(plan) or pending):
+                if index < len(plan) and reclaimed + in_flight < goal_bytes:
+                    candidate = plan[index]
+                    index += 1
+                    if candidate.action == "compress":
+                        pending[pool.submit(compress_file, candidate.path)] = candidate
+                        in_flight += candidate.estimate
+                    else:
+                        step = self._run_step(candidate)
+                        steps.append(step)
+                        reclaimed += step["bytes"]
+                    continue
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    candidate = pending.pop(future)
+                    in_flight -= candidate.estimate
+                    step = future.result()
+                    steps.append(step)
+                    reclaimed += step["bytes"]
+
+            # Goal met: drop queued compressions, let running ones finish
+            for future in list(pending):
+                if future.cancel():
+                    pending.pop(future)
+            for future in pending:
+                step = future.result()
+                steps.append(step)
+                reclaimed += step["bytes"]
+
+        return self._report(goal_bytes, before, self.usage(), steps, reclaimed, started, len(plan))
+
+    def _report(self, goal_bytes: int, before: Dict, after: Dict, steps: List[Dict],
+                reclaimed: int, started: float, planned: int) -> Dict:
+        for step in steps:
+            if step.get("error"):
+                logger.warning(f"{step['action']} failed for {step['path']}: {step['error']}")
+        return {
+            "mount": self.mount,
+            "goal_bytes": goal_bytes,
+            "reclaimed_bytes": reclaimed,
+            "goal_met": reclaimed >= goal_bytes,
+            "candidates": planned,
+            "steps": steps,
+            "usage_before": before["percent"],
+            "usage_after": after["percent"],
+            "wall_seconds": round(time.monotonic() - started, 3),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Disk space reclaim for self-healing")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("plan", "List reclaim candidates"), ("reclaim", "Free space until the goal is met")):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("--mount", default="/")
+        goal = cmd.add_mutually_exclusive_group()
+        goal.add_argument("--target-percent", type=float, help="Reclaim until usage is below this")
+        goal.add_argument("--free-bytes", type=int, help="Reclaim at least this many bytes")
+        if name == "reclaim":
+            cmd.add_argument("--workers", type=int)
+            cmd.add_argument("--dry-run", action="store_true")
+
+    rm = sub.add_parser("remove", help="Delete a file, or truncate it if still open")
+    rm.add_argument("path")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "remove":
+            print(json.dumps(remove(args.path), indent=2))
+            return 0
+
+        reclaimer = DiskReclaimer(args.mount)
+        if args.free_bytes is not None:
+            goal = args.free_bytes
+        elif args.target_percent is not None:
+            goal = reclaimer.goal_for_percent(args.target_percent)
+        else:
+            goal = sum(c.estimate for c in reclaimer.plan()) if args.command == "reclaim" else 0
+
+        if args.command == "plan":
+            plan = reclaimer.plan()
+            result = {
+                "mount": args.mount,
+                "goal_bytes": goal,
+                "usage": reclaimer.usage()["percent"],
+                "reclaimable_bytes": sum(c.estimate for c in plan),
+                "candidates": [c.to_dict() for c in plan],
+            }
+        else:
+            result = reclaimer.reclaim(goal, args.workers, args.dry_run)
+            print(json.dumps(result, indent=2))
+            return 0 if result["goal_met"] else 1
+    except OSError as e:
+        print(json.dumps({"status": "error", "error": str(e)}))
+        return 2
+
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,7 +12,8 @@ LOG="$LOG_DIR/self_heal.log"
 REC="$LOG_DIR/recommendations.json"
 
 # Configuration
-TARGET_DISK=85         # Target disk usage
+# Target usage comes from the shared (learned or default) thresholds
+TARGET_DISK=$(SELF_HEAL_LOG_DIR="$LOG_DIR" python3 "$SCRIPT_DIR/thresholds.py" get DISK 2>/dev/null || echo 85)
 
 # ============================================================
 # Helper Functions
@@ -49,7 +50,8 @@ clean_cache() {
     local freed=0
     echo "[$(date)] [DISK] Cleaning package cache..." >> "$LOG"
     local before=$(df / | awk 'NR==2 {print $3}')
-    sudo yum clean all 2>/dev/null || sudo apt-get clean 2>/dev/null
+    # Their output goes to the log: stdout is this function's return value
+    sudo yum clean all >> "$LOG" 2>/dev/null || sudo apt-get clean >> "$LOG" 2>/dev/null
     local after=$(df / | awk 'NR==2 {print $3}')
     freed=$((before - after))
     echo "[$(date)] [DISK] Freed ${freed}KB from cache" >> "$LOG"
@@ -67,7 +69,7 @@ clean_docker() {
     if command -v docker &> /dev/null; then
         echo "[$(date)] [DISK] Cleaning Docker resources..." >> "$LOG"
         local before=$(df / | awk 'NR==2 {print $3}')
-        sudo docker system prune -af 2>/dev/null
+        sudo docker system prune -af >> "$LOG" 2>/dev/null
         local after=$(df / | awk 'NR==2 {print $3}')
         freed=$((before - after))
         echo "[$(date)] [DISK] Freed ${freed}KB from Docker" >> "$LOG"
@@ -75,6 +77,31 @@ clean_docker() {
     echo $freed
 }
 
+reclaim_native() {
+    # Ranked reclaim in Python: compresses rotated logs in parallel, truncates
+    # files still held open, stops once usage is back under the target.
+    # Exit status: 0 goal met, 1 goal not met, anything else = unavailable
+    echo "[$(date)] [DISK] Running native reclaim (target ${TARGET_DISK}%)..." >> "$LOG"
+    local report
+    report=$(sudo python3 "$SCRIPT_DIR/disk_reclaim.py" reclaim --target-percent "$TARGET_DISK" 2>>"$LOG")
+    local status=$?
+    if [ -z "$report" ] || (( status > 1 )); then
+        echo "[$(date)] [DISK] Native reclaim unavailable, using shell cleanup" >> "$LOG"
+        echo 0
+        return 2
+    fi
+    echo "$report" | python3 -c '
+import json, sys
+report = json.load(sys.stdin)
+for step in report["steps"]:
+    print("[DISK] reclaim %s %s: %d KB in %.2fs%s" % (step["action"], step["path"], step["bytes"] // 1024,
+          step["seconds"], " (" + step["error"] + ")" if step.get("error") else ""))
+print("[DISK] reclaim total: %d KB in %.2fs" % (report["reclaimed_bytes"] // 1024, report["wall_seconds"]))
+' | sed "s/^/[$(date)] /" >> "$LOG"
+    echo "$report" | python3 -c 'import json, sys; print(json.load(sys.stdin)["reclaimed_bytes"] // 1024)' 2>/dev/null || echo 0
+    return $status
+}
+
 generate_recommendation() {
     local severity="$1"
     local disk="$2"
@@ -82,9 +109,10 @@ generate_recommendation() {
     local freed_tmp="$4"
     local freed_cache="$5"
     local freed_docker="$6"
+    local freed_reclaim="${7:-0}"
     
     local timestamp=$(date -Iseconds)
-    local total_freed=$((freed_logs + freed_tmp + freed_cache + freed_docker))
+    local total_freed=$((freed_logs + freed_tmp + freed_cache + freed_docker + freed_reclaim))
     local rec_file="/tmp/disk_rec_$$.json"
     
     cat > "$rec_file" << EOF
@@ -93,8 +121,9 @@ generate_recommendation() {
   "resource": "DISK",
   "severity": "$severity",
   "current_value": "${disk}%",
-  "threshold": "85%",
+  "threshold": "${TARGET_DISK}%",
   "actions_taken": {
+    "reclaim_kb": $freed_reclaim,
     "logs_cleaned_kb": $freed_logs,
     "tmp_cleaned_kb": $freed_tmp,
     "cache_cleaned_kb": $freed_cache,
@@ -156,16 +185,25 @@ fi
 echo "[$(date)] [DISK] ALERT: High disk usage detected (${current_disk}%)" >> "$LOG"
 echo "[$(date)] [DISK] Starting cleanup operations..." >> "$LOG"
 
-# Perform all cleanup operations
-freed_logs=$(clean_logs)
-freed_tmp=$(clean_tmp)
-freed_cache=$(clean_cache)
-clean_cores
-freed_docker=$(clean_docker)
+# Native reclaim first; shell cleanup only if it is unavailable or falls short
+freed_logs=0
+freed_tmp=0
+freed_cache=0
+freed_docker=0
+freed_reclaim=$(reclaim_native)
+reclaim_status=$?
+
+if (( reclaim_status != 0 )); then
+    freed_logs=$(clean_logs)
+    freed_tmp=$(clean_tmp)
+    freed_cache=$(clean_cache)
+    clean_cores
+    freed_docker=$(clean_docker)
+fi
 
 # Check final status
 final_disk=$(get_disk_usage)
-total_freed=$((freed_logs + freed_tmp + freed_cache + freed_docker))
+total_freed=$((freed_logs + freed_tmp + freed_cache + freed_docker + freed_reclaim))
 total_freed_mb=$((total_freed / 1024))
 
 echo "[$(date)] [DISK] Healing completed - Final disk usage: ${final_disk}%" >> "$LOG"
@@ -176,6 +214,6 @@ severity="WARNING"
 if (( final_disk > 90 )); then
     severity="CRITICAL"
 fi
-generate_recommendation "$severity" "$final_disk" "$freed_logs" "$freed_tmp" "$freed_cache" "$freed_docker"
+generate_recommendation "$severity" "$final_disk" "$freed_logs" "$freed_tmp" "$freed_cache" "$freed_docker" "$freed_reclaim"
 
 echo "[$(date)] [DISK] Smart healing finished" >> "$LOG"
@@ -13,11 +13,16 @@ REC="$LOG_DIR/recommendations.json"
 NOTIF="$LOG_DIR/notifications.log"
 
 # Configuration
-TARGET_CPU=80          # Target CPU to reach
+# Target usage comes from the shared (learned or default) thresholds
+TARGET_CPU=$(SELF_HEAL_LOG_DIR="$LOG_DIR" python3 "$SCRIPT_DIR/thresholds.py" get CPU 2>/dev/null || echo 80)
 KILL_THRESHOLD=40      # Kill processes using > 40% CPU
 MAX_ITERATIONS=5       # Max kill attempts
 WAIT_TIME=10          # Seconds to wait between kills
 
+# Remediation: "kill" (default) or "throttle" (cgroup v2 cpu.max, nothing is killed)
+REMEDIATION_MODE="${REMEDIATION_MODE:-kill}"
+THROTTLE_WAIT=2        # cpu.max applies immediately - only wait for top to catch up
+
 # Critical processes to preserve (comma-separated)
 CRITICAL_PROCS="systemd,sshd,dockerd,containerd,python3,node,postgres,mysql,nginx,apache2"
 
@@ -39,6 +44,7 @@ generate_recommendation() {
     local cpu="$2"
     local killed_procs="$3"
     local critical_procs="$4"
+    local throttled_procs="${5:-0}"
     
     local timestamp=$(date -Iseconds)
     local rec_file="/tmp/cpu_rec_$$.json"
@@ -49,9 +55,10 @@ generate_recommendation() {
   "resource": "CPU",
   "severity": "$severity",
   "current_value": "${cpu}%",
-  "threshold": "80%",
+  "threshold": "${TARGET_CPU}%",
   "actions_taken": {
     "killed_processes": $killed_procs,
+    "throttled_processes": $throttled_procs,
     "critical_processes_found": $critical_procs
   },
   "recommendations": {
@@ -109,6 +116,7 @@ echo "[$(date)] [CPU] ALERT: High CPU usage detected (${current_cpu}%)" >> "$LOG
 echo "[$(date)] [CPU] Starting gradual process termination..." >> "$LOG"
 
 killed_count=0
+throttled_count=0
 critical_found=0
 iteration=0
 
@@ -135,38 +143,51 @@ while (( $(get_cpu_usage) > TARGET_CPU && iteration < MAX_ITERATIONS )); do
         critical_found=$((critical_found + 1))
         
         # Generate high-priority recommendation
-        generate_recommendation "CRITICAL" "$(get_cpu_usage)" "$killed_count" "$critical_found"
+        generate_recommendation "CRITICAL" "$(get_cpu_usage)" "$killed_count" "$critical_found" "$throttled_count"
         break
     fi
     
-    # Kill non-critical process
-    echo "[$(date)] [CPU] Killing non-critical process: $proc_name (PID=$pid) using ${proc_cpu}%" >> "$LOG"
-    if sudo kill -9 "$pid" 2>/dev/null; then
-        echo "[$(date)] [CPU] ✓ Process $pid terminated successfully" >> "$LOG"
-        killed_count=$((killed_count + 1))
+    if [ "$REMEDIATION_MODE" = "throttle" ]; then
+        # Throttle non-critical process into a cgroup v2 slice
+        echo "[$(date)] [CPU] Throttling non-critical process: $proc_name (PID=$pid) using ${proc_cpu}%" >> "$LOG"
+        if sudo python3 "$SCRIPT_DIR/cgroup_throttle.py" throttle "$pid" --memory-high "" --reason "handle_high_cpu" >> "$LOG" 2>&1; then
+            echo "[$(date)] [CPU] ✓ Process $pid throttled successfully" >> "$LOG"
+            throttled_count=$((throttled_count + 1))
+        else
+            echo "[$(date)] [CPU] ✗ Failed to throttle process $pid" >> "$LOG"
+        fi
+        wait_time=$THROTTLE_WAIT
     else
-        echo "[$(date)] [CPU] ✗ Failed to kill process $pid" >> "$LOG"
+        # Kill non-critical process
+        echo "[$(date)] [CPU] Killing non-critical process: $proc_name (PID=$pid) using ${proc_cpu}%" >> "$LOG"
+        if sudo kill -9 "$pid" 2>/dev/null; then
+            echo "[$(date)] [CPU] ✓ Process $pid terminated successfully" >> "$LOG"
+            killed_count=$((killed_count + 1))
+        else
+            echo "[$(date)] [CPU] ✗ Failed to kill process $pid" >> "$LOG"
+        fi
+        wait_time=$WAIT_TIME
     fi
     
     # Wait before next iteration
     if (( iteration < MAX_ITERATIONS )); then
-        echo "[$(date)] [CPU] Waiting ${WAIT_TIME}s before next check..." >> "$LOG"
-        sleep "$WAIT_TIME"
+        echo "[$(date)] [CPU] Waiting ${wait_time}s before next check..." >> "$LOG"
+        sleep "$wait_time"
     fi
 done
 
 # Final status
 final_cpu=$(get_cpu_usage)
 echo "[$(date)] [CPU] Healing completed - Final CPU: ${final_cpu}%" >> "$LOG"
-echo "[$(date)] [CPU] Processes killed: $killed_count, Critical processes found: $critical_found" >> "$LOG"
+echo "[$(date)] [CPU] Processes killed: $killed_count, throttled: $throttled_count, Critical processes found: $critical_found" >> "$LOG"
 
 # Generate final recommendation
-if (( killed_count > 0 || critical_found > 0 )); then
+if (( killed_count > 0 || throttled_count > 0 || critical_found > 0 )); then
     severity="WARNING"
     if (( final_cpu > 90 || critical_found > 0 )); then
         severity="CRITICAL"
     fi
-    generate_recommendation "$severity" "$final_cpu" "$killed_count" "$critical_found"
+    generate_recommendation "$severity" "$final_cpu" "$killed_count" "$critical_found" "$throttled_count"
 fi
 
 echo "[$(date)] [CPU] Smart healing finished" >> "$LOG"
@@ -12,7 +12,8 @@ LOG="$LOG_DIR/self_heal.log"
 REC="$LOG_DIR/recommendations.json"
 
 # Configuration
-TARGET_MEM=80          # Target memory usage
+# Target usage comes from the shared (learned or default) thresholds
+TARGET_MEM=$(SELF_HEAL_LOG_DIR="$LOG_DIR" python3 "$SCRIPT_DIR/thresholds.py" get MEMORY 2>/dev/null || echo 75)
 KILL_THRESHOLD=15      # Kill processes using > 15% memory
 MAX_ITERATIONS=3       # Max kill attempts
 WAIT_TIME=10          # Seconds to wait
@@ -57,7 +58,7 @@ generate_recommendation() {
   "resource": "MEMORY",
   "severity": "$severity",
   "current_value": "${mem}%",
-  "threshold": "85%",
+  "threshold": "${TARGET_MEM}%",
   "actions_taken": {
     "cache_cleared": $cache_cleared,
     "killed_processes": $killed_procs,
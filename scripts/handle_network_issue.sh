@@ -18,6 +18,18 @@ TEST_HOSTS=("8.8.8.8" "1.1.1.1" "208.67.222.222")  # Google, Cloudflare, OpenDNS
 # Helper Functions
 # ============================================================
 
+diagnose_network() {
+    # Concurrent probes + /proc counters in one pass (bounded by the slowest probe)
+    # Prints: <reachable> <total> <packet loss %> <summary>
+    local diag
+    diag=$(python3 "$SCRIPT_DIR/network_diag.py" diagnose --targets "${TEST_HOSTS[@]/%/:53}" 2>>"$LOG")
+    [ -n "$diag" ] || return 1
+    echo "$diag" | python3 -c '
+import json, sys
+d = json.load(sys.stdin)
+print(d["reachable"], d["total"], int(d["packet_loss"]), d["summary"])' 2>>"$LOG"
+}
+
 test_connectivity() {
     local host="$1"
     ping -c 2 -W 3 "$host" >/dev/null 2>&1
@@ -56,6 +68,17 @@ flush_dns() {
 kill_network_hogs() {
     echo "[$(date)] [NETWORK] Checking for bandwidth hogs..." >> "$LOG"
     
+    # Sockets attributed to processes via /proc/net/tcp + /proc/*/fd
+    local talkers
+    if talkers=$(sudo python3 "$SCRIPT_DIR/network_diag.py" talkers --count 5 2>/dev/null); then
+        echo "$talkers" | python3 -c '
+import json, sys
+for t in json.load(sys.stdin):
+    print("[NETWORK] %(name)s (PID %(pid)s): %(connections)s connections, %(remote_hosts)s remote hosts, %(queued_bytes)s bytes queued" % t)' \
+            | sed "s/^/[$(date)] /" >> "$LOG"
+        return
+    fi
+    
     # Get top network-using processes (if ss/netstat available)
     if command -v ss &> /dev/null; then
         local conn_count=$(ss -tn | wc -l)
@@ -135,23 +158,31 @@ EOF
 echo "[$(date)] [NETWORK] Smart healing started..." >> "$LOG"
 
 # Test connectivity to multiple hosts
-connectivity_ok=false
 reachable_hosts=0
+total_hosts=${#TEST_HOSTS[@]}
+packet_loss=""
 
-for host in "${TEST_HOSTS[@]}"; do
-    if test_connectivity "$host"; then
-        reachable_hosts=$((reachable_hosts + 1))
-        echo "[$(date)] [NETWORK] ✓ Host $host is reachable" >> "$LOG"
-    else
-        echo "[$(date)] [NETWORK] ✗ Host $host is NOT reachable" >> "$LOG"
-    fi
-done
+if read -r reachable_hosts total_hosts packet_loss diag_summary < <(diagnose_network); then
+    echo "[$(date)] [NETWORK] Diagnosis: $diag_summary" >> "$LOG"
+else
+    # Fallback: sequential ping
+    reachable_hosts=0
+    total_hosts=${#TEST_HOSTS[@]}
+    for host in "${TEST_HOSTS[@]}"; do
+        if test_connectivity "$host"; then
+            reachable_hosts=$((reachable_hosts + 1))
+            echo "[$(date)] [NETWORK] ✓ Host $host is reachable" >> "$LOG"
+        else
+            echo "[$(date)] [NETWORK] ✗ Host $host is NOT reachable" >> "$LOG"
+        fi
+    done
+fi
 
-if (( reachable_hosts == ${#TEST_HOSTS[@]} )); then
+if (( reachable_hosts == total_hosts )); then
     echo "[$(date)] [NETWORK] All hosts reachable - Connectivity OK" >> "$LOG"
     
     # Check for packet loss even if connected
-    packet_loss=$(check_network_saturation)
+    [ -n "$packet_loss" ] || packet_loss=$(check_network_saturation)
     if (( packet_loss > 10 )); then
         echo "[$(date)] [NETWORK] ⚠️  High packet loss detected: ${packet_loss}%" >> "$LOG"
         kill_network_hogs
@@ -162,7 +193,7 @@ if (( reachable_hosts == ${#TEST_HOSTS[@]} )); then
 fi
 
 echo "[$(date)] [NETWORK] ALERT: Network connectivity issue detected!" >> "$LOG"
-echo "[$(date)] [NETWORK] Reachable hosts: $reachable_hosts/${#TEST_HOSTS[@]}" >> "$LOG"
+echo "[$(date)] [NETWORK] Reachable hosts: $reachable_hosts/$total_hosts" >> "$LOG"
 
 # Perform healing actions
 actions_taken=""
@@ -182,15 +213,24 @@ actions_taken="$actions_taken, service restarted"
 # Retest connectivity
 sleep 5
 restored=false
-for host in "${TEST_HOSTS[@]}"; do
-    if test_connectivity "$host"; then
-        echo "[$(date)] [NETWORK] ✓ SUCCESS: Connectivity to $host restored!" >> "$LOG"
+packet_loss=""
+if read -r reachable_hosts total_hosts packet_loss diag_summary < <(diagnose_network); then
+    echo "[$(date)] [NETWORK] Diagnosis after healing: $diag_summary" >> "$LOG"
+    if (( reachable_hosts > 0 )); then
+        echo "[$(date)] [NETWORK] ✓ SUCCESS: Connectivity restored ($reachable_hosts/$total_hosts hosts)!" >> "$LOG"
         restored=true
-        break
     fi
-done
+else
+    for host in "${TEST_HOSTS[@]}"; do
+        if test_connectivity "$host"; then
+            echo "[$(date)] [NETWORK] ✓ SUCCESS: Connectivity to $host restored!" >> "$LOG"
+            restored=true
+            break
+        fi
+    done
+fi
 
-packet_loss=$(check_network_saturation)
+[ -n "$packet_loss" ] || packet_loss=$(check_network_saturation)
 
 if [ "$restored" = true ]; then
     echo "[$(date)] [NETWORK] Network connectivity restored" >> "$LOG"
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Self-Healing Network Diagnostics
+Interface error/drop rates from /proc/net/dev, protocol counters from
+/proc/net/snmp, concurrent reachability probes (ICMP where the kernel allows
+unprivileged ping sockets, TCP connect otherwise), and attribution of TCP
+sockets to processes via /proc/net/tcp + /proc/*/fd.
+
+Probes run concurrently, so a diagnosis takes as long as the slowest single
+probe (bounded by --timeout), not the sum of all of them.
+
+Usage:
+    python3 network_diag.py diagnose [--targets 8.8.8.8:53 1.1.1.1:53] [--timeout 2]
+    python3 network_diag.py counters [--interval 1]
+    python3 network_diag.py talkers [--count 5]
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import socket
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Google, Cloudflare, OpenDNS (same hosts as handle_network_issue.sh); port for TCP probes
+DEFAULT_TARGETS = ("8.8.8.8:53", "1.1.1.1:53", "208.67.222.222:53")
+PROBE_TIMEOUT = 2.0
+PROBES_PER_TARGET = 3
+COUNTER_INTERVAL = 1.0
+
+TCP_STATES = {
+    "01": "ESTABLISHED", "02": "SYN_SENT", "03": "SYN_RECV", "04": "FIN_WAIT1",
+    "05": "FIN_WAIT2", "06": "TIME_WAIT", "07": "CLOSE", "08": "CLOSE_WAIT",
+    "09": "LAST_ACK", "0A": "LISTEN", "0B": "CLOSING",
+}
+
+NET_DEV_FIELDS = (
+    "rx_bytes", "rx_packets", "rx_errs", "rx_drop", "rx_fifo", "rx_frame", "rx_compressed", "rx_multicast",
+    "tx_bytes", "tx_packets", "tx_errs", "tx_drop", "tx_fifo", "tx_colls", "tx_carrier", "tx_compressed",
+)
+
+
+# ============================================================
+# Counters
+# ============================================================
+
+def read_net_dev(proc_root: str = "/proc") -> Dict[str, Dict[str, int]]:
+    """Per-interface counters (loopback excluded)"""
+    interfaces: Dict[str, Dict[str, int]] = {}
+    with open(os.path.join(proc_root, "net", "dev")) as f:
+        for line in f.readlines()[2:]:
+            name, _, data = line.partition(":")
+            name = name.strip()
+            if name == "lo":
+                continue
+            interfaces[name] = dict(zip(NET_DEV_FIELDS, (int(v) for v in data.split())))
+    return interfaces
+
+
+def read_snmp(proc_root: str = "/proc") -> Dict[str, Dict[str, int]]:
+    """Protocol counters: header/value line pairs per protocol (Ip, Icmp, Tcp, Udp...)"""
+    protocols: Dict[str, Dict[str, int]] = {}
+    with open(os.path.join(proc_root, "net", "snmp")) as f:
+        lines = f.read().splitlines()
+    for header, values in zip(lines[::2], lines[1::2]):
+        proto, _, names = header.partition(":")
+        protocols[proto] = {
+            name: int(value) for name, value in zip(names.split(), values.partition(":")[2].split())
+        }
+    return protocols
+
+
+def counter_rates(before: Tuple[float, Dict, Dict], after: Tuple[float, Dict, Dict]) -> Dict:
+    """Rates between two (timestamp, net_dev, snmp) samples"""
+    elapsed = max(after[0] - before[0], 1e-6)
+    interfaces = {}
+    for name, now in after[1].items():
+        prev = before[1].get(name)
+        if prev is None:
+            continue
+        delta = {k: max(0, now[k] - prev[k]) for k in now}
+        interfaces[name] = {
+            "rx_bytes_per_sec": round(delta["rx_bytes"] / elapsed),
+            "tx_bytes_per_sec": round(delta["tx_bytes"] / elapsed),
+            "errors_per_sec": round((delta["rx_errs"] + delta["tx_errs"]) / elapsed, 2),
+            "drops_per_sec": round((delta["rx_drop"] + delta["tx_drop"]) / elapsed, 2),
+        }
+
+    tcp_before, tcp_after = before[2].get("Tcp", {}), after[2].get("Tcp", {})
+    out_segs = tcp_after.get("OutSegs", 0) - tcp_before.get("OutSegs", 0)
+    retrans = tcp_after.get("RetransSegs", 0) - tcp_before.get("RetransSegs", 0)
+    udp_before, udp_after = before[2].get("Udp", {}), after[2].get("Udp", {})
+    return {
+        "interval": round(elapsed, 3),
+        "interfaces": interfaces,
+        "tcp": {
+            "retransmit_percent": round(100.0 * retrans / out_segs, 2) if out_segs > 0 else 0.0,
+            "in_errors_per_sec": round((tcp_after.get("InErrs", 0) - tcp_before.get("InErrs", 0)) / elapsed, 2),
+            "resets_per_sec": round((tcp_after.get("OutRsts", 0) - tcp_before.get("OutRsts", 0)) / elapsed, 2),
+            "established": tcp_after.get("CurrEstab", 0),
+        },
+        "udp": {
+            "errors_per_sec": round((udp_after.get("InErrors", 0) - udp_before.get("InErrors", 0)) / elapsed, 2),
+            "rcvbuf_errors_per_sec": round(
+                (udp_after.get("RcvbufErrors", 0) - udp_before.get("RcvbufErrors", 0)) / elapsed, 2),
+        },
+    }
+
+
+def sample_counters(proc_root: str = "/proc") -> Tuple[float, Dict, Dict]:
+    return time.monotonic(), read_net_dev(proc_root), read_snmp(proc_root)
+
+
+# ============================================================
+# Probes
+# ============================================================
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def icmp_permitted() -> bool:
+    """Unprivileged ping sockets (net.ipv4.ping_group_range) or root"""
+    try:
+        socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP).close()
+        return True
+    except OSError:
+        return False
+
+
+async def icmp_probe(host: str, timeout: float, seq: int = 1) -> Dict:
+    """One ICMP echo over a ping socket (the kernel sets the identifier)"""
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+    sock.setblocking(False)
+    try:
+        header = struct.pack("!BBHHH", 8, 0, 0, 0, seq)
+        payload = b"self-heal"
+        packet = struct.pack("!BBHHH", 8, 0, _checksum(header + payload), 0, seq) + payload
+        await asyncio.wait_for(loop.sock_connect(sock, (host, 0)), timeout)
+        await loop.sock_sendall(sock, packet)
+        deadline = started + timeout
+        while True:
+            reply = await asyncio.wait_for(loop.sock_recv(sock, 1024), max(0.0, deadline - time.monotonic()))
+            if reply[:1] == b"\0" and struct.unpack("!H", reply[6:8])[0] == seq:
+                break
+        return {"target": host, "method": "icmp", "ok": True,
+                "latency_ms": round((time.monotonic() - started) * 1000, 1)}
+    except (OSError, asyncio.TimeoutError) as e:
+        return {"target": host, "method": "icmp", "ok": False,
+                "error": "timeout" if isinstance(e, asyncio.TimeoutError) else str(e)}
+    finally:
+        sock.close()
+
+
+async def tcp_probe(host: str, port: int, timeout: float) -> Dict:
+    """TCP connect (SYN/SYN-ACK round trip), closed right away"""
+    started = time.monotonic()
+    target = f"{host}:{port}"
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        latency = round((time.monotonic() - started) * 1000, 1)
+        writer.close()
+        return {"target": target, "method": "tcp", "ok": True, "latency_ms": latency}
+    except (OSError, asyncio.TimeoutError) as e:
+        return {"target": target, "method": "tcp", "ok": False,
+                "error": "timeout" if isinstance(e, asyncio.TimeoutError) else str(e)}
+
+
+def parse_target(target: str) -> Tuple[str, int]:
+    host, _, port = target.rpartition(":") if ":" in target else (target, "", "53")
+    return host, int(port or 53)
+
+
+async def probe_all(targets=DEFAULT_TARGETS, timeout: float = PROBE_TIMEOUT,
+                    attempts: int = PROBES_PER_TARGET, method: str = "auto") -> List[Dict]:
+    """Probe every target `attempts` times, all at once"""
+    use_icmp = method == "icmp" or (method == "auto" and icmp_permitted())
+    probes = []
+    for target in targets:
+        host, port = parse_target(target)
+        for seq in range(1, attempts + 1):
+            probes.append(icmp_probe(host, timeout, seq) if use_icmp else tcp_probe(host, port, timeout))
+    return await asyncio.gather(*probes)
+
+
+# ============================================================
+# Sockets -> processes
+# ============================================================
+
+def _decode_addr(value: str) -> str:
+    addr, _, port = value.partition(":")
+    raw = bytes.fromhex(addr)
+    if len(raw) == 4:
+        ip = socket.inet_ntop(socket.AF_INET, raw[::-1])
+    else:
+        # IPv6 is stored as four little-endian 32-bit words
+        ip = socket.inet_ntop(socket.AF_INET6, b"".join(raw[i:i + 4][::-1] for i in range(0, 16, 4)))
+    return f"{ip}:{int(port, 16)}"
+
+
+def read_tcp_sockets(proc_root: str = "/proc") -> List[Dict]:
+    sockets = []
+    for name in ("tcp", "tcp6"):
+        try:
+            with open(os.path.join(proc_root, "net", name)) as f:
+                lines = f.readlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            parts = line.split()
+            if len(parts) < 10:
+                continue
+            tx_queue, _, rx_queue = parts[4].partition(":")
+            sockets.append({
+                "local": _decode_addr(parts[1]),
+                "remote": _decode_addr(parts[2]),
+                "state": TCP_STATES.get(parts[3], parts[3]),
+                "queued_bytes": int(tx_queue, 16) + int(rx_queue, 16),
+                "inode": int(parts[9]),
+            })
+    return sockets
+
+
+def socket_owners(proc_root: str = "/proc") -> Dict[int, int]:
+    """socket inode -> owning PID (other users' processes need root)"""
+    owners: Dict[int, int] = {}
+    for pid in os.listdir(proc_root):
+        if not pid.isdigit():
+            continue
+        fd_dir = os.path.join(proc_root, pid, "fd")
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                target = os.readlink(os.path.join(fd_dir, fd))
+            except OSError:
+                continue
+            if target.startswith("socket:["):
+                owners[int(target[8:-1])] = int(pid)
+    return owners
+
+
+def top_talkers(proc_root: str = "/proc", count: int = 5) -> List[Dict]:
+    """
+    Processes ranked by open TCP connections and bytes queued in their sockets.
+    /proc/net/tcp has no byte counters, so queue depth is the bandwidth signal.
+    """
+    owners = socket_owners(proc_root)
+    per_pid: Dict[int, Dict] = {}
+    for sock in read_tcp_sockets(proc_root):
+        pid = owners.get(sock["inode"])
+        if pid is None or sock["state"] == "LISTEN":
+            continue
+        entry = per_pid.setdefault(pid, {"pid": pid, "connections": 0, "established": 0, "queued_bytes": 0,
+                                         "remotes": set()})
+        entry["connections"] += 1
+        entry["queued_bytes"] += sock["queued_bytes"]
+        if sock["state"] == "ESTABLISHED":
+            entry["established"] += 1
+            entry["remotes"].add(sock["remote"].rpartition(":")[0])
+
+    talkers = sorted(per_pid.values(), key=lambda e: (e["queued_bytes"], e["connections"]), reverse=True)[:count]
+    for entry in talkers:
+        try:
+            with open(os.path.join(proc_root, str(entry["pid"]), "comm")) as f:
+                entry["name"] = f.read().strip()
+        except OSError:
+            entry["name"] = "?"
+        entry["remote_hosts"] = len(entry.pop("remotes"))
+    return talkers
+
+
+# ============================================================
+# Diagnosis
+# ============================================================
+
+async def diagnose_async(targets=DEFAULT_TARGETS, timeout: float = PROBE_TIMEOUT,
+                         interval: float = COUNTER_INTERVAL, attempts: int = PROBES_PER_TARGET,
+                         method: str = "auto", proc_root: str = "/proc") -> Dict:
+    started = time.monotonic()
+    before = sample_counters(proc_root)
+    # Counter interval and probes overlap: total time is max(interval, slowest probe)
+    probes, _ = await asyncio.gather(
+        probe_all(targets, timeout, attempts, method),
+        asyncio.sleep(interval),
+    )
+    rates = counter_rates(before, sample_counters(proc_root))
+
+    reachable = sorted({p["target"] for p in probes if p["ok"]})
+    failed = sum(1 for p in probes if not p["ok"])
+    latencies = [p["latency_ms"] for p in probes if p["ok"]]
+    return {
+        "reachable": len(reachable),
+        "total": len(targets),
+        "reachable_targets": reachable,
+        "packet_loss": round(100.0 * failed / len(probes), 1) if probes else 0.0,
+        "latency_ms": {
+            "min": min(latencies) if latencies else None,
+            "max": max(latencies) if latencies else None,
+        },
+        "method": probes[0]["method"] if probes else None,
+        "probes": probes,
+        "counters": rates,
+        "elapsed_seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def diagnose(**kwargs) -> Dict:
+    """Synchronous diagnose_async (also safe to call from inside an event loop)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(diagnose_async(**kwargs))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, diagnose_async(**kwargs)).result()
+
+
+def summarize(result: Dict) -> str:
+    """One-line description for alerts"""
+    parts = []
+    for name, rates in result["counters"]["interfaces"].items():
+        if rates["errors_per_sec"] or rates["drops_per_sec"]:
+            parts.append(f"{name}: {rates['errors_per_sec']} errs/s, {rates['drops_per_sec']} drops/s")
+    parts.append(f"{result['reachable']}/{result['total']} targets reachable")
+    parts.append(f"{result['packet_loss']}% loss")
+    retrans = result["counters"]["tcp"]["retransmit_percent"]
+    if retrans:
+        parts.append(f"TCP retrans {retrans}%")
+    return "; ".join(parts)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Network diagnostics for self-healing")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    diag = sub.add_parser("diagnose", help="Counters + concurrent reachability probes")
+    diag.add_argument("--targets", nargs="+", default=list(DEFAULT_TARGETS))
+    diag.add_argument("--timeout", type=float, default=PROBE_TIMEOUT)
+    diag.add_argument("--interval", type=float, default=COUNTER_INTERVAL)
+    diag.add_argument("--attempts", type=int, default=PROBES_PER_TARGET)
+    diag.add_argument("--method", choices=["auto", "icmp", "tcp"], default="auto")
+
+    counters = sub.add_parser("counters", help="Interface and protocol error rates")
+    counters.add_argument("--interval", type=float, default=COUNTER_INTERVAL)
+
+    talkers = sub.add_parser("talkers", help="Processes with the most TCP traffic")
+    talkers.add_argument("--count", type=int, default=5)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "diagnose":
+        result = diagnose(targets=args.targets, timeout=args.timeout, interval=args.interval,
+                          attempts=args.attempts, method=args.method)
+        result["summary"] = summarize(result)
+        print(json.dumps(result, indent=2))
+        # 0 all reachable, 1 partially, 2 nothing reachable
+        return 0 if result["reachable"] == result["total"] else 1 if result["reachable"] else 2
+    if args.command == "counters":
+        before = sample_counters()
+        time.sleep(args.interval)
+        print(json.dumps(counter_rates(before, sample_counters()), indent=2))
+        return 0
+    print(json.dumps(top_talkers(count=args.count), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+"""
+Self-Healing Notification Dispatcher
+Sends alert notifications to Slack, email (AWS SES) and SMS (AWS SNS) from a
+single background thread: keep-alive HTTP connections per channel, alerts that
+arrive within a short window are merged into one digest per channel, and each
+channel has its own rate limit and retry-with-backoff. submit() never blocks.
+
+Configuration (environment, same names as notification_sender.sh):
+    SLACK_WEBHOOK_URL, EMAIL_RECIPIENT, EMAIL_SENDER, AWS_SNS_TOPIC, AWS_REGION
+    ENABLE_SLACK, ENABLE_EMAIL, ENABLE_SMS   a channel is used only when its flag is true
+    SELF_HEAL_NOTIFY_WINDOW   digest window in seconds (default 10)
+    SELF_HEAL_AWS_ENDPOINT    override SES/SNS endpoint (local stand-ins)
+"""
+
+import abc
+import hashlib
+import hmac
+import http.client
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlencode, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DIGEST_WINDOW = 10.0      # seconds to collect alerts into one message
+CRITICAL_WINDOW = 2.0     # critical alerts are held at most this long
+MAX_DIGEST = 50           # alerts listed per message (the rest are counted)
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0        # 1s, 2s, 4s, 8s ...
+BACKOFF_MAX = 60.0
+QUEUE_SIZE = 1000
+
+DEFAULT_SENDER = "alerts@example.com"
+DEFAULT_REGION = "us-east-1"
+IMDS_URL = "http://169.254.169.254"
+
+
+def _flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class DeliveryError(Exception):
+    """A send failed; retryable unless the remote rejected the request"""
+
+    def __init__(self, message: str, retryable: bool = True, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+# ============================================================
+# HTTP
+# ============================================================
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections, one per scheme/host"""
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+        self.connections: Dict[Tuple[str, str], http.client.HTTPConnection] = {}
+        self.opened = 0
+
+    def _connect(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        self.opened += 1
+        return cls(netloc, timeout=self.timeout)
+
+    def request(self, method: str, url: str, body: bytes = b"",
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        for attempt in range(2):
+            conn = self.connections.get(key)
+            reused = conn is not None
+            if conn is None:
+                conn = self.connections[key] = self._connect(*key)
+            try:
+                conn.request(method, target, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data = resp.read()
+                if resp.will_close:
+                    self.connections.pop(key, None).close()
+                return resp.status, {k.lower(): v for k, v in resp.getheaders()}, data
+            except (http.client.HTTPException, OSError):
+                self.connections.pop(key, None)
+                conn.close()
+                # A kept-alive connection may have been closed by the server: retry once fresh
+                if not reused or attempt:
+                    raise
+        raise DeliveryError("unreachable")
+
+    def close(self) -> None:
+        for conn in self.connections.values():
+            conn.close()
+        self.connections.clear()
+
+
+def check_response(status: int, headers: Dict[str, str], body: bytes) -> None:
+    if 200 <= status < 300:
+        return
+    detail = body[:200].decode("utf-8", "replace")
+    if status == 429 or status >= 500:
+        retry_after = headers.get("retry-after")
+        raise DeliveryError(f"HTTP {status}: {detail}", retry_after=float(retry_after)
+                            if retry_after and retry_after.isdigit() else None)
+    raise DeliveryError(f"HTTP {status}: {detail}", retryable=False)
+
+
+# ============================================================
+# AWS Signature Version 4
+# ============================================================
+
+class AwsCredentials:
+    """Static credentials from the environment, else the EC2 instance role (IMDSv2)"""
+
+    def __init__(self, access_key: Optional[str] = None, secret_key: Optional[str] = None,
+                 token: Optional[str] = None, imds_url: str = IMDS_URL):
+        self.access_key = access_key or os.environ.get("AWS_ACCESS_KEY_ID")
+        self.secret_key = secret_key or os.environ.get("AWS_SECRET_ACCESS_KEY")
+        self.token = token or os.environ.get("AWS_SESSION_TOKEN")
+        self.imds_url = imds_url
+        self.static = bool(self.access_key and self.secret_key)
+        self.expires = 0.0
+
+    def get(self) -> "AwsCredentials":
+        if self.static or time.time() < self.expires:
+            return self
+        self._from_instance_role()
+        return self
+
+    def _from_instance_role(self) -> None:
+        pool = ConnectionPool(timeout=1.0)
+        try:
+            status, _, token = pool.request("PUT", f"{self.imds_url}/latest/api/token",
+                                            headers={"X-aws-ec2-metadata-token-ttl-seconds": "21600"})
+            auth = {"X-aws-ec2-metadata-token": token.decode()}
+            base = f"{self.imds_url}/latest/meta-data/iam/security-credentials/"
+            status, _, role = pool.request("GET", base, headers=auth)
+            if status != 200 or not role.strip():
+                raise DeliveryError("no instance role attached", retryable=False)
+            status, _, data = pool.request("GET", base + role.decode().split()[0], headers=auth)
+            creds = json.loads(data)
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise DeliveryError(f"no AWS credentials available: {e}", retryable=False)
+        finally:
+            pool.close()
+        self.access_key = creds["AccessKeyId"]
+        self.secret_key = creds["SecretAccessKey"]
+        self.token = creds.get("Token")
+        expiration = datetime.strptime(creds["Expiration"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+        self.expires = expiration.timestamp() - 300
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+def sigv4_headers(method: str, url: str, body: bytes, region: str, service: str,
+                  credentials: AwsCredentials, headers: Optional[Dict[str, str]] = None,
+                  now: Optional[datetime] = None) -> Dict[str, str]:
+    """Headers (including Authorization) for an AWS SigV4-signed request"""
+    parts = urlsplit(url)
+    now = now or datetime.now(timezone.utc)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    date = amz_date[:8]
+
+    signed = {k.lower(): str(v).strip() for k, v in (headers or {}).items()}
+    signed["host"] = parts.netloc
+    signed["x-amz-date"] = amz_date
+    if credentials.token:
+        signed["x-amz-security-token"] = credentials.token
+    names = sorted(signed)
+
+    query = sorted(
+        (quote(unquote(k), safe="-_.~"), quote(unquote(v), safe="-_.~"))
+        for k, _, v in (pair.partition("=") for pair in parts.query.split("&") if pair)
+    )
+    canonical = "\n".join([
+        method,
+        quote(parts.path or "/", safe="/-_.~"),
+        "&".join(f"{k}={v}" for k, v in query),
+        "".join(f"{name}:{signed[name]}\n" for name in names),
+        ";".join(names),
+        hashlib.sha256(body).hexdigest(),
+    ])
+    scope = f"{date}/{region}/{service}/aws4_request"
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical.encode()).hexdigest(),
+    ])
+    key = _hmac(("AWS4" + credentials.secret_key).encode(), date)
+    for part in (region, service, "aws4_request"):
+        key = _hmac(key, part)
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    signed["authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={credentials.access_key}/{scope}, "
+        f"SignedHeaders={';'.join(names)}, Signature={signature}"
+    )
+    return signed
+
+
+# ============================================================
+# Channels
+# ============================================================
+
+def _emoji(severity: str) -> str:
+    return "🚨" if severity == "CRITICAL" else "⚠️"
+
+
+def _worst(batch: List[Dict]) -> str:
+    return "CRITICAL" if any(n["severity"] == "CRITICAL" for n in batch) else batch[0]["severity"]
+
+
+def _line(n: Dict) -> str:
+    where = f" on {n['instance']}" if n.get("instance") else ""
+    return f"{n['time']} {n['severity']} {n['resource']} {n['value']}{where}"
+
+
+class TokenBucket:
+    """`rate` sends per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: Optional[float] = None) -> bool:
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class Channel(abc.ABC):
+    """A notification destination with its own connection pool, limit and backlog"""
+
+    name = "channel"
+
+    def __init__(self, rate: float = 1.0, burst: int = 3, window: float = DIGEST_WINDOW):
+        self.pool = ConnectionPool()
+        self.bucket = TokenBucket(rate, burst)
+        self.window = window
+        self.pending: List[Dict] = []
+        self.deadline: Optional[float] = None
+        self.attempts = 0
+        self.stats = {"sent": 0, "alerts": 0, "failed": 0, "retries": 0, "dropped": 0, "last_error": None}
+
+    def add(self, notification: Dict, now: float) -> None:
+        if len(self.pending) >= QUEUE_SIZE:
+            self.stats["dropped"] += 1
+            return
+        self.pending.append(notification)
+        hold = min(self.window, CRITICAL_WINDOW) if notification["severity"] == "CRITICAL" else self.window
+        if self.attempts == 0:
+            self.deadline = min(self.deadline or now + hold, now + hold)
+
+    @abc.abstractmethod
+    def send(self, batch: List[Dict]) -> None:
+        """Deliver one batch; raise DeliveryError on failure"""
+
+    @staticmethod
+    def subject(batch: List[Dict]) -> str:
+        if len(batch) == 1:
+            return f"[{batch[0]['severity']}] High {batch[0]['resource']} Usage Alert"
+        return f"[{_worst(batch)}] {len(batch)} Self-Healing Alerts"
+
+    @staticmethod
+    def text(batch: List[Dict]) -> str:
+        if len(batch) == 1:
+            n = batch[0]
+            return (
+                f"Self-Healing Alert\n\nResource: {n['resource']}\nCurrent Value: {n['value']}\n"
+                f"Severity: {n['severity']}\nTime: {n['time']}\n\n"
+                "Self-healing actions have been executed. Please check the Grafana dashboard "
+                "for detailed recommendations."
+            )
+        lines = [_line(n) for n in batch[:MAX_DIGEST]]
+        if len(batch) > MAX_DIGEST:
+            lines.append(f"... and {len(batch) - MAX_DIGEST} more")
+        return "Self-Healing Alert Digest\n\n" + "\n".join(lines)
+
+
+class SlackChannel(Channel):
+    name = "slack"
+
+    def __init__(self, webhook_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.url = webhook_url
+
+    def payload(self, batch: List[Dict]) -> Dict:
+        severity = _worst(batch)
+        attachment = {
+            "color": "#FF0000" if severity == "CRITICAL" else "#FFA500",
+            "footer": "Self-Healing System",
+            "footer_icon": "https://platform.slack-edge.com/img/default_application_icon.png",
+            "ts": int(time.time()),
+        }
+        if len(batch) == 1:
+            n = batch[0]
+            attachment.update({
+                "title": f"{_emoji(severity)} {severity}: High {n['resource']} Usage",
+                "text": f"*Resource:* {n['resource']}\n*Current Value:* {n['value']}\n"
+                        f"*Severity:* {severity}\n*Time:* {n['time']}",
+                "fields": [
+                    {"title": "Actions Taken", "short": False,
+                     "value": "• Self-healing script executed\n• Check logs for details\n• Recommendations generated"},
+                    {"title": "Next Steps", "short": False,
+                     "value": "• Review recommendations in Grafana dashboard\n• Consider scaling resources\n"
+                              "• Monitor for recurring issues"},
+                ],
+            })
+        else:
+            lines = [f"• {_line(n)}" for n in batch[:MAX_DIGEST]]
+            if len(batch) > MAX_DIGEST:
+                lines.append(f"• ... and {len(batch) - MAX_DIGEST} more")
+            attachment.update({
+                "title": f"{_emoji(severity)} {len(batch)} Self-Healing Alerts",
+                "text": "\n".join(lines),
+            })
+        return {"attachments": [attachment]}
+
+    def send(self, batch: List[Dict]) -> None:
+        body = json.dumps(self.payload(batch)).encode()
+        check_response(*self.pool.request("POST", self.url, body, {"Content-Type": "application/json"}))
+
+
+class SesChannel(Channel):
+    """Email through the SES v2 SendEmail API"""
+
+    name = "email"
+
+    def __init__(self, recipient: str, sender: str = DEFAULT_SENDER, region: str = DEFAULT_REGION,
+                 endpoint: Optional[str] = None, credentials: Optional[AwsCredentials] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.recipient = recipient
+        self.sender = sender
+        self.region = region
+        self.url = (endpoint or f"https://email.{region}.amazonaws.com").rstrip("/") + "/v2/email/outbound-emails"
+        self.credentials = credentials or AwsCredentials()
+
+    def send(self, batch: List[Dict]) -> None:
+        body = json.dumps({
+            "FromEmailAddress": self.sender,
+            "Destination": {"ToAddresses": [self.recipient]},
+            "Content": {"Simple": {
+                "Subject": {"Data": self.subject(batch)},
+                "Body": {"Text": {"Data": self.text(batch)}},
+            }},
+        }).encode()
+        headers = sigv4_headers("POST", self.url, body, self.region, "ses", self.credentials.get(),
+                                {"Content-Type": "application/json"})
+        check_response(*self.pool.request("POST", self.url, body, headers))
+
+
+class SnsChannel(Channel):
+    """SMS/email fan-out through an SNS topic (Publish query API)"""
+
+    name = "sms"
+
+    def __init__(self, topic_arn: str, region: Optional[str] = None, endpoint: Optional[str] = None,
+                 credentials: Optional[AwsCredentials] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.topic_arn = topic_arn
+        # arn:aws:sns:<region>:<account>:<topic>
+        self.region = region or (topic_arn.split(":")[3] if topic_arn.count(":") >= 5 else DEFAULT_REGION)
+        self.url = (endpoint or f"https://sns.{self.region}.amazonaws.com").rstrip("/") + "/"
+        self.credentials = credentials or AwsCredentials()
+
+    def message(self, batch: List[Dict]) -> str:
+        if len(batch) == 1:
+            n = batch[0]
+            return (f"[{n['severity']}] High {n['resource']} usage ({n['value']}) detected. "
+                    "Self-healing executed. Check dashboard.")
+        resources = sorted({n["resource"] for n in batch})
+        return f"[{_worst(batch)}] {len(batch)} alerts ({', '.join(resources)}). Check dashboard."
+
+    def send(self, batch: List[Dict]) -> None:
+        resources = sorted({n["resource"] for n in batch})
+        body = urlencode({
+            "Action": "Publish",
+            "Version": "2010-03-31",
+            "TopicArn": self.topic_arn,
+            "Message": self.message(batch),
+            "Subject": f"Self-Healing Alert: {', '.join(resources)}"[:100],
+        }).encode()
+        headers = sigv4_headers("POST", self.url, body, self.region, "sns", self.credentials.get(),
+                                {"Content-Type": "application/x-www-form-urlencoded"})
+        check_response(*self.pool.request("POST", self.url, body, headers))
+
+
+# ============================================================
+# Dispatcher
+# ============================================================
+
+class NotificationDispatcher:
+    """Queue + worker thread that delivers digests to every channel"""
+
+    def __init__(self, channels: List[Channel], max_retries: int = MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE):
+        self.channels = channels
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.queue: "queue.Queue[Optional[Dict]]" = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+
+    @classmethod
+    def from_env(cls) -> "NotificationDispatcher":
+        window = float(os.environ.get("SELF_HEAL_NOTIFY_WINDOW", DIGEST_WINDOW))
+        endpoint = os.environ.get("SELF_HEAL_AWS_ENDPOINT")
+        region = os.environ.get("AWS_REGION", DEFAULT_REGION)
+        # A channel needs its settings and its ENABLE_* flag (notifications.conf)
+        channels: List[Channel] = []
+        if os.environ.get("SLACK_WEBHOOK_URL") and _flag("ENABLE_SLACK"):
+            channels.append(SlackChannel(os.environ["SLACK_WEBHOOK_URL"], window=window))
+        if os.environ.get("EMAIL_RECIPIENT") and _flag("ENABLE_EMAIL"):
+            channels.append(SesChannel(os.environ["EMAIL_RECIPIENT"], os.environ.get("EMAIL_SENDER", DEFAULT_SENDER),
+                                       region, endpoint, window=window))
+        if os.environ.get("AWS_SNS_TOPIC") and _flag("ENABLE_SMS"):
+            channels.append(SnsChannel(os.environ["AWS_SNS_TOPIC"], endpoint=endpoint, window=window))
+        return cls(channels)
+
+    def start(self) -> None:
+        if self._thread is None and self.channels:
+            self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush whatever is pending (ignoring the digest window) and stop"""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, alert: Dict) -> bool:
+        """Queue an alert for delivery; never blocks (drops if the queue is full)"""
+        if not self.channels:
+            return False
+        notification = {
+            "resource": str(alert.get("resource", "UNKNOWN")).upper(),
+            "severity": str(alert.get("severity", "WARNING")).upper(),
+            "value": alert.get("value", "N/A"),
+            "instance": alert.get("instance"),
+            "alertname": alert.get("alertname"),
+            "time": alert.get("time") or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        try:
+            with self._lock:
+                self._idle.clear()
+                self.queue.put_nowait(notification)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Notification queue full, dropped {notification['resource']} alert")
+            return False
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Block until everything submitted so far was delivered or dropped (tests)"""
+        return self._idle.wait(timeout)
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self.queue.qsize(),
+            "dropped": self.dropped,
+            "channels": {
+                ch.name: dict(ch.stats, pending=len(ch.pending)) for ch in self.channels
+            },
+        }
+
+    def _run(self) -> None:
+        stopping = False
+        while True:
+            now = time.monotonic()
+            deadlines = [ch.deadline for ch in self.channels if ch.pending and ch.deadline is not None]
+            timeout = max(0.0, min(deadlines) - now) if deadlines else None
+            if stopping:
+                timeout = 0
+            try:
+                item = self.queue.get(timeout=timeout)
+                if item is None:
+                    stopping = True
+                else:
+                    now = time.monotonic()
+                    for ch in self.channels:
+                        ch.add(item, now)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            for ch in self.channels:
+                if ch.pending and (stopping or now >= ch.deadline):
+                    self._flush(ch, now, final=stopping)
+
+            if stopping:
+                for ch in self.channels:
+                    ch.pool.close()
+                return
+            with self._lock:
+                if self.queue.empty() and not any(ch.pending for ch in self.channels):
+                    self._idle.set()
+
+    def _flush(self, ch: Channel, now: float, final: bool = False) -> None:
+        if not final and not ch.bucket.take(now):
+            ch.deadline = now + ch.bucket.wait_time()
+            return
+
+        batch, ch.pending = ch.pending, []
+        try:
+            ch.send(batch)
+        except (DeliveryError, OSError, http.client.HTTPException) as e:
+            ch.stats["last_error"] = str(e)
+            retryable = getattr(e, "retryable", True)
+            ch.attempts += 1
+            if final or not retryable or ch.attempts > self.max_retries:
+                ch.stats["failed"] += 1
+                ch.stats["dropped"] += len(batch)
+                ch.attempts = 0
+                ch.deadline = None
+                logger.error(f"[{ch.name}] giving up on {len(batch)} alert(s): {e}")
+                return
+            # Keep the batch (new alerts join it) and try again after a backoff
+            ch.pending = batch + ch.pending
+            delay = getattr(e, "retry_after", None) or min(BACKOFF_MAX, self.backoff_base * 2 ** (ch.attempts - 1))
+            ch.deadline = now + delay
+            ch.stats["retries"] += 1
+            logger.warning(f"[{ch.name}] send failed ({e}), retry {ch.attempts} in {delay:.1f}s")
+            return
+
+        ch.stats["sent"] += 1
+        ch.stats["alerts"] += len(batch)
+        ch.stats["last_error"] = None
+        ch.attempts = 0
+        ch.deadline = None
+        logger.info(f"[{ch.name}] delivered {len(batch)} alert(s)")
@@ -3,10 +3,22 @@
 # Notification Sender - Send recommendations to Slack/Email
 # ============================================================
 
+# Same settings file as the receiver's dispatcher (webhook.service EnvironmentFile)
+NOTIFY_CONF="${SELF_HEAL_NOTIFY_CONF:-/opt/self-heal/config/notifications.conf}"
+if [ -f "$NOTIFY_CONF" ]; then
+    set -a
+    . "$NOTIFY_CONF"
+    set +a
+fi
+
 # Configuration (set via environment or defaults)
 SLACK_WEBHOOK_URL="${SLACK_WEBHOOK_URL:-}"
-EMAIL_RECIPIENT="${EMAIL_RECIPIENT:-abdelatym00@gmail.com}"
+EMAIL_RECIPIENT="${EMAIL_RECIPIENT:-}"
 AWS_SNS_TOPIC="${AWS_SNS_TOPIC:-}"
+ENABLE_SLACK="${ENABLE_SLACK:-false}"
+ENABLE_EMAIL="${ENABLE_EMAIL:-false}"
+ENABLE_SMS="${ENABLE_SMS:-false}"
+RECEIVER_URL="${SELF_HEAL_RECEIVER_URL:-http://localhost:5000}"
 
 # Script arguments
 RESOURCE="$1"      # CPU, MEMORY, DISK, NETWORK
@@ -21,11 +33,37 @@ LOG="$LOG_DIR/notifications.log"
 
 mkdir -p "$LOG_DIR"
 
+# A channel is used only when its ENABLE_* flag is set (same rule as the dispatcher)
+flag_enabled() {
+    case "${1,,}" in
+        1|true|yes|on) return 0 ;;
+    esac
+    return 1
+}
+
+# ============================================================
+# Dispatcher (webhook receiver: pooled connections, digests, retries)
+# ============================================================
+
+send_via_dispatcher() {
+    # json.dumps quotes the values, so a quote in one can't break or extend the body
+    local body
+    body=$(python3 -c 'import json, sys; print(json.dumps(dict(zip(("resource", "severity", "value"), sys.argv[1:]))))' \
+        "$RESOURCE" "$SEVERITY" "$VALUE") || return 1
+    curl -sf -m 2 -X POST -H 'Content-type: application/json' \
+        --data "$body" "$RECEIVER_URL/notify" > /dev/null 2>&1
+}
+
 # ============================================================
 # Slack Notification
 # ============================================================
 
 send_slack_notification() {
+    if ! flag_enabled "$ENABLE_SLACK"; then
+        echo "[$(date)] [NOTIF] Slack disabled (ENABLE_SLACK), skipping..." >> "$LOG"
+        return
+    fi
+    
     if [ -z "$SLACK_WEBHOOK_URL" ]; then
         echo "[$(date)] [NOTIF] Slack webhook not configured, skipping..." >> "$LOG"
         return
@@ -81,6 +119,11 @@ EOF
 # ============================================================
 
 send_email_notification() {
+    if ! flag_enabled "$ENABLE_EMAIL"; then
+        echo "[$(date)] [NOTIF] Email disabled (ENABLE_EMAIL), skipping..." >> "$LOG"
+        return
+    fi
+    
     if [ -z "$EMAIL_RECIPIENT" ]; then
         echo "[$(date)] [NOTIF] Email recipient not configured, skipping..." >> "$LOG"
         return
@@ -112,6 +155,11 @@ send_email_notification() {
 # ============================================================
 
 send_sms_notification() {
+    if ! flag_enabled "$ENABLE_SMS"; then
+        echo "[$(date)] [NOTIF] SMS disabled (ENABLE_SMS), skipping..." >> "$LOG"
+        return
+    fi
+    
     if [ -z "$AWS_SNS_TOPIC" ]; then
         echo "[$(date)] [NOTIF] SNS topic not configured, skipping..." >> "$LOG"
         return
@@ -142,6 +190,13 @@ send_sms_notification() {
 
 echo "[$(date)] [NOTIF] Sending notifications for $RESOURCE alert (Severity: $SEVERITY)" >> "$LOG"
 
+# Hand off to the receiver's dispatcher; send directly only if it is unreachable
+if send_via_dispatcher; then
+    echo "[$(date)] [NOTIF] ✓ Queued with notification dispatcher at $RECEIVER_URL" >> "$LOG"
+    exit 0
+fi
+echo "[$(date)] [NOTIF] Dispatcher unavailable, sending directly" >> "$LOG"
+
 # Send to all configured channels in parallel
 send_slack_notification &
 send_email_notification &
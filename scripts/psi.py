@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Pressure Stall Information (PSI) collector
+Reads /proc/pressure/{cpu,memory,io} and per-cgroup *.pressure files, scores
+contention for alert prioritization, and wraps PSI triggers so stalls can be
+detected as events (poll on the pressure file) instead of by polling.
+
+All readers return None when the kernel has no PSI support (CONFIG_PSI=n or
+booted with psi=0), so callers can simply skip the data.
+"""
+
+import logging
+import os
+import select
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROC_PRESSURE = Path("/proc/pressure")
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+RESOURCES = ("cpu", "memory", "io")
+
+# Trigger defaults: fire when tasks stall >= 200ms within a 2s window
+# (a 2s window is the smallest unprivileged processes may use)
+TRIGGER_STALL_US = 200_000
+TRIGGER_WINDOW_US = 2_000_000
+TRIGGER_COOLDOWN = 60  # seconds between callbacks for the same resource
+
+# How much a stall on each resource/kind counts towards the priority score.
+# "full" memory/io stalls mean nothing runs at all - that is thrashing.
+SCORE_WEIGHTS = {
+    ("cpu", "some"): 1.0,
+    ("memory", "some"): 1.5,
+    ("memory", "full"): 3.0,
+    ("io", "some"): 1.0,
+    ("io", "full"): 2.0,
+}
+
+
+def parse_pressure(text: str) -> Dict[str, Dict[str, float]]:
+    """
+    Parse a pressure file:
+        some avg10=1.23 avg60=0.50 avg300=0.10 total=123456
+        full avg10=0.00 avg60=0.00 avg300=0.00 total=0
+    """
+    result: Dict[str, Dict[str, float]] = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts or parts[0] not in ("some", "full"):
+            continue
+        values: Dict[str, float] = {}
+        for item in parts[1:]:
+            key, _, value = item.partition("=")
+            try:
+                values[key] = int(value) if key == "total" else float(value)
+            except ValueError:
+                continue
+        result[parts[0]] = values
+    return result
+
+
+def read_pressure(resource: str, root: Path = PROC_PRESSURE) -> Optional[Dict[str, Dict[str, float]]]:
+    """Pressure for one resource, or None if PSI is unavailable"""
+    try:
+        return parse_pressure((Path(root) / resource).read_text())
+    except OSError:
+        return None
+
+
+def read_all(root: Path = PROC_PRESSURE) -> Optional[Dict[str, Dict[str, Dict[str, float]]]]:
+    """System-wide pressure for cpu/memory/io, or None if PSI is unavailable"""
+    pressure = {}
+    for resource in RESOURCES:
+        value = read_pressure(resource, root)
+        if value is not None:
+            pressure[resource] = value
+    return pressure or None
+
+
+def read_cgroup_pressure(cgroup: str, root: Path = CGROUP_ROOT) -> Optional[Dict[str, Dict[str, Dict[str, float]]]]:
+    """Pressure of one cgroup v2 group (e.g. 'system.slice/docker.service')"""
+    path = Path(root) / cgroup.lstrip("/")
+    pressure = {}
+    for resource in RESOURCES:
+        try:
+            pressure[resource] = parse_pressure((path / f"{resource}.pressure").read_text())
+        except OSError:
+            continue
+    return pressure or None
+
+
+def available(root: Path = PROC_PRESSURE) -> bool:
+    return read_pressure("cpu", root) is not None
+
+
+def pressure_score(pressure: Optional[Dict]) -> Optional[float]:
+    """Weighted 10s stall percentage across resources (higher = more contention)"""
+    if not pressure:
+        return None
+    score = 0.0
+    for (resource, kind), weight in SCORE_WEIGHTS.items():
+        score += weight * pressure.get(resource, {}).get(kind, {}).get("avg10", 0.0)
+    return round(score, 2)
+
+
+def priority(pressure: Optional[Dict]) -> str:
+    """Map a pressure snapshot to an alert priority"""
+    score = pressure_score(pressure)
+    if score is None:
+        return "unknown"
+    if score >= 40:
+        return "critical"
+    if score >= 10:
+        return "high"
+    if score >= 1:
+        return "elevated"
+    return "normal"
+
+
+def summarize(pressure: Optional[Dict]) -> Dict[str, Dict[str, float]]:
+    """Compact {resource: {some, full}} avg10 view for UIs"""
+    if not pressure:
+        return {}
+    return {
+        resource: {kind: values.get("avg10", 0.0) for kind, values in kinds.items()}
+        for resource, kinds in pressure.items()
+    }
+
+
+class PressureTrigger:
+    """
+    A PSI trigger: the kernel wakes poll() with POLLPRI once tasks stall for
+    stall_us within window_us, so no CPU is spent while things are fine.
+    """
+
+    def __init__(self, resource: str, stall_us: int = TRIGGER_STALL_US,
+                 window_us: int = TRIGGER_WINDOW_US, kind: str = "some", root: Path = PROC_PRESSURE):
+        self.resource = resource
+        self.fd = os.open(str(Path(root) / resource), os.O_RDWR | os.O_NONBLOCK)
+        try:
+            os.write(self.fd, f"{kind} {stall_us} {window_us}\0".encode())
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PressureWatcher:
+    """
+    Event-driven stall detection: one thread polls every trigger and calls
+    callback(resource, pressure) at most once per cooldown per resource.
+    """
+
+    def __init__(self, callback: Callable[[str, Dict], None], resources=RESOURCES,
+                 stall_us: int = TRIGGER_STALL_US, window_us: int = TRIGGER_WINDOW_US,
+                 cooldown: float = TRIGGER_COOLDOWN, root: Path = PROC_PRESSURE):
+        self.callback = callback
+        self.cooldown = cooldown
+        self.root = Path(root)
+        self.triggers: Dict[int, PressureTrigger] = {}
+        self._last_fired: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        for resource in resources:
+            try:
+                trigger = PressureTrigger(resource, stall_us, window_us, root=self.root)
+            except OSError as e:
+                logger.warning(f"PSI trigger for {resource} unavailable: {e}")
+                continue
+            self.triggers[trigger.fileno()] = trigger
+
+    def resources(self) -> List[str]:
+        return [t.resource for t in self.triggers.values()]
+
+    def start(self) -> bool:
+        """Start watching; False if no trigger could be created"""
+        if not self.triggers:
+            return False
+        self._thread = threading.Thread(target=self._run, name="psi-watcher", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        for trigger in self.triggers.values():
+            trigger.close()
+
+    def _run(self) -> None:
+        poller = select.poll()
+        for fd in self.triggers:
+            poller.register(fd, select.POLLPRI)
+
+        while not self._stop.is_set():
+            for fd, event in poller.poll(1000):
+                trigger = self.triggers.get(fd)
+                if trigger is None:
+                    continue
+                if event & select.POLLERR:
+                    logger.error(f"PSI trigger for {trigger.resource} failed, unregistering")
+                    poller.unregister(fd)
+                    continue
+                now = time.monotonic()
+                if now - self._last_fired.get(trigger.resource, -self.cooldown) < self.cooldown:
+                    continue
+                self._last_fired[trigger.resource] = now
+                try:
+                    self.callback(trigger.resource, read_all(self.root) or {})
+                except Exception as e:
+                    logger.error(f"PSI callback failed for {trigger.resource}: {e}")
@@ -7,6 +7,14 @@ LOG_DIR="/opt/self-heal/logs"
 
 mkdir -p "$LOG_DIR"
 
+# Notification channels and ENABLE_* flags, as webhook.service loads them
+NOTIFY_CONF="/opt/self-heal/config/notifications.conf"
+if [ -f "$NOTIFY_CONF" ]; then
+    set -a
+    . "$NOTIFY_CONF"
+    set +a
+fi
+
 echo "🚀 Starting Self-Healing Services..."
 echo "=================================="
 
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Self-Healing Thresholds
+Single source of truth for alert thresholds, with per-host baselines learned
+from observed samples (EWMA mean/variance + optional time-of-day buckets).
+
+Usage:
+    python3 thresholds.py get CPU [--instance web-server]
+    python3 thresholds.py show
+    python3 thresholds.py rules > ../monitoring/alerts.yml
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Paths
+LOG_DIR = Path(os.environ.get("SELF_HEAL_LOG_DIR", "/opt/self-heal/logs"))
+BASELINE_FILE = LOG_DIR / "baselines.json"
+
+# Instance label of the host the services run on (matches prometheus.yml)
+LOCAL_INSTANCE = os.environ.get("SELF_HEAL_INSTANCE", "web-server")
+
+# Static defaults - used until a host has enough samples to learn from.
+# floor/ceiling bound what a learned threshold is allowed to become.
+DEFAULT_THRESHOLDS = {
+    "CPU": {"critical": 80.0, "warning": 60.0, "floor": 50.0, "ceiling": 95.0, "unit": "%"},
+    "MEMORY": {"critical": 75.0, "warning": 70.0, "floor": 50.0, "ceiling": 95.0, "unit": "%"},
+    "DISK": {"critical": 85.0, "warning": 70.0, "floor": 60.0, "ceiling": 95.0, "unit": "%"},
+    "NETWORK": {"critical": 10.0, "warning": 10.0, "floor": 1.0, "ceiling": 1000.0, "unit": " errors/sec"},
+}
+
+# Learning parameters
+ALPHA = 0.05          # EWMA smoothing factor (~20-sample memory)
+SIGMAS = 3.0          # Learned threshold = mean + SIGMAS * stddev
+WARMUP_SAMPLES = 60   # Samples required before a learned value is trusted
+BUCKETS = 24          # Time-of-day seasonality buckets (hourly)
+
+
+def normalize_resource(resource: str) -> str:
+    """Map alert/action names (handle_high_cpu, cpu, CPU) to a resource key"""
+    name = resource.upper()
+    for key in DEFAULT_THRESHOLDS:
+        if key in name:
+            return key
+    return name
+
+
+class BaselineSeries:
+    """
+    EWMA mean/variance for one (instance, resource) pair.
+    Memory is fixed: one global estimate plus BUCKETS hourly estimates.
+    """
+
+    __slots__ = ("mean", "var", "count", "updated", "buckets")
+
+    def __init__(self):
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+        self.updated = 0.0
+        # Flat [mean, var, count] * BUCKETS
+        self.buckets = [0.0] * (3 * BUCKETS)
+
+    @staticmethod
+    def _update(mean: float, var: float, count: float, value: float, alpha: float) -> Tuple[float, float, float]:
+        if count == 0:
+            return value, 0.0, 1
+        diff = value - mean
+        incr = alpha * diff
+        return mean + incr, (1 - alpha) * (var + diff * incr), count + 1
+
+    def observe(self, value: float, ts: float, alpha: float = ALPHA) -> None:
+        self.mean, self.var, self.count = self._update(self.mean, self.var, self.count, value, alpha)
+        i = 3 * datetime.fromtimestamp(ts).hour
+        b = self.buckets
+        b[i], b[i + 1], b[i + 2] = self._update(b[i], b[i + 1], b[i + 2], value, alpha)
+        self.updated = ts
+
+    def estimate(self, ts: Optional[float] = None, seasonal: bool = True) -> Tuple[float, float, int]:
+        """Return (mean, stddev, samples), preferring the time-of-day bucket when warm"""
+        if seasonal and ts is not None:
+            i = 3 * datetime.fromtimestamp(ts).hour
+            if self.buckets[i + 2] >= WARMUP_SAMPLES:
+                return self.buckets[i], math.sqrt(max(self.buckets[i + 1], 0.0)), int(self.buckets[i + 2])
+        return self.mean, math.sqrt(max(self.var, 0.0)), self.count
+
+    def to_dict(self) -> Dict:
+        return {
+            "mean": self.mean,
+            "var": self.var,
+            "count": self.count,
+            "updated": self.updated,
+            "buckets": self.buckets,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BaselineSeries":
+        series = cls()
+        series.mean = float(data.get("mean", 0.0))
+        series.var = float(data.get("var", 0.0))
+        series.count = int(data.get("count", 0))
+        series.updated = float(data.get("updated", 0.0))
+        buckets = data.get("buckets") or []
+        if len(buckets) == 3 * BUCKETS:
+            series.buckets = [float(v) for v in buckets]
+        return series
+
+
+class BaselineEngine:
+    """Per-host, per-resource baselines and the thresholds derived from them"""
+
+    def __init__(self, state_file: Path = BASELINE_FILE, seasonal: bool = True,
+                 sigmas: float = SIGMAS, alpha: float = ALPHA):
+        self.state_file = Path(state_file)
+        self.seasonal = seasonal
+        self.sigmas = sigmas
+        self.alpha = alpha
+        self.series: Dict[Tuple[str, str], BaselineSeries] = {}
+        self._mtime = 0.0
+
+    # ---------------- learning ----------------
+
+    def observe(self, instance: str, resource: str, value: float, ts: Optional[float] = None) -> None:
+        """Feed one sample into the (instance, resource) baseline"""
+        key = (instance, normalize_resource(resource))
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = BaselineSeries()
+        series.observe(float(value), ts if ts is not None else time.time(), self.alpha)
+
+    # ---------------- thresholds ----------------
+
+    def threshold(self, resource: str, instance: str = LOCAL_INSTANCE, ts: Optional[float] = None) -> float:
+        """Critical threshold for a resource on a host (learned or default)"""
+        return self.describe(resource, instance, ts)["threshold"]
+
+    def describe(self, resource: str, instance: str = LOCAL_INSTANCE, ts: Optional[float] = None) -> Dict:
+        resource = normalize_resource(resource)
+        defaults = DEFAULT_THRESHOLDS.get(resource, {"critical": 0.0, "floor": 0.0, "ceiling": math.inf, "unit": ""})
+        info = {
+            "instance": instance,
+            "resource": resource,
+            "threshold": defaults["critical"],
+            "default": defaults["critical"],
+            "unit": defaults["unit"],
+            "source": "default",
+        }
+
+        series = self.series.get((instance, resource))
+        if series is None:
+            return info
+
+        mean, std, samples = series.estimate(ts if ts is not None else time.time(), self.seasonal)
+        info.update({"mean": round(mean, 2), "stddev": round(std, 2), "samples": samples})
+        if samples >= WARMUP_SAMPLES:
+            learned = min(max(mean + self.sigmas * std, defaults["floor"]), defaults["ceiling"])
+            info["threshold"] = round(learned, 1)
+            info["source"] = "learned"
+        return info
+
+    def format_threshold(self, resource: str, instance: str = LOCAL_INSTANCE) -> str:
+        """Human readable threshold, e.g. '80%' or '10 errors/sec'"""
+        info = self.describe(resource, instance)
+        if normalize_resource(resource) not in DEFAULT_THRESHOLDS:
+            return "N/A"
+        return f"{info['threshold']:g}{info['unit']}"
+
+    def instances(self) -> List[str]:
+        return sorted({instance for instance, _ in self.series})
+
+    def snapshot(self, instance: Optional[str] = None) -> Dict[str, Dict[str, Dict]]:
+        """Thresholds for every known host (or one host) and resource"""
+        hosts = [instance] if instance else (self.instances() or [LOCAL_INSTANCE])
+        return {
+            host: {resource: self.describe(resource, host) for resource in DEFAULT_THRESHOLDS}
+            for host in hosts
+        }
+
+    # ---------------- persistence ----------------
+
+    def load(self) -> "BaselineEngine":
+        try:
+            stat = self.state_file.stat()
+            data = json.loads(self.state_file.read_text())
+        except (OSError, ValueError):
+            return self
+        self.series = {}
+        for instance, resources in data.get("series", {}).items():
+            for resource, values in resources.items():
+                self.series[(instance, resource)] = BaselineSeries.from_dict(values)
+        self._mtime = stat.st_mtime
+        return self
+
+    def reload_if_changed(self) -> None:
+        """Pick up state written by another process (the dashboard learns, the receiver reads)"""
+        try:
+            if self.state_file.stat().st_mtime != self._mtime:
+                self.load()
+        except OSError:
+            pass
+
+    def save(self) -> None:
+        data: Dict[str, Dict] = {"series": {}, "saved_at": datetime.now().isoformat()}
+        for (instance, resource), series in self.series.items():
+            data["series"].setdefault(instance, {})[resource] = series.to_dict()
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, self.state_file)
+        self._mtime = self.state_file.stat().st_mtime
+
+
+# ============================================================
+# Prometheus rules generation
+# ============================================================
+
+_FSTYPES = 'fstype!~"tmpfs|fuse.lxcfs|squashfs|vfat"'
+
+
+def _selector(*matchers: str) -> str:
+    matchers = [m for m in matchers if m]
+    return "{" + ",".join(matchers) + "}" if matchers else ""
+
+
+def _cpu_expr(sel: str) -> str:
+    idle = _selector('mode="idle"', sel)
+    return f"100 - (avg by(instance) (irate(node_cpu_seconds_total{idle}[5m])) * 100)"
+
+
+def _memory_expr(sel: str) -> str:
+    return f"(1 - (node_memory_MemAvailable_bytes{_selector(sel)} / node_memory_MemTotal_bytes{_selector(sel)})) * 100"
+
+
+def _disk_expr(sel: str) -> str:
+    return f"(1 - (node_filesystem_avail_bytes{_selector(_FSTYPES, sel)} / node_filesystem_size_bytes{_selector(sel)})) * 100"
+
+
+def _network_expr(kind: str, sel: str, threshold: str) -> str:
+    return (f"rate(node_network_receive_{kind}_total{_selector(sel)}[5m]) > {threshold} or "
+            f"rate(node_network_transmit_{kind}_total{_selector(sel)}[5m]) > {threshold}")
+
+
+# (alert, resource, severity, for, action, expr builder, summary, description, extra annotations)
+THRESHOLD_RULES = [
+    ("HighCPUUsage", "CPU", "critical", "30s", "handle_high_cpu", _cpu_expr,
+     "High CPU usage detected on {{ $labels.instance }}",
+     "CPU usage is {{ $value | humanize }}% for more than 30 seconds", {}),
+    ("ModerateCPUUsage", "CPU", "warning", "5m", "monitor", _cpu_expr,
+     "Moderate CPU usage on {{ $labels.instance }}",
+     "CPU usage is {{ $value | humanize }}%", {}),
+    ("HighMemoryUsage", "MEMORY", "critical", "30s", "handle_high_memory", _memory_expr,
+     "High memory usage on {{ $labels.instance }}",
+     "Memory usage is {{ $value | humanize }}% for more than 30 seconds", {"value": "{{ $value }}"}),
+    ("ModerateMemoryUsage", "MEMORY", "warning", "5m", "monitor", _memory_expr,
+     "Moderate memory usage on {{ $labels.instance }}",
+     "Memory usage is {{ $value | humanize }}%", {}),
+    ("HighDiskUsage", "DISK", "critical", "30s", "handle_disk_alert", _disk_expr,
+     "High disk usage on {{ $labels.instance }}",
+     "Disk usage on {{ $labels.mountpoint }} is {{ $value | humanize }}%", {}),
+    ("ModerateDiskUsage", "DISK", "warning", "10m", "monitor", _disk_expr,
+     "Moderate disk usage on {{ $labels.instance }}",
+     "Disk usage on {{ $labels.mountpoint }} is {{ $value | humanize }}%", {}),
+    ("HighNetworkErrors", "NETWORK", "critical", "3m", "handle_network_issue", "errs",
+     "High network errors on {{ $labels.instance }}",
+     "Network interface {{ $labels.device }} has high error rate", {}),
+    ("HighNetworkDrops", "NETWORK", "warning", "3m", "handle_network_issue", "drop",
+     "High network packet drops on {{ $labels.instance }}",
+     "Network interface {{ $labels.device }} is dropping packets", {}),
+]
+
+# Rules that have no tunable threshold - rendered verbatim
+STATIC_RULES = [
+    ("ServiceDown", 'up{job="ec2-node-exporter"} == 0', "1m", "critical", "service", "restart_service",
+     "Service is down on {{ $labels.instance }}",
+     "The service has been down for more than 1 minute"),
+    ("NodeExporterDown", 'up{job="ec2-node-exporter"} == 0', "30s", "critical", "monitoring", "restart_service",
+     "Node Exporter is down on {{ $labels.instance }}",
+     "Cannot scrape metrics from Node Exporter"),
+    ("HighLoadAverage", 'node_load15 / count(node_cpu_seconds_total{mode="idle"}) without(cpu,mode) > 2', "5m",
+     "warning", "system", "handle_high_cpu",
+     "High load average on {{ $labels.instance }}",
+     "Load average (15m) is {{ $value | humanize }} per CPU core"),
+]
+
+# Patient web app SLOs (scraped from the app's own /metrics endpoint)
+_APP_P95 = ('histogram_quantile(0.95, sum(rate(patient_http_request_duration_seconds_bucket'
+            '{job="patient-web-app",endpoint!="/metrics"}[5m])) by (le, instance))')
+APP_RULES = [
+    ("AppHighLatency", f"{_APP_P95} > 0.5", "5m", "warning", "application", "monitor",
+     "Patient app is slow on {{ $labels.instance }}",
+     "95th percentile latency is {{ $value | humanizeDuration }} (SLO: 500ms)"),
+    ("AppLatencySLOBreach", f"{_APP_P95} > 2", "5m", "critical", "application", "restart_service",
+     "Patient app latency SLO breached on {{ $labels.instance }}",
+     "95th percentile latency is {{ $value | humanizeDuration }} for 5 minutes"),
+    ("AppHighErrorRate",
+     'sum(rate(patient_http_request_duration_seconds_count{job="patient-web-app",status=~"5.."}[5m])) by (instance)'
+     ' / sum(rate(patient_http_request_duration_seconds_count{job="patient-web-app"}[5m])) by (instance) > 0.05',
+     "5m", "critical", "application", "restart_service",
+     "Patient app errors on {{ $labels.instance }}",
+     "{{ $value | humanizePercentage }} of requests return 5xx"),
+    ("AppSlowQueries",
+     'histogram_quantile(0.95, sum(rate(patient_db_query_duration_seconds_bucket{job="patient-web-app"}[5m]))'
+     ' by (le, instance)) > 0.1', "10m", "warning", "application", "monitor",
+     "Slow database queries on {{ $labels.instance }}",
+     "95th percentile query time is {{ $value | humanizeDuration }}"),
+    ("AppDown", 'up{job="patient-web-app"} == 0', "1m", "critical", "application", "restart_service",
+     "Patient app is down on {{ $labels.instance }}",
+     "Cannot scrape /metrics from the Patient app"),
+]
+
+
+def _promql_string(value: str) -> str:
+    """Quote a value as a PromQL string literal"""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _render_rule(lines: List[str], name: str, expr: str, duration: str, severity: str,
+                 component: str, action: str, summary: str, description: str,
+                 extra: Optional[Dict[str, str]] = None) -> None:
+    lines += [
+        f"      - alert: {name}",
+        f"        expr: {expr}",
+        f"        for: {duration}",
+        "        labels:",
+        f"          severity: {severity}",
+        f"          component: {component}",
+        f"          action: {action}",
+        "        annotations:",
+        f"          summary: {json.dumps(summary)}",
+        f"          description: {json.dumps(description)}",
+    ]
+    for key, value in (extra or {}).items():
+        lines.append(f"          {key}: {json.dumps(value)}")
+    lines.append("")
+
+
+def render_rules(engine: Optional[BaselineEngine] = None) -> str:
+    """
+    Render the Prometheus alert rules file.
+    Critical thresholds use each host's learned baseline; hosts without one
+    fall through to a default rule that excludes the learned hosts.
+    """
+    engine = engine or BaselineEngine()
+    lines = [
+        "# Alert Rules for Self-Healing Infrastructure",
+        "# Generated by scripts/thresholds.py - edit DEFAULT_THRESHOLDS there, not here",
+        "groups:",
+        "  - name: system_alerts",
+        "    interval: 30s",
+        "    rules:",
+    ]
+
+    section = None
+    for name, resource, severity, duration, action, builder, summary, description, extra in THRESHOLD_RULES:
+        if resource != section:
+            section = resource
+            lines.append(f"      # {resource if len(resource) <= 3 else resource.title()} Alerts")
+        defaults = DEFAULT_THRESHOLDS[resource]
+        component = resource.lower()
+        overrides: List[Tuple[str, float]] = []
+        if severity == "critical":
+            for instance in engine.instances():
+                info = engine.describe(resource, instance)
+                if info["source"] == "learned":
+                    overrides.append((instance, info["threshold"]))
+
+        variants = [(f"instance={_promql_string(instance)}", value) for instance, value in overrides]
+        default_sel = ""
+        if overrides:
+            # "10.0.0.1:9100" as a regex would also match 10.0.0.119100 and friends
+            pattern = "|".join(re.escape(instance) for instance, _ in overrides)
+            default_sel = f"instance!~{_promql_string(pattern)}"
+        variants.append((default_sel, defaults[severity]))
+
+        for sel, value in variants:
+            if isinstance(builder, str):
+                expr = _network_expr(builder, sel, f"{value:g}")
+            else:
+                expr = f"{builder(sel)} > {value:g}"
+            _render_rule(lines, name, expr, duration, severity, component, action, summary, description, extra)
+
+    lines.append("      # Service Health Alerts")
+    for name, expr, duration, severity, component, action, summary, description in STATIC_RULES:
+        _render_rule(lines, name, expr, duration, severity, component, action, summary, description)
+
+    lines += [
+        "  - name: application_alerts",
+        "    interval: 30s",
+        "    rules:",
+    ]
+    for name, expr, duration, severity, component, action, summary, description in APP_RULES:
+        _render_rule(lines, name, expr, duration, severity, component, action, summary, description)
+
+    return "\n".join(lines).rstrip() + "\n"
+
+
+# ============================================================
+# CLI (used by the shell handlers)
+# ============================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Self-healing thresholds")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    get = sub.add_parser("get", help="Print the critical threshold as an integer")
+    get.add_argument("resource")
+    get.add_argument("--instance", default=LOCAL_INSTANCE)
+
+    show = sub.add_parser("show", help="Print all thresholds as JSON")
+    show.add_argument("--instance")
+
+    rules = sub.add_parser("rules", help="Render the Prometheus alert rules file")
+    rules.add_argument("--output", help="Write to file instead of stdout")
+
+    args = parser.parse_args(argv)
+    engine = BaselineEngine().load()
+
+    if args.command == "get":
+        print(int(round(engine.threshold(args.resource, args.instance))))
+    elif args.command == "show":
+        print(json.dumps(engine.snapshot(args.instance), indent=2))
+    elif args.command == "rules":
+        text = render_rules(engine)
+        if args.output:
+            Path(args.output).write_text(text)
+        else:
+            sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,19 +15,37 @@ except ImportError as e:
         "Original error: " + str(e)
     ) from e
 
+import asyncio
+import hmac
 import logging
+import os
 import subprocess
 import json
+import sys
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, List
 from pathlib import Path
 
+import network_diag
+import psi
+from alert_models import AlertRecord, PayloadError, parse_payload
+from capacity_executor import CapacityError, CapacityExecutor, validate_params
+from notification_dispatcher import NotificationDispatcher
+from thresholds import BaselineEngine, LOCAL_INSTANCE
+
+# Paths (overridable so the receiver can run outside /opt, e.g. under a benchmark)
+LOG_DIR = Path(os.environ.get("SELF_HEAL_LOG_DIR", "/opt/self-heal/logs"))
+SCRIPTS_DIR = Path(os.environ.get("SELF_HEAL_SCRIPTS_DIR", "/opt/self-heal/scripts"))
+PENDING_FILE = LOG_DIR / "pending_actions.json"
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('/opt/self-heal/logs/webhook.log'),
+        logging.FileHandler(LOG_DIR / 'webhook.log'),
         logging.StreamHandler()
     ]
 )
@@ -35,20 +53,78 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Self-Healing Webhook Receiver")
 
-# Paths
-LOG_DIR = Path("/opt/self-heal/logs")
-PENDING_FILE = LOG_DIR / "pending_actions.json"
+# Learned per-host thresholds (written by the dashboard, read here)
+baselines = BaselineEngine().load()
+
+# Slack/SES/SNS delivery on a background thread (digests, rate limits, retries)
+notifier = NotificationDispatcher.from_env()
+
+# Approved capacity actions (swap, disk, instance size) run as background jobs
+capacity = CapacityExecutor.from_env()
+
+# /approve-action starts privileged jobs: callers send this token in
+# X-Self-Heal-Token. Without a token set, only this host may approve.
+APPROVAL_TOKEN = os.environ.get("SELF_HEAL_APPROVAL_TOKEN", "")
+LOCAL_CLIENTS = ("127.0.0.1", "::1")
 
 # Mapping من alert action لـ script path
 SCRIPT_MAPPING = {
-    "handle_high_cpu": "/opt/self-heal/scripts/handle_high_cpu.sh",
-    "handle_high_memory": "/opt/self-heal/scripts/handle_high_memory.sh",
-    "handle_disk_alert": "/opt/self-heal/scripts/handle_disk_alert.sh",
-    "handle_network_issue": "/opt/self-heal/scripts/handle_network_issue.sh",
-    "restart_service": "/opt/self-heal/scripts/restart_service.sh docker:myapp",
+    "handle_high_cpu": f"{SCRIPTS_DIR}/handle_high_cpu.sh",
+    "handle_high_memory": f"{SCRIPTS_DIR}/handle_high_memory.sh",
+    "handle_disk_alert": f"{SCRIPTS_DIR}/handle_disk_alert.sh",
+    "handle_network_issue": f"{SCRIPTS_DIR}/handle_network_issue.sh",
+    "restart_service": f"{SCRIPTS_DIR}/restart_service.sh docker:myapp",
     "monitor": None  # للتنبيهات التحذيرية فقط (بدون action)
 }
 
+# Remediation backend per action: "script" (handle_*.sh, kills processes)
+# or "throttle" (cgroup v2 limits, nothing is killed).
+# Override with SELF_HEAL_REMEDIATION="handle_high_cpu=throttle,handle_high_memory=script"
+THROTTLE_SCRIPT = str(SCRIPTS_DIR / "cgroup_throttle.py")
+THROTTLE_RELEASE_INTERVAL = 30  # seconds
+REMEDIATION_MAPPING = {
+    "handle_high_cpu": "script",
+    "handle_high_memory": "script",
+}
+for _entry in filter(None, os.environ.get("SELF_HEAL_REMEDIATION", "").split(",")):
+    _action, _, _backend = _entry.partition("=")
+    if _backend.strip() in ("script", "throttle"):
+        REMEDIATION_MAPPING[_action.strip()] = _backend.strip()
+
+# Event-driven detection: PSI triggers raise a pending alert as soon as tasks
+# stall, without waiting for the next Prometheus evaluation.
+# Opt-in (SELF_HEAL_PSI_WATCH=1); only CPU and memory stalls have a handler
+PSI_WATCH = os.environ.get("SELF_HEAL_PSI_WATCH", "0") == "1"
+PSI_ACTIONS = {
+    "cpu": "handle_high_cpu",
+    "memory": "handle_high_memory",
+}
+psi_watcher = None
+
+
+class StageTimer:
+    """
+    Per-request stage durations, reported in the Server-Timing header
+    """
+    __slots__ = ("stages", "started")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def header(self) -> str:
+        parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.3f}")
+        return ", ".join(parts)
+
 
 def create_pending_alert(alert_info: Dict, action: str) -> None:
     """
@@ -61,7 +137,9 @@ def create_pending_alert(alert_info: Dict, action: str) -> None:
         
         # Try to get value from alert first, otherwise calculate it
         current_value = alert_info.get("current_value", None)
-        threshold = "N/A"
+        instance = alert_info.get("instance", LOCAL_INSTANCE)
+        baselines.reload_if_changed()
+        threshold = baselines.format_threshold(resource_type, instance)
         
         if not current_value:
             # Fallback: Calculate current value
@@ -74,7 +152,6 @@ def create_pending_alert(alert_info: Dict, action: str) -> None:
                     current_value = f"{round(100 - idle, 1)}%"
                 else:
                     current_value = "N/A"
-                threshold = "80%"
                 
             elif "memory" in action.lower():
                 # Get Memory usage
@@ -83,27 +160,23 @@ def create_pending_alert(alert_info: Dict, action: str) -> None:
                 mem_total = int(mem_line[1])
                 mem_available = int(mem_line[6])
                 current_value = f"{round((1 - mem_available / mem_total) * 100, 1)}%"
-                threshold = "85%"
                 
             elif "disk" in action.lower():
                 # Get Disk usage
                 disk_result = subprocess.run(["df", "/", "--output=pcent"], capture_output=True, text=True, timeout=5)
                 current_value = disk_result.stdout.strip().split('\n')[1].strip()
-                threshold = "85%"
                 
             elif "network" in action.lower():
-                current_value = "High errors detected"
-                threshold = "10 errors/sec"
-        else:
-            # Set thresholds based on resource type
-            if "CPU" in resource_type:
-                threshold = "80%"
-            elif "MEMORY" in resource_type:
-                threshold = "85%"
-            elif "DISK" in resource_type:
-                threshold = "85%"
-            elif "NETWORK" in resource_type:
-                threshold = "10 errors/sec"
+                # Real error/drop rates and reachability (about one second)
+                try:
+                    network = network_diag.diagnose(timeout=1.0, interval=1.0, attempts=2)
+                    current_value = network_diag.summarize(network)
+                except Exception as e:
+                    logger.error(f"Network diagnosis failed: {e}")
+                    current_value = "High errors detected"
+        
+        # Stall averages tell real contention apart from merely busy
+        pressure = psi.read_all()
         
         pending_alert = {
             "timestamp": datetime.now().isoformat(),
@@ -115,6 +188,8 @@ def create_pending_alert(alert_info: Dict, action: str) -> None:
             "instance": alert_info.get("instance", "Unknown"),
             "description": alert_info.get("description", ""),
             "action": action,
+            "pressure": psi.summarize(pressure),
+            "priority": psi.priority(pressure),
             "timeout_seconds": 300  # 5 minutes
         }
         
@@ -176,6 +251,112 @@ def run_healing_script(script_path: str, alert_info: Dict) -> Dict:
         }
 
 
+def run_throttle(action: str, alert_info: Dict) -> Dict:
+    """
+    Throttle the heaviest processes into a cgroup v2 slice instead of killing them
+    """
+    resource = "cpu" if "cpu" in action else "memory"
+    command = [sys.executable, THROTTLE_SCRIPT, "throttle-top", resource]
+    if os.geteuid() != 0:
+        command = ["sudo", "-n"] + command
+    try:
+        logger.info(f"Throttling top {resource} processes for alert: {alert_info.get('alertname')}")
+        result = subprocess.run(command, capture_output=True, text=True, timeout=30)
+        output = json.loads(result.stdout or "{}")
+        if result.returncode == 0:
+            logger.info(f"Throttle applied: {output.get('name', output.get('status'))}")
+            return {"status": "success", "backend": "throttle", "result": output}
+        logger.error(f"Throttle failed: {output.get('error', result.stderr)}")
+        return {"status": "failed", "backend": "throttle", "error": output.get("error", result.stderr)}
+    except (subprocess.TimeoutExpired, ValueError) as e:
+        logger.error(f"Error throttling {resource}: {str(e)}")
+        return {"status": "error", "backend": "throttle", "error": str(e)}
+
+
+async def release_throttled_loop():
+    """
+    Periodically release throttled groups once their pressure has subsided
+    """
+    state_file = LOG_DIR / "throttled.json"
+    command = [sys.executable, THROTTLE_SCRIPT, "release-idle"]
+    if os.geteuid() != 0:
+        command = ["sudo", "-n"] + command
+    while True:
+        await asyncio.sleep(THROTTLE_RELEASE_INTERVAL)
+        try:
+            if state_file.exists() and state_file.read_text().strip() not in ("", "{}"):
+                await asyncio.to_thread(subprocess.run, command, capture_output=True, timeout=30)
+        except Exception as e:
+            logger.error(f"Error releasing throttled groups: {str(e)}")
+
+
+def on_pressure_stall(resource: str, pressure: Dict) -> None:
+    """
+    PSI trigger fired: raise a pending alert unless one is already waiting
+    """
+    stalled = pressure.get(resource, {}).get("some", {}).get("avg10", 0.0)
+    logger.warning(f"Pressure stall detected: {resource} some avg10={stalled}%")
+    
+    action = PSI_ACTIONS.get(resource)
+    if not action or PENDING_FILE.exists():
+        return
+    
+    create_pending_alert({
+        "alertname": f"PressureStall{resource.capitalize()}",
+        "severity": "critical",
+        "instance": LOCAL_INSTANCE,
+        "description": f"Tasks stalled on {resource} {stalled}% of the last 10s",
+        "current_value": f"{stalled}% stalled"
+    }, action)
+    notifier.submit({
+        "resource": resource,
+        "severity": "critical",
+        "value": f"{stalled}% stalled",
+        "instance": LOCAL_INSTANCE,
+        "alertname": f"PressureStall{resource.capitalize()}"
+    })
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """Start background maintenance tasks"""
+    global psi_watcher
+    notifier.start()
+    capacity.start()
+    
+    if "throttle" in REMEDIATION_MAPPING.values() or (LOG_DIR / "throttled.json").exists():
+        asyncio.create_task(release_throttled_loop())
+    
+    if PSI_WATCH and psi.available():
+        psi_watcher = psi.PressureWatcher(on_pressure_stall, resources=tuple(PSI_ACTIONS))
+        if psi_watcher.start():
+            logger.info(f"PSI triggers armed for: {', '.join(psi_watcher.resources())}")
+    elif PSI_WATCH:
+        logger.info("PSI not available in this kernel, relying on Prometheus alerts only")
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    """Flush queued notifications and stop the watchers before exiting"""
+    if psi_watcher is not None:
+        await asyncio.to_thread(psi_watcher.stop)
+    await asyncio.to_thread(notifier.stop)
+    await asyncio.to_thread(capacity.stop)
+
+
+@app.get("/pressure")
+async def get_pressure():
+    """
+    Current pressure stall information (null when PSI is unavailable)
+    """
+    pressure = psi.read_all()
+    return {
+        "pressure": pressure,
+        "priority": psi.priority(pressure),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -192,6 +373,30 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/thresholds")
+async def get_thresholds():
+    """
+    Current alert thresholds for every known host (learned or default)
+    """
+    baselines.reload_if_changed()
+    return {
+        "thresholds": baselines.snapshot(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/thresholds/{instance}")
+async def get_instance_thresholds(instance: str):
+    """
+    Current alert thresholds for one host
+    """
+    baselines.reload_if_changed()
+    return {
+        "thresholds": baselines.snapshot(instance)[instance],
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @app.get("/recommendations")
 async def get_recommendations():
     """
@@ -199,7 +404,7 @@ async def get_recommendations():
     """
     try:
         import os
-        rec_file = "/opt/self-heal/logs/recommendations.json"
+        rec_file = LOG_DIR / "recommendations.json"
         
         if not os.path.exists(rec_file):
             return {"recommendations": [], "count": 0}
@@ -225,13 +430,28 @@ async def get_recommendations():
         return {"recommendations": [], "count": 0, "error": str(e)}
 
 
+def authorize_approval(request: Request) -> None:
+    """
+    Token check (SELF_HEAL_APPROVAL_TOKEN), or localhost only when no token is set
+    """
+    if APPROVAL_TOKEN:
+        supplied = request.headers.get("X-Self-Heal-Token", "")
+        if not hmac.compare_digest(supplied.encode(), APPROVAL_TOKEN.encode()):
+            raise HTTPException(status_code=401, detail="Missing or invalid X-Self-Heal-Token")
+    elif request.client is None or request.client.host not in LOCAL_CLIENTS:
+        raise HTTPException(status_code=403,
+                            detail="Approvals are local-only; set SELF_HEAL_APPROVAL_TOKEN to allow remote ones")
+
+
 @app.post("/approve-action")
 async def approve_action(request: Request):
     """
     Approve and execute a recommended action
     Payload: {"action": "upgrade_instance", "resource": "CPU", "details": {...}}
+    Requires X-Self-Heal-Token when SELF_HEAL_APPROVAL_TOKEN is set, else a local caller
     """
     try:
+        authorize_approval(request)
         payload = await request.json()
         action = payload.get("action")
         resource = payload.get("resource")
@@ -259,25 +479,65 @@ async def approve_action(request: Request):
             "details": payload.get("details", {})
         }
         
-        with open("/opt/self-heal/logs/approvals.log", "a") as f:
+        # Capacity actions become jobs; the rest are only logged for now
+        job = None
+        if capacity.supports(action):
+            details = payload.get("details") or {}
+            if not isinstance(details, dict):
+                raise HTTPException(status_code=400, detail="details must be an object")
+            try:
+                params = validate_params(action, details)
+            except CapacityError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            job = capacity.submit(action, params, requested_by=str(resource))
+            approval_log["job_id"] = job.id
+        
+        with open(LOG_DIR / "approvals.log", "a") as f:
             f.write(json.dumps(approval_log) + "\n")
         
-        # For now, just log. In production, this would trigger Terraform/automation
         logger.info(f"Action approved: {action} for {resource}")
         
-        return {
+        response = {
             "status": "approved",
             "action": action,
             "resource": resource,
             "message": f"Action '{action}' has been logged and will be executed",
             "timestamp": datetime.now().isoformat()
         }
+        if job is not None:
+            response["job"] = job.to_dict()
+            response["message"] = f"Action '{action}' queued as job {job.id} ({job.backend} backend)"
+        return response
         
+    except HTTPException:
+        raise
+    except CapacityError as e:
+        logger.error(f"Capacity action rejected: {str(e)}")
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Error approving action: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/jobs")
+async def list_jobs(limit: int = 50):
+    """
+    Recent capacity jobs, newest first
+    """
+    return {"jobs": capacity.jobs(limit)}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    One capacity job with its step log
+    """
+    job = capacity.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
+
+
 @app.post("/dismiss-recommendation")
 async def dismiss_recommendation(request: Request):
     """
@@ -296,7 +556,7 @@ async def dismiss_recommendation(request: Request):
             "status": "dismissed"
         }
         
-        with open("/opt/self-heal/logs/dismissals.log", "a") as f:
+        with open(LOG_DIR / "dismissals.log", "a") as f:
             f.write(json.dumps(dismissal_log) + "\n")
         
         logger.info(f"Recommendation dismissed: {rec_id} - Reason: {reason}")
@@ -312,31 +572,84 @@ async def dismiss_recommendation(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/notify")
+async def notify(request: Request):
+    """
+    Queue a notification (used by notification_sender.sh)
+    Payload: {"resource": "CPU", "severity": "WARNING", "value": "92%"}
+    """
+    try:
+        payload = await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    
+    if not notifier.channels:
+        raise HTTPException(status_code=503, detail="No notification channels configured")
+    if not notifier.submit(payload):
+        raise HTTPException(status_code=503, detail="Notification queue full")
+    
+    return JSONResponse(status_code=202, content={
+        "status": "queued",
+        "channels": [ch.name for ch in notifier.channels],
+        "timestamp": datetime.now().isoformat()
+    })
+
+
+@app.get("/notify/stats")
+async def notify_stats():
+    """
+    Delivery statistics per notification channel
+    """
+    return notifier.stats()
+
+
+def route_alert(alert: AlertRecord) -> str:
+    """
+    What receive_alert does with an alert:
+    resolved | monitor | no_script | pending | throttle | script
+    """
+    if alert.status == "resolved":
+        return "resolved"
+    if alert.severity == "warning" and alert.action == "monitor":
+        return "monitor"
+    if not SCRIPT_MAPPING.get(alert.action):
+        return "no_script"
+    if alert.severity == "critical":
+        return "pending"
+    if REMEDIATION_MAPPING.get(alert.action) == "throttle":
+        return "throttle"
+    return "script"
+
+
 @app.post("/webhook")
 async def receive_alert(request: Request):
     """
     Receive alerts from Alertmanager
     """
+    timer = StageTimer()
     try:
         # قراءة البيانات
-        payload = await request.json()
-        logger.info(f"Received alert webhook: {json.dumps(payload, indent=2)}")
+        with timer.stage("parse"):
+            parsed = parse_payload(await request.body())
+        with timer.stage("log"):
+            logger.info(f"Received alert webhook: {parsed.summary()}")
+            for error in parsed.errors:
+                logger.warning(f"Invalid alert #{error['index']} ({error['alertname']}): {error['errors']}")
         
         # معالجة كل alert
         results = []
-        alerts = payload.get("alerts", [])
         
-        for alert in alerts:
-            alert_name = alert.get("labels", {}).get("alertname", "Unknown")
-            action = alert.get("labels", {}).get("action", "monitor")
-            severity = alert.get("labels", {}).get("severity", "unknown")
-            status = alert.get("status", "firing")
-            instance = alert.get("labels", {}).get("instance", "unknown")
+        for alert in parsed.alerts:
+            alert_name = alert.alertname
+            action = alert.action
+            severity = alert.severity
+            instance = alert.instance
+            route = route_alert(alert)
             
-            logger.info(f"Processing alert: {alert_name} (severity: {severity}, status: {status}, action: {action})")
+            logger.info(f"Processing alert: {alert_name} on {instance} (severity: {severity}, status: {alert.status}, action: {action})")
             
             # إذا كان Alert resolved، نسجله فقط
-            if status == "resolved":
+            if route == "resolved":
                 logger.info(f"Alert resolved: {alert_name} on {instance}")
                 results.append({
                     "alert": alert_name,
@@ -346,7 +659,7 @@ async def receive_alert(request: Request):
                 continue
             
             # إذا كان warning ومش محتاج action، نسجله فقط
-            if severity == "warning" and action == "monitor":
+            if route == "monitor":
                 logger.warning(f"Warning alert (monitoring only): {alert_name} on {instance}")
                 results.append({
                     "alert": alert_name,
@@ -355,59 +668,79 @@ async def receive_alert(request: Request):
                 })
                 continue
             
+            if route == "no_script":
+                logger.warning(f"No script mapping found for action: {action}")
+                results.append({
+                    "alert": alert_name,
+                    "action": action,
+                    "status": "no_script_found"
+                })
+                continue
+            
             # تنفيذ الـ action المناسب
-            script_path = SCRIPT_MAPPING.get(action)
+            script_path = SCRIPT_MAPPING[action]
+            alert_info = {
+                "alertname": alert_name,
+                "severity": severity,
+                "instance": instance,
+                "description": alert.description
+            }
             
-            if script_path:
-                alert_info = {
-                    "alertname": alert_name,
-                    "severity": severity,
-                    "instance": instance,
-                    "description": alert.get("annotations", {}).get("description", "")
-                }
+            # CRITICAL alerts → Always go to Dashboard for user choice
+            if route == "pending":
+                # Add alert value if available
+                if alert.value:
+                    alert_info["current_value"] = alert.value
                 
-                # CRITICAL alerts → Always go to Dashboard for user choice
-                if severity == "critical":
-                    # Add alert value if available
-                    alert_value = alert.get("annotations", {}).get("value", None)
-                    if alert_value:
-                        alert_info["current_value"] = alert_value
-                    
-                    create_pending_alert(alert_info, action)
-                    logger.info(f"CRITICAL alert created - awaiting user choice on dashboard: {alert_name}")
-                    results.append({
-                        "alert": alert_name,
-                        "action": "pending_user_choice",
-                        "status": "waiting",
-                        "message": "Check dashboard at http://<server-ip>:5001"
+                with timer.stage("pending"):
+                    # Measures usage (network: about a second of probing) off the event loop
+                    await asyncio.to_thread(create_pending_alert, alert_info, action)
+                with timer.stage("notify"):
+                    notifier.submit({
+                        "resource": action.replace("handle_", "").replace("_alert", "").replace("high_", ""),
+                        "severity": severity,
+                        "value": alert.value or "awaiting choice",
+                        "instance": instance,
+                        "alertname": alert_name
                     })
-                else:
-                    # WARNING alerts → Auto execution
-                    result = run_healing_script(script_path, alert_info)
-                    result["alert"] = alert_name
-                    result["action"] = action
-                    results.append(result)
-            else:
-                logger.warning(f"No script mapping found for action: {action}")
+                logger.info(f"CRITICAL alert created - awaiting user choice on dashboard: {alert_name}")
                 results.append({
                     "alert": alert_name,
-                    "action": action,
-                    "status": "no_script_found"
+                    "action": "pending_user_choice",
+                    "status": "waiting",
+                    "message": "Check dashboard at http://<server-ip>:5001"
                 })
+            elif route == "throttle":
+                # WARNING alerts → Auto throttling (non-destructive)
+                with timer.stage("throttle"):
+                    # Samples /proc and shells out to cgroup_throttle.py (up to 30s)
+                    result = await asyncio.to_thread(run_throttle, action, alert_info)
+                result["alert"] = alert_name
+                result["action"] = action
+                results.append(result)
+            else:
+                # WARNING alerts → Auto execution
+                with timer.stage("script"):
+                    result = run_healing_script(script_path, alert_info)
+                result["alert"] = alert_name
+                result["action"] = action
+                results.append(result)
         
         return JSONResponse(
             status_code=200,
             content={
                 "status": "processed",
-                "alerts_count": len(alerts),
+                "alerts_count": parsed.total,
                 "results": results,
+                "invalid_alerts": parsed.errors,
                 "timestamp": datetime.now().isoformat()
-            }
+            },
+            headers={"Server-Timing": timer.header()}
         )
         
-    except json.JSONDecodeError:
-        logger.error("Invalid JSON payload received")
-        raise HTTPException(status_code=400, detail="Invalid JSON")
+    except PayloadError as e:
+        logger.error(f"Rejected webhook payload: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error processing webhook: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Alertmanager storm generator
+
+Builds Alertmanager v4 webhook payloads that look like the ones our rules
+produce. Alert names, severities, actions and annotations come from
+thresholds.py. Each payload is one alert group with any mix of severities,
+firing/resolved alerts, many instances, and alerts arrays as large as a group
+allows (alertmanager.yml sends them all, max_alerts: 0). The payloads are
+replayed open-loop at a fixed rate against the webhook receiver.
+
+The bench command starts a throwaway receiver for the run. Its log directory
+is temporary and its healing scripts are no-op stand-ins, so a storm never
+touches the host. The receiver's Server-Timing header says how long each
+request spent in parse / log / pending / notify / script / throttle. The
+report gives acknowledgement latency, payloads/s, alerts/s and a histogram
+per stage.
+
+Usage:
+    python3 alert_storm.py generate --payloads 1000 --alerts-per-payload 50 > storm.jsonl
+    python3 alert_storm.py replay --url http://localhost:5000 --rate 20 --duration 30
+    python3 alert_storm.py bench --rate 20 --duration 30 --instances 200 --group-by alertname
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from loadgen import JSON, LatencyHistogram, LoadRun, RequestSpec
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = ROOT / 'scripts'
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+from thresholds import APP_RULES, DEFAULT_THRESHOLDS, STATIC_RULES, THRESHOLD_RULES  # noqa: E402
+
+GROUP_BY = ('alertname', 'instance', 'component')  # as in monitoring/alertmanager.yml
+MOUNTPOINTS = ('/', '/var', '/var/lib/docker', '/home', '/tmp', '/opt', '/data', '/boot')
+DEVICES = ('eth0', 'eth1', 'ens5', 'docker0') + tuple(f'veth{i:02x}' for i in range(12))
+ACTIONS = ('handle_high_cpu', 'handle_high_memory', 'handle_disk_alert', 'handle_network_issue', 'restart_service')
+FIRING_ENDS_AT = '0001-01-01T00:00:00Z'
+
+
+class AlertKind:
+    __slots__ = ('name', 'severity', 'action', 'component', 'job', 'annotations')
+
+    def __init__(self, name: str, severity: str, action: str, component: str, job: str,
+                 annotations: Dict[str, str]):
+        self.name = name
+        self.severity = severity
+        self.action = action
+        self.component = component
+        self.job = job
+        self.annotations = annotations
+
+
+def alert_catalog() -> List[AlertKind]:
+    """One entry per alert rule in the generated alerts.yml"""
+    kinds = []
+    for name, resource, severity, _, action, _, summary, description, extra in THRESHOLD_RULES:
+        kinds.append(AlertKind(name, severity, action, resource.lower(), 'ec2-node-exporter',
+                               dict({'summary': summary, 'description': description}, **extra)))
+    for rules, job in ((STATIC_RULES, 'ec2-node-exporter'), (APP_RULES, 'patient-web-app')):
+        for name, _, _, severity, component, action, summary, description in rules:
+            kinds.append(AlertKind(name, severity, action, component, job,
+                                   {'summary': summary, 'description': description}))
+    return kinds
+
+
+_LABEL = re.compile(r'\{\{\s*\$labels\.(\w+)\s*\}\}')
+_VALUE = re.compile(r'\{\{\s*\$value[^}]*\}\}')
+
+
+def _render(template: str, labels: Dict[str, str], value: str) -> str:
+    return _VALUE.sub(value, _LABEL.sub(lambda m: labels.get(m.group(1), ''), template))
+
+
+def _value(kind: AlertKind, rng: random.Random) -> str:
+    defaults = DEFAULT_THRESHOLDS.get(kind.component.upper())
+    if defaults is None:
+        return f'{rng.uniform(0.5, 5.0):.3f}'
+    low = defaults[kind.severity]
+    return f'{rng.uniform(low, max(low, defaults["ceiling"])):.2f}'
+
+
+def _fingerprint(labels: Dict[str, str]) -> str:
+    return hashlib.sha1(json.dumps(labels, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class StormGenerator:
+    """Seeded source of Alertmanager v4 webhook payloads"""
+
+    def __init__(self, instances: int = 50, alerts_per_payload: int = 20, critical_ratio: float = 0.3,
+                 resolved_ratio: float = 0.2, group_by=GROUP_BY, seed: int = 1):
+        self.instances = [f'web-server-{i:03d}' for i in range(max(1, instances))]
+        self.alerts_per_payload = max(1, alerts_per_payload)
+        self.critical_ratio = critical_ratio
+        self.resolved_ratio = resolved_ratio
+        self.group_by = tuple(group_by)
+        self.rng = random.Random(seed)
+        kinds = alert_catalog()
+        self.critical = [k for k in kinds if k.severity == 'critical']
+        self.warning = [k for k in kinds if k.severity != 'critical']
+
+    def _pick_kind(self) -> AlertKind:
+        pool = self.critical if self.rng.random() < self.critical_ratio else self.warning
+        return self.rng.choice(pool)
+
+    def _label_sets(self, kind: AlertKind) -> List[Dict[str, str]]:
+        """Distinct label sets for one group: the grouped labels fixed, the rest varied"""
+        dimensions = [('instance', self.instances)]
+        if kind.component == 'disk':
+            dimensions.append(('mountpoint', MOUNTPOINTS))
+        elif kind.component == 'network':
+            dimensions.append(('device', DEVICES))
+        fixed = {}
+        varied = []
+        for label, choices in dimensions:
+            if label in self.group_by:
+                fixed[label] = self.rng.choice(choices)
+            else:
+                varied.append((label, choices))
+
+        base = {'alertname': kind.name, 'severity': kind.severity, 'component': kind.component,
+                'action': kind.action, 'job': kind.job}
+        if not varied:
+            return [dict(base, **fixed)]
+        # Sample combinations without building the whole product
+        space = 1
+        for _, choices in varied:
+            space *= len(choices)
+        picks = self.rng.sample(range(space), min(self.alerts_per_payload, space))
+        sets = []
+        for pick in picks:
+            labels = dict(base, **fixed)
+            for label, choices in varied:
+                pick, index = divmod(pick, len(choices))
+                labels[label] = choices[index]
+            sets.append(labels)
+        return sets
+
+    def payload(self, now: Optional[datetime] = None) -> Dict:
+        now = now or datetime.now(timezone.utc)
+        kind = self._pick_kind()
+        alerts = []
+        for labels in self._label_sets(kind):
+            value = _value(kind, self.rng)
+            resolved = self.rng.random() < self.resolved_ratio
+            started = now - timedelta(seconds=self.rng.uniform(30, 3600))
+            alerts.append({
+                'status': 'resolved' if resolved else 'firing',
+                'labels': labels,
+                'annotations': {k: _render(v, labels, value) for k, v in kind.annotations.items()},
+                'startsAt': _timestamp(started),
+                'endsAt': _timestamp(now) if resolved else FIRING_ENDS_AT,
+                'generatorURL': f'http://prometheus:9090/graph?g0.expr={kind.name}&g0.tab=1',
+                'fingerprint': _fingerprint(labels),
+            })
+
+        group_labels = {k: alerts[0]['labels'][k] for k in self.group_by if k in alerts[0]['labels']}
+        common_labels = {k: v for k, v in alerts[0]['labels'].items()
+                         if all(a['labels'].get(k) == v for a in alerts)}
+        common_annotations = {k: v for k, v in alerts[0]['annotations'].items()
+                              if all(a['annotations'].get(k) == v for a in alerts)}
+        group_key = '{}/{severity=~"^(?:' + kind.severity + ')$"}:{' + ', '.join(
+            f'{k}="{v}"' for k, v in sorted(group_labels.items())) + '}'
+        return {
+            'receiver': 'webhook-receiver',
+            'status': 'firing' if any(a['status'] == 'firing' for a in alerts) else 'resolved',
+            'alerts': alerts,
+            'groupLabels': group_labels,
+            'commonLabels': common_labels,
+            'commonAnnotations': common_annotations,
+            'externalURL': 'http://alertmanager:9093',
+            'version': '4',
+            'groupKey': group_key,
+            'truncatedAlerts': 0,
+        }
+
+    def payloads(self, count: int) -> Iterator[Dict]:
+        for _ in range(count):
+            yield self.payload()
+
+
+class StormRun(LoadRun):
+    """Open-loop replay of prepared payloads; reads the receiver's Server-Timing"""
+
+    def __init__(self, url: str, payloads: List[bytes], alert_counts: List[int], timeout: float = 30.0,
+                 seed: int = 1):
+        self.payloads = itertools.cycle(payloads)
+        self.alert_counts = {id(body): count for body, count in zip(payloads, alert_counts)}
+        self.alerts_sent = 0
+        self.alerts_acked = 0
+        self.stages: Dict[str, LatencyHistogram] = {}
+        spec = RequestSpec('webhook', 'POST', '/webhook', self._next_payload, JSON)
+        super().__init__(url, [spec], timeout=timeout, seed=seed)
+
+    def _next_payload(self, rng: random.Random) -> bytes:
+        body = next(self.payloads)
+        self.alerts_sent += self.alert_counts[id(body)]
+        return body
+
+    def observe(self, spec: RequestSpec, body: bytes, conn) -> None:
+        self.alerts_acked += self.alert_counts[id(body)]
+        for part in conn.headers.get('server-timing', '').split(','):
+            name, _, params = part.strip().partition(';')
+            for param in params.split(';'):
+                key, _, value = param.strip().partition('=')
+                if name and key == 'dur':
+                    self.stages.setdefault(name, LatencyHistogram()).record(float(value) / 1000)
+
+    def result(self, elapsed: float, config: Dict) -> Dict:
+        result = super().result(elapsed, config)
+        acked = result['latency']['count']
+        result.update({
+            'payloads_per_s': round(acked / elapsed, 2) if elapsed else 0.0,
+            'alerts_sent': self.alerts_sent,
+            'alerts_acked': self.alerts_acked,
+            'alerts_per_s': round(self.alerts_acked / elapsed, 2) if elapsed else 0.0,
+            # Time per request in each receiver stage (summed over its alerts)
+            'stages': {name: hist.summary() for name, hist in sorted(self.stages.items())},
+        })
+        return result
+
+
+def prepare(args) -> Tuple[List[bytes], List[int]]:
+    """Encoded payloads (from --input or freshly generated) and their alert counts"""
+    if args.input:
+        with open(args.input) as f:
+            decoded = [json.loads(line) for line in f if line.strip()]
+    else:
+        generator = StormGenerator(args.instances, args.alerts_per_payload, args.critical_ratio,
+                                   args.resolved_ratio, args.group_by.split(','), args.seed)
+        decoded = list(generator.payloads(args.payloads))
+    payloads = [json.dumps(p, separators=(',', ':')).encode() for p in decoded]
+    return payloads, [len(p['alerts']) for p in decoded]
+
+
+async def replay(url: str, payloads: List[bytes], alert_counts: List[int], rate: float, duration: float,
+                 timeout: float = 30.0, max_requests: int = 0, config: Optional[Dict] = None) -> Dict:
+    run = StormRun(url, payloads, alert_counts, timeout=timeout)
+    try:
+        elapsed = await run.open_loop(lambda t: rate, duration, max_requests)
+    finally:
+        run.close()
+    result = run.result(elapsed, config or {})
+    sizes = [len(p) for p in payloads]
+    result['payload_bytes'] = {'mean': round(sum(sizes) / len(sizes)), 'max': max(sizes)}
+    result['alerts_per_payload'] = round(sum(alert_counts) / len(alert_counts), 1)
+    return result
+
+
+# ============================================================
+# Sandboxed receiver
+# ============================================================
+
+STAND_IN_SCRIPT = '#!/bin/bash\n# No-op stand-in written by alert_storm.py\nexit 0\n'
+STAND_IN_THROTTLE = 'import json\nprint(json.dumps({"status": "noop", "name": "alert-storm"}))\n'
+
+
+def sandbox_env(root: Path, remediation: str = '', stand_ins: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Environment for a receiver that logs under root and only runs stand-ins.
+
+    stand_ins maps script file names to replacement contents (default: no-ops).
+    """
+    scripts = root / 'scripts'
+    logs = root / 'logs'
+    scripts.mkdir(parents=True, exist_ok=True)
+    logs.mkdir(parents=True, exist_ok=True)
+    for action in ACTIONS:
+        (scripts / f'{action}.sh').write_text(STAND_IN_SCRIPT)
+    (scripts / 'cgroup_throttle.py').write_text(STAND_IN_THROTTLE)
+    for name, content in (stand_ins or {}).items():
+        (scripts / name).write_text(content)
+
+    env = dict(os.environ)
+    for name in ('SLACK_WEBHOOK_URL', 'AWS_SNS_TOPIC', 'SELF_HEAL_AWS_ENDPOINT'):
+        env.pop(name, None)
+    env.update({
+        'SELF_HEAL_LOG_DIR': str(logs),
+        'SELF_HEAL_SCRIPTS_DIR': str(scripts),
+        'SELF_HEAL_PSI_WATCH': '0',
+        'SELF_HEAL_REMEDIATION': remediation,
+        'EMAIL_RECIPIENT': '',  # no SES either
+    })
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def sandboxed_receiver(remediation: str = '', startup_timeout: float = 20.0,
+                       stand_ins: Optional[Dict[str, str]] = None, extra_env: Optional[Dict[str, str]] = None):
+    """Start webhook_receiver.py on a free port with stand-in scripts; yields its URL"""
+    with tempfile.TemporaryDirectory(prefix='alert-storm-') as tmp:
+        root = Path(tmp)
+        env = sandbox_env(root, remediation, stand_ins)
+        env.update(extra_env or {})
+        port = _free_port()
+        output = open(root / 'receiver.out', 'wb')
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'webhook_receiver:app',
+             '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+            cwd=SCRIPTS, env=env, stdout=output, stderr=subprocess.STDOUT,
+        )
+        url = f'http://127.0.0.1:{port}'
+        try:
+            deadline = time.monotonic() + startup_timeout
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError('receiver exited:\n' + (root / 'receiver.out').read_text()[-2000:])
+                try:
+                    with urllib.request.urlopen(url + '/health', timeout=1):
+                        break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError(f'receiver not healthy after {startup_timeout}s')
+                    time.sleep(0.1)
+            yield url
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+            output.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Alertmanager webhook storm generator')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    shape = argparse.ArgumentParser(add_help=False)
+    shape.add_argument('--payloads', type=int, default=200, help='distinct payloads (replay cycles them)')
+    shape.add_argument('--alerts-per-payload', type=int, default=20, help='upper bound per alert group')
+    shape.add_argument('--instances', type=int, default=50)
+    shape.add_argument('--critical-ratio', type=float, default=0.3)
+    shape.add_argument('--resolved-ratio', type=float, default=0.2)
+    shape.add_argument('--group-by', default=','.join(GROUP_BY),
+                       help='labels each payload is grouped by (fewer labels = larger alerts arrays)')
+    shape.add_argument('--seed', type=int, default=1)
+
+    load = argparse.ArgumentParser(add_help=False)
+    load.add_argument('--input', help='replay payloads from this JSONL file instead of generating')
+    load.add_argument('--rate', type=float, default=10.0, help='payloads/s')
+    load.add_argument('--duration', type=float, default=30.0)
+    load.add_argument('--requests', type=int, default=0, help='stop after this many (0 = no cap)')
+    load.add_argument('--timeout', type=float, default=30.0)
+    load.add_argument('--output', help='write the result JSON here')
+
+    sub.add_parser('generate', parents=[shape], help='Write payloads as JSONL to stdout')
+    replay_parser = sub.add_parser('replay', parents=[shape, load], help='Replay against a running receiver')
+    replay_parser.add_argument('--url', default='http://localhost:5000')
+    bench = sub.add_parser('bench', parents=[shape, load], help='Replay against a sandboxed receiver')
+    bench.add_argument('--remediation', default='',
+                       help='SELF_HEAL_REMEDIATION for the sandbox, e.g. handle_high_cpu=throttle')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        generator = StormGenerator(args.instances, args.alerts_per_payload, args.critical_ratio,
+                                   args.resolved_ratio, args.group_by.split(','), args.seed)
+        for payload in generator.payloads(args.payloads):
+            sys.stdout.write(json.dumps(payload, separators=(',', ':')) + '\n')
+        return 0
+
+    payloads, counts = prepare(args)
+    config = {k: v for k, v in vars(args).items() if k not in ('command', 'output')}
+    if args.command == 'bench':
+        with sandboxed_receiver(args.remediation) as url:
+            result = asyncio.run(replay(url, payloads, counts, args.rate, args.duration,
+                                        args.timeout, args.requests, config))
+    else:
+        result = asyncio.run(replay(args.url, payloads, counts, args.rate, args.duration,
+                                    args.timeout, args.requests, config))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    printable = {k: v for k, v in result.items() if k not in ('histogram_us', 'timeline')}
+    print(json.dumps(printable, indent=2))
+    return 1 if result['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Webhook parse + dispatch micro-benchmark
+
+Times what receive_alert does to a payload before any healing runs. The old
+path: json.loads into dicts, format the whole payload with indent=2 for
+the log line, then nested .get() lookups per alert. The new path:
+alert_models.parse_payload (orjson + pydantic, one AlertRecord per alert),
+a one-line summary, and route_alert. Payloads of 1, 100 and 10,000 alerts
+come from alert_storm.py. Nothing is executed; only the routing decision
+is made.
+
+Usage:
+    python3 bench_alert_models.py --sizes 1,100,10000 --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from alert_storm import StormGenerator
+
+# webhook_receiver logs to SELF_HEAL_LOG_DIR on import
+os.environ.setdefault('SELF_HEAL_LOG_DIR', tempfile.mkdtemp(prefix='bench-alert-models-'))
+
+import alert_models  # noqa: E402
+from webhook_receiver import REMEDIATION_MAPPING, SCRIPT_MAPPING, route_alert  # noqa: E402
+
+
+def legacy_dispatch(body: bytes) -> List[str]:
+    """receive_alert before alert_models, minus the side effects"""
+    payload = json.loads(body)
+    f'Received alert webhook: {json.dumps(payload, indent=2)}'
+    routes = []
+    for alert in payload.get('alerts', []):
+        alert.get('labels', {}).get('alertname', 'Unknown')
+        action = alert.get('labels', {}).get('action', 'monitor')
+        severity = alert.get('labels', {}).get('severity', 'unknown')
+        status = alert.get('status', 'firing')
+        alert.get('labels', {}).get('instance', 'unknown')
+        alert.get('annotations', {}).get('description', '')
+        if status == 'resolved':
+            routes.append('resolved')
+        elif severity == 'warning' and action == 'monitor':
+            routes.append('monitor')
+        elif not SCRIPT_MAPPING.get(action):
+            routes.append('no_script')
+        elif severity == 'critical':
+            routes.append('pending')
+        elif REMEDIATION_MAPPING.get(action) == 'throttle':
+            routes.append('throttle')
+        else:
+            routes.append('script')
+    return routes
+
+
+def typed_dispatch(body: bytes) -> List[str]:
+    parsed = alert_models.parse_payload(body)
+    f'Received alert webhook: {parsed.summary()}'
+    return [route_alert(alert) for alert in parsed.alerts]
+
+
+def _time(fn: Callable[[bytes], List[str]], bodies: List[bytes], repeat: int) -> List[float]:
+    samples = []
+    for i in range(repeat):
+        body = bodies[i % len(bodies)]
+        start = time.perf_counter()
+        fn(body)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench(sizes: List[int], repeat: int, variants: int = 3) -> Dict:
+    result = {
+        'decoder': 'orjson' if alert_models.orjson is not None else 'json',
+        'repeat': repeat,
+        'sizes': {},
+    }
+    for size in sizes:
+        generator = StormGenerator(instances=size, alerts_per_payload=size, group_by=('alertname',), seed=size)
+        bodies = [json.dumps(generator.payload(), separators=(',', ':')).encode() for _ in range(variants)]
+        assert legacy_dispatch(bodies[0]) == typed_dispatch(bodies[0])
+        # Fewer rounds for the big payloads, at least 3
+        rounds = max(3, repeat if size < 1000 else repeat // 4)
+        entry = {'payload_bytes': len(bodies[0])}
+        for name, fn in (('legacy', legacy_dispatch), ('typed', typed_dispatch)):
+            fn(bodies[0])  # warm up
+            samples = _time(fn, bodies, rounds)
+            median = statistics.median(samples)
+            entry[name] = {
+                'median_ms': round(median * 1000, 3),
+                'min_ms': round(min(samples) * 1000, 3),
+                'per_alert_us': round(median / size * 1e6, 2),
+            }
+        entry['speedup'] = round(entry['legacy']['median_ms'] / entry['typed']['median_ms'], 2)
+        result['sizes'][str(size)] = entry
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Webhook parse + dispatch micro-benchmark')
+    parser.add_argument('--sizes', default='1,100,10000', help='alerts per payload, comma-separated')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='write the result JSON here')
+    args = parser.parse_args(argv)
+
+    result = bench([int(s) for s in args.sizes.split(',')], args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
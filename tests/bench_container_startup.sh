@@ -0,0 +1,89 @@
+#!/bin/bash
+# ------------------------------------------------------
+# Container Startup Benchmark (start / restart -> HTTP 200)
+# ------------------------------------------------------
+# Measures how long the Patient app container takes from `docker run` and
+# from `docker restart` (what restart_service.sh docker:<name> does) until
+# it first answers 200. Optionally builds the image first.
+#
+# Usage: bench_container_startup.sh [image] [runs] [--build]
+
+# Resolve paths relative to this script
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+BASE_DIR="$(cd "$SCRIPT_DIR/.." && pwd)"
+LOG_DIR="$BASE_DIR/logs"
+mkdir -p "$LOG_DIR"
+
+IMAGE="${1:-patient-web:latest}"
+RUNS=${2:-5}
+BUILD="${3:-}"
+PORT=${BENCH_PORT:-18000}
+TIMEOUT=${BENCH_TIMEOUT:-60}
+NAME="startup-bench-$$"
+LOG="$LOG_DIR/self_heal.log"
+
+if ! command -v docker >/dev/null 2>&1; then
+  echo "[$(date)] ERROR: docker CLI not found" | tee -a "$LOG"
+  exit 2
+fi
+
+cleanup() { docker rm -f "$NAME" >/dev/null 2>&1 || true; }
+trap cleanup EXIT
+
+if [ "$BUILD" = "--build" ]; then
+  echo "[$(date)] Building $IMAGE" | tee -a "$LOG"
+  BUILD_START=$(date +%s%N)
+  docker build -q -t "$IMAGE" "$BASE_DIR/Patient-Web-interface/project" >/dev/null || exit 2
+  echo "[$(date)] Build took $(( ($(date +%s%N) - BUILD_START) / 1000000 )) ms" | tee -a "$LOG"
+fi
+
+# Wait for the first 200; prints elapsed ms since $1, or fails on timeout
+wait_for_200() {
+  local start=$1
+  local deadline=$(( start + TIMEOUT * 1000000000 ))
+  while [ "$(date +%s%N)" -lt "$deadline" ]; do
+    if [ "$(curl -s -o /dev/null -w '%{http_code}' "http://127.0.0.1:$PORT/")" = "200" ]; then
+      echo $(( ($(date +%s%N) - start) / 1000000 ))
+      return 0
+    fi
+    sleep 0.05
+  done
+  return 1
+}
+
+# min / median / max of the arguments
+summary() {
+  printf '%s\n' "$@" | sort -n | awk '{ v[NR] = $1 } END { printf "min %d ms, median %d ms, max %d ms", v[1], v[int((NR + 1) / 2)], v[NR] }'
+}
+
+SIZE=$(docker image inspect --format '{{.Size}}' "$IMAGE" 2>/dev/null) || {
+  echo "[$(date)] ERROR: image $IMAGE not found (pass --build)" | tee -a "$LOG"
+  exit 2
+}
+echo "[$(date)] Image $IMAGE: $(( SIZE / 1024 / 1024 )) MB, $RUNS runs" | tee -a "$LOG"
+
+START_TIMES=()
+RESTART_TIMES=()
+for i in $(seq 1 "$RUNS"); do
+  cleanup
+  T0=$(date +%s%N)
+  docker run -d --name "$NAME" -p "$PORT:8000" "$IMAGE" >/dev/null || exit 2
+  if ! MS=$(wait_for_200 "$T0"); then
+    echo "[$(date)] ❌ Run #$i: no HTTP 200 within ${TIMEOUT}s" | tee -a "$LOG"
+    docker logs --tail 20 "$NAME" >> "$LOG" 2>&1
+    exit 1
+  fi
+  START_TIMES+=("$MS")
+
+  T0=$(date +%s%N)
+  docker restart "$NAME" >/dev/null || exit 2
+  if ! RMS=$(wait_for_200 "$T0"); then
+    echo "[$(date)] ❌ Run #$i: no HTTP 200 within ${TIMEOUT}s after restart" | tee -a "$LOG"
+    exit 1
+  fi
+  RESTART_TIMES+=("$RMS")
+  echo "[$(date)] Run #$i -> start ${MS} ms, restart ${RMS} ms" | tee -a "$LOG"
+done
+
+echo "[$(date)] Start to first 200:   $(summary "${START_TIMES[@]}")" | tee -a "$LOG"
+echo "[$(date)] Restart to first 200: $(summary "${RESTART_TIMES[@]}")" | tee -a "$LOG"
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Patient app benchmark
+
+Drives /signup (GET form + POST with its CSRF token) and /search with N
+concurrent clients, each holding one keep-alive connection, and reports
+throughput and latency percentiles per endpoint. Run it once against the
+development server and once against gunicorn to compare serving profiles.
+
+Usage:
+    python3 bench_patient_app.py --url http://localhost:8000 --clients 50 --duration 20
+    python3 bench_patient_app.py --url http://localhost:8000 --output after.json --compare before.json
+"""
+import argparse
+import http.client
+import json
+import random
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Dict, List, Optional
+
+CSRF_RE = re.compile(rb'name="csrf_token" type="hidden" value="([^"]+)"')
+
+
+class Client:
+    """One simulated user: a connection plus its session cookie"""
+
+    def __init__(self, base_url: str, timeout: float):
+        parts = urllib.parse.urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.https = parts.scheme == 'https'
+        self.timeout = timeout
+        self.cookie: Optional[str] = None
+        self.conn = None
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        self.conn = cls(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method: str, path: str, form: Optional[Dict] = None):
+        headers = {'Connection': 'keep-alive'}
+        body = None
+        if form is not None:
+            body = urllib.parse.urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        for attempt in range(2):
+            if self.conn is None:
+                self._connect()
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                resp = self.conn.getresponse()
+                data = resp.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Server closed an idle keep-alive connection
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+        cookie = resp.getheader('Set-Cookie')
+        if cookie:
+            self.cookie = cookie.split(';', 1)[0]
+        if resp.getheader('Connection', '').lower() == 'close':
+            self.conn.close()
+            self.conn = None
+        return resp.status, data
+
+
+def signup(client: Client, nid: int):
+    status, page = client.request('GET', '/signup')
+    match = CSRF_RE.search(page)
+    if status != 200 or not match:
+        return status
+    status, _ = client.request('POST', '/signup', {
+        'csrf_token': match.group(1).decode(),
+        'username': f'bench{nid}',
+        'email': f'bench{nid}@example.com',
+        'password': 'benchpass',
+        'Re_password': 'benchpass',
+        'Fname': 'Bench',
+        'Lname': 'User',
+        'NID': str(nid),
+        'BD': '1990-01-01',
+        'submit': 'submit',
+    })
+    return status
+
+
+def search(client: Client, nid: int):
+    status, _ = client.request('POST', '/search', {'NID': str(nid)})
+    return status
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(url: str, clients: int, duration: float, search_ratio: float, timeout: float) -> Dict:
+    samples = {'signup': [], 'search': []}
+    errors = {'signup': 0, 'search': 0}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+    # Spread NIDs per run so repeated runs don't collide on the primary key
+    base_nid = int(time.time() * 1000) % 10**9 * 100
+    signed_up: List[int] = []
+
+    def worker(index: int):
+        client = Client(url, timeout)
+        rng = random.Random(index)
+        seq = 0
+        while time.monotonic() < stop_at:
+            if signed_up and rng.random() < search_ratio:
+                name, func, nid = 'search', search, rng.choice(signed_up)
+            else:
+                seq += 1
+                name, func, nid = 'signup', signup, base_nid + seq * clients + index
+            start = time.perf_counter()
+            try:
+                ok = func(client, nid) == 200
+            except (OSError, http.client.HTTPException):
+                ok = False
+                client.conn = None
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    samples[name].append(elapsed)
+                    if name == 'signup':
+                        signed_up.append(nid)
+                else:
+                    errors[name] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(clients)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - started
+
+    result = {'url': url, 'clients': clients, 'duration': round(wall, 2), 'endpoints': {}}
+    for name, values in samples.items():
+        values.sort()
+        result['endpoints'][name] = {
+            'requests': len(values),
+            'errors': errors[name],
+            'throughput': round(len(values) / wall, 1),
+            'p50_ms': round(percentile(values, 50) * 1000, 1),
+            'p95_ms': round(percentile(values, 95) * 1000, 1),
+            'p99_ms': round(percentile(values, 99) * 1000, 1),
+            'max_ms': round(values[-1] * 1000, 1) if values else 0.0,
+        }
+    return result
+
+
+def compare(before: Dict, after: Dict) -> Dict:
+    diff = {}
+    for name, new in after['endpoints'].items():
+        old = before['endpoints'].get(name)
+        if not old:
+            continue
+        diff[name] = {
+            'throughput': f"{old['throughput']} -> {new['throughput']} req/s",
+            'p99_ms': f"{old['p99_ms']} -> {new['p99_ms']} ms",
+            'errors': f"{old['errors']} -> {new['errors']}",
+        }
+    return diff
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Patient app load benchmark')
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--search-ratio', type=float, default=0.8,
+                        help='share of requests that are searches')
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--output', help='write the result JSON here')
+    parser.add_argument('--compare', help='earlier result JSON to compare against')
+    args = parser.parse_args(argv)
+
+    result = run(args.url.rstrip('/'), args.clients, args.duration, args.search_ratio, args.timeout)
+    if args.compare:
+        with open(args.compare) as f:
+            result['compare'] = compare(json.load(f), result)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+    return 0 if all(e['requests'] for e in result['endpoints'].values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# Make the self-healing modules importable (scripts/ and scripts/dashboard/)
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT / "scripts", ROOT / "scripts" / "dashboard"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Load generator
+
+asyncio HTTP/1.1 load generator for the Patient app, the dashboard and the
+webhook receiver. Two ways to apply load:
+
+  closed  N virtual users send back-to-back requests (throughput-bound)
+  open    requests arrive at a fixed rate whether or not earlier ones
+          finished. Latency is measured from the scheduled send time, so a
+          stalled server can't hide its queueing (coordinated omission).
+
+Profiles shape the load over the run: constant, ramp (start -> peak), or
+spike (base load with a burst in the middle). Latencies go into a log-linear
+(HDR-style) histogram, and results are written as JSON. The compare command
+diffs two result files and exits 1 on a regression.
+
+Usage:
+    python3 loadgen.py run --target patient --url http://localhost:8000 --mode open --rate 200 --duration 30
+    python3 loadgen.py run --target dashboard --url http://localhost:5001 --mode closed --concurrency 50
+    python3 loadgen.py run --target webhook --url http://localhost:5000 --profile spike --rate 20 --spike-rate 400
+    python3 loadgen.py compare baseline.json current.json --threshold 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import ssl
+import sys
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class LatencyHistogram:
+    """Log-linear histogram of microsecond values (HdrHistogram layout).
+
+    Values below 2**SUB_BITS are exact; above that every power of two is
+    split into 2**(SUB_BITS-1) buckets, so any recorded value is reported
+    within 1/64 (~1.6%) of its true value at any magnitude, in constant memory.
+    """
+
+    SUB_BITS = 7
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum = 0
+        self.min: Optional[int] = None
+        self.max = 0
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        if value < (1 << cls.SUB_BITS):
+            return value
+        shift = value.bit_length() - cls.SUB_BITS
+        return (shift << (cls.SUB_BITS - 1)) + (value >> shift)
+
+    @classmethod
+    def _highest(cls, index: int) -> int:
+        """Largest value that lands in bucket index"""
+        if index < (1 << cls.SUB_BITS):
+            return index
+        shift = (index >> (cls.SUB_BITS - 1)) - 1
+        mantissa = index - (shift << (cls.SUB_BITS - 1))
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentile(self, pct: float) -> int:
+        """Value (us) at the given percentile, 0 when empty"""
+        if not self.total:
+            return 0
+        rank = max(1, int(round(pct / 100 * self.total + 0.4999)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._highest(index), self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        ms = lambda us: round(us / 1000, 3)
+        return {
+            'count': self.total,
+            'min_ms': ms(self.min or 0),
+            'mean_ms': ms(self.sum / self.total) if self.total else 0.0,
+            'p50_ms': ms(self.percentile(50)),
+            'p90_ms': ms(self.percentile(90)),
+            'p99_ms': ms(self.percentile(99)),
+            'p999_ms': ms(self.percentile(99.9)),
+            'max_ms': ms(self.max),
+        }
+
+    def to_dict(self) -> Dict[str, int]:
+        """{bucket upper bound in us: count}, enough to re-merge runs later"""
+        return {str(self._highest(i)): c for i, c in sorted(self.counts.items())}
+
+
+class HTTPConnection:
+    """Minimal keep-alive HTTP/1.1 client connection (Content-Length or chunked)"""
+
+    def __init__(self, host: str, port: int, use_ssl: bool):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if use_ssl else None
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.headers: Dict[str, str] = {}  # of the last response, names lower-cased
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> int:
+        fresh = self.writer is None
+        if fresh:
+            await self._connect()
+        head = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', f'Content-Length: {len(body)}']
+        head.extend(f'{k}: {v}' for k, v in headers.items())
+        self.writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+        try:
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+            if not status_line:
+                raise ConnectionResetError('connection closed')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if fresh:
+                raise
+            # The server dropped an idle keep-alive connection; retry once
+            return await self.request(method, path, headers, body)
+        return await self._read_response(status_line)
+
+    async def _read_response(self, status_line: bytes) -> int:
+        status = int(status_line.split(None, 2)[1])
+        length = None
+        chunked = False
+        close = False
+        self.headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name = name.strip().lower()
+            self.headers[name] = value.strip()
+            value = value.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'transfer-encoding' and 'chunked' in value:
+                chunked = True
+            elif name == 'connection' and value == 'close':
+                close = True
+        if status in (204, 304) or status < 200:
+            pass
+        elif chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif length is not None:
+            await self.reader.readexactly(length)
+        else:
+            await self.reader.read()
+            close = True
+        if close:
+            self.close()
+        return status
+
+
+class RequestSpec:
+    __slots__ = ('name', 'method', 'path', 'headers', 'body', 'weight')
+
+    def __init__(self, name: str, method: str, path: str, body: Callable[[random.Random], bytes] = None,
+                 headers: Optional[Dict[str, str]] = None, weight: int = 1):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body or (lambda rng: b'')
+        self.headers = headers or {}
+        self.weight = weight
+
+
+FORM = {'Content-Type': 'application/x-www-form-urlencoded'}
+JSON = {'Content-Type': 'application/json'}
+
+
+def _search_body(rng: random.Random) -> bytes:
+    return urllib.parse.urlencode({'NID': rng.randint(1, 100000)}).encode()
+
+
+def _webhook_body(rng: random.Random) -> bytes:
+    # warning + monitor alerts are only logged, so load never triggers healing
+    alert = {
+        'status': 'firing',
+        'labels': {
+            'alertname': 'LoadTestAlert',
+            'severity': 'warning',
+            'action': 'monitor',
+            'instance': f'loadgen-{rng.randint(1, 50)}:9100',
+        },
+        'annotations': {'description': 'synthetic alert from loadgen.py'},
+        'startsAt': datetime.now(timezone.utc).isoformat(),
+    }
+    return json.dumps({'version': '4', 'status': 'firing', 'alerts': [alert]}).encode()
+
+
+TARGETS: Dict[str, List[RequestSpec]] = {
+    'patient': [
+        RequestSpec('home', 'GET', '/', weight=1),
+        RequestSpec('search', 'POST', '/search', _search_body, FORM, weight=4),
+    ],
+    'dashboard': [RequestSpec('status', 'GET', '/api/status')],
+    'webhook': [RequestSpec('webhook', 'POST', '/webhook', _webhook_body, JSON)],
+}
+
+
+def shape(profile: str, peak: float, duration: float, start: float = 0.0,
+          spike_at: float = 0.5, spike_len: float = 0.1, spike_peak: float = 0.0) -> Callable[[float], float]:
+    """Load level (rate or users) as a function of seconds since start"""
+    if profile == 'ramp':
+        return lambda t: start + (peak - start) * min(t / duration, 1.0)
+    if profile == 'spike':
+        begin = duration * spike_at
+        end = begin + duration * spike_len
+        return lambda t: spike_peak if begin <= t < end else peak
+    return lambda t: peak
+
+
+class LoadRun:
+    def __init__(self, url: str, specs: List[RequestSpec], timeout: float = 10.0, seed: int = 1):
+        parts = urllib.parse.urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = parts.scheme == 'https'
+        self.prefix = parts.path.rstrip('/')
+        self.specs = specs
+        self.weights = [s.weight for s in specs]
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.idle: List[HTTPConnection] = []
+        self.histograms: Dict[str, LatencyHistogram] = {s.name: LatencyHistogram() for s in specs}
+        self.seconds: Dict[int, Tuple[int, int, LatencyHistogram]] = {}
+        self.statuses: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started = 0.0
+
+    def _pick(self) -> RequestSpec:
+        return self.rng.choices(self.specs, self.weights)[0] if len(self.specs) > 1 else self.specs[0]
+
+    async def fire(self, scheduled: float, conn: Optional[HTTPConnection] = None):
+        """One request; latency counts from scheduled (open loop) or send time"""
+        spec = self._pick()
+        pooled = conn is None
+        if pooled:
+            conn = self.idle.pop() if self.idle else HTTPConnection(self.host, self.port, self.ssl)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        error = None
+        status = 0
+        body = spec.body(self.rng)
+        try:
+            status = await asyncio.wait_for(
+                conn.request(spec.method, self.prefix + spec.path, spec.headers, body),
+                self.timeout,
+            )
+            if status >= 500:
+                error = f'http_{status}'
+            else:
+                self.observe(spec, body, conn)
+        except asyncio.TimeoutError:
+            error = 'timeout'
+            conn.close()
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            error = type(e).__name__
+            conn.close()
+        finally:
+            self.in_flight -= 1
+        done = time.perf_counter()
+        self._record(spec.name, scheduled, done, status, error)
+        if pooled and conn.writer is not None:
+            self.idle.append(conn)
+
+    def observe(self, spec: RequestSpec, body: bytes, conn: HTTPConnection):
+        """Hook for subclasses: called after each non-5xx response (conn.headers is set)"""
+
+    def _record(self, name: str, scheduled: float, done: float, status: int, error: Optional[str]):
+        second = int(scheduled - self.started)
+        count, errors, hist = self.seconds.get(second) or (0, 0, LatencyHistogram())
+        if status:
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+            self.seconds[second] = (count + 1, errors + 1, hist)
+            return
+        self.histograms[name].record(done - scheduled)
+        hist.record(done - scheduled)
+        self.seconds[second] = (count + 1, errors, hist)
+
+    async def open_loop(self, rate_at: Callable[[float], float], duration: float, max_requests: int = 0):
+        tasks = set()
+        sent = 0
+        self.started = next_at = time.perf_counter()
+        end = self.started + duration
+        while next_at < end and (not max_requests or sent < max_requests):
+            now = time.perf_counter()
+            if next_at > now:
+                await asyncio.sleep(next_at - now)
+            task = asyncio.ensure_future(self.fire(next_at))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            sent += 1
+            rate = max(rate_at(next_at - self.started), 0.1)
+            next_at += 1.0 / rate
+        if tasks:
+            await asyncio.wait(tasks, timeout=self.timeout + 1)
+        return time.perf_counter() - self.started
+
+    async def closed_loop(self, users_at: Callable[[float], float], peak: int, duration: float, max_requests: int = 0):
+        self.started = time.perf_counter()
+        end = self.started + duration
+        sent = 0
+
+        async def user(index: int):
+            nonlocal sent
+            conn = HTTPConnection(self.host, self.port, self.ssl)
+            while time.perf_counter() < end and (not max_requests or sent < max_requests):
+                # Users above the current profile level wait their turn
+                if index >= users_at(time.perf_counter() - self.started):
+                    await asyncio.sleep(0.05)
+                    continue
+                sent += 1
+                await self.fire(time.perf_counter(), conn)
+            conn.close()
+
+        await asyncio.gather(*(user(i) for i in range(peak)))
+        return time.perf_counter() - self.started
+
+    def close(self):
+        for conn in self.idle:
+            conn.close()
+        self.idle.clear()
+
+    def result(self, elapsed: float, config: Dict) -> Dict:
+        overall = LatencyHistogram()
+        for hist in self.histograms.values():
+            overall.merge(hist)
+        requests = overall.total + sum(self.errors.values())
+        return {
+            'config': config,
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'duration_s': round(elapsed, 3),
+            'requests': requests,
+            'errors': dict(self.errors),
+            'error_rate': round(sum(self.errors.values()) / requests, 4) if requests else 0.0,
+            'throughput_rps': round(overall.total / elapsed, 2) if elapsed else 0.0,
+            'max_in_flight': self.max_in_flight,
+            'status_codes': dict(sorted(self.statuses.items())),
+            'latency': overall.summary(),
+            'endpoints': {name: h.summary() for name, h in self.histograms.items()},
+            'timeline': [
+                {'second': s, 'requests': c, 'errors': e,
+                 'p50_ms': h.summary()['p50_ms'], 'p99_ms': h.summary()['p99_ms']}
+                for s, (c, e, h) in sorted(self.seconds.items())
+            ],
+            'histogram_us': overall.to_dict(),
+        }
+
+
+async def run_load(args) -> Dict:
+    if args.target == 'custom':
+        headers = dict(h.split(':', 1) for h in args.header)
+        headers = {k.strip(): v.strip() for k, v in headers.items()}
+        body = (args.body or '').encode()
+        specs = [RequestSpec('custom', args.method, args.path, lambda rng: body, headers)]
+    else:
+        specs = TARGETS[args.target]
+    run = LoadRun(args.url, specs, timeout=args.timeout, seed=args.seed)
+    try:
+        if args.mode == 'open':
+            rate_at = shape(args.profile, args.rate, args.duration, args.start_rate,
+                            args.spike_at, args.spike_length, args.spike_rate or args.rate * 5)
+            elapsed = await run.open_loop(rate_at, args.duration, args.requests)
+        else:
+            peak = args.spike_concurrency if args.profile == 'spike' and args.spike_concurrency else args.concurrency
+            users_at = shape(args.profile, args.concurrency, args.duration, args.start_concurrency,
+                             args.spike_at, args.spike_length, peak)
+            elapsed = await run.closed_loop(users_at, max(peak, args.concurrency), args.duration, args.requests)
+    finally:
+        run.close()
+    config = {k: v for k, v in vars(args).items() if k not in ('command', 'output', 'baseline', 'header', 'body')}
+    return run.result(elapsed, config)
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 10.0) -> Dict:
+    """Relative change of the headline numbers; regressions are beyond threshold %"""
+    checks = [
+        ('throughput_rps', baseline['throughput_rps'], current['throughput_rps'], False),
+        ('error_rate', baseline['error_rate'], current['error_rate'], True),
+    ]
+    for key in ('p50_ms', 'p90_ms', 'p99_ms', 'p999_ms'):
+        checks.append((f'latency.{key}', baseline['latency'][key], current['latency'][key], True))
+
+    report = {'threshold_pct': threshold, 'metrics': {}, 'regressions': []}
+    for name, old, new, lower_is_better in checks:
+        change = ((new - old) / old * 100) if old else (0.0 if new == old else float('inf'))
+        worse = change > threshold if lower_is_better else change < -threshold
+        # Ignore noise on tiny absolute error rates
+        if name == 'error_rate' and new - old < 0.001:
+            worse = False
+        report['metrics'][name] = {'baseline': old, 'current': new, 'change_pct': round(change, 1)}
+        if worse:
+            report['regressions'].append(name)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='HTTP load generator')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='Apply load and record latencies')
+    run.add_argument('--target', choices=sorted(TARGETS) + ['custom'], default='patient')
+    run.add_argument('--url', default='http://localhost:8000')
+    run.add_argument('--method', default='GET', help='custom target only')
+    run.add_argument('--path', default='/', help='custom target only')
+    run.add_argument('--body', help='custom target only')
+    run.add_argument('--header', action='append', default=[], help='"Name: value", custom target only')
+    run.add_argument('--mode', choices=['open', 'closed'], default='open')
+    run.add_argument('--profile', choices=['constant', 'ramp', 'spike'], default='constant')
+    run.add_argument('--duration', type=float, default=30.0)
+    run.add_argument('--requests', type=int, default=0, help='stop after this many (0 = no cap)')
+    run.add_argument('--rate', type=float, default=50.0, help='open loop: requests/s (peak for ramp)')
+    run.add_argument('--start-rate', type=float, default=1.0, help='ramp: initial rate')
+    run.add_argument('--spike-rate', type=float, default=0.0, help='spike: burst rate (default 5x rate)')
+    run.add_argument('--concurrency', type=int, default=10, help='closed loop: users (peak for ramp)')
+    run.add_argument('--start-concurrency', type=int, default=1, help='ramp: initial users')
+    run.add_argument('--spike-concurrency', type=int, default=0, help='spike: users during the burst')
+    run.add_argument('--spike-at', type=float, default=0.5, help='spike: start, as a fraction of the run')
+    run.add_argument('--spike-length', type=float, default=0.1, help='spike: length, as a fraction of the run')
+    run.add_argument('--timeout', type=float, default=10.0)
+    run.add_argument('--seed', type=int, default=1)
+    run.add_argument('--slo-p99-ms', type=float, default=0.0, help='exit 1 if p99 exceeds this')
+    run.add_argument('--output', help='write the result JSON here')
+    run.add_argument('--baseline', help='compare against this earlier result')
+    run.add_argument('--threshold', type=float, default=10.0, help='regression threshold in %%')
+
+    cmp_parser = sub.add_parser('compare', help='Diff two result files')
+    cmp_parser.add_argument('baseline')
+    cmp_parser.add_argument('current')
+    cmp_parser.add_argument('--threshold', type=float, default=10.0)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        report = compare(baseline, current, args.threshold)
+        print(json.dumps(report, indent=2))
+        return 1 if report['regressions'] else 0
+
+    result = asyncio.run(run_load(args))
+    failed = False
+    if args.baseline:
+        with open(args.baseline) as f:
+            result['comparison'] = compare(json.load(f), result, args.threshold)
+        failed = bool(result['comparison']['regressions'])
+    if args.slo_p99_ms and result['latency']['p99_ms'] > args.slo_p99_ms:
+        result['slo_breached'] = True
+        failed = True
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    printable = {k: v for k, v in result.items() if k not in ('histogram_us', 'timeline')}
+    print(json.dumps(printable, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
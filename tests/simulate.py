@@ -0,0 +1,740 @@
+#!/usr/bin/env python3
+"""
+Healing handler simulation
+
+Runs the real handle_*.sh scripts against a simulated host instead of the
+machine they are on. Each scenario file describes the host (CPU, memory,
+disk, a process table and a fixture filesystem) and how it changes over
+time. The handler runs in a sandbox where:
+
+  - top, ps, free, df, kill, sleep, sync, tee, find, yum, apt-get and docker
+    are shims on PATH that read and change the simulated host. sudo just
+    runs the rest of the command
+  - disk_reclaim.py is the real DiskReclaimer, pointed at the fixture tree;
+    cgroup_throttle.py caps the process in the simulated process table
+  - sleep advances a simulated clock and applies the timeline events due,
+    so a handler that waits 10s between kills finishes in milliseconds
+  - every action (kill, throttle, cache drop, deleted file, notification)
+    is recorded with its simulated time instead of being performed
+  - a synthetic /proc (stat, meminfo, mounts and, when the scenario gives
+    them, pressure files) lets collectors such as ProcSampler and psi run
+    against the same host
+
+Disk sizes are at fixture scale: the simulated disk is a few MB, and the
+files the handler can free are real files of that size under the sandbox.
+The run passes if the recorded actions, final state and recommendation
+severity match the scenario's expectations. run exits 1 on any failure.
+
+Usage:
+    python3 simulate.py run scenarios/*.json
+    python3 simulate.py run scenarios/cpu_runaway.json --repeat 5 --output sim.json
+    python3 simulate.py run scenarios/disk_reclaim.json --keep /tmp/sim-disk
+"""
+import argparse
+import fcntl
+import importlib.util
+import json
+import math
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+HERE = Path(__file__).resolve().parent
+SCRIPTS_DIR = HERE.parent / 'scripts'
+SCENARIOS_DIR = HERE / 'scenarios'
+
+HZ = 100                     # USER_HZ, for /proc/stat ticks
+FIRST_PID = 1000
+LINE = b'2026-10-19 10:00:00,000 - app - INFO - request served in 12ms\n'
+
+# Shims put on PATH; each one runs `simulate.py shim <name>`
+SHIM_COMMANDS = ('top', 'ps', 'free', 'df', 'kill', 'sleep', 'sync', 'tee', 'find', 'yum', 'apt-get', 'docker')
+SUDO_SHIM = '#!/bin/sh\n# sudo for the simulated host: run the command as is\nexec "$@"\n'
+
+# What `<package manager> clean` and `docker system prune` free in the fixture tree
+PACKAGE_CACHES = {'yum': ('/var/cache/yum', '/var/cache/dnf'), 'apt-get': ('/var/cache/apt/archives',)}
+DOCKER_DATA = ('/var/lib/docker',)
+
+STAND_IN_MODULE = """#!/usr/bin/env python3
+# Stand-in written by simulate.py: acts on the simulated host only
+import sys
+sys.path.insert(0, {harness!r})
+import simulate
+sys.exit(simulate.shim({name!r}, sys.argv[1:]))
+"""
+
+
+# ============================================================
+# Simulated host
+# ============================================================
+
+class SimHost:
+    """The state of the simulated machine, as stored in <sandbox>/state.json"""
+
+    def __init__(self, root: Path, state: Dict):
+        self.root = Path(root)
+        self.state = state
+
+    # ------------------------------------------------------------
+    # Paths
+    # ------------------------------------------------------------
+
+    @property
+    def fs(self) -> Path:
+        return self.root / 'fs'
+
+    @property
+    def proc(self) -> Path:
+        return self.root / 'proc'
+
+    def fs_path(self, path: str) -> Path:
+        """Host path -> fixture path"""
+        return self.fs / path.lstrip('/')
+
+    def host_path(self, path: str) -> str:
+        """Fixture path -> host path"""
+        try:
+            return '/' + str(Path(path).relative_to(self.fs))
+        except ValueError:
+            return str(path)
+
+    # ------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------
+
+    @property
+    def now(self) -> float:
+        return self.state['epoch'] + self.state['clock']
+
+    @property
+    def processes(self) -> Dict[str, Dict]:
+        return self.state['processes']
+
+    @staticmethod
+    def process_cpu(proc: Dict) -> float:
+        cap = proc.get('cpu_max')
+        return float(proc.get('cpu', 0.0) if cap is None else min(proc.get('cpu', 0.0), cap))
+
+    def cpu_percent(self) -> float:
+        busy = self.state['system']['cpu'].get('base', 0.0) + sum(map(self.process_cpu, self.processes.values()))
+        return round(min(100.0, busy), 1)
+
+    def memory(self) -> Dict[str, int]:
+        """KB figures; page cache counts against available until it is dropped"""
+        mem = self.state['system']['memory']
+        total = int(mem['total_mb'] * 1024)
+        cache = int(mem.get('cache_mb', 0) * 1024)
+        rss = sum(int(p.get('rss_mb', 0) * 1024) for p in self.processes.values())
+        available = max(0, total - int(mem.get('used_mb', 0) * 1024) - cache - rss)
+        return {'total': total, 'used': total - available - cache, 'free': available,
+                'cache': cache, 'available': available}
+
+    def memory_percent(self) -> float:
+        mem = self.memory()
+        return round(100.0 * (mem['total'] - mem['available']) / mem['total'], 1)
+
+    def disk(self) -> Dict[str, int]:
+        """Bytes: everything outside the fixture tree, plus the fixture files as allocated"""
+        disk = self.state['system']['disk']
+        size = int(disk['size_mb'] * 1024 * 1024)
+        used = int(disk.get('used_mb', 0) * 1024 * 1024)
+        for dirpath, _, filenames in os.walk(self.fs):
+            for name in filenames:
+                try:
+                    used += os.lstat(os.path.join(dirpath, name)).st_blocks * 512
+                except OSError:
+                    continue
+        used = min(used, size)
+        return {'size': size, 'used': used, 'available': size - used}
+
+    def disk_percent(self) -> float:
+        disk = self.disk()
+        return round(100.0 * disk['used'] / disk['size'], 1) if disk['size'] else 0.0
+
+    def snapshot(self) -> Dict[str, float]:
+        return {'cpu': self.cpu_percent(), 'memory': self.memory_percent(), 'disk': self.disk_percent()}
+
+    # ------------------------------------------------------------
+    # Changes
+    # ------------------------------------------------------------
+
+    def record(self, action: str, **details) -> None:
+        entry = {'t': round(self.state['clock'], 3), 'action': action}
+        entry.update(details)
+        with open(self.root / 'actions.jsonl', 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    def spawn(self, spec: Dict) -> int:
+        pid = int(spec.get('pid') or self.state['next_pid'])
+        self.state['next_pid'] = max(self.state['next_pid'], pid + 1)
+        proc = {k: v for k, v in spec.items() if k != 'pid'}
+        proc.setdefault('comm', 'unknown')
+        self.processes[str(pid)] = proc
+        return pid
+
+    def kill(self, pid: int, signal: str) -> bool:
+        proc = self.processes.pop(str(pid), None)
+        if proc is None:
+            return False
+        self.record('kill', pid=pid, comm=proc['comm'], signal=signal)
+        if proc.get('respawn'):
+            # A supervisor brings it straight back under a new pid
+            self.spawn({k: v for k, v in proc.items() if k != 'cpu_max'})
+        return True
+
+    def write_file(self, spec: Dict) -> Path:
+        path = self.fs_path(spec['path'])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        size = int(spec.get('size_kb', 4) * 1024)
+        with open(path, 'wb') as f:
+            f.write(LINE * (size // len(LINE)) + LINE[:size % len(LINE)])
+        mtime = self.now - spec.get('age_days', 0) * 86400
+        atime = self.now - spec.get('atime_days', spec.get('age_days', 0)) * 86400
+        os.utime(path, (atime, mtime))
+        return path
+
+    def remove_tree(self, host_paths, source: str) -> int:
+        freed = 0
+        for host_path in host_paths:
+            root = self.fs_path(host_path)
+            for dirpath, _, filenames in os.walk(root):
+                for name in sorted(filenames):
+                    path = os.path.join(dirpath, name)
+                    freed += os.lstat(path).st_blocks * 512
+                    os.unlink(path)
+                    self.record('delete', path=self.host_path(path), source=source)
+        return freed
+
+    def apply(self, event: Dict) -> None:
+        """One timeline event: spawn, exit, process updates, system changes, new files"""
+        for spec in _as_list(event.get('spawn')):
+            self.spawn(spec)
+        for pid in _as_list(event.get('exit')):
+            self.processes.pop(str(pid), None)
+        for update in _as_list(event.get('process')):
+            proc = self.processes.get(str(update['pid']))
+            if proc is not None:
+                proc.update({k: v for k, v in update.items() if k != 'pid'})
+        for section in ('cpu', 'memory', 'disk', 'pressure'):
+            if section in event:
+                self.state['system'].setdefault(section, {}).update(event[section])
+        for spec in _as_list(event.get('files')):
+            self.write_file(spec)
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward, applying due events and accruing CPU ticks"""
+        target = self.state['clock'] + max(0.0, seconds)
+        timeline = self.state['timeline']
+        while True:
+            due = timeline[0]['at'] if timeline and timeline[0]['at'] <= target else target
+            self._tick(due - self.state['clock'])
+            self.state['clock'] = due
+            if not timeline or timeline[0]['at'] > target:
+                break
+            self.apply(timeline.pop(0))
+
+    def _tick(self, seconds: float) -> None:
+        busy = self.cpu_percent() / 100
+        self.state['ticks'][0] += int(round(seconds * HZ * busy))
+        self.state['ticks'][1] += int(round(seconds * HZ * (1 - busy)))
+
+    # ------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------
+
+    def save(self) -> None:
+        tmp = self.root / 'state.json.tmp'
+        tmp.write_text(json.dumps(self.state))
+        os.replace(tmp, self.root / 'state.json')
+        self.write_proc()
+
+    def write_proc(self) -> None:
+        """Synthetic /proc for collectors pointed at <sandbox>/proc"""
+        busy, idle = self.state['ticks']
+        (self.proc / 'stat').write_text(f'cpu  {busy} 0 0 {idle} 0 0 0 0 0 0\ncpu0 {busy} 0 0 {idle} 0 0 0 0 0 0\n')
+        mem = self.memory()
+        (self.proc / 'meminfo').write_text(
+            f"MemTotal:       {mem['total']} kB\nMemFree:        {mem['free']} kB\n"
+            f"MemAvailable:   {mem['available']} kB\nCached:         {mem['cache']} kB\n")
+        (self.proc / 'mounts').write_text('/dev/sim / ext4 rw,relatime 0 0\n')
+        pressure = self.state['system'].get('pressure')
+        if pressure:
+            (self.proc / 'pressure').mkdir(exist_ok=True)
+            for resource, kinds in pressure.items():
+                lines = [f'{kind} avg10={v:.2f} avg60={v:.2f} avg300={v:.2f} total=0' for kind, v in kinds.items()]
+                (self.proc / 'pressure' / resource).write_text('\n'.join(lines) + '\n')
+
+
+def _as_list(value) -> List:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+@contextmanager
+def locked_host(root: Path):
+    """The simulated host, locked against the other shims; saved on exit"""
+    root = Path(root)
+    with open(root / 'state.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        host = SimHost(root, json.loads((root / 'state.json').read_text()))
+        host.state['calls'] = host.state.get('calls', 0) + 1
+        yield host
+        host.save()
+
+
+# ============================================================
+# Shims
+# ============================================================
+
+def _real_command(name: str) -> Optional[str]:
+    """The real binary, skipping the shim directory"""
+    sim_bin = os.path.join(os.environ['SIM_ROOT'], 'bin')
+    path = os.pathsep.join(p for p in os.environ.get('PATH', '').split(os.pathsep) if p != sim_bin)
+    return shutil.which(name, path=path)
+
+
+def _real_module(name: str):
+    """A module from the repo's scripts/ (the sandbox has stand-ins under the same names)"""
+    spec = importlib.util.spec_from_file_location(f'real_{name}', SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _top(host: SimHost, args: List[str]) -> int:
+    cpu = host.cpu_percent()
+    mem = host.memory()
+    print(f"top - {time.strftime('%H:%M:%S', time.localtime(host.now))} up 1 day,  1 user,  load average: 0.00")
+    print(f'Tasks: {len(host.processes)} total,   1 running')
+    print(f'%Cpu(s): {cpu:4.1f} us,  0.0 sy,  0.0 ni, {100 - cpu:4.1f} id,  0.0 wa,  0.0 hi,  0.0 si,  0.0 st')
+    print(f"KiB Mem : {mem['total']} total, {mem['free']} free, {mem['used']} used, {mem['cache']} buff/cache")
+    print()
+    print('    PID COMMAND          %CPU')
+    for pid, proc in sorted(host.processes.items(), key=lambda item: -host.process_cpu(item[1])):
+        print(f'{pid:>7} {proc["comm"]:<16} {host.process_cpu(proc):5.1f}')
+    return 0
+
+
+PS_COLUMNS = {
+    'pid': ('PID', lambda host, pid, proc: int(pid)),
+    'comm': ('COMMAND', lambda host, pid, proc: proc['comm']),
+    '%cpu': ('%CPU', lambda host, pid, proc: round(host.process_cpu(proc), 1)),
+    '%mem': ('%MEM', lambda host, pid, proc: round(100.0 * proc.get('rss_mb', 0) / host.state['system']['memory']['total_mb'], 1)),
+    'rss': ('RSS', lambda host, pid, proc: int(proc.get('rss_mb', 0) * 1024)),
+}
+
+
+def _ps(host: SimHost, args: List[str]) -> int:
+    """ps -eo <columns> [--sort=[-+]<column>]"""
+    columns, sort = ['pid', 'comm'], None
+    for i, arg in enumerate(args):
+        if arg in ('-o', '-eo') and i + 1 < len(args):
+            columns = args[i + 1].split(',')
+        elif arg.startswith('--sort='):
+            sort = arg.split('=', 1)[1]
+    unknown = [c for c in columns if c not in PS_COLUMNS]
+    if unknown:
+        print(f'error: unknown user-defined format specifier "{unknown[0]}"', file=sys.stderr)
+        return 1
+    rows = [[PS_COLUMNS[c][1](host, pid, proc) for c in columns] for pid, proc in host.processes.items()]
+    if sort:
+        key = sort.lstrip('+-')
+        if key in columns:
+            index = columns.index(key)
+            rows.sort(key=lambda row: row[index], reverse=sort.startswith('-'))
+    print(' '.join(f'{PS_COLUMNS[c][0]:>7}' for c in columns))
+    for row in rows:
+        print(' '.join(f'{value:>7}' for value in row))
+    return 0
+
+
+def _free(host: SimHost, args: List[str]) -> int:
+    mem = host.memory()
+    print('               total        used        free      shared  buff/cache   available')
+    print(f"Mem:    {mem['total']:>12} {mem['used']:>11} {mem['free']:>11} {0:>11} {mem['cache']:>11} "
+          f"{mem['available']:>11}")
+    print(f"Swap:   {0:>12} {0:>11} {0:>11}")
+    return 0
+
+
+def _df(host: SimHost, args: List[str]) -> int:
+    disk = host.disk()
+    used, available = disk['used'] // 1024, disk['available'] // 1024
+    percent = math.ceil(100.0 * used / (used + available)) if used + available else 0
+    print('Filesystem     1K-blocks    Used Available Use% Mounted on')
+    print(f"/dev/sim       {disk['size'] // 1024:>9} {used:>7} {available:>9} {percent:>3}% /")
+    return 0
+
+
+def _kill(host: SimHost, args: List[str]) -> int:
+    signal, status = 'TERM', 0
+    for arg in args:
+        if arg.startswith('-'):
+            signal = arg.lstrip('-').upper().replace('SIG', '') or signal
+            signal = {'9': 'KILL', '15': 'TERM'}.get(signal, signal)
+        elif not host.kill(int(arg), signal):
+            print(f'kill: ({arg}) - No such process', file=sys.stderr)
+            status = 1
+    return status
+
+
+def _sleep(host: SimHost, args: List[str]) -> int:
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    seconds = 0.0
+    for arg in args:
+        unit = arg[-1] if arg[-1] in units else 's'
+        seconds += float(arg.rstrip('smhd')) * units[unit]
+    host.advance(seconds)
+    return 0
+
+
+def _sync(host: SimHost, args: List[str]) -> int:
+    host.record('sync')
+    return 0
+
+
+def _tee(host: SimHost, args: List[str]) -> int:
+    data = sys.stdin.read()
+    sys.stdout.write(data)
+    for target in (a for a in args if not a.startswith('-')):
+        if target == '/proc/sys/vm/drop_caches':
+            mode = data.strip()
+            if mode in ('1', '3'):
+                freed = host.state['system']['memory'].get('cache_mb', 0)
+                host.state['system']['memory']['cache_mb'] = 0
+                host.record('drop_caches', mode=int(mode), freed_mb=freed)
+            continue
+        with open(target, 'a' if '-a' in args else 'w') as f:
+            f.write(data)
+    return 0
+
+
+def _find(host: SimHost, args: List[str]) -> int:
+    """Real find over the fixture tree; deletions are printed so they can be recorded"""
+    split = next((i for i, a in enumerate(args) if a.startswith('-') or a in ('(', '!')), len(args))
+    roots = [str(host.fs_path(a)) if a.startswith('/') else a for a in args[:split]]
+    expression = []
+    for arg in args[split:]:
+        expression += ['-print', '-delete'] if arg == '-delete' else [arg]
+    find = _real_command('find')
+    result = subprocess.run([find] + roots + expression, capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if '-delete' in args:
+            host.record('delete', path=host.host_path(line), source='find')
+        else:
+            print(host.host_path(line))
+    sys.stderr.write(result.stderr.replace(str(host.fs), ''))
+    return result.returncode
+
+
+def _package_manager(name: str):
+    def clean(host: SimHost, args: List[str]) -> int:
+        if host.state['system'].get('package_manager', 'apt-get') != name:
+            print(f'sudo: {name}: command not found', file=sys.stderr)
+            return 1
+        if 'clean' in args:
+            freed = host.remove_tree(PACKAGE_CACHES[name], name)
+            host.record('package_clean', manager=name, freed_bytes=freed)
+            print(f'{freed // 1024} kB of cached packages removed')
+        return 0
+    return clean
+
+
+def _docker(host: SimHost, args: List[str]) -> int:
+    if args[:2] == ['system', 'prune']:
+        freed = host.remove_tree(DOCKER_DATA, 'docker')
+        host.record('docker_prune', freed_bytes=freed)
+        print(f'Total reclaimed space: {freed // 1024}kB')
+    return 0
+
+
+def _notify(host: SimHost, args: List[str]) -> int:
+    resource, severity, value = (args + ['', '', ''])[:3]
+    host.record('notify', resource=resource, severity=severity, value=value)
+    return 0
+
+
+def _cgroup_throttle(host: SimHost, args: List[str]) -> int:
+    """cgroup_throttle.py throttle PID... [--cpu-max "QUOTA PERIOD"]: caps the simulated processes"""
+    DEFAULT_CPU_MAX = _real_module('cgroup_throttle').DEFAULT_CPU_MAX
+
+    parser = argparse.ArgumentParser(prog='cgroup_throttle.py')
+    sub = parser.add_subparsers(dest='command', required=True)
+    throttle = sub.add_parser('throttle')
+    throttle.add_argument('pids', nargs='+', type=int)
+    throttle.add_argument('--cpu-max', default=DEFAULT_CPU_MAX)
+    throttle.add_argument('--memory-high', default='')
+    throttle.add_argument('--reason', default='manual')
+    args = parser.parse_args(args)
+
+    missing = [pid for pid in args.pids if str(pid) not in host.processes]
+    if missing:
+        print(json.dumps({'status': 'error', 'error': f'No such process: {missing[0]}'}))
+        return 1
+    quota, _, period = args.cpu_max.partition(' ')
+    cap = None if quota == 'max' else 100.0 * int(quota) / int(period or 100000)
+    for pid in args.pids:
+        host.processes[str(pid)]['cpu_max'] = cap
+        host.record('throttle', pid=pid, comm=host.processes[str(pid)]['comm'], cpu_max=cap, reason=args.reason)
+    print(json.dumps({'status': 'throttled', 'pids': args.pids, 'cpu_max': args.cpu_max}))
+    return 0
+
+
+def _disk_reclaim(host: SimHost, args: List[str]) -> int:
+    """disk_reclaim.py reclaim: the real reclaimer over the fixture tree, sized by the simulated disk"""
+    disk_reclaim = _real_module('disk_reclaim')
+
+    class FixtureReclaimer(disk_reclaim.DiskReclaimer):
+        def usage(self) -> Dict:
+            disk = host.disk()
+            return {'used_bytes': disk['used'], 'free_bytes': disk['available'],
+                    'percent': round(100.0 * disk['used'] / disk['size'], 1), 'usable_bytes': disk['size']}
+
+    parser = argparse.ArgumentParser(prog='disk_reclaim.py')
+    parser.add_argument('command', choices=('reclaim',))
+    parser.add_argument('--mount', default='/')
+    parser.add_argument('--target-percent', type=float)
+    parser.add_argument('--free-bytes', type=int)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args(args)
+
+    def remap(roots):
+        return tuple(str(host.fs_path(r)) for r in roots)
+
+    host.fs.mkdir(exist_ok=True)
+    reclaimer = FixtureReclaimer(str(host.fs), remap(disk_reclaim.LOG_ROOTS), remap(disk_reclaim.TMP_ROOTS),
+                                 remap(disk_reclaim.CACHE_ROOTS), str(host.proc), now=host.now)
+    if args.free_bytes is not None:
+        goal = args.free_bytes
+    elif args.target_percent is not None:
+        goal = reclaimer.goal_for_percent(args.target_percent)
+    else:
+        goal = sum(c.estimate for c in reclaimer.plan())
+    report = reclaimer.reclaim(goal, workers=args.workers)
+    report['mount'] = args.mount
+    for step in report['steps']:
+        step['path'] = host.host_path(step['path'])
+        host.record(f"reclaim_{step['action']}", path=step['path'], bytes=step['bytes'])
+    print(json.dumps(report, indent=2))
+    return 0 if report['goal_met'] else 1
+
+
+SHIMS = {
+    'top': _top, 'ps': _ps, 'free': _free, 'df': _df, 'kill': _kill, 'sleep': _sleep, 'sync': _sync,
+    'tee': _tee, 'find': _find, 'yum': _package_manager('yum'), 'apt-get': _package_manager('apt-get'),
+    'docker': _docker, 'notify': _notify, 'cgroup_throttle': _cgroup_throttle, 'disk_reclaim': _disk_reclaim,
+}
+
+
+def shim(name: str, argv: List[str]) -> int:
+    """Entry point for the PATH shims and script stand-ins"""
+    with locked_host(Path(os.environ['SIM_ROOT'])) as host:
+        return SHIMS[name](host, list(argv))
+
+
+# ============================================================
+# Sandbox and runs
+# ============================================================
+
+def load_scenario(path) -> Dict:
+    scenario = json.loads(Path(path).read_text())
+    scenario.setdefault('name', Path(path).stem)
+    return scenario
+
+
+def build_sandbox(root: Path, scenario: Dict) -> SimHost:
+    """bin/ shims, scripts/ (real handler + stand-ins), logs/, fs/, proc/ and the initial state"""
+    root = Path(root)
+    for name in ('bin', 'scripts', 'logs', 'fs', 'proc'):
+        (root / name).mkdir(parents=True, exist_ok=True)
+
+    for command in SHIM_COMMANDS:
+        shim_file = root / 'bin' / command
+        shim_file.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{__file__}" shim {command} "$@"\n')
+        shim_file.chmod(0o755)
+    (root / 'bin' / 'sudo').write_text(SUDO_SHIM)
+    (root / 'bin' / 'sudo').chmod(0o755)
+
+    scripts = root / 'scripts'
+    for name in (scenario['handler'], 'thresholds.py'):
+        shutil.copy2(SCRIPTS_DIR / name, scripts / name)
+    for name, module in (('disk_reclaim.py', 'disk_reclaim'), ('cgroup_throttle.py', 'cgroup_throttle')):
+        (scripts / name).write_text(STAND_IN_MODULE.format(harness=str(HERE), name=module))
+    notifier = scripts / 'notification_sender.sh'
+    notifier.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{__file__}" shim notify "$@"\n')
+    notifier.chmod(0o755)
+
+    system = json.loads(json.dumps(scenario.get('system', {})))
+    system.setdefault('cpu', {}).setdefault('base', 0.0)
+    system.setdefault('memory', {}).setdefault('total_mb', 1024)
+    system.setdefault('disk', {}).setdefault('size_mb', 64)
+    state = {
+        'epoch': time.time(), 'clock': 0.0, 'ticks': [0, 0], 'next_pid': FIRST_PID, 'calls': 0,
+        'system': {k: v for k, v in system.items() if k not in ('processes', 'files')},
+        'processes': {}, 'timeline': sorted(scenario.get('timeline', []), key=lambda e: e['at']),
+    }
+    host = SimHost(root, state)
+    host.spawn({'pid': 1, 'comm': 'systemd', 'cpu': 0.0, 'rss_mb': 10})
+    for spec in system.get('processes', []):
+        host.spawn(spec)
+    for spec in system.get('files', []):
+        host.write_file(spec)
+    host.advance(0)
+    host.save()
+    return host
+
+
+def _matches(action: Dict, pattern: Dict) -> bool:
+    return all(action.get(k) == v for k, v in pattern.items())
+
+
+def check(result: Dict, expect: Dict) -> List[str]:
+    """Failures of one run against the scenario's expectations"""
+    failures = []
+    if result['exit_code'] != expect.get('exit_code', 0):
+        failures.append(f"handler exited {result['exit_code']}")
+
+    # Expected actions must appear in this order (other actions may come between)
+    actions = iter(result['actions'])
+    for pattern in expect.get('actions', []):
+        if not any(_matches(action, pattern) for action in actions):
+            failures.append(f'missing action {pattern}')
+            break
+    for pattern in expect.get('forbid', []):
+        hits = [a for a in result['actions'] if _matches(a, pattern)]
+        if hits:
+            failures.append(f'forbidden action {hits[0]}')
+    for pattern, count in expect.get('counts', {}).items():
+        seen = sum(1 for a in result['actions'] if a['action'] == pattern)
+        if seen != count:
+            failures.append(f'{seen} {pattern} action(s), expected {count}')
+
+    if 'severity' in expect and result['severity'] != expect['severity']:
+        failures.append(f"severity {result['severity']}, expected {expect['severity']}")
+    for metric, bounds in expect.get('final', {}).items():
+        value = result['final'][metric]
+        if value > bounds.get('max', math.inf) or value < bounds.get('min', -math.inf):
+            failures.append(f'final {metric} {value}% outside {bounds}')
+    if result['sim_seconds'] > expect.get('max_sim_seconds', math.inf):
+        failures.append(f"took {result['sim_seconds']}s simulated, limit {expect['max_sim_seconds']}s")
+    return failures
+
+
+def _recommendations(logs: Path) -> List[Dict]:
+    path = logs / 'recommendations.json'
+    if not path.exists():
+        return []
+    try:
+        return json.loads(path.read_text() + ']')
+    except ValueError:
+        return []
+
+
+def run_scenario(scenario, keep: Optional[str] = None, timeout: float = 60.0) -> Dict:
+    """Run one scenario (a dict or a file path) in a fresh sandbox"""
+    if not isinstance(scenario, dict):
+        scenario = load_scenario(scenario)
+    root = Path(keep) if keep else Path(tempfile.mkdtemp(prefix='simulate-'))
+    try:
+        if keep and root.exists():
+            shutil.rmtree(root)
+        build_sandbox(root, scenario)
+        env = dict(os.environ)
+        for name in ('SLACK_WEBHOOK_URL', 'AWS_SNS_TOPIC', 'EMAIL_RECIPIENT', 'REMEDIATION_MODE'):
+            env.pop(name, None)
+        env.update(scenario.get('env', {}))
+        env.update({'SIM_ROOT': str(root), 'PATH': f"{root / 'bin'}{os.pathsep}{env.get('PATH', '')}"})
+
+        started = time.monotonic()
+        # capture_output also waits for the handler's background notifications
+        proc = subprocess.run(['bash', str(root / 'scripts' / scenario['handler'])], env=env,
+                              capture_output=True, text=True, timeout=timeout)
+        wall_ms = (time.monotonic() - started) * 1000
+
+        with locked_host(root) as host:
+            final, sim_seconds, calls = host.snapshot(), host.state['clock'], host.state['calls'] - 1
+        actions_file = root / 'actions.jsonl'
+        actions = [json.loads(line) for line in actions_file.read_text().splitlines()] if actions_file.exists() else []
+        recommendations = _recommendations(root / 'logs')
+        result = {
+            'scenario': scenario['name'],
+            'handler': scenario['handler'],
+            'exit_code': proc.returncode,
+            'actions': actions,
+            'severity': recommendations[-1]['severity'] if recommendations else None,
+            'recommendations': len(recommendations),
+            'final': final,
+            'sim_seconds': round(sim_seconds, 3),
+            'wall_ms': round(wall_ms, 1),
+            'shim_calls': calls,
+        }
+        if proc.stderr:
+            result['stderr'] = proc.stderr[-2000:]
+        result['failures'] = check(result, scenario.get('expect', {}))
+        result['passed'] = not result['failures']
+        return result
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def _action_key(actions: List[Dict]) -> List[tuple]:
+    return [(a['t'], a['action'], a.get('pid'), a.get('comm'), a.get('path')) for a in actions]
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ['shim']:
+        return shim(argv[1], argv[2:])
+
+    parser = argparse.ArgumentParser(description='Run healing handlers against simulated hosts')
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help='Run scenario files')
+    run.add_argument('scenarios', nargs='*', help=f'scenario files (default: {SCENARIOS_DIR}/*.json)')
+    run.add_argument('--repeat', type=int, default=1, help='runs per scenario; all must record the same actions')
+    run.add_argument('--keep', help='sandbox directory to keep (single scenario only)')
+    run.add_argument('--output', help='write the results JSON here')
+    args = parser.parse_args(argv)
+
+    paths = args.scenarios or sorted(str(p) for p in SCENARIOS_DIR.glob('*.json'))
+    if args.keep and (len(paths) > 1 or args.repeat > 1):
+        parser.error('--keep needs a single scenario and --repeat 1')
+
+    results = []
+    for path in paths:
+        scenario = load_scenario(path)
+        runs = [run_scenario(scenario, keep=args.keep) for _ in range(args.repeat)]
+        result = dict(runs[0])
+        failures = set().union(*(r['failures'] for r in runs))
+        if any(_action_key(r['actions']) != _action_key(result['actions']) for r in runs[1:]):
+            failures.add('actions differ between repeats')
+        result['failures'] = sorted(failures)
+        result['passed'] = not failures
+        result['wall_ms'] = round(statistics.median(r['wall_ms'] for r in runs), 1)
+        result['runs'] = len(runs)
+        results.append(result)
+        status = 'PASS' if result['passed'] else 'FAIL'
+        print(f"{status} {result['scenario']:<28} {len(result['actions']):>3} actions  "
+              f"{result['sim_seconds']:>6.1f}s simulated  {result['wall_ms']:>7.1f}ms wall", file=sys.stderr)
+        for failure in result['failures']:
+            print(f'     {failure}', file=sys.stderr)
+
+    summary = {'scenarios': len(results), 'failed': sum(not r['passed'] for r in results), 'results': results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2))
+    else:
+        print(json.dumps(summary, indent=2))
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
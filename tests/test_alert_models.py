@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+import alert_models
+
+
+def _alert(name, **labels):
+    return {
+        "status": "firing",
+        "labels": dict({"alertname": name, "severity": "critical", "action": "handle_high_memory",
+                        "instance": "web-server"}, **labels),
+        "annotations": {"description": "Memory usage is 91%", "value": "91.2"},
+        "startsAt": "2026-10-19T10:00:00Z",
+        "fingerprint": "abc123",
+    }
+
+
+def test_parse_builds_records_from_bytes():
+    body = json.dumps({
+        "version": "4", "status": "firing", "receiver": "webhook-receiver",
+        "groupKey": '{}:{alertname="HighMemoryUsage"}', "alerts": [_alert("HighMemoryUsage")],
+        "futureField": {"ignored": True},
+    }).encode()
+    parsed = alert_models.parse_payload(body)
+
+    assert parsed.errors == [] and parsed.total == 1
+    record = parsed.alerts[0]
+    assert (record.alertname, record.severity, record.action, record.instance) == \
+        ("HighMemoryUsage", "critical", "handle_high_memory", "web-server")
+    assert record.value == "91.2" and record.description == "Memory usage is 91%"
+    assert not hasattr(record, "__dict__")
+    assert "1 alert(s)" in parsed.summary() and "invalid=0" in parsed.summary()
+
+
+def test_bad_alerts_are_reported_without_failing_the_batch():
+    bad_status = dict(_alert("HighCPUUsage"), status="exploded")
+    bad_label = _alert("HighDiskUsage", instance=42)
+    body = json.dumps({"alerts": [_alert("HighMemoryUsage"), bad_status, "not an alert", bad_label]})
+    parsed = alert_models.parse_payload(body.encode())
+
+    assert [a.alertname for a in parsed.alerts] == ["HighMemoryUsage"]
+    assert [(e["index"], e["alertname"]) for e in parsed.errors] == \
+        [(1, "HighCPUUsage"), (2, None), (3, "HighDiskUsage")]
+    assert parsed.errors[0]["errors"][0]["loc"] == "status"
+    assert parsed.errors[2]["errors"][0]["loc"] == "labels.instance"
+    assert parsed.total == 4
+
+
+def test_defaults_match_the_receiver():
+    parsed = alert_models.parse_payload(b'{"alerts": [{"labels": {}}]}')
+    record = parsed.alerts[0]
+    assert (record.status, record.alertname, record.severity, record.action, record.instance) == \
+        ("firing", "Unknown", "unknown", "monitor", "unknown")
+
+
+@pytest.mark.parametrize("body", [b"{not json", b"[1, 2]", b'{"alerts": {"a": 1}}'])
+def test_bad_envelopes_raise_payload_error(body):
+    with pytest.raises(alert_models.PayloadError):
+        alert_models.parse_payload(body)
@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+import pytest
+
+import alert_storm
+
+
+def test_payloads_follow_the_rules_and_grouping():
+    generator = alert_storm.StormGenerator(instances=30, alerts_per_payload=25, critical_ratio=0.5,
+                                           resolved_ratio=0.3, group_by=('alertname',), seed=7)
+    kinds = {k.name: k for k in alert_storm.alert_catalog()}
+    payloads = list(generator.payloads(40))
+
+    sizes = set()
+    for payload in payloads:
+        assert payload['version'] == '4'
+        assert payload['truncatedAlerts'] == 0
+        alerts = payload['alerts']
+        sizes.add(len(alerts))
+        names = {a['labels']['alertname'] for a in alerts}
+        assert len(names) == 1 and payload['groupLabels'] == {'alertname': names.pop()}
+        assert len({a['fingerprint'] for a in alerts}) == len(alerts)
+        for alert in alerts:
+            kind = kinds[alert['labels']['alertname']]
+            assert alert['labels']['severity'] == kind.severity
+            assert alert['labels']['action'] == kind.action
+            assert '{{' not in alert['annotations']['summary']
+            assert (alert['endsAt'] == alert_storm.FIRING_ENDS_AT) == (alert['status'] == 'firing')
+        firing = any(a['status'] == 'firing' for a in alerts)
+        assert payload['status'] == ('firing' if firing else 'resolved')
+        assert payload['commonLabels']['alertname'] == alerts[0]['labels']['alertname']
+
+    # Not grouped by instance: large arrays spanning many hosts
+    assert max(sizes) == 25
+    severities = {a['labels']['severity'] for p in payloads for a in p['alerts']}
+    assert severities == {'critical', 'warning'}
+
+    # Grouped like alertmanager.yml: one host per payload
+    generator = alert_storm.StormGenerator(instances=30, alerts_per_payload=25, seed=7)
+    for payload in generator.payloads(20):
+        assert len({a['labels']['instance'] for a in payload['alerts']}) == 1
+
+
+def test_bench_reports_receiver_stages():
+    pytest.importorskip('uvicorn')
+    # Warnings only: logged, or a stand-in script for HighNetworkDrops / HighLoadAverage
+    generator = alert_storm.StormGenerator(instances=5, alerts_per_payload=10, critical_ratio=0.0,
+                                           group_by=('alertname',), seed=3)
+    decoded = list(generator.payloads(10))
+    payloads = [json.dumps(p).encode() for p in decoded]
+    counts = [len(p['alerts']) for p in decoded]
+
+    with alert_storm.sandboxed_receiver() as url:
+        result = asyncio.run(alert_storm.replay(url, payloads, counts, rate=50, duration=5, max_requests=10))
+
+    assert result['errors'] == {}
+    assert result['status_codes'] == {'200': 10}
+    assert result['alerts_acked'] == result['alerts_sent'] == sum(counts)
+    assert {'parse', 'log', 'total'} <= set(result['stages'])
+    assert result['stages']['total']['count'] == 10
+    assert result['alerts_per_payload'] == sum(counts) / 10
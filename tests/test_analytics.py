@@ -0,0 +1,99 @@
+import json
+from datetime import datetime, timedelta
+
+from analytics import IncidentAnalytics, parse_window
+
+T0 = datetime(2026, 10, 19, 10, 0, 0)
+
+
+def _log_line(at, alertname, instance, status, severity="critical"):
+    stamp = at.strftime("%Y-%m-%d %H:%M:%S") + ",123"
+    return (f"{stamp} - webhook_receiver - INFO - Processing alert: {alertname} on {instance} "
+            f"(severity: {severity}, status: {status}, action: handle_high_cpu)\n")
+
+
+def _minutes(n):
+    return T0 + timedelta(minutes=n)
+
+
+def test_incremental_ingest_builds_mttr_and_frequency(tmp_path):
+    log = tmp_path / "webhook.log"
+    log.write_text(
+        "2026-10-19 09:59:00,000 - webhook_receiver - INFO - Received alert webhook: 1 alert(s)\n"
+        + _log_line(_minutes(0), "HighCPUUsage", "web-1", "firing")
+        + _log_line(_minutes(5), "HighCPUUsage", "web-1", "firing")  # Alertmanager repeat
+        + _log_line(_minutes(10), "HighCPUUsage", "web-1", "resolved")
+        + _log_line(_minutes(70), "HighCPUUsage", "web-1", "firing")
+    )
+    analytics = IncidentAnalytics(tmp_path)
+    assert analytics.refresh()["webhook.log"] == 4
+    start, end = T0.timestamp(), _minutes(180).timestamp()
+
+    mttr = analytics.mttr(start, end)
+    assert mttr["by_alert"]["HighCPUUsage"]["p50"] == 600.0
+    assert mttr["open"] == {"HighCPUUsage": 1}
+
+    # Only the appended part is read; a half-written line waits for the next refresh
+    with open(log, "a") as f:
+        f.write(_log_line(_minutes(100), "HighCPUUsage", "web-1", "resolved"))
+        f.write(_log_line(_minutes(101), "HighDiskUsage", "web-2", "firing")[:40])
+    assert analytics.refresh()["webhook.log"] == 1
+    mttr = analytics.mttr(start, end)
+    assert mttr["overall"]["count"] == 2 and mttr["overall"]["max"] == 1800.0
+    assert mttr["open"] == {}
+
+    freq = analytics.alert_frequency(start, end, bucket_hours=1)
+    assert freq["total"] == 3 and freq["bucket_seconds"] == 3600
+    assert freq["hosts"]["web-1"]["counts"] == [2, 1, 0]
+    assert freq["flapping"] == [{"host": "web-1", "alert": "HighCPUUsage", "incidents": 2}]
+
+    # Rotation: a new, shorter file is read from the start
+    log.write_text(_log_line(_minutes(120), "HighDiskUsage", "web-2", "firing"))
+    assert analytics.refresh()["webhook.log"] == 1
+    assert analytics.alert_frequency(start, end)["hosts"]["web-2"]["total"] == 1
+
+
+def test_action_effectiveness_across_sources(tmp_path):
+    recs = tmp_path / "recommendations.json"
+    with open(recs, "w") as f:
+        f.write('[\n{"timestamp": "%s", "resource": "MEMORY", "severity": "WARNING"}' % _minutes(1).isoformat())
+        f.write('\n,\n{"timestamp": "%s", "resource": "MEMORY", "severity": "CRITICAL"}' % _minutes(2).isoformat())
+        f.write('\n,\n{"timestamp": "%s", "resource": "MEM' % _minutes(3).isoformat())  # still being written
+    history = [
+        {"timestamp": _minutes(4).isoformat(), "type": "CPU_ACTION", "details": {"status": "success", "action": "scale"}},
+        {"timestamp": _minutes(3).isoformat(), "type": "CPU_RESOLVED", "details": {"action": "scale"}},
+        {"timestamp": _minutes(2).isoformat(), "type": "MANUAL_DISK_CLEANUP", "details": {"errors": ["busy"]}},
+    ]
+    (tmp_path / "actions_history.json").write_text(json.dumps(history))
+    (tmp_path / "approvals.log").write_text(json.dumps(
+        {"timestamp": _minutes(5).isoformat(), "action": "add_swap", "resource": "MEMORY"}) + "\n")
+
+    analytics = IncidentAnalytics(tmp_path)
+    counts = analytics.refresh()
+    assert counts["recommendations.json"] == 2 and counts["actions_history.json"] == 2
+    rows = {(r["source"], r["action"], r["resource"]): r
+            for r in analytics.effectiveness(T0.timestamp(), _minutes(60).timestamp())["actions"]}
+    auto = rows[("auto", "auto_heal", "MEMORY")]
+    assert (auto["attempts"], auto["succeeded"], auto["success_rate"]) == (2, 1, 0.5)
+    assert rows[("dashboard", "scale", "CPU")]["success_rate"] == 1.0
+    assert rows[("manual", "cleanup", "DISK")]["failed"] == 1
+    assert rows[("recommendation", "add_swap", "MEMORY")]["success_rate"] is None
+
+    # The rest of the recommendation arrives; history is rewritten with one new entry on top
+    with open(recs, "a") as f:
+        f.write('ORY", "severity": "INFO"}')
+    history.insert(0, {"timestamp": _minutes(6).isoformat(), "type": "ALERT_DISMISSED",
+                       "details": {"alert": {"alert_type": "disk"}}})
+    (tmp_path / "actions_history.json").write_text(json.dumps(history))
+    counts = analytics.refresh()
+    assert counts["recommendations.json"] == 1 and counts["actions_history.json"] == 1
+    assert len(analytics.actions) == 7
+
+
+def test_out_of_order_rows_and_windows():
+    analytics = IncidentAnalytics()
+    for ts in (30.0, 10.0, 20.0):
+        analytics._action(ts, "auto", "auto_heal", "CPU", 1)
+    ts, = analytics.actions.select(15, 31, "ts")
+    assert list(ts) == [20.0, 30.0]
+    assert parse_window("36h") == 36 * 3600 and parse_window("2w") == 14 * 86400
@@ -0,0 +1,191 @@
+import json
+import shutil
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+import capacity_executor as cx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class FakeRunner:
+    """Records commands; fails those containing a marker, answers losetup -j"""
+
+    def __init__(self, fail_on=None, losetup=""):
+        self.commands = []
+        self.fail_on = fail_on
+        self.losetup = losetup
+
+    def __call__(self, command):
+        command = [c for c in command if c not in ("sudo", "-n")]
+        self.commands.append(command)
+        if self.fail_on and any(self.fail_on in part for part in command):
+            raise cx.CapacityError(f"{command[0]} failed")
+        return self.losetup if command[:2] == ["losetup", "-j"] else ""
+
+
+def test_jobs_run_in_background_dedupe_and_persist(tmp_path):
+    state = tmp_path / "jobs.json"
+    fake = cx.FakeBackend()
+    executor = cx.CapacityExecutor({"fake": fake}, {"add_swap": "fake", "expand_disk": "fake"}, state)
+    assert executor.supports("add_swap") and not executor.supports("upgrade_instance")
+
+    first = executor.submit("add_swap", {"size_mb": "512"}, requested_by="MEMORY")
+    assert executor.submit("add_swap").id == first.id  # double click while queued
+    failing = executor.submit("expand_disk", {"fail": "volume busy"})
+    executor.start()
+    try:
+        assert executor.wait(first.id, 5).status == "succeeded"
+        assert executor.wait(failing.id, 5).status == "failed"
+    finally:
+        executor.stop()
+
+    assert fake.calls == [("add_swap", {"size_mb": "512"}), ("expand_disk", {"fail": "volume busy"})]
+    assert first.steps[0]["message"] == "Simulated add_swap"
+    assert failing.error == "volume busy"
+    assert executor.submit("add_swap").id != first.id  # finished jobs don't dedupe
+
+    # Reloaded state keeps history; a job that never ran is not re-run blindly
+    reloaded = cx.CapacityExecutor({"fake": fake}, {"add_swap": "fake"}, state)
+    statuses = {job["id"]: job["status"] for job in reloaded.jobs()}
+    assert statuses[first.id] == "succeeded" and statuses[failing.id] == "failed"
+    assert list(statuses.values()).count("interrupted") == 1
+    with pytest.raises(cx.CapacityError):
+        reloaded.submit("upgrade_instance")
+
+
+def test_terraform_backend_edits_instance_and_applies(tmp_path):
+    shutil.copy(ROOT / "Terraform" / "main.tf", tmp_path / "main.tf")
+    runner = FakeRunner()
+    backend = cx.TerraformBackend(runner, tf_dir=tmp_path)
+
+    result = backend.execute("upgrade_instance", {}, lambda m: None)
+    assert result["changes"] == {"instance_type": {"from": "t3.micro", "to": "t3.small"}}
+    text = (tmp_path / "main.tf").read_text()
+    assert 'instance_type                = "t3.small"\n' in text
+    assert [c[2] for c in runner.commands] == ["init", "plan", "apply"]
+    assert "-target=aws_instance.web_server" in runner.commands[1]
+
+    # The first grow adds root_block_device, the second edits it
+    backend.execute("expand_disk", {"grow_gb": "4"}, lambda m: None)
+    result = backend.execute("expand_disk", {}, lambda m: None)
+    assert result["changes"] == {"volume_size_gb": {"from": 12, "to": 20}}
+    text = (tmp_path / "main.tf").read_text()
+    assert text.count("root_block_device") == 1 and "volume_size = 20" in text
+    # Braces inside heredocs and provisioner strings didn't confuse the block scan
+    assert text.index("volume_size") < text.index('provisioner "remote-exec"')
+
+
+def test_terraform_failure_restores_main_tf(tmp_path):
+    shutil.copy(ROOT / "Terraform" / "main.tf", tmp_path / "main.tf")
+    original = (tmp_path / "main.tf").read_text()
+    backend = cx.TerraformBackend(FakeRunner(fail_on="apply"), tf_dir=tmp_path)
+    with pytest.raises(cx.CapacityError):
+        backend.execute("upgrade_instance", {"instance_type": "t3.large"}, lambda m: None)
+    assert (tmp_path / "main.tf").read_text() == original
+
+
+def test_local_backend_swap_and_loopback(tmp_path):
+    swaps = tmp_path / "swaps"
+    swaps.write_text("Filename\tType\tSize\tUsed\tPriority\n")
+    runner = FakeRunner(fail_on="fallocate")
+    backend = cx.LocalBackend(runner, swap_file=str(tmp_path / "swapfile"), proc_swaps=str(swaps))
+
+    result = backend.execute("add_swap", {"size_mb": "16"}, lambda m: None)
+    assert result["status"] == "enabled"
+    assert [c[0] for c in runner.commands] == ["fallocate", "dd", "chmod", "mkswap", "swapon"]
+
+    swaps.write_text(swaps.read_text() + f"{tmp_path / 'swapfile'} file 16380 0 -2\n")
+    assert backend.execute("add_swap", {}, lambda m: None)["status"] == "unchanged"
+    with pytest.raises(cx.CapacityError):
+        backend.execute("add_swap", {"size_mb": "0"}, lambda m: None)
+    # Paths are never taken from the caller
+    with pytest.raises(cx.CapacityError, match="Unsupported parameter"):
+        backend.execute("add_swap", {"path": "/etc/passwd"}, lambda m: None)
+    assert not any("/etc/passwd" in part for command in runner.commands for part in command)
+
+    image = tmp_path / "data.img"
+    image.write_bytes(b"")
+    runner = FakeRunner(losetup=f"/dev/loop3: [2049]:131 ({image})\n")
+    backend = cx.LocalBackend(runner, loop_image=str(image))
+    result = backend.execute("expand_disk", {"grow_mb": "64"}, lambda m: None)
+    assert result["device"] == "/dev/loop3"
+    assert runner.commands[1:] == [["truncate", "-s", "+64M", str(image)],
+                                   ["losetup", "-c", "/dev/loop3"], ["resize2fs", "/dev/loop3"]]
+
+
+def test_default_routes_skip_unprovisioned_backends(tmp_path, monkeypatch):
+    assert cx.LocalBackend(loop_image=str(tmp_path / "data.img")).provisioned("add_swap")
+    assert not cx.LocalBackend(loop_image=str(tmp_path / "data.img")).provisioned("expand_disk")
+    assert not cx.TerraformBackend(tf_dir=tmp_path).provisioned("upgrade_instance")
+
+    for backend in (cx.LocalBackend, cx.TerraformBackend):
+        monkeypatch.setattr(backend, "provisioned", lambda self, action: action == "add_swap")
+    monkeypatch.setenv("SELF_HEAL_CAPACITY_BACKENDS", "upgrade_instance=fake")
+    executor = cx.CapacityExecutor.from_env()
+    assert executor.routes == {"add_swap": "local", "upgrade_instance": "fake"}
+    with pytest.raises(cx.CapacityError, match="No backend"):
+        executor.submit("expand_disk")
+
+
+def test_params_are_whitelisted_and_bounded():
+    assert cx.validate_params("add_swap", {"size_mb": "2048"}) == {"size_mb": 2048}
+    assert cx.validate_params("upgrade_instance", {"instance_type": "t3.large"}) == {"instance_type": "t3.large"}
+    for action, params in (("expand_disk", {"image": "/dev/sda"}), ("expand_disk", {"grow_gb": 10_000}),
+                           ("add_swap", {"size_mb": "lots"}), ("upgrade_instance", {"instance_type": "p4d.24xlarge"}),
+                           ("upgrade_instance", {"volume_size": 500}), ("reboot", {})):
+        with pytest.raises(cx.CapacityError):
+            cx.validate_params(action, params)
+
+
+def _call(url, path, payload=None, headers=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url + path, data=data, headers={"Content-Type": "application/json", **(headers or {})})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return json.loads(resp.read())
+
+
+def test_receiver_approval_queues_a_job():
+    pytest.importorskip("uvicorn")
+    from alert_storm import sandboxed_receiver
+
+    call = _call
+
+    env = {"SELF_HEAL_CAPACITY_BACKENDS": "add_swap=fake,expand_disk=fake,upgrade_instance=fake"}
+    with sandboxed_receiver(extra_env=env) as url:
+        approved = call(url, "/approve-action", {"action": "add_swap", "resource": "MEMORY",
+                                                 "details": {"size_mb": 1024}})
+        assert approved["status"] == "approved" and approved["job"]["backend"] == "fake"
+        job_id = approved["job"]["id"]
+        for _ in range(50):
+            job = call(url, f"/jobs/{job_id}")
+            if job["status"] == "succeeded":
+                break
+            time.sleep(0.1)
+        assert job["status"] == "succeeded"
+        assert job["result"]["params"] == {"size_mb": 1024}
+        assert call(url, "/jobs")["jobs"][0]["id"] == job_id
+        # Non-capacity approvals are still only logged
+        assert "job" not in call(url, "/approve-action", {"action": "optimize_app", "resource": "APP"})
+        with pytest.raises(urllib.error.HTTPError) as rejected:
+            call(url, "/approve-action", {"action": "add_swap", "resource": "MEMORY",
+                                          "details": {"path": "/etc/passwd"}})
+        assert rejected.value.code == 400
+
+
+def test_receiver_approval_needs_the_token_when_set():
+    pytest.importorskip("uvicorn")
+    from alert_storm import sandboxed_receiver
+
+    env = {"SELF_HEAL_CAPACITY_BACKENDS": "add_swap=fake", "SELF_HEAL_APPROVAL_TOKEN": "s3cret"}
+    payload = {"action": "add_swap", "resource": "MEMORY"}
+    with sandboxed_receiver(extra_env=env) as url:
+        for headers in ({}, {"X-Self-Heal-Token": "wrong"}):
+            with pytest.raises(urllib.error.HTTPError) as rejected:
+                _call(url, "/approve-action", payload, headers)
+            assert rejected.value.code == 401
+        assert _call(url, "/approve-action", payload, {"X-Self-Heal-Token": "s3cret"})["job"]["backend"] == "fake"
@@ -0,0 +1,103 @@
+import errno
+import os
+import time
+
+import pytest
+from cgroup_throttle import CgroupError, CgroupThrottler
+
+
+@pytest.fixture
+def throttler(tmp_path, monkeypatch):
+    """A plain directory standing in for /sys/fs/cgroup plus a fake /proc"""
+    root = tmp_path / "cgroup"
+    rmdir = os.rmdir
+
+    def cgroupfs_rmdir(path, *args, **kwargs):
+        # cgroupfs drops a group's interface files with it; a plain directory doesn't
+        if str(path).startswith(str(root) + os.sep):
+            for child in os.scandir(path):
+                if child.is_file():
+                    os.unlink(child.path)
+        rmdir(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "rmdir", cgroupfs_rmdir)
+    (root / "user.slice").mkdir(parents=True)
+    (root / "cgroup.controllers").write_text("cpuset cpu io memory pids\n")
+    (root / "cgroup.subtree_control").write_text("")
+    proc = tmp_path / "proc"
+    for pid in (101, 102):
+        (proc / str(pid)).mkdir(parents=True)
+        (proc / str(pid) / "cgroup").write_text("0::/user.slice\n")
+    return CgroupThrottler(root=root, state_file=tmp_path / "throttled.json", proc_root=str(proc))
+
+
+def test_throttle_applies_limits(throttler):
+    group = throttler.throttle([101, 102], cpu_max="10000 100000", memory_high="128M")
+    path = throttler.slice / group["name"]
+    assert (path / "cpu.max").read_text() == "10000 100000"
+    assert (path / "memory.high").read_text() == "128M"
+    assert (throttler.root / "cgroup.subtree_control").read_text() == "+cpu +memory"
+    assert group["origins"] == {"101": "/user.slice", "102": "/user.slice"}
+    assert group["name"] in throttler.groups()
+
+
+def test_release_restores_origin(throttler):
+    group = throttler.throttle([101], memory_high=None)
+    released = throttler.release(group["name"])
+    assert released["restored"] == [101]
+    assert (throttler.root / "user.slice" / "cgroup.procs").read_text() == "101"
+    assert not (throttler.slice / group["name"]).exists()
+    assert throttler.groups() == {}
+
+
+def test_release_moves_forked_children_back(throttler):
+    group = throttler.throttle([101], memory_high=None)
+    path = throttler.slice / group["name"]
+    (throttler.proc_root / "103").mkdir()
+    (throttler.proc_root / "103" / "stat").write_text("103 (worker) S 101 103 103 0\n")
+    (path / "cgroup.procs").write_text("101\n103\n104\n")  # 103 forked by 101, 104 unknown
+
+    moved = []
+    write = throttler._write
+    throttler._write = lambda target, value: (moved.append((str(target), value)), write(target, value))
+    assert throttler.release(group["name"])["restored"] == [101, 103, 104]
+    user_procs = str(throttler.root / "user.slice" / "cgroup.procs")
+    assert moved == [(user_procs, "101"), (user_procs, "103"), (str(throttler.root / "cgroup.procs"), "104")]
+
+
+def test_release_idle_keeps_groups_it_cannot_remove(throttler, monkeypatch):
+    busy = throttler.throttle([101])
+    other = throttler.throttle([102])
+    rmdir = os.rmdir
+
+    def ebusy(path, *args, **kwargs):
+        if str(path).endswith(busy["name"]):
+            raise OSError(errno.EBUSY, "Device or resource busy")
+        rmdir(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "rmdir", ebusy)
+    released = throttler.release_idle(quiet_seconds=0, now=time.time() + 1)
+    assert [r["name"] for r in released] == [other["name"]]
+    assert list(throttler.groups()) == [busy["name"]]
+
+
+def test_release_idle_waits_for_pressure_to_subside(throttler):
+    group = throttler.throttle([101])
+    path = throttler.slice / group["name"]
+    created = group["created"]
+
+    # Still hitting cpu.max: activity resets the quiet timer
+    (path / "cpu.stat").write_text("usage_usec 500\nnr_throttled 7\n")
+    assert throttler.release_idle(quiet_seconds=60, now=created + 50) == []
+    assert throttler.release_idle(quiet_seconds=60, now=created + 100) == []
+
+    # No new throttling for a full quiet period: released
+    released = throttler.release_idle(quiet_seconds=60, now=created + 111)
+    assert [r["name"] for r in released] == [group["name"]]
+
+
+def test_unavailable_hierarchy(tmp_path):
+    throttler = CgroupThrottler(root=tmp_path / "missing", state_file=tmp_path / "t.json")
+    assert not throttler.available()
+    with pytest.raises(CgroupError):
+        throttler.throttle([1])
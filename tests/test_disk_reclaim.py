@@ -0,0 +1,98 @@
+import gzip
+import os
+import time
+
+import disk_reclaim
+
+DAY = 86400
+
+
+def make_file(path, size, age_days=0, content=b"log line 12345\n"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes((content * (size // len(content) + 1))[:size])
+    ts = time.time() - age_days * DAY
+    os.utime(path, (ts, ts))
+    return path
+
+
+def make_reclaimer(tmp_path, proc):
+    return disk_reclaim.DiskReclaimer(
+        str(tmp_path),
+        log_roots=[str(tmp_path / "log")],
+        tmp_roots=[str(tmp_path / "tmp")],
+        cache_roots=[str(tmp_path / "cache")],
+        proc_root=str(proc),
+    )
+
+
+def fake_proc(tmp_path, pid, open_paths):
+    fd_dir = tmp_path / "proc" / str(pid) / "fd"
+    fd_dir.mkdir(parents=True)
+    for n, target in enumerate(open_paths):
+        os.symlink(target, fd_dir / str(n))
+    return tmp_path / "proc"
+
+
+def test_plan_ranks_and_skips_recent_and_open(tmp_path):
+    rotated = make_file(tmp_path / "log" / "app.log.1", 400_000, age_days=1)
+    make_file(tmp_path / "log" / "app.log", 800_000)  # being written
+    old_gz = make_file(tmp_path / "log" / "old.log.gz", 200_000, age_days=30)
+    stale = make_file(tmp_path / "tmp" / "stale.bin", 600_000, age_days=10)
+    held = make_file(tmp_path / "tmp" / "held.bin", 600_000, age_days=10)
+    proc = fake_proc(tmp_path, 42, [str(held)])
+
+    plan = make_reclaimer(tmp_path, proc).plan()
+    assert [(c.action, c.path) for c in plan] == [
+        ("delete", str(stale)),
+        ("compress", str(rotated)),
+        ("delete", str(old_gz)),
+    ]
+
+
+def test_plan_leaves_journal_and_login_records_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_reclaim, "TRUNCATE_MIN_BYTES", 100_000)
+    log = tmp_path / "log"
+    journal = make_file(log / "journal" / "0123abcd" / "system.journal", 400_000, age_days=30)
+    make_file(log / "journal" / "0123abcd" / "user-1000.log.1", 400_000, age_days=30)
+    make_file(log / "wtmp-20240101", 400_000, age_days=30)
+    make_file(log / "btmp", 400_000, age_days=30)
+    make_file(log / "audit" / "audit.dat", 400_000, age_days=30)
+    dated = make_file(log / "messages-20240101", 400_000, age_days=30)
+    old_xz = make_file(log / "app.log.2.xz", 200_000, age_days=30)
+    proc = fake_proc(tmp_path, 42, [str(journal)])
+
+    plan = make_reclaimer(tmp_path, proc).plan()
+    assert [(c.action, c.path) for c in plan] == [("compress", str(dated)), ("delete", str(old_xz))]
+
+
+def test_open_files_sees_deleted_descriptors(tmp_path):
+    proc = fake_proc(tmp_path, 7, ["/var/log/x.log", "/var/log/gone.log (deleted)", "socket:[123]"])
+    holders = disk_reclaim.open_files(str(proc))
+    assert holders["/var/log/x.log"] == [7]
+    assert holders[str(proc / "7" / "fd" / "1")] == [7]
+    assert len(holders) == 2
+
+
+def test_reclaim_compresses_in_pool_and_stops_at_goal(tmp_path):
+    first = make_file(tmp_path / "log" / "a.log.1", 2_000_000, age_days=1)
+    second = make_file(tmp_path / "log" / "b.log.1", 1_000_000, age_days=1)
+    proc = fake_proc(tmp_path, 1, [])
+
+    report = make_reclaimer(tmp_path, proc).reclaim(goal_bytes=1_000_000, workers=2)
+    assert report["goal_met"]
+    assert [s["path"] for s in report["steps"]] == [str(first)]
+    assert report["steps"][0]["bytes"] > 1_000_000
+    assert not first.exists() and second.exists()
+    with gzip.open(str(first) + ".gz") as f:
+        assert f.read(15) == b"log line 12345\n"
+
+
+def test_remove_truncates_open_files(tmp_path):
+    held = make_file(tmp_path / "held.log", 50_000)
+    loose = make_file(tmp_path / "loose.log", 50_000)
+    holders = {str(held): [99]}
+
+    assert disk_reclaim.remove(str(held), holders)["action"] == "truncate"
+    assert held.exists() and held.stat().st_size == 0
+    assert disk_reclaim.remove(str(loose), holders)["action"] == "delete"
+    assert not loose.exists()
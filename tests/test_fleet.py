@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from fleet import FLEET_QUERIES, UP_QUERY, FleetView, PrometheusClient, PrometheusError, QueryCache
+
+CANNED = {
+    FLEET_QUERIES["cpu"]: {"web-server": 91.5, "web-2": 35.0},
+    FLEET_QUERIES["memory"]: {"web-server": 60.0, "web-2": 72.0},
+    FLEET_QUERIES["disk"]: {"web-server": 40.0, "web-2": 50.0},
+    FLEET_QUERIES["network"]: {"web-server": 0.0, "web-2": 0.0},
+    UP_QUERY: {"web-server": 1, "web-2": 1, "web-3": 0},
+}
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Canned /api/v1/query and /api/v1/query_range answers, slow enough to overlap"""
+
+    calls = []
+    delay = 0.2
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.calls.append((url.path, params["query"]))
+        time.sleep(self.delay)
+        values = CANNED.get(params["query"])
+        if values is None:
+            status, body = 400, {"status": "error", "errorType": "bad_data", "error": "parse error"}
+        elif url.path == "/api/v1/query":
+            status, body = 200, {"status": "success", "data": {"resultType": "vector", "result": [
+                {"metric": {"instance": i}, "value": [time.time(), str(v)]} for i, v in values.items()]}}
+        else:
+            start, end, step = (float(params[k]) for k in ("start", "end", "step"))
+            steps = range(int((end - start) // step) + 1)
+            status, body = 200, {"status": "success", "data": {"resultType": "matrix", "result": [
+                {"metric": {"instance": i}, "values": [[start + n * step, str(v)] for n in steps]}
+                for i, v in values.items()]}}
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def prometheus():
+    StandIn.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _limits(instance, resource):
+    return {"critical": 80.0, "warning": 70.0}
+
+
+def test_snapshot_batches_per_resource_and_coalesces_viewers(prometheus):
+    fleet = FleetView(PrometheusClient(prometheus))
+    pending = {"web-2": {"alert_name": "HighMemoryUsage", "instance": "web-2"}}
+    results = []
+    viewers = [threading.Thread(target=lambda: results.append(fleet.snapshot(_limits, pending))) for _ in range(10)]
+    for viewer in viewers:
+        viewer.start()
+    for viewer in viewers:
+        viewer.join()
+
+    # Ten viewers, five queries: one upstream call per query
+    assert len(StandIn.calls) == 5 and len(results) == 10
+    hosts = results[0]["hosts"]
+    assert hosts["web-server"]["status"] == "critical" and hosts["web-server"]["cpu"] == 91.5
+    assert hosts["web-2"]["status"] == "warning"
+    assert hosts["web-2"]["pending_alert"]["alert_name"] == "HighMemoryUsage"
+    assert hosts["web-3"]["status"] == "down" and hosts["web-3"]["cpu"] is None
+
+    fleet.snapshot(_limits)
+    assert len(StandIn.calls) == 5  # still fresh
+    assert fleet.cache.stats["coalesced"] + fleet.cache.stats["hits"] == 50
+
+
+def test_expired_entries_serve_stale_while_one_caller_refreshes():
+    now = [0.0]
+    cache = QueryCache(clock=lambda: now[0])
+    release, started, loads = threading.Event(), threading.Event(), []
+
+    def slow_loader():
+        loads.append(1)
+        started.set()
+        release.wait(5)
+        return len(loads)
+
+    assert cache.get(("k",), 5, lambda: 1) == 1
+    now[0] = 10.0
+    refresher = threading.Thread(target=lambda: cache.get(("k",), 5, slow_loader))
+    refresher.start()
+    started.wait(5)
+    assert cache.get(("k",), 5, slow_loader) == 1  # stale, no second load
+    release.set()
+    refresher.join()
+    assert cache.get(("k",), 5, slow_loader) == 1 and loads == [1]
+    assert cache.stats["stale"] == 1
+
+
+def test_history_is_step_aligned_and_errors_surface(prometheus):
+    fleet = FleetView(PrometheusClient(prometheus))
+    first = fleet.history("cpu", minutes=10, step=60, now=1_000_030)
+    second = fleet.history("cpu", minutes=10, step=60, now=1_000_079)
+    assert first == second and first["end"] == 1_000_020 and first["start"] == 999_420
+    assert len(first["series"]["web-server"]) == 11
+    assert len(StandIn.calls) == 1
+
+    with pytest.raises(ValueError):
+        fleet.history("cpu", minutes=24 * 60, step=5)
+    bad = FleetView(PrometheusClient(prometheus), queries={"cpu": "not promql"})
+    with pytest.raises(PrometheusError, match="bad_data"):
+        bad.history("cpu")
+    with pytest.raises(PrometheusError, match="unreachable"):
+        FleetView(PrometheusClient("http://127.0.0.1:1", timeout=1)).snapshot()
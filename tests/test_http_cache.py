@@ -0,0 +1,81 @@
+import gzip
+import json
+import os
+
+import pytest
+from flask import Flask, Response, jsonify
+
+import http_cache
+from http_cache import conditional, entries_since, file_version, init_compression, not_modified
+
+
+@pytest.fixture
+def client(tmp_path):
+    source = tmp_path / "history.json"
+    source.write_text("[]")
+    app = Flask(__name__)
+    init_compression(app)
+
+    @app.route("/file")
+    def from_file():
+        etag, modified = file_version(source)
+        return not_modified(etag, modified) or conditional(jsonify(json.loads(source.read_text())), etag, modified)
+
+    @app.route("/big")
+    def big():
+        return jsonify({"rows": [{"n": i, "text": "x" * 40} for i in range(200)]})
+
+    @app.route("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    @app.route("/stream")
+    def stream():
+        return Response(iter(['{"n": 1}\n'] * 500), mimetype="application/json")
+
+    app.source = source
+    return app.test_client()
+
+
+def test_unchanged_file_answers_304(client):
+    first = client.get("/file")
+    assert first.status_code == 200 and first.headers["ETag"].startswith('W/"')
+    assert "no-cache" in first.headers["Cache-Control"]
+
+    assert client.get("/file", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    cached = client.get("/file", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert cached.status_code == 304 and cached.data == b""
+
+    client.application.source.write_text('[{"timestamp": "t1"}]')
+    stat = os.stat(client.application.source)
+    os.utime(client.application.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    changed = client.get("/file", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200 and changed.json == [{"timestamp": "t1"}]
+
+
+def test_large_json_is_compressed(client, monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", None)
+    plain = client.get("/big")
+    assert "Content-Encoding" not in plain.headers and plain.headers["Vary"] == "Accept-Encoding"
+
+    packed = client.get("/big", headers={"Accept-Encoding": "br, gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert int(packed.headers["Content-Length"]) < len(plain.data) // 10
+    assert json.loads(gzip.decompress(packed.data)) == plain.json
+
+    assert "Content-Encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "Content-Encoding" not in client.get("/stream", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_brotli_is_preferred_when_installed(client):
+    brotli = pytest.importorskip("brotli")
+    packed = client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+    assert packed.headers["Content-Encoding"] == "br"
+    assert json.loads(brotli.decompress(packed.data))["rows"][199]["n"] == 199
+
+
+def test_entries_since_returns_only_newer_entries():
+    entries = [{"timestamp": t} for t in ("t3", "t2", "t1")]
+    assert entries_since(entries, "t1") == entries[:2]
+    assert entries_since(entries, "t3") == []
+    assert entries_since(entries, "t0") is None  # gone: the client needs everything
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import loadgen
+
+
+@pytest.fixture
+def server():
+    """Keep-alive stand-in that answers after a configurable delay"""
+    state = {"delay": 0.0, "connections": set(), "requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            state["requests"] += 1
+            state["connections"].add(self.client_address[1])
+            time.sleep(state["delay"])
+            body = b'{"status": "ok"}'
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    state["url"] = f"http://127.0.0.1:{httpd.server_port}"
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_histogram_percentiles_within_precision():
+    rng = random.Random(7)
+    values = sorted(rng.uniform(0.0005, 2.0) for _ in range(20000))
+    hist = loadgen.LatencyHistogram()
+    for v in values:
+        hist.record(v)
+    for pct in (50, 90, 99, 99.9):
+        exact = values[int(pct / 100 * len(values)) - 1] * 1e6
+        assert abs(hist.percentile(pct) - exact) / exact < 0.02
+    assert hist.total == 20000 and hist.percentile(100) == hist.max
+
+
+def test_open_loop_keeps_arrival_rate_when_server_is_slow(server):
+    server["delay"] = 0.2
+    run = loadgen.LoadRun(server["url"], loadgen.TARGETS["dashboard"])
+
+    async def go():
+        try:
+            return await run.open_loop(loadgen.shape("constant", 50, 1.0), 1.0)
+        finally:
+            run.close()
+
+    result = run.result(asyncio.run(go()), {})
+
+    # 50 req/s for 1s despite 200ms responses: arrivals don't wait on replies
+    assert 48 <= result["requests"] <= 52
+    assert result["max_in_flight"] >= 8
+    assert result["latency"]["p50_ms"] >= 195
+
+
+def test_closed_loop_reuses_connections_and_writes_json(server, tmp_path):
+    out = tmp_path / "run.json"
+    code = loadgen.main([
+        "run", "--target", "webhook", "--url", server["url"], "--mode", "closed",
+        "--concurrency", "4", "--requests", "40", "--duration", "5", "--output", str(out),
+    ])
+    result = json.loads(out.read_text())
+    assert code == 0
+    assert result["requests"] == 40 and result["errors"] == {}
+    assert result["status_codes"] == {"200": 40}
+    assert len(server["connections"]) == 4
+    assert result["timeline"][0]["requests"] == 40
+
+
+def test_compare_flags_regressions(tmp_path):
+    base = {"throughput_rps": 100.0, "error_rate": 0.0,
+            "latency": {"p50_ms": 10.0, "p90_ms": 20.0, "p99_ms": 50.0, "p999_ms": 80.0}}
+    worse = json.loads(json.dumps(base))
+    worse["throughput_rps"] = 80.0
+    worse["latency"]["p99_ms"] = 70.0
+    worse["latency"]["p50_ms"] = 10.5
+
+    report = loadgen.compare(base, worse, threshold=10)
+    assert report["regressions"] == ["throughput_rps", "latency.p99_ms"]
+    assert loadgen.compare(base, base)["regressions"] == []
+
+    (tmp_path / "a.json").write_text(json.dumps(base))
+    (tmp_path / "b.json").write_text(json.dumps(worse))
+    assert loadgen.main(["compare", str(tmp_path / "a.json"), str(tmp_path / "b.json")]) == 1
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from log_search import LogSearch
+
+T0 = datetime(2026, 10, 19, 10, 0, 0)
+
+
+def _at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+def _python_line(seconds, level, message):
+    return f"{_at(seconds):%Y-%m-%d %H:%M:%S},000 - webhook_receiver - {level} - {message}\n"
+
+
+def _shell_line(seconds, tag, message):
+    return f"[{_at(seconds):%a %b %e %H:%M:%S} UTC {_at(seconds):%Y}] [{tag}] {message}\n"
+
+
+@pytest.fixture
+def logs(tmp_path):
+    with open(tmp_path / "webhook.log", "w") as f:
+        for i in range(0, 2000, 2):
+            host = f"web-{i % 3}"
+            level = "ERROR" if i % 100 == 0 else "INFO"
+            f.write(_python_line(i, level, f"Processing alert: HighCPUUsage on {host} (severity: critical)"))
+            if i == 500:
+                f.write("Traceback (most recent call last):\n  RuntimeError: boom on web-9\n")
+    with open(tmp_path / "self_heal.log", "w") as f:
+        for i in range(1, 2000, 10):
+            f.write(_shell_line(i, "CPU", "✗ Failed to throttle" if i == 501 else f"Current usage: {i % 100}%"))
+    # A small index step so the tests cross many index entries
+    return LogSearch(tmp_path, step=512)
+
+
+def _ts(seconds):
+    return _at(seconds).timestamp()
+
+
+def _all_pages(search, **kwargs):
+    entries, cursor = [], None
+    while True:
+        page = search.search(limit=7, cursor=cursor, **kwargs)
+        entries += page["entries"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return entries
+
+
+def test_time_range_pages_merge_files_in_order(logs):
+    newest_first = _all_pages(logs, start=_ts(300), end=_ts(400))
+    times = [e["ts"] for e in newest_first]
+    assert times == sorted(times, reverse=True)
+    assert len(newest_first) == 50 + 10
+    assert {e["file"] for e in newest_first} == {"webhook.log", "self_heal.log"}
+    assert newest_first[0]["time"] == "2026-10-19T10:06:38.000" and newest_first[-1]["ts"] == _ts(300)
+
+    oldest_first = _all_pages(logs, start=_ts(300), end=_ts(400), descending=False)
+    assert oldest_first == newest_first[::-1]
+    assert logs.index_stats()["webhook.log"]["entries"] > 100
+
+
+def test_filters_levels_and_continuation_lines(logs):
+    errors = logs.search(_ts(0), _ts(2000), limit=100, levels=["error"])["entries"]
+    assert len(errors) == 20 + 1
+    shell = [e for e in errors if e["file"] == "self_heal.log"]
+    assert shell[0]["source"] == "CPU" and shell[0]["message"] == "✗ Failed to throttle"
+
+    # The traceback belongs to the entry at 500s; a hit inside it returns the whole entry
+    boom = logs.search(_ts(0), _ts(2000), text="boom")["entries"]
+    assert len(boom) == 1 and boom[0]["ts"] == _ts(500)
+    assert boom[0]["message"].endswith("RuntimeError: boom on web-9")
+
+    hosts = logs.search(_ts(0), _ts(100), limit=100, alert="HighCPUUsage", instance="web-1 ", descending=False)
+    assert [e["ts"] - _ts(0) for e in hosts["entries"]] == [4, 10, 16, 22, 28, 34, 40, 46, 52, 58, 64, 70, 76, 82,
+                                                             88, 94]
+
+
+def test_growth_and_rotation_update_the_index(logs, tmp_path):
+    assert logs.search(_ts(5000), _ts(6000))["count"] == 0
+    with open(tmp_path / "webhook.log", "a") as f:
+        f.write(_python_line(5000, "WARNING", "late entry"))
+    assert logs.search(_ts(5000), _ts(6000))["entries"][0]["message"] == "late entry"
+
+    (tmp_path / "webhook.log").write_text(_python_line(7000, "INFO", "after rotation"))
+    assert logs.search(_ts(6000), _ts(8000))["entries"][0]["message"] == "after rotation"
+    assert logs.index_stats()["webhook.log"]["entries"] == 1
+
+
+def test_bad_arguments_are_rejected_before_reading(logs):
+    for kwargs in ({"files": ["../etc/passwd"]}, {"levels": ["LOUD"]}, {"cursor": "webhook.log:abc"}):
+        with pytest.raises(ValueError):
+            logs.iter_entries(_ts(0), _ts(10), **kwargs)
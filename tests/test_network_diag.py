@@ -0,0 +1,81 @@
+import asyncio
+import os
+import socket
+import time
+
+import network_diag
+
+NET_DEV = """Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo:  100 1 0 0 0 0 0 0  100 1 0 0 0 0 0 0
+  eth0: {rx} 10 {errs} {drop} 0 0 0 0 {tx} 10 0 0 0 0 0 0
+"""
+
+SNMP = """Tcp: RtoAlgorithm RtoMin RtoMax MaxConn ActiveOpens PassiveOpens AttemptFails EstabResets CurrEstab InSegs OutSegs RetransSegs InErrs OutRsts
+Tcp: 1 200 120000 -1 10 5 0 0 3 1000 {out} {retrans} 0 0
+Udp: InDatagrams NoPorts InErrors OutDatagrams RcvbufErrors SndbufErrors
+Udp: 10 0 0 10 0 0
+"""
+
+# 127.0.0.1:8080 -> 10.0.0.2:443 ESTABLISHED, 16 bytes queued, inode 4242
+TCP = """  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+   0: 0100007F:1F90 0200000A:01BB 01 00000010:00000000 00:00000000 00000000  1000        0 4242 1 0 20 4 30 10 -1
+   1: 00000000:0016 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 999 1 0 20 4 30 10 -1
+"""
+
+
+def write_proc(root, rx=0, errs=0, drop=0, tx=0, out=1000, retrans=0):
+    (root / "net").mkdir(parents=True, exist_ok=True)
+    (root / "net" / "dev").write_text(NET_DEV.format(rx=rx, errs=errs, drop=drop, tx=tx))
+    (root / "net" / "snmp").write_text(SNMP.format(out=out, retrans=retrans))
+    (root / "net" / "tcp").write_text(TCP)
+    return str(root)
+
+
+def test_counter_rates_from_proc(tmp_path):
+    proc = write_proc(tmp_path)
+    before = (0.0, network_diag.read_net_dev(proc), network_diag.read_snmp(proc))
+    write_proc(tmp_path, rx=2000, errs=20, drop=4, tx=1000, out=1100, retrans=5)
+    after = (2.0, network_diag.read_net_dev(proc), network_diag.read_snmp(proc))
+
+    rates = network_diag.counter_rates(before, after)
+    assert list(rates["interfaces"]) == ["eth0"]
+    assert rates["interfaces"]["eth0"] == {
+        "rx_bytes_per_sec": 1000, "tx_bytes_per_sec": 500, "errors_per_sec": 10.0, "drops_per_sec": 2.0,
+    }
+    assert rates["tcp"]["retransmit_percent"] == 5.0
+
+
+def test_sockets_attributed_to_processes(tmp_path):
+    proc = write_proc(tmp_path)
+    fd_dir = tmp_path / "321" / "fd"
+    fd_dir.mkdir(parents=True)
+    os.symlink("socket:[4242]", fd_dir / "5")
+    (tmp_path / "321" / "comm").write_text("curl\n")
+
+    sockets = network_diag.read_tcp_sockets(proc)
+    assert sockets[0]["local"] == "127.0.0.1:8080" and sockets[0]["remote"] == "10.0.0.2:443"
+    talkers = network_diag.top_talkers(proc)
+    assert talkers == [{"pid": 321, "connections": 1, "established": 1, "queued_bytes": 16,
+                        "name": "curl", "remote_hosts": 1}]
+
+
+def test_probes_and_counters_overlap(tmp_path):
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(8)
+    closed = socket.socket()
+    closed.bind(("127.0.0.1", 0))
+    targets = [f"127.0.0.1:{listener.getsockname()[1]}", f"127.0.0.1:{closed.getsockname()[1]}"]
+
+    started = time.monotonic()
+    result = asyncio.run(network_diag.diagnose_async(
+        targets, timeout=0.5, interval=0.3, attempts=2, method="tcp", proc_root=write_proc(tmp_path)))
+    elapsed = time.monotonic() - started
+    listener.close()
+    closed.close()
+
+    # Probes run during the counter interval instead of after it
+    assert elapsed < 0.6
+    assert result["reachable"] == 1 and result["total"] == 2
+    assert result["packet_loss"] == 50.0
@@ -0,0 +1,129 @@
+import json
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import notification_dispatcher as nd
+
+
+class StandIn:
+    """Local HTTP stand-in for Slack/SES: records requests, replies from a script"""
+
+    def __init__(self, statuses=()):
+        self.requests = []
+        self.ports = set()
+        self.statuses = list(statuses)
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                stand_in.requests.append((self.path, dict(self.headers), body))
+                stand_in.ports.add(self.client_address[1])
+                status = stand_in.statuses.pop(0) if stand_in.statuses else 200
+                self.send_response(status)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stand_in():
+    server = StandIn()
+    yield server
+    server.close()
+
+
+def test_alerts_in_window_become_one_digest(stand_in):
+    slack = nd.SlackChannel(stand_in.url + "/hook", window=0.2)
+    dispatcher = nd.NotificationDispatcher([slack])
+    dispatcher.start()
+    for i in range(5):
+        assert dispatcher.submit({"resource": "cpu", "severity": "warning", "value": f"{90 + i}%"})
+    assert dispatcher.wait_idle(5)
+
+    assert len(stand_in.requests) == 1
+    text = json.loads(stand_in.requests[0][2])["attachments"][0]["text"]
+    assert text.count("WARNING CPU") == 5
+    assert slack.stats["alerts"] == 5
+    dispatcher.stop()
+
+
+def test_connections_are_reused(stand_in):
+    slack = nd.SlackChannel(stand_in.url + "/hook", window=0.01, rate=100, burst=100)
+    dispatcher = nd.NotificationDispatcher([slack])
+    dispatcher.start()
+    for i in range(3):
+        dispatcher.submit({"resource": "disk", "severity": "warning", "value": "90%"})
+        assert dispatcher.wait_idle(5)
+    assert len(stand_in.requests) == 3
+    assert len(stand_in.ports) == 1 and slack.pool.opened == 1
+    dispatcher.stop()
+
+
+def test_retries_with_backoff_then_delivers(stand_in):
+    stand_in.statuses = [503, 500]
+    slack = nd.SlackChannel(stand_in.url + "/hook", window=0.01)
+    dispatcher = nd.NotificationDispatcher([slack], backoff_base=0.05)
+    dispatcher.start()
+    dispatcher.submit({"resource": "memory", "severity": "critical", "value": "97%"})
+    assert dispatcher.wait_idle(5)
+    assert len(stand_in.requests) == 3
+    assert slack.stats["retries"] == 2 and slack.stats["sent"] == 1
+    dispatcher.stop()
+
+
+def test_ses_request_is_signed(stand_in):
+    creds = nd.AwsCredentials("AKIDEXAMPLE", "secret")
+    ses = nd.SesChannel("ops@example.com", endpoint=stand_in.url, credentials=creds, window=0.01)
+    dispatcher = nd.NotificationDispatcher([ses])
+    dispatcher.start()
+    dispatcher.submit({"resource": "cpu", "severity": "critical", "value": "95%"})
+    assert dispatcher.wait_idle(5)
+    path, headers, body = stand_in.requests[0]
+    assert path == "/v2/email/outbound-emails"
+    assert "/us-east-1/ses/aws4_request" in headers["authorization"]
+    assert json.loads(body)["Destination"]["ToAddresses"] == ["ops@example.com"]
+    dispatcher.stop()
+
+
+def test_sigv4_matches_aws_test_suite():
+    # get-vanilla from the AWS Signature Version 4 test suite
+    headers = nd.sigv4_headers(
+        "GET", "https://example.amazonaws.com/", b"", "us-east-1", "service",
+        nd.AwsCredentials("AKIDEXAMPLE", "wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY"),
+        now=datetime(2015, 8, 30, 12, 36, 0, tzinfo=timezone.utc),
+    )
+    assert headers["authorization"].endswith(
+        "Signature=5fa00fa31553b73ebf1942676e86291e8372ff2a2260956d9b8aae1d763fbf31"
+    )
+
+
+def test_channels_need_settings_and_enable_flag(monkeypatch):
+    for name in ("SLACK_WEBHOOK_URL", "EMAIL_RECIPIENT", "AWS_SNS_TOPIC", "ENABLE_SLACK", "ENABLE_EMAIL", "ENABLE_SMS"):
+        monkeypatch.delenv(name, raising=False)
+    assert nd.NotificationDispatcher.from_env().channels == []
+
+    monkeypatch.setenv("SLACK_WEBHOOK_URL", "http://127.0.0.1:9/hook")
+    monkeypatch.setenv("EMAIL_RECIPIENT", "ops@example.com")
+    monkeypatch.setenv("ENABLE_EMAIL", "false")
+    assert nd.NotificationDispatcher.from_env().channels == []
+
+    monkeypatch.setenv("ENABLE_SLACK", "true")
+    monkeypatch.setenv("ENABLE_SMS", "true")  # no topic configured
+    assert [c.name for c in nd.NotificationDispatcher.from_env().channels] == ["slack"]
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+import psi
+
+SAMPLE = (
+    "some avg10=12.50 avg60=4.00 avg300=1.00 total=123456\n"
+    "full avg10=8.00 avg60=2.00 avg300=0.50 total=6543\n"
+)
+
+
+def write_pressure(root, cpu="some avg10=0.00 avg60=0.00 avg300=0.00 total=0\n", memory=SAMPLE, io=SAMPLE):
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "cpu").write_text(cpu)
+    (root / "memory").write_text(memory)
+    (root / "io").write_text(io)
+    return root
+
+
+def test_parse_pressure():
+    parsed = psi.parse_pressure(SAMPLE)
+    assert parsed["some"]["avg10"] == 12.5
+    assert parsed["full"]["total"] == 6543
+
+
+def test_missing_psi_falls_back_to_none(tmp_path):
+    assert psi.read_all(tmp_path / "nope") is None
+    assert psi.priority(None) == "unknown"
+    assert psi.summarize(None) == {}
+
+
+def test_priority_weights_memory_thrashing_over_cpu(tmp_path):
+    busy_cpu = write_pressure(tmp_path / "cpu", cpu=SAMPLE, memory="some avg10=0 avg60=0 avg300=0 total=0\n",
+                              io="some avg10=0 avg60=0 avg300=0 total=0\n")
+    thrashing = write_pressure(tmp_path / "mem")
+    assert psi.pressure_score(psi.read_all(busy_cpu)) < psi.pressure_score(psi.read_all(thrashing))
+    assert psi.priority(psi.read_all(thrashing)) == "critical"
+    assert psi.summarize(psi.read_all(thrashing))["memory"] == {"some": 12.5, "full": 8.0}
+
+
+def test_cgroup_pressure(tmp_path):
+    group = tmp_path / "system.slice"
+    group.mkdir()
+    (group / "memory.pressure").write_text(SAMPLE)
+    assert psi.read_cgroup_pressure("/system.slice", tmp_path) == {"memory": psi.parse_pressure(SAMPLE)}
+    assert psi.read_cgroup_pressure("missing.slice", tmp_path) is None
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/pressure/cpu"), reason="kernel without PSI")
+def test_watcher_arms_triggers_or_reports_none():
+    watcher = psi.PressureWatcher(lambda resource, pressure: None)
+    try:
+        assert set(watcher.resources()) <= set(psi.RESOURCES)
+    finally:
+        watcher.stop()
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+import psi
+import simulate
+from timeseries import ProcSampler
+
+SCENARIOS = sorted(simulate.SCENARIOS_DIR.glob('*.json'))
+
+
+@pytest.mark.parametrize('path', SCENARIOS, ids=lambda p: p.stem)
+def test_scenario_passes(path):
+    result = simulate.run_scenario(path)
+    assert result['passed'], (result['failures'], result['actions'], result.get('stderr'))
+
+
+def test_collectors_read_the_fixture_proc(tmp_path):
+    scenario = simulate.load_scenario(simulate.SCENARIOS_DIR / 'memory_leak.json')
+    host = simulate.build_sandbox(tmp_path, scenario)
+    sampler = ProcSampler(str(host.proc))
+    assert sampler.cpu_percent() is None
+    assert sampler.memory_percent() == host.memory_percent() == 94.7
+    assert psi.read_all(host.proc / 'pressure')['memory']['full']['avg10'] == 12.0
+
+    # Time passes: the leak grows on schedule and CPU ticks accrue at the simulated load
+    with simulate.locked_host(tmp_path) as locked:
+        locked.advance(5)
+    assert sampler.memory_percent() == 100.0
+    assert sampler.cpu_percent() == 23.0
+
+
+def test_shims_act_on_the_simulated_host_only(tmp_path, monkeypatch, capsys):
+    scenario = {'handler': 'handle_high_cpu.sh', 'system': {
+        'processes': [{'pid': 4000, 'comm': 'spin', 'cpu': 70, 'rss_mb': 5}],
+        'files': [{'path': '/tmp/old.dat', 'size_kb': 8, 'age_days': 5}]}}
+    simulate.build_sandbox(tmp_path, scenario)
+    monkeypatch.setenv('SIM_ROOT', str(tmp_path))
+
+    assert simulate.main(['shim', 'ps', '-eo', 'pid,comm,%cpu', '--sort=-%cpu']) == 0
+    assert capsys.readouterr().out.splitlines()[1].split() == ['4000', 'spin', '70.0']
+    assert simulate.main(['shim', 'kill', '-9', '4000']) == 0
+    assert simulate.main(['shim', 'kill', '-9', '4000']) == 1
+    assert simulate.main(['shim', 'find', '/tmp', '-type', 'f', '-atime', '+3', '-delete']) == 0
+    assert not (tmp_path / 'fs' / 'tmp' / 'old.dat').exists()
+
+    actions = [json.loads(line) for line in (tmp_path / 'actions.jsonl').read_text().splitlines()]
+    assert [(a['action'], a.get('pid'), a.get('path')) for a in actions] == [
+        ('kill', 4000, None), ('delete', None, '/tmp/old.dat')]
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+from thresholds import BaselineEngine, DEFAULT_THRESHOLDS, WARMUP_SAMPLES, render_rules
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return BaselineEngine(state_file=tmp_path / "baselines.json", seasonal=False)
+
+
+def feed(engine, instance, resource, mean, spread, count=WARMUP_SAMPLES * 3):
+    rng = random.Random(42)
+    for i in range(count):
+        engine.observe(instance, resource, mean + rng.uniform(-spread, spread), ts=1_700_000_000 + i)
+
+
+def test_default_until_warm(engine):
+    feed(engine, "web-server", "cpu", 20, 5, count=WARMUP_SAMPLES - 1)
+    info = engine.describe("CPU", "web-server")
+    assert info["source"] == "default"
+    assert info["threshold"] == DEFAULT_THRESHOLDS["CPU"]["critical"]
+
+
+def test_learned_threshold_tracks_host(engine):
+    feed(engine, "quiet", "cpu", 10, 2)
+    feed(engine, "busy", "cpu", 70, 5)
+    quiet = engine.threshold("handle_high_cpu", "quiet")
+    busy = engine.threshold("CPU", "busy")
+    assert quiet == DEFAULT_THRESHOLDS["CPU"]["floor"]
+    assert 75 < busy <= DEFAULT_THRESHOLDS["CPU"]["ceiling"]
+    assert engine.format_threshold("NETWORK", "quiet") == "10 errors/sec"
+
+
+def test_state_roundtrip(engine, tmp_path):
+    feed(engine, "busy", "memory", 60, 4)
+    engine.save()
+    loaded = BaselineEngine(state_file=tmp_path / "baselines.json", seasonal=False).load()
+    assert loaded.threshold("MEMORY", "busy") == engine.threshold("MEMORY", "busy")
+
+
+def test_rules_use_learned_thresholds(engine):
+    assert "> 80\n" in render_rules(engine)
+    feed(engine, "busy", "cpu", 70, 5)
+    rules = render_rules(engine)
+    learned = engine.threshold("CPU", "busy")
+    assert 'instance="busy"' in rules and f"> {learned:g}" in rules
+    assert 'instance!~"busy"' in rules
+
+
+def test_rules_escape_instance_names(engine):
+    feed(engine, "10.0.0.1:9100", "cpu", 70, 5)
+    rules = render_rules(engine)
+    assert 'instance="10.0.0.1:9100"' in rules
+    assert 'instance!~"10\\\\.0\\\\.0\\\\.1:9100"' in rules
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+import time_to_heal
+
+
+def test_disk_scenario_is_healed_by_the_receiver(tmp_path):
+    pytest.importorskip('uvicorn')
+    output = tmp_path / 'tth.json'
+    code = time_to_heal.main([
+        '--scenarios', 'disk', '--fill-mb', '64', '--fill-dir', str(tmp_path / 'fill'),
+        '--interval', '0.1', '--for', '0.2', '--baseline-samples', '2', '--timeout', '30',
+        '--output', str(output),
+    ])
+    assert code == 0
+    result = json.loads(output.read_text())
+    run = result['runs']['disk'][0]
+    assert run['healed'] and run['webhook_status'] == 200
+    # The stand-in healer ran between delivery and recovery
+    events = run['events_s']
+    assert events['onset'] <= events['breach'] <= events['firing'] <= events['sent']
+    assert events['sent'] <= events['action_start'] <= events['action_end'] <= events['recovered']
+    assert set(result['scenarios']['disk']['stages_ms']) == {name for name, _, _ in time_to_heal.STAGES}
+    assert not list((tmp_path / 'fill').iterdir())
+
+
+def test_compare_flags_slower_stages_only():
+    def result(action, recover):
+        return {'scenarios': {'cpu': {'stages_ms': {
+            'action': {'median': action}, 'recover': {'median': recover}}}}}
+
+    report = time_to_heal.compare(result(1000.0, 500.0), result(1500.0, 520.0), threshold=20)
+    assert report['regressions'] == ['cpu.action']
+    assert report['stages']['cpu.recover']['change_pct'] == 4.0
+    # Large relative change on a tiny stage is noise
+    assert time_to_heal.compare(result(10.0, 500.0), result(50.0, 500.0))['regressions'] == []
@@ -0,0 +1,35 @@
+from timeseries import MetricHistory, RingTier
+
+
+def test_ring_wraps_without_growing():
+    tier = RingTier(step=1, size=10)
+    for ts in range(100):
+        tier.add(ts, float(ts))
+    first, mins, avgs, maxs = tier.window(99, 10)
+    assert first == 90
+    assert avgs == [float(v) for v in range(90, 100)]
+    assert len(tier.slot_ids) == 10
+
+
+def test_gaps_are_null():
+    tier = RingTier(step=1, size=10)
+    tier.add(0, 5.0)
+    tier.add(3, 7.0)
+    _, _, avgs, _ = tier.window(3, 4)
+    assert avgs == [5.0, None, None, 7.0]
+
+
+def test_downsampled_tier_keeps_min_avg_max():
+    history = MetricHistory(tiers=(("1s", 1, 60), ("10s", 10, 6)))
+    for ts, value in enumerate([10, 20, 30, 40, 50, 60, 70, 80, 90, 100]):
+        history.record(1000 + ts, {"cpu": float(value)})
+    data = history.query(["cpu"], "10s", points=1, now=1009)
+    assert data["step"] == 10 and data["start"] == 1000
+    assert data["series"]["cpu"] == {"min": [10.0], "avg": [55.0], "max": [100.0]}
+
+
+def test_series_and_memory_are_bounded():
+    history = MetricHistory(tiers=(("1s", 1, 60),), max_series=2)
+    history.record(0, {"a": 1.0, "b": 2.0, "c": 3.0})
+    assert sorted(history.series) == ["a", "b"]
+    assert history.memory_bytes() == 2 * 60 * RingTier.bytes_per_slot()
@@ -2,31 +2,53 @@
 # ----------------------------
 # Website Response Time Check
 # ----------------------------
+# One request per second via loadgen.py; alerts when p99 exceeds
+# SLO_MS (default 2000 ms) and compares with the stored baseline.
 
 # Resolve paths relative to this script
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 BASE_DIR="$(cd "$SCRIPT_DIR/.." && pwd)"
 LOG_DIR="$BASE_DIR/logs"
-mkdir -p "$LOG_DIR"
+RESULT_DIR="$LOG_DIR/loadgen"
+mkdir -p "$RESULT_DIR"
 
 URL="${1:-http://localhost}"
 ITERATIONS=${2:-20}
+SLO_MS=${3:-2000}
 LOG="$LOG_DIR/self_heal.log"
+OUT="$RESULT_DIR/latency-$(date +%Y%m%d-%H%M%S).json"
+BASELINE="$RESULT_DIR/latency-baseline.json"
 
-# Ensure bc exists
-if ! command -v bc >/dev/null 2>&1; then
-  sudo apt-get update -y && sudo apt-get install -y bc || sudo dnf install -y bc
+echo "[$(date)] Measuring response time for $URL ($ITERATIONS requests)" | tee -a "$LOG"
+
+ARGS=(run --target custom --path / --url "$URL" --mode open --rate 1 --requests "$ITERATIONS"
+      --duration "$ITERATIONS" --slo-p99-ms "$SLO_MS" --output "$OUT")
+[ -f "$BASELINE" ] && ARGS+=(--baseline "$BASELINE")
+
+python3 "$SCRIPT_DIR/loadgen.py" "${ARGS[@]}" > /dev/null
+STATUS=$?
+if [ ! -f "$OUT" ]; then
+  echo "[$(date)] ERROR: loadgen.py failed (exit $STATUS)" | tee -a "$LOG"
+  exit 2
 fi
 
-echo "[$(date)] Measuring response time for $URL ($ITERATIONS requests)" | tee -a "$LOG"
+python3 - "$OUT" <<'PY' | tee -a "$LOG"
+import json, sys
+r = json.load(open(sys.argv[1]))
+l = r["latency"]
+print(f"  requests={r['requests']} errors={r['error_rate']:.2%} p50={l['p50_ms']}ms "
+      f"p90={l['p90_ms']}ms p99={l['p99_ms']}ms max={l['max_ms']}ms")
+if r.get("slo_breached"):
+    print(f"  ⚠️ ALERT: Response time too high (p99 {l['p99_ms']}ms > SLO {r['config']['slo_p99_ms']}ms)")
+for name in r.get("comparison", {}).get("regressions", []):
+    m = r["comparison"]["metrics"][name]
+    print(f"  ⚠️ REGRESSION {name}: {m['baseline']} -> {m['current']} ({m['change_pct']:+}%)")
+PY
 
-for i in $(seq 1 "$ITERATIONS"); do
-  TIME=$(curl -o /dev/null -s -w "%{time_total}\n" "$URL")
-  echo "[$(date)] Request #$i -> ${TIME}s" | tee -a "$LOG"
-  if (( $(echo "$TIME > 2.0" | bc -l) )); then
-    echo "[$(date)] ⚠️ ALERT: Response time too high (${TIME}s)" | tee -a "$LOG"
-  fi
-  sleep 1
-done
+if [ ! -f "$BASELINE" ]; then
+  cp "$OUT" "$BASELINE"
+  echo "[$(date)] Saved as baseline: $BASELINE" | tee -a "$LOG"
+fi
 
-echo "[$(date)] Latency test completed." | tee -a "$LOG"
\ No newline at end of file
+echo "[$(date)] Latency test completed (results: $OUT)." | tee -a "$LOG"
+exit $STATUS
@@ -2,26 +2,50 @@
 # ----------------------------
 # Website Load Test (HTTP GET)
 # ----------------------------
+# Closed-loop load via loadgen.py; results are kept as JSON under
+# logs/loadgen/ and compared with the stored baseline to flag regressions.
 
 # Resolve paths relative to this script
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 BASE_DIR="$(cd "$SCRIPT_DIR/.." && pwd)"
 LOG_DIR="$BASE_DIR/logs"
-mkdir -p "$LOG_DIR"
+RESULT_DIR="$LOG_DIR/loadgen"
+mkdir -p "$RESULT_DIR"
 
 URL="${1:-http://localhost}"
 CONNECTIONS=${2:-50}
 DURATION=${3:-30}
 LOG="$LOG_DIR/self_heal.log"
+OUT="$RESULT_DIR/load-$(date +%Y%m%d-%H%M%S).json"
+BASELINE="$RESULT_DIR/load-baseline.json"
 
 echo "[$(date)] Starting web load test on $URL for ${DURATION}s with ${CONNECTIONS} concurrent connections" | tee -a "$LOG"
 
-# Install ApacheBench if needed
-if ! command -v ab >/dev/null 2>&1; then
-  echo "[*] Installing apache bench tool..." | tee -a "$LOG"
-  sudo apt-get update -y && sudo apt-get install -y apache2-utils || sudo dnf install -y httpd-tools
+ARGS=(run --target custom --path / --url "$URL" --mode closed --concurrency "$CONNECTIONS" --duration "$DURATION" --output "$OUT")
+[ -f "$BASELINE" ] && ARGS+=(--baseline "$BASELINE")
+
+python3 "$SCRIPT_DIR/loadgen.py" "${ARGS[@]}" > /dev/null
+STATUS=$?
+if [ ! -f "$OUT" ]; then
+  echo "[$(date)] ERROR: loadgen.py failed (exit $STATUS)" | tee -a "$LOG"
+  exit 2
 fi
 
-ab -n $((CONNECTIONS * DURATION)) -c "$CONNECTIONS" "$URL"/ >> "$LOG" 2>&1
+python3 - "$OUT" <<'PY' | tee -a "$LOG"
+import json, sys
+r = json.load(open(sys.argv[1]))
+l = r["latency"]
+print(f"  requests={r['requests']} rps={r['throughput_rps']} errors={r['error_rate']:.2%} "
+      f"p50={l['p50_ms']}ms p99={l['p99_ms']}ms max={l['max_ms']}ms")
+for name in r.get("comparison", {}).get("regressions", []):
+    m = r["comparison"]["metrics"][name]
+    print(f"  ⚠️ REGRESSION {name}: {m['baseline']} -> {m['current']} ({m['change_pct']:+}%)")
+PY
+
+if [ ! -f "$BASELINE" ]; then
+  cp "$OUT" "$BASELINE"
+  echo "[$(date)] Saved as baseline: $BASELINE" | tee -a "$LOG"
+fi
 
-echo "[$(date)] Web load test completed." | tee -a "$LOG"
\ No newline at end of file
+echo "[$(date)] Web load test completed (results: $OUT)." | tee -a "$LOG"
+exit $STATUS
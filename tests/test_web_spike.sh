@@ -2,26 +2,55 @@
 # ---------------------------------
 # Website Spike Test (sudden burst)
 # ---------------------------------
+# Open-loop spike via loadgen.py: a steady trickle with a one-second burst
+# of SPIKE_SIZE requests in the middle. Latency is measured from each
+# request's scheduled time, so queueing during the burst shows up in p99.
 
 # Resolve paths relative to this script
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 BASE_DIR="$(cd "$SCRIPT_DIR/.." && pwd)"
 LOG_DIR="$BASE_DIR/logs"
-mkdir -p "$LOG_DIR"
+RESULT_DIR="$LOG_DIR/loadgen"
+mkdir -p "$RESULT_DIR"
 
 URL="${1:-http://localhost}"
 SPIKE_SIZE=${2:-500}
+BASE_RATE=${3:-10}
 LOG="$LOG_DIR/self_heal.log"
+OUT="$RESULT_DIR/spike-$(date +%Y%m%d-%H%M%S).json"
+BASELINE="$RESULT_DIR/spike-baseline.json"
 
-echo "[$(date)] Starting SPIKE test: $SPIKE_SIZE requests at once to $URL" | tee -a "$LOG"
+echo "[$(date)] Starting SPIKE test: $SPIKE_SIZE requests in 1s (base ${BASE_RATE}/s) to $URL" | tee -a "$LOG"
 
-if ! command -v curl >/dev/null 2>&1; then
-  sudo apt-get update -y && sudo apt-get install -y curl || sudo dnf install -y curl
+# 10s run, burst at 5s lasting 10% of the run
+ARGS=(run --target custom --path / --url "$URL" --mode open --profile spike --rate "$BASE_RATE"
+      --spike-rate "$SPIKE_SIZE" --duration 10 --spike-at 0.5 --spike-length 0.1 --output "$OUT")
+[ -f "$BASELINE" ] && ARGS+=(--baseline "$BASELINE")
+
+python3 "$SCRIPT_DIR/loadgen.py" "${ARGS[@]}" > /dev/null
+STATUS=$?
+if [ ! -f "$OUT" ]; then
+  echo "[$(date)] ERROR: loadgen.py failed (exit $STATUS)" | tee -a "$LOG"
+  exit 2
 fi
 
-for i in $(seq 1 "$SPIKE_SIZE"); do
-  curl -s -o /dev/null -w "%{http_code}\n" "$URL" &
-done
+python3 - "$OUT" <<'PY' | tee -a "$LOG"
+import json, sys
+r = json.load(open(sys.argv[1]))
+l = r["latency"]
+print(f"  requests={r['requests']} errors={r['error_rate']:.2%} p50={l['p50_ms']}ms "
+      f"p99={l['p99_ms']}ms max={l['max_ms']}ms max_in_flight={r['max_in_flight']}")
+for t in r["timeline"]:
+    print(f"  t+{t['second']}s requests={t['requests']} errors={t['errors']} p99={t['p99_ms']}ms")
+for name in r.get("comparison", {}).get("regressions", []):
+    m = r["comparison"]["metrics"][name]
+    print(f"  ⚠️ REGRESSION {name}: {m['baseline']} -> {m['current']} ({m['change_pct']:+}%)")
+PY
+
+if [ ! -f "$BASELINE" ]; then
+  cp "$OUT" "$BASELINE"
+  echo "[$(date)] Saved as baseline: $BASELINE" | tee -a "$LOG"
+fi
 
-wait
-echo "[$(date)] Spike test completed (sent $SPIKE_SIZE requests)." | tee -a "$LOG"
\ No newline at end of file
+echo "[$(date)] Spike test completed (results: $OUT)." | tee -a "$LOG"
+exit $STATUS
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Time-to-heal benchmark
+
+Measures how long the self-healing loop takes end to end, stage by stage.
+For each scenario it:
+  1. samples the metric at idle and sets the threshold at baseline + margin
+  2. starts a stressor in its own process group (onset): CPU spinners on
+     every core, a memory balloon, or a disk filler in a temp dir
+  3. samples like Prometheus does. The first sample over the threshold is
+     the breach. After --for seconds over it, the alert fires
+  4. posts the alert to /webhook like Alertmanager (after --group-wait) and
+     records the acknowledgement
+  5. lets the receiver run its healing script. The stand-in script records
+     action start/end and stops only the harness's own stressor
+  6. samples until the metric is back under the threshold (recovery), then
+     sends the resolved alert
+
+The receiver is the real webhook_receiver.py, run in the same sandbox as the
+alert storm benchmark (alert_storm.py). Alerts go out as warnings, because
+critical ones wait for a person on the dashboard. Each stage is reported
+per run and as a median per scenario. --baseline flags the stages that got
+slower.
+
+Usage:
+    python3 time_to_heal.py --scenarios cpu,memory,disk --runs 3 --output tth.json
+    python3 time_to_heal.py --runs 5 --baseline tth.json --threshold 20
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from alert_storm import FIRING_ENDS_AT, alert_catalog, sandboxed_receiver
+
+# (name, from event, to event), in timeline order
+STAGES = (
+    ('detect', 'onset', 'breach'),
+    ('pending', 'breach', 'firing'),
+    ('deliver', 'firing', 'sent'),
+    ('dispatch', 'sent', 'action_start'),
+    ('action', 'action_start', 'action_end'),
+    ('recover', 'action_end', 'recovered'),
+    ('time_to_heal', 'onset', 'recovered'),
+)
+
+# The stand-in for every handle_*.sh: timestamps, then stop only our stressor
+STAND_IN_HEALER = """#!/bin/bash
+# Stand-in written by time_to_heal.py: stops the harness's stressor, nothing else
+echo "action_start $(date +%s.%N)" >> "$TTH_EVENTS"
+if [ -s "$TTH_PIDFILE" ]; then
+    kill -TERM -- "-$(cat "$TTH_PIDFILE")" 2>/dev/null
+fi
+if [ -n "$TTH_FILL_DIR" ] && [ -d "$TTH_FILL_DIR" ]; then
+    find "$TTH_FILL_DIR" -type f -delete
+fi
+echo "action_end $(date +%s.%N)" >> "$TTH_EVENTS"
+"""
+
+SPINNER = 'while True:\n    pass\n'
+BALLOON = """import sys, time
+block = b'\\x01' * (int(sys.argv[1]) << 20)  # touches every page
+time.sleep(3600)
+"""
+FILLER = """import os, sys, time
+chunk = os.urandom(1 << 20)
+with open(os.path.join(sys.argv[2], 'fill.bin'), 'wb') as f:
+    for _ in range(int(sys.argv[1])):
+        f.write(chunk)
+    f.flush()
+    os.fsync(f.fileno())
+time.sleep(3600)
+"""
+
+
+# ============================================================
+# Metrics (what node-exporter would report)
+# ============================================================
+
+class CPUBusy:
+    """Host CPU busy % between consecutive reads of /proc/stat"""
+
+    def __init__(self):
+        self.last = self._read()
+
+    @staticmethod
+    def _read():
+        with open('/proc/stat') as f:
+            fields = [int(v) for v in f.readline().split()[1:]]
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+        return sum(fields), idle
+
+    def __call__(self) -> float:
+        total, idle = self._read()
+        last_total, last_idle = self.last
+        self.last = (total, idle)
+        if total == last_total:
+            return 0.0
+        return 100.0 * (1 - (idle - last_idle) / (total - last_total))
+
+
+def memory_used_mb() -> float:
+    info = {}
+    with open('/proc/meminfo') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            info[name] = int(value.split()[0])
+    return (info['MemTotal'] - info['MemAvailable']) / 1024
+
+
+def disk_used_mb(path: Path) -> float:
+    return shutil.disk_usage(path).used / (1 << 20)
+
+
+# ============================================================
+# Scenarios
+# ============================================================
+
+class Scenario:
+    __slots__ = ('name', 'alertname', 'unit', 'margin', 'measure', 'command')
+
+    def __init__(self, name: str, alertname: str, unit: str, margin: float,
+                 measure: Callable[[], float], command: List[str]):
+        self.name = name
+        self.alertname = alertname
+        self.unit = unit
+        self.margin = margin
+        self.measure = measure
+        self.command = command
+
+
+def build_scenarios(args, fill_dir: Path) -> Dict[str, Scenario]:
+    cores = os.cpu_count() or 1
+    spin = ' '.join(['"$0" -c "$1" &'] * cores) + ' wait'
+    return {
+        'cpu': Scenario('cpu', 'HighCPUUsage', '%', args.cpu_margin, CPUBusy(),
+                        ['bash', '-c', spin, sys.executable, SPINNER]),
+        'memory': Scenario('memory', 'HighMemoryUsage', 'MB', args.balloon_mb / 2, memory_used_mb,
+                           [sys.executable, '-c', BALLOON, str(args.balloon_mb)]),
+        'disk': Scenario('disk', 'HighDiskUsage', 'MB', args.fill_mb / 2, lambda: disk_used_mb(fill_dir),
+                         [sys.executable, '-c', FILLER, str(args.fill_mb), str(fill_dir)]),
+    }
+
+
+def _alert_payload(alertname: str, status: str, value: float, started: datetime) -> bytes:
+    kind = next(k for k in alert_catalog() if k.name == alertname)
+    labels = {'alertname': alertname, 'severity': 'warning', 'component': kind.component,
+              'action': kind.action, 'instance': 'time-to-heal', 'job': 'ec2-node-exporter'}
+    now = datetime.now(timezone.utc)
+    alert = {
+        'status': status,
+        'labels': labels,
+        'annotations': {'summary': f'{alertname} (time-to-heal harness)', 'description': f'value {value:.1f}'},
+        'startsAt': started.isoformat(),
+        'endsAt': now.isoformat() if status == 'resolved' else FIRING_ENDS_AT,
+    }
+    payload = {'version': '4', 'status': status, 'receiver': 'webhook-receiver', 'alerts': [alert],
+               'groupLabels': {'alertname': alertname}, 'commonLabels': labels, 'truncatedAlerts': 0}
+    return json.dumps(payload).encode()
+
+
+def _post(url: str, body: bytes, timeout: float) -> int:
+    request = urllib.request.Request(url + '/webhook', data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+        return response.status
+
+
+def _read_events(path: Path, since: float) -> Dict[str, float]:
+    events = {}
+    if path.exists():
+        for line in path.read_text().splitlines():
+            name, _, stamp = line.partition(' ')
+            if stamp and float(stamp) >= since:
+                events.setdefault(name, float(stamp))
+    return events
+
+
+def run_scenario(scenario: Scenario, url: str, args, events_file: Path, pidfile: Path) -> Dict:
+    # Idle baseline: median of a few samples
+    samples = []
+    for _ in range(args.baseline_samples):
+        time.sleep(args.interval)
+        samples.append(scenario.measure())
+    baseline = statistics.median(samples)
+    threshold = baseline + scenario.margin
+
+    stamps: Dict[str, float] = {}
+    delivery: Dict = {}
+    started_at = datetime.now(timezone.utc)
+    stamps['onset'] = time.time()
+    process = subprocess.Popen(scenario.command, start_new_session=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    pidfile.write_text(str(process.pid))
+
+    def deliver(value: float):
+        time.sleep(args.group_wait)
+        delivery['sent'] = time.time()
+        try:
+            delivery['status'] = _post(url, _alert_payload(scenario.alertname, 'firing', value, started_at),
+                                       args.timeout)
+        except OSError as e:
+            delivery['error'] = str(e)
+        delivery['acked'] = time.time()
+
+    sender = None
+    peak = baseline
+    deadline = stamps['onset'] + args.timeout
+    try:
+        while time.time() < deadline:
+            time.sleep(args.interval)
+            value = scenario.measure()
+            now = time.time()
+            peak = max(peak, value)
+            if value > threshold:
+                stamps.setdefault('breach', now)
+                if 'firing' not in stamps and now - stamps['breach'] >= args.for_seconds:
+                    stamps['firing'] = now
+                    sender = threading.Thread(target=deliver, args=(value,), daemon=True)
+                    sender.start()
+            elif 'firing' in stamps:
+                stamps['recovered'] = now
+                break
+            elif 'breach' in stamps:
+                del stamps['breach']  # dipped before "for" elapsed, as Prometheus would reset
+    finally:
+        pidfile.write_text('')
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+
+    if sender is not None:
+        sender.join(args.timeout)
+        if 'recovered' in stamps:
+            _post(url, _alert_payload(scenario.alertname, 'resolved', value, started_at), args.timeout)
+    stamps.update({k: v for k, v in delivery.items() if k in ('sent', 'acked')})
+    stamps.update(_read_events(events_file, stamps['onset']))
+
+    onset = stamps['onset']
+    stages = {name: round((stamps[end] - stamps[start]) * 1000, 1)
+              for name, start, end in STAGES if start in stamps and end in stamps}
+    return {
+        'healed': 'recovered' in stamps,
+        'baseline': round(baseline, 1),
+        'threshold': round(threshold, 1),
+        'peak': round(peak, 1),
+        'unit': scenario.unit,
+        'webhook_status': delivery.get('status'),
+        'webhook_error': delivery.get('error'),
+        'events_s': {name: round(stamp - onset, 3) for name, stamp in sorted(stamps.items(), key=lambda i: i[1])},
+        'stages_ms': stages,
+    }
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    summary = {'runs': len(runs), 'healed': sum(r['healed'] for r in runs), 'stages_ms': {}}
+    for name, _, _ in STAGES:
+        values = [r['stages_ms'][name] for r in runs if name in r['stages_ms']]
+        if values:
+            summary['stages_ms'][name] = {
+                'median': round(statistics.median(values), 1),
+                'min': min(values),
+                'max': max(values),
+            }
+    return summary
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 20.0, noise_ms: float = 100.0) -> Dict:
+    """Stages whose median grew more than threshold % (and noise_ms) per scenario"""
+    report = {'threshold_pct': threshold, 'regressions': [], 'stages': {}}
+    for scenario, summary in current['scenarios'].items():
+        old_stages = baseline.get('scenarios', {}).get(scenario, {}).get('stages_ms', {})
+        for stage, stats in summary['stages_ms'].items():
+            if stage not in old_stages:
+                continue
+            old, new = old_stages[stage]['median'], stats['median']
+            change = ((new - old) / old * 100) if old else 0.0
+            report['stages'][f'{scenario}.{stage}'] = {'baseline': old, 'current': new, 'change_pct': round(change, 1)}
+            if change > threshold and new - old > noise_ms:
+                report['regressions'].append(f'{scenario}.{stage}')
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='End-to-end time-to-heal benchmark')
+    parser.add_argument('--scenarios', default='cpu,memory,disk')
+    parser.add_argument('--runs', type=int, default=1)
+    parser.add_argument('--interval', type=float, default=0.5, help='sampling (scrape) interval, seconds')
+    parser.add_argument('--for', dest='for_seconds', type=float, default=2.0,
+                        help='seconds over the threshold before the alert fires')
+    parser.add_argument('--group-wait', type=float, default=0.0, help='Alertmanager group_wait, seconds')
+    parser.add_argument('--timeout', type=float, default=60.0, help='per run')
+    parser.add_argument('--baseline-samples', type=int, default=4)
+    parser.add_argument('--cpu-margin', type=float, default=40.0, help='busy %% over idle that counts as high')
+    parser.add_argument('--balloon-mb', type=int, default=256)
+    parser.add_argument('--fill-mb', type=int, default=256)
+    parser.add_argument('--fill-dir', help='where the disk filler writes (default: a temp dir)')
+    parser.add_argument('--output', help='write the result JSON here')
+    parser.add_argument('--baseline', help='compare against this earlier result')
+    parser.add_argument('--threshold', type=float, default=20.0, help='regression threshold in %%')
+    args = parser.parse_args(argv)
+
+    work = Path(tempfile.mkdtemp(prefix='time-to-heal-'))
+    fill_dir = Path(args.fill_dir) if args.fill_dir else work / 'fill'
+    fill_dir.mkdir(parents=True, exist_ok=True)
+    events_file = work / 'events.log'
+    pidfile = work / 'stressor.pid'
+    scenarios = build_scenarios(args, fill_dir)
+    names = [n.strip() for n in args.scenarios.split(',') if n.strip()]
+    unknown = set(names) - set(scenarios)
+    if unknown:
+        parser.error(f'unknown scenario(s): {", ".join(sorted(unknown))}')
+    if 'disk' in names and shutil.disk_usage(fill_dir).free < args.fill_mb * 2 << 20:
+        parser.error(f'not enough free space in {fill_dir} for --fill-mb {args.fill_mb}')
+
+    stand_ins = {f'{action}.sh': STAND_IN_HEALER
+                 for action in ('handle_high_cpu', 'handle_high_memory', 'handle_disk_alert')}
+    env = {'TTH_EVENTS': str(events_file), 'TTH_PIDFILE': str(pidfile), 'TTH_FILL_DIR': str(fill_dir)}
+    result = {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')},
+        'scenarios': {},
+        'runs': {},
+    }
+    try:
+        with sandboxed_receiver(stand_ins=stand_ins, extra_env=env) as url:
+            for name in names:
+                runs = [run_scenario(scenarios[name], url, args, events_file, pidfile) for _ in range(args.runs)]
+                result['runs'][name] = runs
+                result['scenarios'][name] = summarize(runs)
+                print(f"{name}: healed {result['scenarios'][name]['healed']}/{len(runs)}, "
+                      f"time to heal {result['scenarios'][name]['stages_ms'].get('time_to_heal')}",
+                      file=sys.stderr)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    failed = any(s['healed'] < s['runs'] for s in result['scenarios'].values())
+    if args.baseline:
+        with open(args.baseline) as f:
+            result['comparison'] = compare(json.load(f), result, args.threshold)
+        failed = failed or bool(result['comparison']['regressions'])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    print(json.dumps({k: v for k, v in result.items() if k != 'runs'}, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())